@@ -0,0 +1,29 @@
+"""add collection data version updated at
+
+Revision ID: 2e9d5c4b7f10
+Revises: 8c4b2f7e1a36
+Create Date: 2025-10-09 14:18:52.906113
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "2e9d5c4b7f10"
+down_revision: Union[str, Sequence[str], None] = "8c4b2f7e1a36"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("collections", sa.Column("data_version_updated_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("collections", "data_version_updated_at")
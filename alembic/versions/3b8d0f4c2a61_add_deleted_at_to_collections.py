@@ -0,0 +1,29 @@
+"""add deleted_at to collections
+
+Revision ID: 3b8d0f4c2a61
+Revises: e4255c1640a7
+Create Date: 2025-09-24 10:12:41.508213
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3b8d0f4c2a61"
+down_revision: Union[str, Sequence[str], None] = "e4255c1640a7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("collections", sa.Column("deleted_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("collections", "deleted_at")
@@ -0,0 +1,57 @@
+"""add chart_rollups
+
+Revision ID: 4e8a2d6c1f05
+Revises: 9c1f27e4b6a3
+Create Date: 2025-10-01 16:42:08.519374
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4e8a2d6c1f05"
+down_revision: Union[str, Sequence[str], None] = "9c1f27e4b6a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "chart_rollups",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("collection_id", sa.String(length=36), nullable=False),
+        sa.Column("spec_hash", sa.String(length=64), nullable=False),
+        sa.Column("spec", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("last_used_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["collection_id"], ["collections.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("collection_id", "spec_hash", name="uq_chart_rollups_spec"),
+    )
+    op.create_index(
+        op.f("ix_chart_rollups_collection_id"), "chart_rollups", ["collection_id"], unique=False
+    )
+    op.create_table(
+        "chart_rollup_bins",
+        sa.Column("rollup_id", sa.String(length=36), nullable=False),
+        sa.Column("bin_values", postgresql.ARRAY(sa.Text()), nullable=False),
+        sa.Column("row_count", sa.BigInteger(), nullable=False),
+        sa.Column("measure_count", sa.BigInteger(), nullable=False),
+        sa.Column("measure_sum", sa.Numeric(), nullable=False),
+        sa.Column("measure_sum_sq", sa.Numeric(), nullable=False),
+        sa.ForeignKeyConstraint(["rollup_id"], ["chart_rollups.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("rollup_id", "bin_values"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("chart_rollup_bins")
+    op.drop_index(op.f("ix_chart_rollups_collection_id"), table_name="chart_rollups")
+    op.drop_table("chart_rollups")
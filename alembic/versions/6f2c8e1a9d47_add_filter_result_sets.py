@@ -0,0 +1,57 @@
+"""add filter_result_sets
+
+Revision ID: 6f2c8e1a9d47
+Revises: d3a6f0b2c871
+Create Date: 2025-10-08 15:02:51.337804
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "6f2c8e1a9d47"
+down_revision: Union[str, Sequence[str], None] = "d3a6f0b2c871"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "filter_result_sets",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("collection_id", sa.String(length=36), nullable=False),
+        sa.Column("filter_hash", sa.String(length=64), nullable=False),
+        sa.Column("data_version", sa.BigInteger(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("last_used_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["collection_id"], ["collections.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "collection_id", "filter_hash", "data_version", name="uq_filter_result_sets_key"
+        ),
+    )
+    op.create_index(
+        op.f("ix_filter_result_sets_collection_id"),
+        "filter_result_sets",
+        ["collection_id"],
+        unique=False,
+    )
+    op.create_table(
+        "filter_result_set_runs",
+        sa.Column("result_set_id", sa.String(length=36), nullable=False),
+        sa.Column("agent_run_id", sa.String(length=36), nullable=False),
+        sa.ForeignKeyConstraint(["result_set_id"], ["filter_result_sets.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("result_set_id", "agent_run_id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("filter_result_set_runs")
+    op.drop_index(op.f("ix_filter_result_sets_collection_id"), table_name="filter_result_sets")
+    op.drop_table("filter_result_sets")
@@ -0,0 +1,109 @@
+"""add metadata_key_stats
+
+Revision ID: 7a3e9c51d2b8
+Revises: 3b8d0f4c2a61
+Create Date: 2025-09-26 14:03:17.240561
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7a3e9c51d2b8"
+down_revision: Union[str, Sequence[str], None] = "3b8d0f4c2a61"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SKETCH_SIZE = 256
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "metadata_key_stats",
+        sa.Column("collection_id", sa.String(length=36), nullable=False),
+        sa.Column("path", sa.Text(), nullable=False),
+        sa.Column("depth", sa.Integer(), nullable=False),
+        sa.Column("run_count", sa.BigInteger(), nullable=False),
+        sa.Column("null_count", sa.BigInteger(), nullable=False),
+        sa.Column("string_count", sa.BigInteger(), nullable=False),
+        sa.Column("number_count", sa.BigInteger(), nullable=False),
+        sa.Column("integer_count", sa.BigInteger(), nullable=False),
+        sa.Column("boolean_count", sa.BigInteger(), nullable=False),
+        sa.Column("object_count", sa.BigInteger(), nullable=False),
+        sa.Column("array_count", sa.BigInteger(), nullable=False),
+        sa.Column("value_hashes", postgresql.ARRAY(sa.BigInteger()), nullable=False),
+        sa.ForeignKeyConstraint(["collection_id"], ["collections.id"]),
+        sa.PrimaryKeyConstraint("collection_id", "path"),
+    )
+
+    # Build the catalog for existing agent runs
+    op.execute(
+        sa.text(
+            """
+            WITH RECURSIVE json_paths AS (
+                SELECT collection_id, ''::text AS path, 0 AS depth, metadata_json AS value
+                FROM agent_runs
+
+                UNION ALL
+
+                SELECT
+                    jp.collection_id,
+                    CASE WHEN jp.depth = 0 THEN nested.key ELSE jp.path || '.' || nested.key END,
+                    jp.depth + 1,
+                    nested.value
+                FROM json_paths jp
+                CROSS JOIN LATERAL jsonb_each(jp.value) AS nested(key, value)
+                WHERE jsonb_typeof(jp.value) = 'object'
+            ),
+            typed_paths AS (
+                SELECT
+                    collection_id,
+                    path,
+                    depth,
+                    jsonb_typeof(value) AS value_type,
+                    CASE
+                        WHEN jsonb_typeof(value) = 'number' THEN value::numeric % 1 = 0
+                    END AS is_integer,
+                    CASE
+                        WHEN jsonb_typeof(value) IN ('string', 'number', 'boolean')
+                        THEN ('x' || substr(md5(value::text), 1, 16))::bit(64)::bigint
+                    END AS value_hash
+                FROM json_paths
+            )
+            INSERT INTO metadata_key_stats (
+                collection_id, path, depth, run_count, null_count, string_count, number_count,
+                integer_count, boolean_count, object_count, array_count, value_hashes
+            )
+            SELECT
+                collection_id,
+                path,
+                min(depth),
+                count(*),
+                count(*) FILTER (WHERE value_type = 'null'),
+                count(*) FILTER (WHERE value_type = 'string'),
+                count(*) FILTER (WHERE value_type = 'number'),
+                count(*) FILTER (WHERE is_integer),
+                count(*) FILTER (WHERE value_type = 'boolean'),
+                count(*) FILTER (WHERE value_type = 'object'),
+                count(*) FILTER (WHERE value_type = 'array'),
+                coalesce(
+                    (array_agg(DISTINCT value_hash ORDER BY value_hash)
+                        FILTER (WHERE value_hash IS NOT NULL))[1:CAST(:sketch_size AS int)],
+                    '{}'
+                )
+            FROM typed_paths
+            GROUP BY collection_id, path
+            """
+        ).bindparams(sketch_size=SKETCH_SIZE)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("metadata_key_stats")
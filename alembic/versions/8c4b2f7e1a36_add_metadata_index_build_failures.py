@@ -0,0 +1,36 @@
+"""add metadata index build failures
+
+Revision ID: 8c4b2f7e1a36
+Revises: 6f2c8e1a9d47
+Create Date: 2025-10-09 10:41:17.204518
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8c4b2f7e1a36"
+down_revision: Union[str, Sequence[str], None] = "6f2c8e1a9d47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "metadata_path_indexes",
+        sa.Column("build_failures", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "metadata_path_indexes", sa.Column("build_failed_at", sa.DateTime(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("metadata_path_indexes", "build_failed_at")
+    op.drop_column("metadata_path_indexes", "build_failures")
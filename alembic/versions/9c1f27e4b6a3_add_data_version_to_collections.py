@@ -0,0 +1,32 @@
+"""add data_version to collections
+
+Revision ID: 9c1f27e4b6a3
+Revises: 7a3e9c51d2b8
+Create Date: 2025-09-29 11:21:54.873120
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9c1f27e4b6a3"
+down_revision: Union[str, Sequence[str], None] = "7a3e9c51d2b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "collections",
+        sa.Column("data_version", sa.BigInteger(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("collections", "data_version")
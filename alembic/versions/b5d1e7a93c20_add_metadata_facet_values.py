@@ -0,0 +1,93 @@
+"""add metadata_facet_values
+
+Revision ID: b5d1e7a93c20
+Revises: 4e8a2d6c1f05
+Create Date: 2025-10-03 10:17:45.902318
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b5d1e7a93c20"
+down_revision: Union[str, Sequence[str], None] = "4e8a2d6c1f05"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MAX_FACET_VALUE_LENGTH = 256
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.create_table(
+        "metadata_facet_values",
+        sa.Column("collection_id", sa.String(length=36), nullable=False),
+        sa.Column("path", sa.Text(), nullable=False),
+        sa.Column("value", sa.Text(), nullable=False),
+        sa.Column("run_count", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(["collection_id"], ["collections.id"]),
+        sa.PrimaryKeyConstraint("collection_id", "path", "value"),
+    )
+
+    # Build the index for existing agent runs
+    op.execute(
+        sa.text(
+            """
+            WITH RECURSIVE json_paths AS (
+                SELECT collection_id, ''::text AS path, 0 AS depth, metadata_json AS json_value
+                FROM agent_runs
+
+                UNION ALL
+
+                SELECT
+                    jp.collection_id,
+                    CASE WHEN jp.depth = 0 THEN nested.key ELSE jp.path || '.' || nested.key END,
+                    jp.depth + 1,
+                    nested.value
+                FROM json_paths jp
+                CROSS JOIN LATERAL jsonb_each(jp.json_value) AS nested(key, value)
+                WHERE jsonb_typeof(jp.json_value) = 'object'
+            )
+            INSERT INTO metadata_facet_values (collection_id, path, value, run_count)
+            SELECT collection_id, path, json_value #>> '{}', count(*)
+            FROM json_paths
+            WHERE jsonb_typeof(json_value) IN ('string', 'number', 'boolean')
+            AND length(json_value #>> '{}') <= CAST(:max_value_length AS int)
+            GROUP BY collection_id, path, json_value #>> '{}'
+            """
+        ).bindparams(max_value_length=MAX_FACET_VALUE_LENGTH)
+    )
+
+    # Create the indexes after the backfill, which is faster than maintaining them during it
+    op.create_index(
+        "idx_metadata_facet_values_prefix",
+        "metadata_facet_values",
+        ["collection_id", "path", sa.text('lower(value) COLLATE "C"')],
+        unique=False,
+    )
+    op.create_index(
+        "idx_metadata_facet_values_trgm",
+        "metadata_facet_values",
+        ["value"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"value": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "idx_metadata_facet_values_trgm",
+        table_name="metadata_facet_values",
+        postgresql_using="gin",
+        postgresql_ops={"value": "gin_trgm_ops"},
+    )
+    op.drop_index("idx_metadata_facet_values_prefix", table_name="metadata_facet_values")
+    op.drop_table("metadata_facet_values")
@@ -0,0 +1,48 @@
+"""add metadata_path_indexes
+
+Revision ID: d3a6f0b2c871
+Revises: b5d1e7a93c20
+Create Date: 2025-10-06 11:24:39.618205
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d3a6f0b2c871"
+down_revision: Union[str, Sequence[str], None] = "b5d1e7a93c20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "metadata_path_indexes",
+        sa.Column("collection_id", sa.String(length=36), nullable=False),
+        sa.Column("path", sa.Text(), nullable=False),
+        sa.Column("value_type", sa.String(length=16), nullable=False),
+        sa.Column("usage_score", sa.Float(), nullable=False),
+        sa.Column("usage_updated_at", sa.DateTime(), nullable=False),
+        sa.Column("last_used_at", sa.DateTime(), nullable=False),
+        sa.Column("index_name", sa.String(length=63), nullable=True),
+        sa.Column("index_built_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["collection_id"], ["collections.id"]),
+        sa.PrimaryKeyConstraint("collection_id", "path", "value_type"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Drop the indexes built on agent_runs, which are only tracked in this table
+    result = op.get_bind().execute(
+        sa.text("SELECT index_name FROM metadata_path_indexes WHERE index_name IS NOT NULL")
+    )
+    for index_name in result.scalars().all():
+        op.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+    op.drop_table("metadata_path_indexes")
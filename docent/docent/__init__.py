@@ -1,4 +1,5 @@
-__all__ = ["Docent", "init"]
+__all__ = ["AsyncDocent", "Docent", "init"]
 
 from docent.sdk.agent_run_writer import init
+from docent.sdk.async_client import AsyncDocent
 from docent.sdk.client import Docent
@@ -1,8 +1,9 @@
 import json
 from pathlib import Path
-from typing import Any, BinaryIO, Generator, Tuple
+from typing import Any, BinaryIO, Generator, Iterator, Tuple
 from zipfile import ZipFile
 
+import ijson
 from inspect_ai.log import EvalLog
 from inspect_ai.scorer import CORRECT, INCORRECT, NOANSWER, PARTIAL, Score
 
@@ -143,26 +144,102 @@ def _run_metadata_from_header(header: dict[str, Any]) -> dict[str, Any]:
     return m
 
 
+JSONEvent = tuple[str, str, Any]
+
+
+def _build_json_value(events: Iterator[JSONEvent]) -> Any:
+    """Build the next complete value from an `ijson.parse` event stream."""
+    builder = ijson.ObjectBuilder()
+    depth = 0
+    for _, event, value in events:
+        builder.event(event, value)
+        if event in ("start_map", "start_array"):
+            depth += 1
+        elif event in ("end_map", "end_array"):
+            depth -= 1
+        if depth == 0:
+            return builder.value
+    raise ValueError("Unexpected end of JSON input")
+
+
+def _read_json_log_header(events: Iterator[JSONEvent]) -> tuple[dict[str, Any], list[Any] | None]:
+    """Read the top-level fields of an Inspect .json log up to its `samples` field.
+
+    Inspect writes `samples` after the header fields, so this normally stops with the
+    events positioned at the samples array and returns None for the samples. Otherwise
+    the samples are decoded and returned so the remaining fields can be read, since a
+    stream can't be rewound.
+    """
+    header: dict[str, Any] = {}
+    samples: list[Any] | None = None
+    for prefix, event, key in events:
+        if prefix != "" or event != "map_key":
+            continue
+        if key != "samples":
+            header[key] = _build_json_value(events)
+        elif "eval" in header:
+            return header, None
+        else:
+            samples = _build_json_value(events) or []
+    if samples is None:
+        raise ValueError("Inspect log has no samples field")
+    return header, samples
+
+
 def get_total_samples(file_path: Path, format: str = "json") -> int:
-    """Return the total number of samples in the provided file."""
+    """Return the total number of samples in the provided file.
+
+    For .json logs, samples are counted by scanning the file without decoding them.
+    """
     with open(file_path, "rb") as f:
         if format == "json":
-            data = json.load(f)
-            return len(data.get("samples", []))
+            # Each element of the samples array starts with an event at its own prefix;
+            # map keys and end events of object elements share that prefix too
+            return sum(
+                1
+                for prefix, event, _ in ijson.parse(f)
+                if prefix == "samples.item" and event not in ("map_key", "end_map", "end_array")
+            )
         elif format == "eval":
             z = ZipFile(f, mode="r")
             try:
-                return sum(
-                    1
-                    for name in z.namelist()
-                    if name.startswith("samples/") and name.endswith(".json")
-                )
+                return sum(1 for name in z.namelist() if _is_sample_file(name))
             finally:
                 z.close()
         else:
             raise ValueError(f"Format must be 'json' or 'eval': {format}")
 
 
+def _is_sample_file(name: str) -> bool:
+    return name.startswith("samples/") and name.endswith(".json")
+
+
+def list_eval_samples(file_path: Path) -> list[str]:
+    """Return the names of the sample entries in an .eval archive, in archive order."""
+    with ZipFile(file_path, mode="r") as z:
+        return [name for name in z.namelist() if _is_sample_file(name)]
+
+
+def load_eval_samples_as_json(file_path: Path, sample_names: list[str]) -> list[bytes]:
+    """Parse the given samples of an .eval archive and return each run serialized as JSON.
+
+    This is the CPU-heavy half of ingestion (decompression, JSON decoding, validation and
+    re-encoding), packaged as a picklable top-level function so it can run in a process
+    pool. Returning encoded bytes keeps the payload cheap to send back to the parent.
+    """
+    with ZipFile(file_path, mode="r") as z:
+        try:
+            header_metadata = _run_metadata_from_header(json.loads(z.read("header.json")))
+        except KeyError:
+            header_metadata = {}
+
+        encoded: list[bytes] = []
+        for name in sample_names:
+            run = _read_sample_as_run(json.loads(z.read(name)), header_metadata)
+            encoded.append(run.model_dump_json().encode("utf-8"))
+        return encoded
+
+
 def _runs_from_eval_file(
     file: BinaryIO,
 ) -> Tuple[dict[str, Any], Generator[AgentRun, None, None]]:
@@ -177,7 +254,7 @@ def _runs_from_eval_file(
     def _iter_runs() -> Generator[AgentRun, None, None]:
         try:
             for sample_file in zip.namelist():
-                if not (sample_file.startswith("samples/") and sample_file.endswith(".json")):
+                if not _is_sample_file(sample_file):
                     continue
                 with zip.open(sample_file, "r") as f:
                     data = json.load(f)
@@ -192,11 +269,12 @@ def _runs_from_eval_file(
 def _runs_from_json_file(
     file: BinaryIO,
 ) -> Tuple[dict[str, Any], Generator[AgentRun, None, None]]:
-    data = json.load(file)
-    header_metadata = _run_metadata_from_header(data)
+    events = ijson.parse(file, use_float=True)
+    header, samples = _read_json_log_header(events)
+    header_metadata = _run_metadata_from_header(header)
 
     def _iter_runs() -> Generator[AgentRun, None, None]:
-        for sample in data["samples"]:
+        for sample in ijson.items(events, "samples.item") if samples is None else samples:
             run: AgentRun = _read_sample_as_run(sample, header_metadata)
             yield run
 
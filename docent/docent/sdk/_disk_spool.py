@@ -0,0 +1,100 @@
+import gzip
+import os
+import threading
+import time
+from pathlib import Path
+from uuid import uuid4
+
+from docent._log_util.logger import get_logger
+
+logger = get_logger(__name__)
+
+_SEGMENT_SUFFIX = ".ndjson.gz"
+_TMP_SUFFIX = ".tmp"
+
+
+class DiskSpool:
+    """A directory of gzip-compressed NDJSON segments holding serialized agent runs.
+
+    Each `write` creates one segment, written to a temporary file and renamed into
+    place so a crash never leaves a partial segment behind. Segments are named by
+    creation time, so `segments()` returns them oldest first. The total compressed
+    size is capped at `max_bytes`.
+
+    A spool directory should only be used by one process at a time.
+
+    Args:
+        directory: Directory to store segments in; created if missing.
+        max_bytes: Maximum total size of all segments on disk.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for tmp in self.directory.glob(f"*{_TMP_SUFFIX}"):
+            tmp.unlink(missing_ok=True)
+        self._size_bytes = sum(p.stat().st_size for p in self.segments())
+
+    @property
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._size_bytes
+
+    def segments(self) -> list[Path]:
+        """Return the segments currently on disk, oldest first."""
+        return sorted(self.directory.glob(f"*{_SEGMENT_SUFFIX}"))
+
+    def write(self, runs: list[bytes]) -> bool:
+        """Write serialized runs as a new segment.
+
+        Returns:
+            bool: False (and writes nothing) if the segment would exceed `max_bytes`.
+        """
+        data = gzip.compress(b"\n".join(runs) + b"\n", compresslevel=6)
+        with self._lock:
+            if self._size_bytes + len(data) > self.max_bytes:
+                return False
+            self._size_bytes += len(data)
+
+        name = f"{time.time_ns():020d}-{uuid4().hex}"
+        tmp_path = self.directory / f"{name}{_TMP_SUFFIX}"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.directory / f"{name}{_SEGMENT_SUFFIX}")
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            with self._lock:
+                self._size_bytes -= len(data)
+            raise
+        return True
+
+    def read(self, segment: Path) -> list[bytes]:
+        """Return the serialized runs stored in a segment."""
+        with open(segment, "rb") as f:
+            return [line for line in gzip.decompress(f.read()).split(b"\n") if line]
+
+    def remove(self, segment: Path) -> None:
+        """Delete a segment once its runs have been delivered."""
+        try:
+            size = segment.stat().st_size
+            segment.unlink()
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._size_bytes -= size
+
+    def reject(self, segment: Path) -> None:
+        """Move a segment the server refused into `rejected/` so it isn't replayed again."""
+        rejected_dir = self.directory / "rejected"
+        rejected_dir.mkdir(exist_ok=True)
+        size = segment.stat().st_size
+        os.replace(segment, rejected_dir / segment.name)
+        with self._lock:
+            self._size_bytes -= size
+        logger.error(f"Server rejected spooled agent runs; moved segment to {rejected_dir}")
@@ -0,0 +1,69 @@
+"""Helpers shared by the clients and writers that upload agent runs in batches."""
+
+import gzip
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from docent._log_util.logger import get_logger
+from docent.data_models.agent_run import AgentRun
+from docent.loaders import load_inspect
+
+logger = get_logger(__name__)
+
+# Upload batches are cut at whichever of these limits is reached first
+DEFAULT_MAX_BATCH_BYTES = 8 * 1024 * 1024
+DEFAULT_MAX_BATCH_RUNS = 1000
+DEFAULT_UPLOAD_CONCURRENCY = 4
+# Number of Inspect samples parsed per process-pool task
+DEFAULT_SAMPLES_PER_PARSE_TASK = 100
+
+
+def batch_encoded_runs(
+    encoded_runs: Iterable[bytes], max_batch_bytes: int, max_batch_runs: int
+) -> Iterator[list[bytes]]:
+    """Group serialized agent runs into batches bounded by size and count.
+
+    A single run larger than `max_batch_bytes` is sent in a batch of its own.
+    """
+    batch: list[bytes] = []
+    batch_bytes = 0
+    for encoded in encoded_runs:
+        if batch and (batch_bytes + len(encoded) > max_batch_bytes or len(batch) >= max_batch_runs):
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append(encoded)
+        batch_bytes += len(encoded)
+    if batch:
+        yield batch
+
+
+def iter_agent_run_batches(
+    agent_runs: Iterable[AgentRun], max_batch_bytes: int, max_batch_runs: int
+) -> Iterator[list[bytes]]:
+    """Serialize agent runs and group them into batches bounded by size and count."""
+    encoded_runs = (agent_run.model_dump_json().encode("utf-8") for agent_run in agent_runs)
+    return batch_encoded_runs(encoded_runs, max_batch_bytes, max_batch_runs)
+
+
+def plan_eval_parse_tasks(
+    eval_files: list[Path], samples_per_task: int
+) -> list[tuple[Path, list[str]]]:
+    """Split the samples of each .eval file into chunks that can be parsed independently."""
+    tasks: list[tuple[Path, list[str]]] = []
+    for eval_file in eval_files:
+        sample_names = load_inspect.list_eval_samples(eval_file)
+        if not sample_names:
+            logger.info(f"No samples found in {eval_file}")
+        for i in range(0, len(sample_names), samples_per_task):
+            tasks.append((eval_file, sample_names[i : i + samples_per_task]))
+    return tasks
+
+
+def encode_agent_run_batch(batch: list[bytes], compress: bool) -> tuple[bytes, dict[str, str]]:
+    """Build the request body and headers for a batch of pre-serialized agent runs."""
+    body = b'{"agent_runs":[' + b",".join(batch) + b"]}"
+    headers = {"Content-Type": "application/json"}
+    if compress:
+        body = gzip.compress(body, compresslevel=6)
+        headers["Content-Encoding"] = "gzip"
+    return body, headers
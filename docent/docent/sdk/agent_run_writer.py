@@ -1,9 +1,13 @@
 import atexit
+import dataclasses
+import json
 import os
 import queue
 import signal
 import threading
 import time
+from dataclasses import dataclass
+from pathlib import Path
 from typing import Any, Callable, Coroutine, Optional
 
 import anyio
@@ -13,10 +17,45 @@ from backoff.types import Details
 
 from docent._log_util.logger import get_logger
 from docent.data_models.agent_run import AgentRun
+from docent.sdk._disk_spool import DiskSpool
+from docent.sdk._uploads import (
+    DEFAULT_MAX_BATCH_BYTES,
+    batch_encoded_runs,
+    encode_agent_run_batch,
+)
 from docent.sdk.client import Docent
 
 logger = get_logger(__name__)
 
+# A spooled segment the server keeps failing with a 5xx is set aside after this many
+# replay attempts so it can't block the rest
+_MAX_SEGMENT_REPLAY_FAILURES = 5
+
+
+@dataclass
+class AgentRunWriterMetrics:
+    """Snapshot of an AgentRunWriter's throughput counters."""
+
+    queue_depth: int = 0
+    runs_sent: int = 0
+    batches_sent: int = 0
+    bytes_sent: int = 0
+    runs_failed: int = 0
+    batches_failed: int = 0
+    last_batch_runs: int = 0
+    last_batch_bytes: int = 0
+    last_send_latency_s: float = 0.0
+    max_send_latency_s: float = 0.0
+    total_send_latency_s: float = 0.0
+    runs_spooled: int = 0
+    runs_replayed: int = 0
+    spool_bytes: int = 0
+
+    @property
+    def mean_send_latency_s(self) -> float:
+        n_batches = self.batches_sent + self.batches_failed
+        return self.total_send_latency_s / n_batches if n_batches else 0.0
+
 
 def _giveup(exc: BaseException) -> bool:
     """Give up on timeouts and client errors (4xx except 429). Retry others."""
@@ -50,11 +89,22 @@ class AgentRunWriter:
         queue_maxsize (int): Maximum size of the queue.
             If maxsize is <= 0, the queue size is infinite.
         request_timeout (float): Timeout for the HTTP request.
-        flush_interval (float): Interval to flush the queue.
-        batch_size (int): Number of agent runs to batch together.
+        flush_interval (float): Maximum time a run waits for its batch to fill up
+            before the batch is sent anyway.
+        batch_size (int): Maximum number of agent runs per batch.
+        max_batch_bytes (int): Maximum serialized size of a batch, in bytes.
+            A single run larger than this is sent on its own.
         max_retries (int): Maximum number of retries for the HTTP request.
         shutdown_timeout (int): Timeout to wait for the background thread to finish
             after the main thread has requested shutdown.
+        spool_dir (str | None): If set, runs that don't fit in the queue, batches that
+            fail after all retries, and runs still queued at shutdown are written to a
+            compressed on-disk spool under this directory instead of blocking or being
+            dropped. Spooled runs are replayed in the background, including by the next
+            process started with the same spool_dir and collection.
+        spool_max_bytes (int): Maximum compressed size of the spool. Once full, logging
+            blocks and failed batches are dropped, as without a spool.
+        spool_replay_interval (float): Seconds between attempts to replay the spool.
     """
 
     _instance: Optional["AgentRunWriter"] = None
@@ -70,8 +120,12 @@ class AgentRunWriter:
         request_timeout: float = 30.0,
         flush_interval: float = 1.0,
         batch_size: int = 1_000,
+        max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
         max_retries: int = 5,
         shutdown_timeout: int = 60,
+        spool_dir: str | None = None,
+        spool_max_bytes: int = 1024**3,
+        spool_replay_interval: float = 5.0,
     ) -> None:
         with self._instance_lock:
             if AgentRunWriter._instance is not None:
@@ -82,17 +136,30 @@ class AgentRunWriter:
         self._headers = {"Authorization": f"Bearer {api_key}"}
         self._base_url = server_url.rstrip("/") + "/rest"
         self._endpoint = f"{collection_id}/agent_runs"
+        self._metadata_endpoint = f"{collection_id}/agent_run_metadata"
 
         self._num_workers = num_workers
         self._request_timeout = request_timeout
         self._flush_interval = flush_interval
         self._batch_size = batch_size
+        self._max_batch_bytes = max_batch_bytes
         self._max_retries = max_retries
         self._shutdown_timeout = shutdown_timeout
 
-        self._queue: queue.Queue[AgentRun] = queue.Queue(maxsize=queue_maxsize)
+        # None is put on the queue to wake blocked workers at shutdown
+        self._queue: queue.Queue[AgentRun | None] = queue.Queue(maxsize=queue_maxsize)
         self._cancel_event = threading.Event()
 
+        self._metrics = AgentRunWriterMetrics()
+        self._metrics_lock = threading.Lock()
+
+        self._spool = (
+            DiskSpool(Path(spool_dir) / collection_id, max_bytes=spool_max_bytes)
+            if spool_dir is not None
+            else None
+        )
+        self._spool_replay_interval = spool_replay_interval
+
         # Start background thread
         self._thread = threading.Thread(
             target=lambda: anyio.run(self._async_main),
@@ -124,7 +191,8 @@ class AgentRunWriter:
     def log_agent_runs(self, agent_runs: list[AgentRun]) -> None:
         """Put a list of AgentRun objects into the queue.
 
-        If the queue is full, the method will block until the queue has space.
+        If the queue is full, runs are written to the disk spool if one is configured
+        and has room; otherwise the method will block until the queue has space.
 
         Args:
             agent_runs (list[AgentRun]): List of AgentRun objects to put into the queue.
@@ -138,12 +206,41 @@ class AgentRunWriter:
         if p_full >= 0.9:
             logger.warning("AgentRunWriter queue is almost full (>=90%).")
 
-        for run in agent_runs:
+        for i, run in enumerate(agent_runs):
             try:
                 self._queue.put_nowait(run)
             except queue.Full:
+                remaining = agent_runs[i:]
+                if self._spool is not None:
+                    n_spooled = self._spool_runs(
+                        [r.model_dump_json().encode("utf-8") for r in remaining]
+                    )
+                    remaining = remaining[n_spooled:]
+                    if not remaining:
+                        return
+
                 logger.warning("AgentRunWriter queue is full, blocking...")
-                self._queue.put(run, block=True)
+                for blocked_run in remaining:
+                    self._queue.put(blocked_run, block=True)
+                return
+
+    def _spool_runs(self, runs: list[bytes]) -> int:
+        """Write serialized runs to the spool in batch-sized segments.
+
+        Returns:
+            int: The number of runs written, counted from the front of `runs`.
+        """
+        assert self._spool is not None
+        n_spooled = 0
+        for batch in batch_encoded_runs(runs, self._max_batch_bytes, self._batch_size):
+            if not self._spool.write(batch):
+                logger.warning("AgentRunWriter spool is full")
+                break
+            n_spooled += len(batch)
+
+        with self._metrics_lock:
+            self._metrics.runs_spooled += n_spooled
+        return n_spooled
 
     def finish(self, force: bool = False) -> None:
         """Request shutdown and wait up to timeout for pending tasks to complete.
@@ -169,12 +266,59 @@ class AgentRunWriter:
 
         self._shutdown()
 
+    def metrics(self) -> AgentRunWriterMetrics:
+        """Return a snapshot of queue depth, batch sizes and send latencies."""
+        with self._metrics_lock:
+            return dataclasses.replace(
+                self._metrics,
+                queue_depth=self._queue.qsize(),
+                spool_bytes=self._spool.size_bytes if self._spool is not None else 0,
+            )
+
+    def _record_batch(self, n_runs: int, n_bytes: int, latency: float, ok: bool) -> None:
+        with self._metrics_lock:
+            m = self._metrics
+            if ok:
+                m.runs_sent += n_runs
+                m.batches_sent += 1
+                m.bytes_sent += n_bytes
+            else:
+                m.runs_failed += n_runs
+                m.batches_failed += 1
+            m.last_batch_runs = n_runs
+            m.last_batch_bytes = n_bytes
+            m.last_send_latency_s = latency
+            m.max_send_latency_s = max(m.max_send_latency_s, latency)
+            m.total_send_latency_s += latency
+
     def _shutdown(self) -> None:
         """Shutdown the AgentRunWriter thread."""
         if self._thread.is_alive():
             logger.info("Cancelling pending tasks...")
             self._cancel_event.set()
             n_pending = self._queue.qsize()
+
+            # Keep runs that never made it out of the queue for the next process
+            if self._spool is not None:
+                pending: list[bytes] = []
+                while True:
+                    try:
+                        run = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if run is not None:
+                        pending.append(run.model_dump_json().encode("utf-8"))
+                if pending:
+                    n_spooled = self._spool_runs(pending)
+                    logger.info(f"Spooled {n_spooled} pending agent runs to disk")
+
+            # Wake workers blocked waiting for the next run
+            for _ in range(self._num_workers):
+                try:
+                    self._queue.put_nowait(None)
+                except queue.Full:
+                    # Workers aren't blocked on an empty queue; they'll see the cancel event
+                    break
             logger.info(f"Cancelled ~{n_pending} pending tasks")
 
             # Give a brief moment to exit
@@ -183,8 +327,8 @@ class AgentRunWriter:
 
     def get_post_batch_fcn(
         self, client: httpx.AsyncClient
-    ) -> Callable[[list[AgentRun]], Coroutine[Any, Any, None]]:
-        """Return a function that will post a batch of agent runs to the API."""
+    ) -> Callable[[list[bytes]], Coroutine[Any, Any, None]]:
+        """Return a function that will post a batch of serialized agent runs to the API."""
 
         @backoff.on_exception(
             backoff.expo,
@@ -193,13 +337,32 @@ class AgentRunWriter:
             max_tries=self._max_retries,
             on_backoff=_print_backoff_message,
         )
-        async def _post_batch(batch: list[AgentRun]) -> None:
-            payload = {"agent_runs": [ar.model_dump(mode="json") for ar in batch]}
-            resp = await client.post(self._endpoint, json=payload, timeout=self._request_timeout)
+        async def _post_batch(batch: list[bytes]) -> None:
+            body, headers = encode_agent_run_batch(batch, compress=True)
+            resp = await client.post(
+                self._endpoint, content=body, headers=headers, timeout=self._request_timeout
+            )
             resp.raise_for_status()
 
         return _post_batch
 
+    def get_find_stored_runs_fcn(
+        self, client: httpx.AsyncClient
+    ) -> Callable[[list[str]], Coroutine[Any, Any, set[str]]]:
+        """Return a function that returns which of the given agent run IDs the server has."""
+
+        async def _find_stored_runs(agent_run_ids: list[str]) -> set[str]:
+            # Fetching no metadata paths returns just the IDs of the runs that exist
+            resp = await client.post(
+                self._metadata_endpoint,
+                json={"agent_run_ids": agent_run_ids, "metadata_paths": []},
+                timeout=self._request_timeout,
+            )
+            resp.raise_for_status()
+            return set(resp.json())
+
+        return _find_stored_runs
+
     async def _async_main(self) -> None:
         """Main async function for the AgentRunWriter thread."""
 
@@ -207,34 +370,194 @@ class AgentRunWriter:
             _post_batch = self.get_post_batch_fcn(client)
             async with anyio.create_task_group() as tg:
 
-                async def worker():
-                    while not self._cancel_event.is_set():
-                        batch = await self._gather_next_batch_from_queue()
-                        if not batch:
-                            continue
-                        try:
-                            await _post_batch(batch)
-                        except Exception as e:
+                async def send_batch(batch: list[bytes]):
+                    n_bytes = sum(len(run) for run in batch)
+                    start = time.perf_counter()
+                    try:
+                        await _post_batch(batch)
+                        self._record_batch(
+                            len(batch), n_bytes, time.perf_counter() - start, ok=True
+                        )
+                    except Exception as e:
+                        self._record_batch(
+                            len(batch), n_bytes, time.perf_counter() - start, ok=False
+                        )
+                        n_spooled = self._spool_runs(batch) if self._spool is not None else 0
+                        if n_spooled == len(batch):
+                            logger.warning(
+                                f"Spooled batch of {len(batch)} agent runs after failing to post it: {e.__class__.__name__}: {e}"
+                            )
+                        else:
                             logger.error(
-                                f"Failed to post batch of {len(batch)} agent runs: {e.__class__.__name__}: {e}"
+                                f"Failed to post batch of {len(batch) - n_spooled} agent runs: {e.__class__.__name__}: {e}"
                             )
 
+                async def worker():
+                    carry: list[bytes] = []
+                    while not self._cancel_event.is_set():
+                        batch = await self._gather_next_batch_from_queue(carry)
+                        if batch:
+                            await send_batch(batch)
+
+                    # A run that didn't fit in the last batch is still held here. Spooling it
+                    # is quicker than posting it, which matters while the process exits.
+                    if carry:
+                        if self._spool is not None and self._spool_runs(carry) == len(carry):
+                            logger.info("Spooled 1 pending agent run to disk")
+                        else:
+                            await send_batch(carry)
+
                 for _ in range(self._num_workers):
                     tg.start_soon(worker)
+                if self._spool is not None:
+                    tg.start_soon(
+                        self._replay_spool,
+                        self._spool,
+                        _post_batch,
+                        self.get_find_stored_runs_fcn(client),
+                    )
+
+    async def _replay_spool(
+        self,
+        spool: DiskSpool,
+        post_batch: Callable[[list[bytes]], Coroutine[Any, Any, None]],
+        find_stored_runs: Callable[[list[str]], Coroutine[Any, Any, set[str]]],
+    ) -> None:
+        """Periodically post spooled segments, oldest first, until shutdown.
 
-    async def _gather_next_batch_from_queue(self) -> list[AgentRun]:
-        """Gather a batch of agent runs from the queue.
-
-        Fetches items from the queue until the batch is full or the timeout expires.
+        A pass stops at the first failure (the server is likely unavailable) and is
+        retried after `spool_replay_interval`.
         """
-        batch: list[AgentRun] = []
-        with anyio.move_on_after(self._flush_interval):
-            while len(batch) < self._batch_size:
+        failures: dict[Path, int] = {}
+
+        while not self._cancel_event.is_set():
+            for segment in spool.segments():
+                if self._cancel_event.is_set():
+                    return
+
+                batch = await anyio.to_thread.run_sync(spool.read, segment)
                 try:
-                    item = self._queue.get_nowait()
-                    batch.append(item)
-                except queue.Empty:
-                    await anyio.sleep(0.1)
+                    n_replayed = await self._replay_batch(batch, post_batch, find_stored_runs)
+                except httpx.HTTPStatusError as e:
+                    failures[segment] = failures.get(segment, 0) + 1
+                    status = e.response.status_code
+                    if (status < 500 and status != 429) or (
+                        failures[segment] >= _MAX_SEGMENT_REPLAY_FAILURES
+                    ):
+                        spool.reject(segment)
+                        failures.pop(segment)
+                        continue
+                    break
+                except Exception as e:
+                    logger.warning(
+                        f"Failed to replay spooled agent runs: {e.__class__.__name__}: {e}"
+                    )
+                    break
+
+                spool.remove(segment)
+                failures.pop(segment, None)
+                with self._metrics_lock:
+                    self._metrics.runs_replayed += n_replayed
+
+            # Sleep until the next pass, waking early at shutdown
+            await anyio.to_thread.run_sync(self._cancel_event.wait, self._spool_replay_interval)
+
+    async def _replay_batch(
+        self,
+        batch: list[bytes],
+        post_batch: Callable[[list[bytes]], Coroutine[Any, Any, None]],
+        find_stored_runs: Callable[[list[str]], Coroutine[Any, Any, set[str]]],
+    ) -> int:
+        """Post a spooled batch, skipping runs the server already has if it fails.
+
+        A batch is spooled when posting it fails, even if the server stored it and only
+        the response was lost, and the server fails batches that repeat stored runs. So
+        when the server fails a batch, the runs it already has are dropped and the rest
+        are posted again.
+
+        Returns:
+            int: The number of runs posted.
+        """
+        try:
+            await self._post_recorded(batch, post_batch)
+            return len(batch)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code < 500:
+                raise
+            agent_run_ids = [json.loads(run)["id"] for run in batch]
+            try:
+                stored = await find_stored_runs(agent_run_ids)
+            except Exception:
+                raise e
+            if not stored:
+                raise
+
+        remaining = [run for run, run_id in zip(batch, agent_run_ids) if run_id not in stored]
+        logger.info(
+            f"Skipping {len(batch) - len(remaining)} spooled agent runs the server already has"
+        )
+        if remaining:
+            await self._post_recorded(remaining, post_batch)
+        return len(remaining)
+
+    async def _post_recorded(
+        self, batch: list[bytes], post_batch: Callable[[list[bytes]], Coroutine[Any, Any, None]]
+    ) -> None:
+        """Post a batch, recording its outcome in the metrics."""
+        n_bytes = sum(len(run) for run in batch)
+        start = time.perf_counter()
+        try:
+            await post_batch(batch)
+        except Exception:
+            self._record_batch(len(batch), n_bytes, time.perf_counter() - start, ok=False)
+            raise
+        self._record_batch(len(batch), n_bytes, time.perf_counter() - start, ok=True)
+
+    def _get_from_queue(self, timeout: float | None) -> AgentRun | None:
+        """Blocking get for use on a worker thread. Returns None on timeout or shutdown."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    async def _gather_next_batch_from_queue(self, carry: list[bytes]) -> list[bytes]:
+        """Gather a batch of serialized agent runs from the queue.
+
+        Blocks until a run is available, then keeps adding runs until the batch reaches
+        `batch_size` runs or `max_batch_bytes`, or until `flush_interval` has passed since
+        the batch was started. `carry` holds a run that didn't fit in the previous batch;
+        it starts this batch, and a run that doesn't fit in this one is left there.
+
+        Returns an empty list at shutdown.
+        """
+        batch = carry[:]
+        carry.clear()
+        batch_bytes = sum(len(run) for run in batch)
+        deadline = time.monotonic() + self._flush_interval
+
+        while len(batch) < self._batch_size and batch_bytes < self._max_batch_bytes:
+            try:
+                run = self._queue.get_nowait()
+            except queue.Empty:
+                if batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                else:
+                    remaining = None
+                run = await anyio.to_thread.run_sync(self._get_from_queue, remaining)
+
+            if run is None:
+                break
+
+            encoded = run.model_dump_json().encode("utf-8")
+            if batch and batch_bytes + len(encoded) > self._max_batch_bytes:
+                carry.append(encoded)
+                break
+            if not batch:
+                deadline = time.monotonic() + self._flush_interval
+            batch.append(encoded)
+            batch_bytes += len(encoded)
 
         return batch
 
@@ -251,8 +574,12 @@ def init(
     request_timeout: float = 30.0,
     flush_interval: float = 1.0,
     batch_size: int = 1_000,
+    max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
     max_retries: int = 5,
     shutdown_timeout: int = 60,
+    spool_dir: str | None = None,
+    spool_max_bytes: int = 1024**3,
+    spool_replay_interval: float = 5.0,
 ):
     """Initialize the AgentRunWriter thread.
 
@@ -267,11 +594,17 @@ def init(
         queue_maxsize (int): Maximum size of the queue.
             If maxsize is <= 0, the queue size is infinite.
         request_timeout (float): Timeout for the HTTP request.
-        flush_interval (float): Interval to flush the queue.
-        batch_size (int): Number of agent runs to batch together.
+        flush_interval (float): Maximum time a run waits for its batch to fill up
+            before the batch is sent anyway.
+        batch_size (int): Maximum number of agent runs per batch.
+        max_batch_bytes (int): Maximum serialized size of a batch, in bytes.
         max_retries (int): Maximum number of retries for the HTTP request.
         shutdown_timeout (int): Timeout to wait for the background thread to finish
             after the main thread has requested shutdown.
+        spool_dir (str | None): Directory for an on-disk spool of runs that couldn't be
+            queued or sent; see AgentRunWriter.
+        spool_max_bytes (int): Maximum compressed size of the spool.
+        spool_replay_interval (float): Seconds between attempts to replay the spool.
     """
     api_key = api_key or os.getenv("DOCENT_API_KEY")
 
@@ -299,6 +632,10 @@ def init(
         request_timeout=request_timeout,
         flush_interval=flush_interval,
         batch_size=batch_size,
+        max_batch_bytes=max_batch_bytes,
         max_retries=max_retries,
         shutdown_timeout=shutdown_timeout,
+        spool_dir=spool_dir,
+        spool_max_bytes=spool_max_bytes,
+        spool_replay_interval=spool_replay_interval,
     )
@@ -0,0 +1,559 @@
+import json
+import os
+import time
+from pathlib import Path
+from types import TracebackType
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Iterable
+
+import anyio
+import httpx
+from anyio.streams.memory import MemoryObjectSendStream
+from tqdm import tqdm
+
+from docent._log_util.logger import get_logger
+from docent.data_models.agent_run import AgentRun
+from docent.loaders import load_inspect
+from docent.sdk._uploads import (
+    DEFAULT_MAX_BATCH_BYTES,
+    DEFAULT_MAX_BATCH_RUNS,
+    DEFAULT_SAMPLES_PER_PARSE_TASK,
+    batch_encoded_runs,
+    encode_agent_run_batch,
+    iter_agent_run_batches,
+    plan_eval_parse_tasks,
+)
+
+logger = get_logger(__name__)
+
+
+async def _aiter(items: Iterable[list[bytes]]) -> AsyncIterator[list[bytes]]:
+    for item in items:
+        yield item
+
+
+class AsyncDocent:
+    """Asynchronous client for interacting with the Docent API.
+
+    Mirrors the methods of `Docent`, but every call is a coroutine. Requests share a
+    pooled `httpx.AsyncClient`, and at most `max_concurrency` of them are in flight at
+    once, so callers can fan out freely (e.g. with a task group) without overwhelming
+    the server.
+
+    Use as an async context manager, which verifies the API key on entry and closes
+    the connection pool on exit:
+
+        async with AsyncDocent(api_key=...) as client:
+            runs = await client.get_agent_runs(collection_id, run_ids)
+
+    Args:
+        server_url: URL of the Docent API server.
+        web_url: URL of the Docent web UI.
+        api_key: API key for authentication. Defaults to the DOCENT_API_KEY environment variable.
+        max_concurrency: Maximum number of concurrent requests, and size of the connection pool.
+        request_timeout: Timeout in seconds for each request.
+    """
+
+    def __init__(
+        self,
+        server_url: str = "https://api.docent.transluce.org",
+        web_url: str = "https://docent.transluce.org",
+        api_key: str | None = None,
+        max_concurrency: int = 16,
+        request_timeout: float = 60.0,
+    ):
+        self._server_url = server_url.rstrip("/") + "/rest"
+        self._web_url = web_url.rstrip("/")
+
+        api_key = api_key or os.getenv("DOCENT_API_KEY")
+
+        if api_key is None:
+            raise ValueError(
+                "api_key is required. Please provide an "
+                "api_key or set the DOCENT_API_KEY environment variable."
+            )
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self._max_concurrency = max_concurrency
+        self._semaphore = anyio.Semaphore(max_concurrency)
+        self._client = httpx.AsyncClient(
+            base_url=self._server_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=request_timeout,
+            limits=httpx.Limits(
+                max_connections=max_concurrency, max_keepalive_connections=max_concurrency
+            ),
+        )
+
+    async def __aenter__(self) -> "AsyncDocent":
+        try:
+            await self._login()
+        except BaseException:
+            await self.aclose()
+            raise
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the underlying connection pool."""
+        await self._client.aclose()
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        """Send a request once a concurrency slot is free, raising on error statuses."""
+        async with self._semaphore:
+            response = await self._client.request(method, path, **kwargs)
+        response.raise_for_status()
+        return response
+
+    async def _login(self):
+        """Verify the API key against the server."""
+        await self._request("GET", "/api-keys/test")
+        logger.info("Logged in with API key")
+
+    async def create_collection(
+        self,
+        collection_id: str | None = None,
+        name: str | None = None,
+        description: str | None = None,
+    ) -> str:
+        """Creates a new Collection.
+
+        Args:
+            collection_id: Optional ID for the new Collection. If not provided, one will be generated.
+            name: Optional name for the Collection.
+            description: Optional description for the Collection.
+
+        Returns:
+            str: The ID of the created Collection.
+
+        Raises:
+            ValueError: If the response is missing the Collection ID.
+            httpx.HTTPStatusError: If the API request fails.
+        """
+        payload = {
+            "collection_id": collection_id,
+            "name": name,
+            "description": description,
+        }
+        response = await self._request("POST", "/create", json=payload)
+
+        collection_id = response.json().get("collection_id")
+        if collection_id is None:
+            raise ValueError("Failed to create collection: 'collection_id' missing in response.")
+
+        logger.info(f"Successfully created Collection with id='{collection_id}'")
+        logger.info(
+            f"Collection creation complete. Frontend available at: {self._web_url}/dashboard/{collection_id}"
+        )
+        return collection_id
+
+    async def add_agent_runs(
+        self,
+        collection_id: str,
+        agent_runs: list[AgentRun],
+        batch_size: int = DEFAULT_MAX_BATCH_RUNS,
+        max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+        compress: bool = True,
+    ) -> dict[str, Any]:
+        """Adds agent runs to a Collection.
+
+        Runs are grouped into batches bounded by serialized size and count, and the
+        batches are uploaded concurrently.
+
+        Args:
+            collection_id: ID of the Collection.
+            agent_runs: List of AgentRun objects to add.
+            batch_size: Maximum number of agent runs per request.
+            max_batch_bytes: Maximum uncompressed size of a request body, in bytes.
+            compress: Whether to gzip request bodies.
+
+        Returns:
+            dict: API response data.
+
+        Raises:
+            httpx.HTTPStatusError: If the API request fails.
+        """
+        total_runs = len(agent_runs)
+
+        with tqdm(total=total_runs, desc="Adding agent runs", unit="runs") as pbar:
+            await self._upload_batches(
+                collection_id,
+                _aiter(iter_agent_run_batches(agent_runs, max_batch_bytes, batch_size)),
+                pbar.update,
+                compress=compress,
+            )
+
+        await self._request("POST", f"/{collection_id}/compute_embeddings")
+
+        logger.info(f"Successfully added {total_runs} agent runs to Collection '{collection_id}'")
+        return {"status": "success", "total_runs_added": total_runs}
+
+    async def _upload_batches(
+        self,
+        collection_id: str,
+        batches: AsyncIterable[list[bytes]],
+        on_batch_uploaded: Callable[[int], Any],
+        compress: bool = True,
+    ) -> int:
+        """Upload batches of serialized agent runs concurrently, reporting each as it lands.
+
+        A new batch is only pulled from `batches` once a request slot is free, so only as
+        many batches as there are slots are held in memory at once.
+
+        Returns:
+            int: The number of agent runs uploaded.
+        """
+        path = f"/{collection_id}/agent_runs"
+        pending = anyio.Semaphore(self._max_concurrency)
+        num_uploaded = 0
+
+        async def _post_batch(batch: list[bytes]):
+            nonlocal num_uploaded
+            try:
+                body, headers = await anyio.to_thread.run_sync(
+                    encode_agent_run_batch, batch, compress
+                )
+                await self._request("POST", path, content=body, headers=headers)
+                num_uploaded += len(batch)
+                on_batch_uploaded(len(batch))
+            finally:
+                pending.release()
+
+        async with anyio.create_task_group() as tg:
+            async for batch in batches:
+                await pending.acquire()
+                tg.start_soon(_post_batch, batch)
+
+        return num_uploaded
+
+    async def list_collections(self) -> list[dict[str, Any]]:
+        """Lists all available Collections.
+
+        Returns:
+            list: List of dictionaries containing Collection information.
+
+        Raises:
+            httpx.HTTPStatusError: If the API request fails.
+        """
+        response = await self._request("GET", "/collections")
+        return response.json()
+
+    async def list_rubrics(self, collection_id: str) -> list[dict[str, Any]]:
+        """List all rubrics for a given collection.
+
+        Args:
+            collection_id: ID of the Collection.
+
+        Returns:
+            list: List of dictionaries containing rubric information.
+
+        Raises:
+            httpx.HTTPStatusError: If the API request fails.
+        """
+        response = await self._request("GET", f"/rubric/{collection_id}/rubrics")
+        return response.json()
+
+    async def get_rubric_run_state(self, collection_id: str, rubric_id: str) -> dict[str, Any]:
+        """Get rubric run state for a given collection and rubric.
+
+        Args:
+            collection_id: ID of the Collection.
+            rubric_id: The ID of the rubric to get run state for.
+
+        Returns:
+            dict: Dictionary containing rubric run state with results, job_id, and total_agent_runs.
+
+        Raises:
+            httpx.HTTPStatusError: If the API request fails.
+        """
+        response = await self._request(
+            "GET", f"/rubric/{collection_id}/{rubric_id}/rubric_run_state"
+        )
+        return response.json()
+
+    async def get_clustering_state(self, collection_id: str, rubric_id: str) -> dict[str, Any]:
+        """Get clustering state for a given collection and rubric.
+
+        Args:
+            collection_id: ID of the Collection.
+            rubric_id: The ID of the rubric to get clustering state for.
+
+        Returns:
+            dict: Dictionary containing job_id, centroids, and assignments.
+
+        Raises:
+            httpx.HTTPStatusError: If the API request fails.
+        """
+        response = await self._request("GET", f"/rubric/{collection_id}/{rubric_id}/clustering_job")
+        return response.json()
+
+    async def get_cluster_centroids(
+        self, collection_id: str, rubric_id: str
+    ) -> list[dict[str, Any]]:
+        """Get centroids for a given collection and rubric.
+
+        Args:
+            collection_id: ID of the Collection.
+            rubric_id: The ID of the rubric to get centroids for.
+
+        Returns:
+            list: List of dictionaries containing centroid information.
+
+        Raises:
+            httpx.HTTPStatusError: If the API request fails.
+        """
+        clustering_state = await self.get_clustering_state(collection_id, rubric_id)
+        return clustering_state.get("centroids", [])
+
+    async def get_cluster_assignments(
+        self, collection_id: str, rubric_id: str
+    ) -> dict[str, list[str]]:
+        """Get centroid assignments for a given rubric.
+
+        Args:
+            collection_id: ID of the Collection.
+            rubric_id: The ID of the rubric to get assignments for.
+
+        Returns:
+            dict: Dictionary mapping centroid IDs to lists of judge result IDs.
+
+        Raises:
+            httpx.HTTPStatusError: If the API request fails.
+        """
+        clustering_state = await self.get_clustering_state(collection_id, rubric_id)
+        return clustering_state.get("assignments", {})
+
+    async def get_agent_run(self, collection_id: str, agent_run_id: str) -> AgentRun | None:
+        """Get a specific agent run by its ID.
+
+        Args:
+            collection_id: ID of the Collection.
+            agent_run_id: The ID of the agent run to retrieve.
+
+        Returns:
+            AgentRun | None: The agent run, or None if it does not exist.
+
+        Raises:
+            httpx.HTTPStatusError: If the API request fails.
+        """
+        response = await self._request(
+            "GET", f"/{collection_id}/agent_run", params={"agent_run_id": agent_run_id}
+        )
+        data = response.json()
+        if data is None:
+            return None
+        return AgentRun.model_validate(data)
+
+    async def get_agent_runs(
+        self, collection_id: str, agent_run_ids: list[str]
+    ) -> list[AgentRun | None]:
+        """Fetch many agent runs concurrently.
+
+        Args:
+            collection_id: ID of the Collection.
+            agent_run_ids: IDs of the agent runs to retrieve.
+
+        Returns:
+            list: Agent runs in the same order as `agent_run_ids`, with None for missing runs.
+
+        Raises:
+            httpx.HTTPStatusError: If any API request fails.
+        """
+        results: list[AgentRun | None] = [None] * len(agent_run_ids)
+
+        async def _fetch(i: int, agent_run_id: str):
+            results[i] = await self.get_agent_run(collection_id, agent_run_id)
+
+        async with anyio.create_task_group() as tg:
+            for i, agent_run_id in enumerate(agent_run_ids):
+                tg.start_soon(_fetch, i, agent_run_id)
+
+        return results
+
+    async def make_collection_public(self, collection_id: str) -> dict[str, Any]:
+        """Make a collection publicly accessible to anyone with the link.
+
+        Args:
+            collection_id: ID of the Collection to make public.
+
+        Returns:
+            dict: API response data.
+
+        Raises:
+            httpx.HTTPStatusError: If the API request fails.
+        """
+        response = await self._request("POST", f"/{collection_id}/make_public")
+
+        logger.info(f"Successfully made Collection '{collection_id}' public")
+        return response.json()
+
+    async def share_collection_with_email(self, collection_id: str, email: str) -> dict[str, Any]:
+        """Share a collection with a specific user by email address.
+
+        Args:
+            collection_id: ID of the Collection to share.
+            email: Email address of the user to share with.
+
+        Returns:
+            dict: API response data.
+
+        Raises:
+            ValueError: If no user with that email exists.
+            httpx.HTTPStatusError: If the API request fails.
+        """
+        try:
+            response = await self._request(
+                "POST", f"/{collection_id}/share_with_email", json={"email": email}
+            )
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                raise ValueError(f"The user you are trying to share with ({email}) does not exist.")
+            raise
+
+        logger.info(f"Successfully shared Collection '{collection_id}' with {email}")
+        return response.json()
+
+    async def list_agent_run_ids(self, collection_id: str) -> list[str]:
+        """Get all agent run IDs for a collection.
+
+        Args:
+            collection_id: ID of the Collection.
+
+        Returns:
+            list: The agent run IDs in the collection.
+
+        Raises:
+            httpx.HTTPStatusError: If the API request fails.
+        """
+        response = await self._request("GET", f"/{collection_id}/agent_run_ids")
+        return response.json()
+
+    async def export_agent_runs(
+        self,
+        collection_id: str,
+        fields: list[str] | None = None,
+        page_size: int = 1000,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Stream every agent run in a collection, a page at a time.
+
+        Args:
+            collection_id: ID of the Collection.
+            fields: Top-level AgentRun fields to include, e.g. `["metadata"]`. `id` is always
+                included. Defaults to all fields.
+            page_size: Number of runs per request (at most 5,000).
+
+        Yields:
+            dict: One agent run per iteration, ordered by ID.
+
+        Raises:
+            httpx.HTTPStatusError: If the API request fails.
+        """
+        path = f"/{collection_id}/agent_runs/export"
+        params: dict[str, Any] = {"limit": page_size}
+        if fields is not None:
+            params["fields"] = ",".join(fields)
+
+        while True:
+            # Read the whole page before yielding so the request slot isn't held while
+            # the caller processes runs (and possibly makes requests of its own)
+            response = await self._request("GET", path, params=params)
+            for line in response.text.splitlines():
+                if line:
+                    yield json.loads(line)
+
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                return
+            params["cursor"] = cursor
+
+    async def recursively_ingest_inspect_logs(
+        self,
+        collection_id: str,
+        fpath: str,
+        num_parse_workers: int | None = None,
+        samples_per_task: int = DEFAULT_SAMPLES_PER_PARSE_TASK,
+    ):
+        """Recursively search directory for .eval files and ingest them as agent runs.
+
+        Ingestion is pipelined: worker processes parse chunks of samples into a bounded
+        stream while earlier batches are uploaded concurrently.
+
+        Args:
+            collection_id: ID of the Collection to add agent runs to.
+            fpath: Path to directory to search recursively.
+            num_parse_workers: Number of processes used to parse samples. Defaults to the CPU count.
+            samples_per_task: Number of samples parsed per worker-process call.
+
+        Raises:
+            ValueError: If the path doesn't exist or isn't a directory.
+            httpx.HTTPStatusError: If any API requests fail.
+        """
+        root_path = Path(fpath)
+        if not root_path.exists():
+            raise ValueError(f"Path does not exist: {fpath}")
+        if not root_path.is_dir():
+            raise ValueError(f"Path is not a directory: {fpath}")
+
+        eval_files = list(root_path.rglob("*.eval"))
+
+        if not eval_files:
+            logger.info(f"No .eval files found in {fpath}")
+            return
+
+        logger.info(f"Found {len(eval_files)} .eval files in {fpath}")
+
+        tasks = await anyio.to_thread.run_sync(plan_eval_parse_tasks, eval_files, samples_per_task)
+        total_samples = sum(len(sample_names) for _, sample_names in tasks)
+        num_parse_workers = num_parse_workers or os.cpu_count() or 1
+        remaining_tasks = iter(tasks)
+        parse_limiter = anyio.CapacityLimiter(num_parse_workers)
+
+        send_stream, recv_stream = anyio.create_memory_object_stream[list[bytes]](
+            2 * num_parse_workers
+        )
+
+        async def _parse_worker(send: MemoryObjectSendStream[list[bytes]]):
+            async with send:
+                for eval_file, sample_names in remaining_tasks:
+                    chunk = await anyio.to_process.run_sync(
+                        load_inspect.load_eval_samples_as_json,
+                        eval_file,
+                        sample_names,
+                        limiter=parse_limiter,
+                    )
+                    await send.send(chunk)
+
+        async def _parsed_batches() -> AsyncIterator[list[bytes]]:
+            async with recv_stream:
+                async for chunk in recv_stream:
+                    for batch in batch_encoded_runs(
+                        chunk, DEFAULT_MAX_BATCH_BYTES, DEFAULT_MAX_BATCH_RUNS
+                    ):
+                        yield batch
+
+        start = time.perf_counter()
+        with tqdm(total=total_samples, desc="Ingesting Inspect logs", unit="runs") as pbar:
+            async with anyio.create_task_group() as tg:
+                async with send_stream:
+                    for _ in range(num_parse_workers):
+                        tg.start_soon(_parse_worker, send_stream.clone())
+                total_runs_added = await self._upload_batches(
+                    collection_id, _parsed_batches(), pbar.update
+                )
+        elapsed = time.perf_counter() - start
+
+        if total_runs_added > 0:
+            logger.info("Computing embeddings for added runs...")
+            await self._request("POST", f"/{collection_id}/compute_embeddings")
+
+        logger.info(
+            f"Successfully ingested {total_runs_added} total agent runs from {len(eval_files)} files "
+            f"in {elapsed:.1f}s ({total_runs_added / max(elapsed, 1e-9):.1f} runs/s)"
+        )
@@ -1,18 +1,67 @@
 import itertools
+import json
 import os
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator
 
 import requests
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
 
 from docent._log_util.logger import get_logger
 from docent.data_models.agent_run import AgentRun
 from docent.loaders import load_inspect
+from docent.sdk._uploads import (
+    DEFAULT_MAX_BATCH_BYTES,
+    DEFAULT_MAX_BATCH_RUNS,
+    DEFAULT_SAMPLES_PER_PARSE_TASK,
+    DEFAULT_UPLOAD_CONCURRENCY,
+    batch_encoded_runs,
+    encode_agent_run_batch,
+    iter_agent_run_batches,
+    plan_eval_parse_tasks,
+)
 
 logger = get_logger(__name__)
 
 
+def _parse_eval_samples_in_pool(
+    executor: ProcessPoolExecutor, tasks: list[tuple[Path, list[str]]], max_pending: int
+) -> Iterator[list[bytes]]:
+    """Parse sample chunks on a process pool, yielding results in completion order.
+
+    At most `max_pending` chunks are queued or in progress at once, which bounds how far
+    parsing can run ahead of a slower consumer.
+    """
+    remaining = iter(tasks)
+    in_flight: set[Future[list[bytes]]] = set()
+    try:
+        for eval_file, sample_names in itertools.islice(remaining, max_pending):
+            in_flight.add(
+                executor.submit(load_inspect.load_eval_samples_as_json, eval_file, sample_names)
+            )
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                next_task = next(remaining, None)
+                if next_task is not None:
+                    in_flight.add(
+                        executor.submit(load_inspect.load_eval_samples_as_json, *next_task)
+                    )
+                yield future.result()
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+
 class Docent:
     """Client for interacting with the Docent API.
 
@@ -22,8 +71,9 @@ class Docent:
     Args:
         server_url: URL of the Docent API server.
         web_url: URL of the Docent web UI.
-        email: Email address for authentication.
-        password: Password for authentication.
+        api_key: API key for authentication. Defaults to the DOCENT_API_KEY environment variable.
+        max_connections: Maximum number of pooled connections kept open to the server.
+            Should be at least as large as the upload concurrency.
     """
 
     def __init__(
@@ -31,12 +81,16 @@ class Docent:
         server_url: str = "https://api.docent.transluce.org",
         web_url: str = "https://docent.transluce.org",
         api_key: str | None = None,
+        max_connections: int = 16,
     ):
         self._server_url = server_url.rstrip("/") + "/rest"
         self._web_url = web_url.rstrip("/")
 
         # Use requests.Session for connection pooling and persistent headers
         self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
 
         api_key = api_key or os.getenv("DOCENT_API_KEY")
 
@@ -105,16 +159,27 @@ class Docent:
         return collection_id
 
     def add_agent_runs(
-        self, collection_id: str, agent_runs: list[AgentRun], batch_size: int = 1000
+        self,
+        collection_id: str,
+        agent_runs: list[AgentRun],
+        batch_size: int = DEFAULT_MAX_BATCH_RUNS,
+        max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+        max_concurrency: int = DEFAULT_UPLOAD_CONCURRENCY,
+        compress: bool = True,
     ) -> dict[str, Any]:
         """Adds agent runs to a Collection.
 
         Agent runs represent execution traces that can be visualized and analyzed.
-        This method batches the insertion in groups of 1,000 for better performance.
+        Runs are grouped into batches bounded by serialized size and count, and
+        batches are uploaded concurrently over the client's connection pool.
 
         Args:
             collection_id: ID of the Collection.
             agent_runs: List of AgentRun objects to add.
+            batch_size: Maximum number of agent runs per request.
+            max_batch_bytes: Maximum uncompressed size of a request body, in bytes.
+            max_concurrency: Maximum number of requests in flight at once.
+            compress: Whether to gzip request bodies.
 
         Returns:
             dict: API response data.
@@ -122,21 +187,16 @@ class Docent:
         Raises:
             requests.exceptions.HTTPError: If the API request fails.
         """
-        from tqdm import tqdm
-
-        url = f"{self._server_url}/{collection_id}/agent_runs"
         total_runs = len(agent_runs)
 
-        # Process agent runs in batches
         with tqdm(total=total_runs, desc="Adding agent runs", unit="runs") as pbar:
-            for i in range(0, total_runs, batch_size):
-                batch = agent_runs[i : i + batch_size]
-                payload = {"agent_runs": [ar.model_dump(mode="json") for ar in batch]}
-
-                response = self._session.post(url, json=payload)
-                response.raise_for_status()
-
-                pbar.update(len(batch))
+            self._upload_batches(
+                collection_id,
+                iter_agent_run_batches(agent_runs, max_batch_bytes, batch_size),
+                pbar.update,
+                max_concurrency=max_concurrency,
+                compress=compress,
+            )
 
         url = f"{self._server_url}/{collection_id}/compute_embeddings"
         response = self._session.post(url)
@@ -145,6 +205,59 @@ class Docent:
         logger.info(f"Successfully added {total_runs} agent runs to Collection '{collection_id}'")
         return {"status": "success", "total_runs_added": total_runs}
 
+    def _post_agent_run_batch(self, url: str, batch: list[bytes], compress: bool) -> int:
+        """POST a batch of pre-serialized agent runs and return the number of runs sent."""
+        body, headers = encode_agent_run_batch(batch, compress)
+        response = self._session.post(url, data=body, headers=headers)
+        response.raise_for_status()
+        return len(batch)
+
+    def _upload_batches(
+        self,
+        collection_id: str,
+        batches: Iterable[list[bytes]],
+        on_batch_uploaded: Callable[[int], Any],
+        max_concurrency: int = DEFAULT_UPLOAD_CONCURRENCY,
+        compress: bool = True,
+    ) -> int:
+        """Upload batches of serialized agent runs concurrently, reporting each as it lands.
+
+        `batches` is pulled lazily: a new batch is only requested once fewer than
+        `max_concurrency` uploads are in flight, so it may be backed by a generator over
+        more runs than fit in memory.
+
+        Returns:
+            int: The number of agent runs uploaded.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        url = f"{self._server_url}/{collection_id}/agent_runs"
+        num_uploaded = 0
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            in_flight: set[Future[int]] = set()
+            try:
+                for batch in batches:
+                    if len(in_flight) >= max_concurrency:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            n = future.result()
+                            num_uploaded += n
+                            on_batch_uploaded(n)
+                    in_flight.add(executor.submit(self._post_agent_run_batch, url, batch, compress))
+
+                for future in in_flight:
+                    n = future.result()
+                    num_uploaded += n
+                    on_batch_uploaded(n)
+            except BaseException:
+                for future in in_flight:
+                    future.cancel()
+                raise
+
+        return num_uploaded
+
     def list_collections(self) -> list[dict[str, Any]]:
         """Lists all available Collections.
 
@@ -331,12 +444,67 @@ class Docent:
         response.raise_for_status()
         return response.json()
 
-    def recursively_ingest_inspect_logs(self, collection_id: str, fpath: str):
+    def export_agent_runs(
+        self,
+        collection_id: str,
+        fields: list[str] | None = None,
+        page_size: int = 1000,
+    ) -> Iterator[dict[str, Any]]:
+        """Stream every agent run in a collection, a page at a time.
+
+        Runs are fetched in cursor-paginated NDJSON pages (gzip-compressed in transit),
+        so exporting a large collection takes one request per `page_size` runs.
+
+        Args:
+            collection_id: ID of the Collection.
+            fields: Top-level AgentRun fields to include, e.g. `["metadata"]`. `id` is always
+                included. Defaults to all fields; pass the full dicts to
+                `AgentRun.model_validate` to rebuild AgentRun objects.
+            page_size: Number of runs per request (at most 5,000).
+
+        Yields:
+            dict: One agent run per iteration, ordered by ID.
+
+        Raises:
+            requests.exceptions.HTTPError: If the API request fails.
+        """
+        url = f"{self._server_url}/{collection_id}/agent_runs/export"
+        params: dict[str, Any] = {"limit": page_size}
+        if fields is not None:
+            params["fields"] = ",".join(fields)
+
+        while True:
+            with self._session.get(url, params=params, stream=True) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if line:
+                        yield json.loads(line)
+                cursor = response.headers.get("X-Next-Cursor")
+
+            if cursor is None:
+                return
+            params["cursor"] = cursor
+
+    def recursively_ingest_inspect_logs(
+        self,
+        collection_id: str,
+        fpath: str,
+        num_parse_workers: int | None = None,
+        max_concurrency: int = DEFAULT_UPLOAD_CONCURRENCY,
+        samples_per_task: int = DEFAULT_SAMPLES_PER_PARSE_TASK,
+    ):
         """Recursively search directory for .eval files and ingest them as agent runs.
 
+        Ingestion is pipelined: a process pool decompresses and parses chunks of samples
+        while earlier batches are uploaded concurrently. Both stages are bounded, so
+        memory use stays flat regardless of how many logs are ingested.
+
         Args:
             collection_id: ID of the Collection to add agent runs to.
             fpath: Path to directory to search recursively.
+            num_parse_workers: Number of processes used to parse samples. Defaults to the CPU count.
+            max_concurrency: Maximum number of upload requests in flight at once.
+            samples_per_task: Number of samples parsed per process-pool task.
 
         Raises:
             ValueError: If the path doesn't exist or isn't a directory.
@@ -357,49 +525,27 @@ class Docent:
 
         logger.info(f"Found {len(eval_files)} .eval files in {fpath}")
 
-        total_runs_added = 0
-        batch_size = 100
-
-        # Process each .eval file
-        for eval_file in tqdm(eval_files, desc="Processing .eval files", unit="files"):
-            # Get total samples for progress tracking
-            total_samples = load_inspect.get_total_samples(eval_file, format="eval")
-
-            if total_samples == 0:
-                logger.info(f"No samples found in {eval_file}")
-                continue
-
-            # Load runs from file
-            with open(eval_file, "rb") as f:
-                _, runs_generator = load_inspect.runs_from_file(f, format="eval")
-
-                # Process runs in batches
-                runs_from_file = 0
-                batches = itertools.batched(runs_generator, batch_size)
-
-                with tqdm(
-                    total=total_samples,
-                    desc=f"Processing {eval_file.name}",
-                    unit="runs",
-                    leave=False,
-                ) as file_pbar:
-                    for batch in batches:
-                        batch_list = list(batch)  # Convert generator batch to list
-                        if not batch_list:
-                            break
-
-                        # Add batch to collection
-                        url = f"{self._server_url}/{collection_id}/agent_runs"
-                        payload = {"agent_runs": [ar.model_dump(mode="json") for ar in batch_list]}
-
-                        response = self._session.post(url, json=payload)
-                        response.raise_for_status()
-
-                        runs_from_file += len(batch_list)
-                        file_pbar.update(len(batch_list))
-
-            total_runs_added += runs_from_file
-            logger.info(f"Added {runs_from_file} runs from {eval_file}")
+        tasks = plan_eval_parse_tasks(eval_files, samples_per_task)
+        total_samples = sum(len(sample_names) for _, sample_names in tasks)
+        num_parse_workers = num_parse_workers or os.cpu_count() or 1
+
+        start = time.perf_counter()
+        with (
+            ProcessPoolExecutor(max_workers=num_parse_workers) as executor,
+            tqdm(total=total_samples, desc="Ingesting Inspect logs", unit="runs") as pbar,
+        ):
+            parsed_chunks = _parse_eval_samples_in_pool(
+                executor, tasks, max_pending=2 * num_parse_workers
+            )
+            batches = batch_encoded_runs(
+                itertools.chain.from_iterable(parsed_chunks),
+                DEFAULT_MAX_BATCH_BYTES,
+                DEFAULT_MAX_BATCH_RUNS,
+            )
+            total_runs_added = self._upload_batches(
+                collection_id, batches, pbar.update, max_concurrency=max_concurrency
+            )
+        elapsed = time.perf_counter() - start
 
         # Compute embeddings after all files are processed
         if total_runs_added > 0:
@@ -409,5 +555,6 @@ class Docent:
             response.raise_for_status()
 
         logger.info(
-            f"Successfully ingested {total_runs_added} total agent runs from {len(eval_files)} files"
+            f"Successfully ingested {total_runs_added} total agent runs from {len(eval_files)} files "
+            f"in {elapsed:.1f}s ({total_runs_added / max(elapsed, 1e-9):.1f} runs/s)"
         )
@@ -3,16 +3,30 @@ import contextvars
 import itertools
 import logging
 import os
+import queue
 import sys
 import threading
+import time
 import uuid
+import zlib
 from collections import defaultdict
 from contextlib import asynccontextmanager, contextmanager
 from contextvars import ContextVar, Token
 from datetime import datetime, timezone
 from enum import Enum
 from importlib.metadata import Distribution, distributions
-from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Set, Union
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Union,
+)
 
 import requests
 from opentelemetry import trace
@@ -27,7 +41,9 @@ from opentelemetry.sdk.trace.export import (
     ConsoleSpanExporter,
     SimpleSpanProcessor,
 )
-from opentelemetry.trace import Span
+from opentelemetry.sdk.trace.sampling import Decision, Sampler, SamplingResult
+from opentelemetry.trace import Link, Span, SpanKind, TraceState
+from opentelemetry.util.types import Attributes
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +61,204 @@ class Instruments(Enum):
     LANGCHAIN = "langchain"
 
 
+class AgentRunSampler(Sampler):
+    """
+    Head sampler that keeps or drops all spans of an agent run together.
+
+    The decision is a deterministic hash of the agent run ID in the current context,
+    so every span of a run (across threads and processes) gets the same decision.
+    Dropped spans are non-recording: span processors never see them and attribute
+    writes on them are no-ops.
+    """
+
+    def __init__(self, manager: "DocentTracer", sample_rate: float):
+        self.manager = manager
+        self.sample_rate = sample_rate
+
+    def should_sample(
+        self,
+        parent_context: Optional[Context],
+        trace_id: int,
+        name: str,
+        kind: Optional[SpanKind] = None,
+        attributes: Attributes = None,
+        links: Optional[Sequence[Link]] = None,
+        trace_state: Optional[TraceState] = None,
+    ) -> SamplingResult:
+        agent_run_id = self.manager.get_current_agent_run_id()
+        if agent_run_id and self.manager.is_agent_run_sampled(agent_run_id):
+            return SamplingResult(Decision.RECORD_AND_SAMPLE, attributes, trace_state)
+        return SamplingResult(Decision.DROP, None, trace_state)
+
+    def get_description(self) -> str:
+        return f"AgentRunSampler{{{self.sample_rate}}}"
+
+
+class TelemetryBatchExporter:
+    """
+    Sends scores, metadata and trace-done signals to the backend from a background thread.
+
+    Works like the span BatchSpanProcessor: callers enqueue payloads and return
+    immediately, and a worker thread posts them to the bulk `/v1/batch` endpoint once
+    `max_batch_size` payloads are waiting or `schedule_delay_s` has passed. Payloads keep
+    their order. If the server has no bulk endpoint, payloads are posted one by one to
+    their individual endpoints instead.
+
+    When the queue is full, new payloads are dropped with a warning rather than blocking
+    the caller.
+    """
+
+    def __init__(
+        self,
+        endpoint_base: str,
+        headers: Dict[str, str],
+        max_queue_size: int = 2048,
+        max_batch_size: int = 256,
+        schedule_delay_s: float = 1.0,
+    ):
+        self.endpoint_base = endpoint_base
+        self.headers = headers
+        self.max_batch_size = max_batch_size
+        self.schedule_delay_s = schedule_delay_s
+
+        # Items are (path, payload); an Event is a flush marker and None stops the worker
+        self._queue: queue.Queue[tuple[str, Dict[str, Any]] | threading.Event | None] = (
+            queue.Queue(maxsize=max_queue_size)
+        )
+        self._session = requests.Session()
+        self._bulk_supported = True
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self._is_shutdown = False
+
+    def enqueue(self, path: str, payload: Dict[str, Any]) -> None:
+        """Queue a payload for the endpoint at `path` (e.g. "/v1/scores").
+
+        Payloads enqueued after `shutdown` are dropped with a warning.
+        """
+        if not self._ensure_worker():
+            logger.warning(f"Telemetry exporter is shut down; dropping payload for {path}")
+            return
+        try:
+            self._queue.put_nowait((path, payload))
+        except queue.Full:
+            logger.warning(f"Telemetry queue is full; dropping payload for {path}")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every payload enqueued so far has been sent.
+
+        Returns:
+            False if the timeout expired first.
+        """
+        with self._worker_lock:
+            if self._worker is None:
+                return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        """Send everything still queued, then stop the worker thread."""
+        with self._worker_lock:
+            self._is_shutdown = True
+            worker, self._worker = self._worker, None
+            if worker is None:
+                return
+            self._queue.put(None)
+        worker.join(timeout)
+        if worker.is_alive():
+            logger.warning("Timed out sending queued scores and metadata during shutdown")
+
+    def _ensure_worker(self) -> bool:
+        """Start the worker thread if needed. Returns False once the exporter is shut down."""
+        with self._worker_lock:
+            if self._is_shutdown:
+                return False
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="docent-telemetry-exporter", daemon=True
+                )
+                self._worker.start()
+            return True
+
+    def _run(self) -> None:
+        while True:
+            # Block for the first item, then keep gathering until the batch is full or
+            # the schedule delay has passed since that item arrived
+            item = self._queue.get()
+            deadline = time.monotonic() + self.schedule_delay_s
+            batch: List[tuple[str, Dict[str, Any]]] = []
+            flush_markers: List[threading.Event] = []
+            stop = False
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    flush_markers.append(item)
+                else:
+                    batch.append(item)
+
+                if stop or flush_markers or len(batch) >= self.max_batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._export(batch)
+            for marker in flush_markers:
+                marker.set()
+            if stop:
+                return
+
+    @staticmethod
+    def _log_rejected_items(
+        resp: requests.Response, batch: List[tuple[str, Dict[str, Any]]]
+    ) -> None:
+        """Log the items of a bulk request that the server rejected; the rest were stored."""
+        try:
+            errors = resp.json().get("errors", [])
+        except ValueError:
+            return
+        for error in errors:
+            path, _ = batch[error["index"]]
+            logger.error(f"Server rejected payload for {path}: {error['detail']}")
+
+    def _export(self, batch: List[tuple[str, Dict[str, Any]]]) -> None:
+        if self._bulk_supported:
+            url = f"{self.endpoint_base}/v1/batch"
+            items = [{"type": path.removeprefix("/v1/"), "data": payload} for path, payload in batch]
+            try:
+                resp = self._session.post(
+                    url, json={"items": items}, headers=self.headers, timeout=(10, 60)
+                )
+                if resp.status_code not in (404, 405):
+                    resp.raise_for_status()
+                    self._log_rejected_items(resp, batch)
+                    return
+                logger.info("Server has no bulk telemetry endpoint; posting payloads one by one")
+                self._bulk_supported = False
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Failed POST {url} with {len(batch)} payloads: {e}")
+                return
+
+        for path, payload in batch:
+            url = f"{self.endpoint_base}{path}"
+            try:
+                resp = self._session.post(url, json=payload, headers=self.headers, timeout=(10, 60))
+                resp.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Failed POST {url}: {e}")
+
+
 class DocentTracer:
     """
     Manages Docent tracing setup and provides tracing utilities.
@@ -63,8 +277,13 @@ class DocentTracer:
         disable_batch: bool = False,
         instruments: Optional[Set[Instruments]] = None,
         block_instruments: Optional[Set[Instruments]] = None,
+        sample_rate: float = 1.0,
+        capture_content: bool = True,
+        max_attribute_length: Optional[int] = None,
     ):
         self._initialized: bool = False
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(f"sample_rate must be between 0 and 1, got {sample_rate}")
         # Check if tracing is disabled via environment variable
         if _is_tracing_disabled():
             self._disabled = True
@@ -100,6 +319,9 @@ class DocentTracer:
         self.disabled_instruments: Set[Instruments] = {Instruments.LANGCHAIN}
         self.instruments = instruments or (set(Instruments) - self.disabled_instruments)
         self.block_instruments = block_instruments or set()
+        self.sample_rate = sample_rate
+        self.capture_content = capture_content
+        self.max_attribute_length = max_attribute_length
 
         # Use separate tracer provider to avoid interfering with existing OTEL setup
         self._tracer_provider: Optional[TracerProvider] = None
@@ -108,6 +330,7 @@ class DocentTracer:
         self._cleanup_registered: bool = False
         self._disabled: bool = False
         self._spans_processors: List[Union[BatchSpanProcessor, SimpleSpanProcessor]] = []
+        self._telemetry_exporter: Optional[TelemetryBatchExporter] = None
 
         # Base HTTP endpoint for direct API calls (scores, metadata, trace-done)
         if len(self.endpoints) > 0:
@@ -146,6 +369,18 @@ class DocentTracer:
         except LookupError:
             return self.default_agent_run_id
 
+    def is_agent_run_sampled(self, agent_run_id: str) -> bool:
+        """
+        Check whether an agent run is kept by head sampling.
+
+        Runs are sampled by hashing their ID, so the decision is stable for a given
+        agent run ID and `sample_rate`. Spans, scores and metadata of unsampled runs
+        are not sent.
+        """
+        if self.sample_rate >= 1.0:
+            return True
+        return zlib.crc32(agent_run_id.encode()) < self.sample_rate * 0x100000000
+
     def _register_cleanup(self):
         """Register cleanup handlers."""
         if self._cleanup_registered:
@@ -231,14 +466,25 @@ class DocentTracer:
             env_limit = int(env_value) if env_value.isdigit() else 0
             attribute_limit = max(env_limit, default_attribute_limit)
 
+            # Long string attributes (e.g. prompts and completions) are truncated to
+            # max_attribute_length; None defers to OTEL_ATTRIBUTE_VALUE_LENGTH_LIMIT
             span_limits = SpanLimits(
                 max_attributes=attribute_limit,
+                max_attribute_length=self.max_attribute_length,
             )
 
+            # The instrumentors read this at span time to decide whether to record
+            # prompt and completion bodies
+            if not self.capture_content:
+                os.environ["TRACELOOP_TRACE_CONTENT"] = "false"
+
             # Create our own isolated tracer provider
             self._tracer_provider = TracerProvider(
                 resource=Resource.create({"service.name": self.collection_name}),
                 span_limits=span_limits,
+                sampler=(
+                    AgentRunSampler(self, self.sample_rate) if self.sample_rate < 1.0 else None
+                ),
             )
 
             class ContextSpanProcessor(SpanProcessor):
@@ -246,56 +492,40 @@ class DocentTracer:
                     self.manager: "DocentTracer" = manager
 
                 def on_start(self, span: Span, parent_context: Optional[Context] = None) -> None:
-                    # Add collection_id, agent_run_id, transcript_id, transcript_group_id, and any other current attributes
-                    span.set_attribute("collection_id", self.manager.collection_id)
-
-                    # Set agent_run_id from context
-                    try:
-                        agent_run_id: str = self.manager._agent_run_id_var.get()
-                        if agent_run_id:
-                            span.set_attribute("agent_run_id", agent_run_id)
-                        else:
-                            span.set_attribute("agent_run_id_default", True)
-                            span.set_attribute("agent_run_id", self.manager.default_agent_run_id)
-                    except LookupError:
-                        span.set_attribute("agent_run_id_default", True)
-                        span.set_attribute("agent_run_id", self.manager.default_agent_run_id)
-
-                    # Set transcript_group_id from context
-                    try:
-                        transcript_group_id: str = self.manager._transcript_group_id_var.get()
-                        if transcript_group_id:
-                            span.set_attribute("transcript_group_id", transcript_group_id)
-                    except LookupError:
-                        pass
-
-                    # Set transcript_id from context
-                    try:
-                        transcript_id: str = self.manager._transcript_id_var.get()
-                        if transcript_id:
-                            span.set_attribute("transcript_id", transcript_id)
-                            # Add atomic span order number
-                            span_order: int = self.manager._next_span_order(transcript_id)
-                            span.set_attribute("span_order", span_order)
-                    except LookupError:
-                        # transcript_id not available, skip it
-                        pass
-
-                    # Set custom attributes from context
-                    try:
-                        attributes: dict[str, Any] = self.manager._attributes_var.get()
-                        for key, value in attributes.items():
-                            span.set_attribute(key, value)
-                    except LookupError:
-                        # attributes not available, skip them
-                        pass
-
-                    # Debug logging for span creation
-                    span_name = getattr(span, "name", "unknown")
-                    span_attrs = getattr(span, "attributes", {})
-                    logger.debug(
-                        f"Created span: name='{span_name}', collection_id={self.manager.collection_id}, agent_run_id={span_attrs.get('agent_run_id')}, transcript_id={span_attrs.get('transcript_id')}"
-                    )
+                    # Runs for every recorded span, so collect collection_id, agent_run_id,
+                    # transcript_id, transcript_group_id, and any other current attributes
+                    # into one dict and set them in a single call
+                    manager = self.manager
+                    span_attrs: dict[str, Any] = {"collection_id": manager.collection_id}
+
+                    agent_run_id: Optional[str] = manager._agent_run_id_var.get(None)
+                    if agent_run_id:
+                        span_attrs["agent_run_id"] = agent_run_id
+                    else:
+                        span_attrs["agent_run_id_default"] = True
+                        span_attrs["agent_run_id"] = manager.default_agent_run_id
+
+                    transcript_group_id: Optional[str] = manager._transcript_group_id_var.get(None)
+                    if transcript_group_id:
+                        span_attrs["transcript_group_id"] = transcript_group_id
+
+                    transcript_id: Optional[str] = manager._transcript_id_var.get(None)
+                    if transcript_id:
+                        span_attrs["transcript_id"] = transcript_id
+                        # Add atomic span order number
+                        span_attrs["span_order"] = manager._next_span_order(transcript_id)
+
+                    # Custom attributes from context
+                    attributes: Optional[dict[str, Any]] = manager._attributes_var.get(None)
+                    if attributes:
+                        span_attrs.update(attributes)
+
+                    span.set_attributes(span_attrs)
+
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(
+                            f"Created span: name='{getattr(span, 'name', 'unknown')}', collection_id={manager.collection_id}, agent_run_id={span_attrs.get('agent_run_id')}, transcript_id={span_attrs.get('transcript_id')}"
+                        )
 
                 def on_end(self, span: ReadableSpan) -> None:
                     pass
@@ -413,7 +643,8 @@ class DocentTracer:
 
         The cleanup process:
         1. Flushes all span processors to ensure data is exported
-        2. Shuts down the tracer provider and releases resources
+        2. Sends any queued scores and metadata and stops the background exporter
+        3. Shuts down the tracer provider and releases resources
         """
         if self._disabled:
             return
@@ -421,6 +652,9 @@ class DocentTracer:
         try:
             self.flush()
 
+            if self._telemetry_exporter:
+                self._telemetry_exporter.shutdown(timeout=60)
+
             if self._tracer_provider:
                 self._tracer_provider.shutdown()
                 self._tracer_provider = None
@@ -441,7 +675,7 @@ class DocentTracer:
             logger.error(f"Error during close: {e}")
 
     def flush(self) -> None:
-        """Force flush all spans to exporters."""
+        """Force flush all spans to exporters and send queued scores and metadata."""
         if self._disabled:
             return
 
@@ -452,6 +686,9 @@ class DocentTracer:
                     logger.debug(f"Flushing span processor {i}")
                     processor.force_flush(timeout_millis=50)
             logger.debug("Span flush completed")
+
+            if self._telemetry_exporter and not self._telemetry_exporter.flush(timeout=30):
+                logger.warning("Timed out flushing queued scores and metadata")
         except Exception as e:
             logger.error(f"Error during flush: {e}")
 
@@ -597,6 +834,26 @@ class DocentTracer:
 
         return headers
 
+    def _send_json(self, path: str, data: Dict[str, Any]) -> None:
+        """
+        Send a payload to a telemetry endpoint without waiting on the network.
+
+        Payloads are batched by a background TelemetryBatchExporter, except when batching
+        is disabled (or in notebooks), where they are posted immediately as spans are.
+        """
+        if self.disable_batch or _is_notebook():
+            self._post_json(path, data)
+            return
+
+        if not self._api_endpoint_base:
+            raise RuntimeError("API endpoint base is not configured")
+        with self._flush_lock:
+            if self._telemetry_exporter is None:
+                self._telemetry_exporter = TelemetryBatchExporter(
+                    self._api_endpoint_base, self._api_headers()
+                )
+        self._telemetry_exporter.enqueue(path, data)
+
     def _post_json(self, path: str, data: Dict[str, Any]) -> None:
         if not self._api_endpoint_base:
             raise RuntimeError("API endpoint base is not configured")
@@ -623,7 +880,7 @@ class DocentTracer:
             score: Numeric score value
             attributes: Optional additional attributes
         """
-        if self._disabled:
+        if self._disabled or not self.is_agent_run_sampled(agent_run_id):
             return
 
         collection_id = self.collection_id
@@ -636,10 +893,10 @@ class DocentTracer:
         }
         if attributes:
             payload.update(attributes)
-        self._post_json("/v1/scores", payload)
+        self._send_json("/v1/scores", payload)
 
     def send_agent_run_metadata(self, agent_run_id: str, metadata: Dict[str, Any]) -> None:
-        if self._disabled:
+        if self._disabled or not self.is_agent_run_sampled(agent_run_id):
             return
 
         collection_id = self.collection_id
@@ -649,7 +906,7 @@ class DocentTracer:
             "metadata": metadata,
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
-        self._post_json("/v1/agent-run-metadata", payload)
+        self._send_json("/v1/agent-run-metadata", payload)
 
     def send_transcript_metadata(
         self,
@@ -669,7 +926,9 @@ class DocentTracer:
             transcript_group_id: Optional transcript group ID
             metadata: Optional metadata to send
         """
-        if self._disabled:
+        if self._disabled or not self.is_agent_run_sampled(
+            self.get_current_agent_run_id() or self.default_agent_run_id
+        ):
             return
 
         collection_id = self.collection_id
@@ -689,7 +948,7 @@ class DocentTracer:
         if metadata is not None:
             payload["metadata"] = metadata
 
-        self._post_json("/v1/transcript-metadata", payload)
+        self._send_json("/v1/transcript-metadata", payload)
 
     def get_current_transcript_id(self) -> Optional[str]:
         """
@@ -869,6 +1128,8 @@ class DocentTracer:
                 f"Cannot send transcript group metadata for {transcript_group_id} - no agent_run_id in context"
             )
             return
+        if not self.is_agent_run_sampled(agent_run_id):
+            return
 
         payload: Dict[str, Any] = {
             "collection_id": collection_id,
@@ -886,7 +1147,7 @@ class DocentTracer:
         if metadata is not None:
             payload["metadata"] = metadata
 
-        self._post_json("/v1/transcript-group-metadata", payload)
+        self._send_json("/v1/transcript-group-metadata", payload)
 
     @contextmanager
     def transcript_group_context(
@@ -1026,7 +1287,7 @@ class DocentTracer:
             "status": "completed",
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
-        self._post_json("/v1/trace-done", payload)
+        self._send_json("/v1/trace-done", payload)
 
 
 _global_tracer: Optional[DocentTracer] = None
@@ -1043,6 +1304,9 @@ def initialize_tracing(
     disable_batch: bool = False,
     instruments: Optional[Set[Instruments]] = None,
     block_instruments: Optional[Set[Instruments]] = None,
+    sample_rate: float = 1.0,
+    capture_content: bool = True,
+    max_attribute_length: Optional[int] = None,
 ) -> DocentTracer:
     """
     Initialize the global Docent tracer.
@@ -1062,6 +1326,12 @@ def initialize_tracing(
         disable_batch: Whether to disable batch processing (use SimpleSpanProcessor)
         instruments: Set of instruments to enable (None = all instruments).
         block_instruments: Set of instruments to explicitly disable.
+        sample_rate: Fraction of agent runs to trace, decided per agent run ID. Spans,
+                scores and metadata of unsampled runs are dropped before any work is done.
+        capture_content: Whether instrumentors record prompt and completion bodies.
+                Disabling this sets TRACELOOP_TRACE_CONTENT=false for the process.
+        max_attribute_length: Truncate string span attributes to this many characters
+                (None = OTEL_ATTRIBUTE_VALUE_LENGTH_LIMIT, or no limit if unset).
 
     Returns:
         The initialized Docent tracer
@@ -1089,6 +1359,9 @@ def initialize_tracing(
             disable_batch=disable_batch,
             instruments=instruments,
             block_instruments=block_instruments,
+            sample_rate=sample_rate,
+            capture_content=capture_content,
+            max_attribute_length=max_attribute_length,
         )
         _global_tracer.initialize()
 
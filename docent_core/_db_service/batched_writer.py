@@ -1,39 +1,107 @@
+import json
+import time
 import types
-from typing import AsyncContextManager, Callable, List
+from dataclasses import dataclass, replace
+from typing import Any, AsyncContextManager, Awaitable, Callable, List
 
 import anyio
+from sqlalchemy import inspect as sqla_inspect
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import DeclarativeBase
 
 from docent._log_util import get_logger
+from docent_core._db_service.bulk_insert import copy_rows, orm_row
 
 logger = get_logger(__name__)
 
 
+@dataclass
+class BatchedWriterMetrics:
+    """Counters describing a BatchedWriter's throughput and backlog."""
+
+    queue_depth: int = 0
+    queue_bytes: int = 0
+    flushes: int = 0
+    objects_written: int = 0
+    bytes_written: int = 0
+    failed_flushes: int = 0
+    last_flush_latency_s: float = 0.0
+    max_flush_latency_s: float = 0.0
+    total_flush_latency_s: float = 0.0
+
+    @property
+    def mean_flush_latency_s(self) -> float:
+        return self.total_flush_latency_s / self.flushes if self.flushes else 0.0
+
+
+def _estimate_size(obj: DeclarativeBase) -> int:
+    """Roughly estimate how many bytes an object's column values will take on the wire."""
+    size = 0
+    for value in sqla_inspect(obj).dict.values():
+        if isinstance(value, str | bytes):
+            size += len(value)
+        elif isinstance(value, dict | list):
+            size += len(json.dumps(value, default=str))
+        else:
+            size += 8
+    return size
+
+
 class BatchedWriter:
     def __init__(
         self,
         session_cm_factory: Callable[[], AsyncContextManager[AsyncSession]],
         batch_size: int = 50,
         commit_interval_seconds: float = 5.0,
+        max_batch_bytes: int = 8 * 1024 * 1024,
+        max_pending_batches: int = 4,
+        bulk_insert: bool = False,
+        before_commit: Callable[[AsyncSession, list[Any]], Awaitable[None]] | None = None,
     ) -> None:
         """
         A batched writer that manages committing SQLAlchemy objects in batches.
 
+        Objects are double-buffered: `add_all` only appends to the pending buffer, and a
+        background task swaps that buffer out and writes it while producers keep filling
+        a new one. Producers only wait when `max_pending_batches` full batches are
+        already waiting behind an in-flight write.
+
+        With `bulk_insert`, each batch is grouped by model and written with COPY instead
+        of the ORM unit of work. This only suits plain rows without related objects attached
+        or ORM events that must fire, so it is opt-in.
+
         This class MUST be used as a context manager with 'async with'.
 
         Args:
             session_cm_factory: Factory function that creates new session context managers
             batch_size: Number of objects to batch before committing
             commit_interval_seconds: How often to commit pending objects (in seconds)
+            max_batch_bytes: Estimated size of pending objects that triggers a commit
+            max_pending_batches: How many full batches may queue up before producers wait
+            bulk_insert: Whether to write batches with COPY rather than `session.add_all`
+            before_commit: Called with each batch's session and objects after the batch is
+                written and before it commits, for writes that must land in the same transaction
         """
         self.session_cm_factory = session_cm_factory
         self.batch_size = batch_size
-        self._lock = anyio.Lock()
+        self.max_batch_bytes = max_batch_bytes
+        self.max_pending_batches = max_pending_batches
+        self.bulk_insert = bulk_insert
+        self.before_commit = before_commit
+
+        # Serializes writes; only the flush task and commit_pending take it, never add_all
+        self._write_lock = anyio.Lock()
+        self._flush_requested = anyio.Event()
+        self._space_available = anyio.Event()
+        self._flush_error: Exception | None = None
+        self._metrics = BatchedWriterMetrics()
 
         # Object state
         self._context_entered = False
-        self.pending_objects: List[DeclarativeBase] = []
+        # Each add_all call is kept as one chunk so a batch never splits it
+        self._pending_chunks: List[tuple[List[DeclarativeBase], int]] = []
+        self._pending_objects = 0
+        self._pending_bytes = 0
 
         # Background task to commit pending objects
         self.commit_interval_seconds = commit_interval_seconds
@@ -71,17 +139,20 @@ class BatchedWriter:
                 self._task_group = None
 
     async def _background_commit_task(self):
-        """Background task that periodically commits pending objects."""
+        """Background task that commits pending objects when a threshold is hit or the interval passes."""
         while True:
-            await anyio.sleep(self.commit_interval_seconds)
-            logger.info(
-                f"Auto-committing pending objects (interval={self.commit_interval_seconds})"
-            )
+            with anyio.move_on_after(self.commit_interval_seconds):
+                await self._flush_requested.wait()
+            self._flush_requested = anyio.Event()
 
             try:
                 await self.commit_pending()
             except Exception as e:
-                logger.error(f"Error committing pending objects in timed background task: {e}")
+                # Surface the failure to the next add_all; the batch was put back for a retry
+                self._flush_error = e
+                self._space_available.set()
+                self._space_available = anyio.Event()
+                logger.error(f"Error committing pending objects in background task: {e}")
 
     def _ensure_context_manager(self) -> None:
         """Ensure this is being used within a context manager."""
@@ -91,45 +162,129 @@ class BatchedWriter:
                 "Use 'async with BatchedWriter(...) as writer:'"
             )
 
+    def _raise_flush_error(self) -> None:
+        if self._flush_error is not None:
+            error, self._flush_error = self._flush_error, None
+            raise error
+
+    def _batch_full(self) -> bool:
+        return (
+            self._pending_objects >= self.batch_size or self._pending_bytes >= self.max_batch_bytes
+        )
+
     async def add_all(self, objects: List[DeclarativeBase]) -> None:
         """
-        Add objects to the batch. Will commit if batch size is reached.
+        Add objects to the batch. Once the batch is full by count or size, the background
+        task commits it without blocking the caller. Objects added together are always
+        committed in the same transaction.
 
         Args:
             objects: List of SQLAlchemy model instances to add
         """
         self._ensure_context_manager()
+        self._raise_flush_error()
 
-        async with self._lock:
-            self.pending_objects.extend(objects)
+        # Backpressure: wait while several batches' worth of objects are still queued
+        while (
+            self._pending_objects >= self.batch_size * self.max_pending_batches
+            or self._pending_bytes >= self.max_batch_bytes * self.max_pending_batches
+        ):
+            self._flush_requested.set()
+            await self._space_available.wait()
+            self._raise_flush_error()
+
+        if not objects:
+            return
+        size = sum(_estimate_size(obj) for obj in objects)
+        self._pending_chunks.append((list(objects), size))
+        self._pending_objects += len(objects)
+        self._pending_bytes += size
 
-            # Check if we need to commit
-            if len(self.pending_objects) >= self.batch_size:
-                await self._commit_pending_unsafe()
+        if self._batch_full():
+            self._flush_requested.set()
 
     async def commit_pending(self) -> None:
-        """Commit the current batch of pending objects."""
+        """Commit all pending objects, waiting for any in-flight commit to finish first."""
         self._ensure_context_manager()
 
-        async with self._lock:
-            await self._commit_pending_unsafe()
+        async with self._write_lock:
+            while self._pending_chunks:
+                await self._commit_next_batch_unsafe()
 
-    async def _commit_pending_unsafe(self) -> None:
-        """Commit the current batch of pending objects without acquiring the lock."""
-        if not self.pending_objects:
-            return
+    async def _commit_next_batch_unsafe(self) -> None:
+        """Swap out up to one batch of pending objects and commit it. Caller holds the write lock."""
+        # Take whole chunks up to the count and size limits, leaving the rest for producers
+        num_chunks, num_objects, num_bytes = 0, 0, 0
+        for objects, size in self._pending_chunks:
+            if num_chunks and (
+                num_objects + len(objects) > self.batch_size
+                or num_bytes + size > self.max_batch_bytes
+            ):
+                break
+            num_chunks += 1
+            num_objects += len(objects)
+            num_bytes += size
+        chunks = self._pending_chunks[:num_chunks]
+        del self._pending_chunks[:num_chunks]
+        self._pending_objects -= num_objects
+        self._pending_bytes -= num_bytes
+        batch = [obj for objects, _ in chunks for obj in objects]
+        self._space_available.set()
+        self._space_available = anyio.Event()
+
+        start = time.perf_counter()
+        try:
+            async with self.session_cm_factory() as session:
+                if self.bulk_insert:
+                    await self._bulk_insert(session, batch)
+                else:
+                    session.add_all(batch)
+                if self.before_commit is not None:
+                    await self.before_commit(session, batch)
+                await session.commit()
+        except BaseException:
+            # Put the batch back in front so it is retried on the next commit
+            self._pending_chunks[:0] = chunks
+            self._pending_objects += num_objects
+            self._pending_bytes += num_bytes
+            self._metrics.failed_flushes += 1
+            raise
+
+        latency = time.perf_counter() - start
+        m = self._metrics
+        m.flushes += 1
+        m.objects_written += num_objects
+        m.bytes_written += num_bytes
+        m.last_flush_latency_s = latency
+        m.max_flush_latency_s = max(m.max_flush_latency_s, latency)
+        m.total_flush_latency_s += latency
+
+        logger.info(
+            f"Committed batch of {num_objects} objects (~{num_bytes / 1024:.0f} KiB) in {latency:.3f}s; "
+            f"{self._pending_objects} objects still queued"
+        )
 
-        batch_size = len(self.pending_objects)
+    @staticmethod
+    async def _bulk_insert(session: AsyncSession, batch: List[DeclarativeBase]) -> None:
+        """COPY a batch model by model, with parent tables before the tables referencing them."""
+        rows_by_model: dict[type[DeclarativeBase], list[dict[str, Any]]] = {}
+        for obj in batch:
+            rows_by_model.setdefault(type(obj), []).append(orm_row(obj))
 
-        async with self.session_cm_factory() as session:
-            session.add_all(self.pending_objects)
-            await session.commit()
-        self.pending_objects.clear()
+        table_order = {table.name: i for i, table in enumerate(batch[0].metadata.sorted_tables)}
+        for model in sorted(
+            rows_by_model, key=lambda m: table_order.get(sqla_inspect(m).local_table.name, 0)
+        ):
+            await copy_rows(session, model, rows_by_model[model])
 
-        logger.info(f"Committed batch of {batch_size} objects")
+    def metrics(self) -> BatchedWriterMetrics:
+        """Return a snapshot of flush counts, latencies and the current queue depth."""
+        return replace(
+            self._metrics, queue_depth=self._pending_objects, queue_bytes=self._pending_bytes
+        )
 
     @property
     def pending_count(self) -> int:
         """Return the number of pending objects."""
         self._ensure_context_manager()
-        return len(self.pending_objects)
+        return self._pending_objects
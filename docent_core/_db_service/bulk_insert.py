@@ -0,0 +1,99 @@
+"""Bulk insert helpers that bypass the ORM unit of work.
+
+`session.add_all` tracks every object in the identity map and emits inserts through the
+unit of work, which dominates the cost of large imports. These helpers instead turn ORM
+objects into plain rows and stream them into Postgres with COPY.
+"""
+
+from typing import Any, Mapping, Sequence, cast
+
+from sqlalchemy import Table, insert
+from sqlalchemy import inspect as sqla_inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import DeclarativeBase
+
+from docent._log_util import get_logger
+
+logger = get_logger(__name__)
+
+
+def orm_row(obj: DeclarativeBase) -> dict[str, Any]:
+    """Return the column values that have been set on a (transient) ORM object.
+
+    Columns that were never set are left out, so `copy_rows` fills in their defaults.
+    """
+    state = sqla_inspect(obj)
+    row: dict[str, Any] = {}
+    for attr in state.mapper.column_attrs:
+        if attr.key in state.dict:
+            row[attr.columns[0].name] = state.dict[attr.key]
+    return row
+
+
+def _column_default(column: Any) -> Any:
+    default = column.default
+    if default is None:
+        return None
+    if default.is_callable:
+        # SQLAlchemy wraps zero-argument callables to accept an execution context
+        return default.arg(None)
+    if default.is_scalar:
+        return default.arg
+    raise ValueError(f"Cannot bulk insert into {column}: unsupported default {default!r}")
+
+
+async def copy_rows(
+    session: AsyncSession, model: type[DeclarativeBase], rows: Sequence[Mapping[str, Any]]
+) -> int:
+    """Insert rows into a model's table with COPY, inside the session's current transaction.
+
+    Python-side column defaults are applied to columns missing from a row, columns with only
+    a server default are left to Postgres, and values go through each column type's bind
+    processing (JSON encoding, enum names, ...), so rows end up the same as with an ORM
+    insert. Falls back to a multi-row INSERT when the
+    connection doesn't support COPY.
+
+    Returns:
+        int: The number of rows inserted.
+    """
+    if not rows:
+        return 0
+    table = cast(Table, model.__table__)
+
+    connection = await session.connection()
+    # The asyncpg adapter only sends BEGIN before the first statement it executes itself, so
+    # a COPY sent straight to the driver before then would commit on its own
+    await connection.exec_driver_sql("SELECT 1")
+    raw_connection = await connection.get_raw_connection()
+    driver_connection = raw_connection.driver_connection
+    if not hasattr(driver_connection, "copy_records_to_table"):
+        await session.execute(insert(table), [dict(row) for row in rows])
+        return len(rows)
+
+    processors = {c.name: c.type.bind_processor(connection.dialect) for c in table.columns}
+    # Columns that only have a server default are left out of the COPY for rows that don't
+    # set them, so Postgres fills them in; rows are grouped by the columns they end up with
+    records_by_columns: dict[tuple[Any, ...], list[tuple[Any, ...]]] = {}
+    for row in rows:
+        columns = tuple(
+            c
+            for c in table.columns
+            if c.name in row or c.default is not None or c.server_default is None
+        )
+        record: list[Any] = []
+        for column in columns:
+            value = row[column.name] if column.name in row else _column_default(column)
+            process = processors[column.name]
+            if value is not None and process is not None:
+                value = process(value)
+            record.append(value)
+        records_by_columns.setdefault(columns, []).append(tuple(record))
+
+    for columns, records in records_by_columns.items():
+        await driver_connection.copy_records_to_table(  # type: ignore[union-attr]
+            table.name,
+            records=records,
+            columns=[c.name for c in columns],
+            schema_name=table.schema,
+        )
+    return len(rows)
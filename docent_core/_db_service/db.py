@@ -14,6 +14,13 @@ from sqlalchemy.ext.asyncio import (
 
 import docent_core._db_service.schemas._all_tables as tables  # Import all tables to ensure SQLAlchemy checks their existence
 from docent._log_util import get_logger
+from docent_core._db_service.pool import (
+    PoolMetrics,
+    create_pooled_engine,
+    get_pool_metrics,
+    get_pool_settings,
+    get_process_role,
+)
 from docent_core._env_util import ENV
 
 logger = get_logger(__name__)
@@ -121,15 +128,11 @@ class DocentDB:
             connection_url = url.set(database=target_database)
             logger.info(f"Using database connection: {connection_url}")
 
-            # Initialize engine with connection pooling
-            engine = create_async_engine(
-                connection_url,
-                pool_size=25,
-                max_overflow=25,
-                pool_timeout=30,
-                pool_recycle=1800,  # Recycle connections after 30 minutes
-                pool_pre_ping=True,  # Check connection validity before use
-            )
+            # Initialize engine with connection pooling sized for this process's role
+            role = get_process_role()
+            pool_settings = get_pool_settings(role)
+            logger.info(f"Using {role} pool settings: {pool_settings}")
+            engine = create_pooled_engine(connection_url, pool_settings)
 
             # Create session factory
             Session = async_sessionmaker(
@@ -205,6 +208,10 @@ class DocentDB:
         async with self.engine.begin() as conn:
             await conn.run_sync(tables.base.SQLABase.metadata.drop_all)
 
+    def pool_metrics(self) -> PoolMetrics | None:
+        """Get a snapshot of the connection pool's metrics, if its pool records them."""
+        return get_pool_metrics(self.engine)
+
     @asynccontextmanager
     async def session(self) -> AsyncIterator[AsyncSession]:
         """Provide a transactional scope around a series of operations."""
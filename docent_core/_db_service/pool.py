@@ -0,0 +1,229 @@
+"""
+Connection pool settings per process role, and pool metrics.
+
+API servers handle many concurrent requests, while a worker runs one job at a time, so
+each role sizes its pool separately. Defaults can be overridden for all roles with
+`DOCENT_PG_<SETTING>` or for one role with `DOCENT_<ROLE>_PG_<SETTING>`, e.g.
+`DOCENT_WORKER_PG_POOL_SIZE=5`.
+"""
+
+import time
+from dataclasses import dataclass, fields, replace
+from typing import Any, Literal
+
+import anyio
+from sqlalchemy import URL, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+
+from docent._log_util import get_logger
+from docent_core._env_util import ENV
+
+logger = get_logger(__name__)
+
+ProcessRole = Literal["server", "worker"]
+
+# Checkouts that wait longer than this are logged with the pool's occupancy
+SLOW_CHECKOUT_SECONDS = 1.0
+POOL_METRICS_REPORT_INTERVAL_SECONDS = 60
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    """Connection pool and per-connection settings for a process role."""
+
+    pool_size: int
+    max_overflow: int
+    pool_timeout: float
+    # Applied to every statement on the pool's connections; 0 disables it
+    statement_timeout_ms: int
+    # Prepared statements cached per connection; 0 disables caching, e.g. behind PgBouncer
+    prepared_statement_cache_size: int
+
+
+DEFAULT_POOL_SETTINGS: dict[ProcessRole, PoolSettings] = {
+    "server": PoolSettings(
+        pool_size=25,
+        max_overflow=25,
+        pool_timeout=30.0,
+        statement_timeout_ms=0,
+        prepared_statement_cache_size=100,
+    ),
+    # Workers run one job at a time, though jobs and index builds can run long statements
+    "worker": PoolSettings(
+        pool_size=10,
+        max_overflow=20,
+        pool_timeout=60.0,
+        statement_timeout_ms=0,
+        prepared_statement_cache_size=100,
+    ),
+}
+
+_process_role: ProcessRole = "server"
+
+
+def set_process_role(role: ProcessRole):
+    """Set the role whose pool settings this process uses. Call before `DocentDB.init`."""
+    global _process_role
+    _process_role = role
+
+
+def get_process_role() -> ProcessRole:
+    return _process_role
+
+
+def get_pool_settings(role: ProcessRole) -> PoolSettings:
+    """Get a role's pool settings, with overrides from the environment applied."""
+    settings = DEFAULT_POOL_SETTINGS[role]
+    overrides: dict[str, Any] = {}
+    for field in fields(PoolSettings):
+        for env_var in (
+            f"DOCENT_PG_{field.name.upper()}",
+            f"DOCENT_{role.upper()}_PG_{field.name.upper()}",
+        ):
+            value = ENV.get(env_var)
+            if value:
+                try:
+                    overrides[field.name] = field.type(value)  # type: ignore
+                except ValueError as e:
+                    raise ValueError(f"Invalid value for {env_var}: {value}") from e
+    return replace(settings, **overrides)
+
+
+@dataclass
+class PoolMetrics:
+    """Counters describing how a pool's connections are checked out and replaced."""
+
+    checkouts: int = 0
+    checkout_timeouts: int = 0
+    slow_checkouts: int = 0
+    total_checkout_wait_s: float = 0.0
+    max_checkout_wait_s: float = 0.0
+    connections_opened: int = 0
+    connections_closed: int = 0
+    connections_invalidated: int = 0
+    # Occupancy when the snapshot was taken
+    checked_out: int = 0
+    idle: int = 0
+    overflow: int = 0
+
+    @property
+    def mean_checkout_wait_s(self) -> float:
+        return self.total_checkout_wait_s / self.checkouts if self.checkouts else 0.0
+
+
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records checkout waits and connection churn in `PoolMetrics`."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self) -> "MeteredQueuePool":
+        # Keep counting across `engine.dispose()`
+        pool = super().recreate()
+        assert isinstance(pool, MeteredQueuePool)
+        pool.metrics = self.metrics
+        return pool
+
+    def connect(self) -> PoolProxiedConnection:
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.metrics.checkout_timeouts += 1
+            logger.error(f"Timed out waiting for a database connection: {self.status()}")
+            raise
+
+        wait = time.perf_counter() - start
+        m = self.metrics
+        m.checkouts += 1
+        m.total_checkout_wait_s += wait
+        m.max_checkout_wait_s = max(m.max_checkout_wait_s, wait)
+        if wait >= SLOW_CHECKOUT_SECONDS:
+            m.slow_checkouts += 1
+            logger.warning(f"Waited {wait:.2f}s for a database connection: {self.status()}")
+        return connection
+
+    def metrics_snapshot(self) -> PoolMetrics:
+        """Return a copy of the counters, with the pool's current occupancy."""
+        return replace(
+            self.metrics,
+            checked_out=self.checkedout(),
+            idle=self.checkedin(),
+            overflow=max(self.overflow(), 0),
+        )
+
+
+def create_pooled_engine(url: URL, settings: PoolSettings) -> AsyncEngine:
+    """Create an engine whose pool follows `settings` and records `PoolMetrics`."""
+    server_settings: dict[str, str] = {}
+    if settings.statement_timeout_ms > 0:
+        server_settings["statement_timeout"] = str(settings.statement_timeout_ms)
+
+    engine = create_async_engine(
+        url,
+        poolclass=MeteredQueuePool,
+        pool_size=settings.pool_size,
+        max_overflow=settings.max_overflow,
+        pool_timeout=settings.pool_timeout,
+        pool_recycle=1800,  # Recycle connections after 30 minutes
+        pool_pre_ping=True,  # Check connection validity before use
+        connect_args={
+            "prepared_statement_cache_size": settings.prepared_statement_cache_size,
+            "server_settings": server_settings,
+        },
+    )
+
+    def _metrics() -> PoolMetrics:
+        pool = engine.pool
+        assert isinstance(pool, MeteredQueuePool)
+        return pool.metrics
+
+    # Listeners on the engine stay attached when its pool is recreated
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(*_: Any):  # type: ignore[reportUnusedFunction]
+        _metrics().connections_opened += 1
+
+    @event.listens_for(engine.sync_engine, "close")
+    def _on_close(*_: Any):  # type: ignore[reportUnusedFunction]
+        _metrics().connections_closed += 1
+
+    @event.listens_for(engine.sync_engine, "invalidate")
+    def _on_invalidate(*_: Any):  # type: ignore[reportUnusedFunction]
+        _metrics().connections_invalidated += 1
+
+    return engine
+
+
+def get_pool_metrics(engine: AsyncEngine) -> PoolMetrics | None:
+    """Get a snapshot of an engine's pool metrics, if its pool records them."""
+    pool = engine.pool
+    return pool.metrics_snapshot() if isinstance(pool, MeteredQueuePool) else None
+
+
+async def report_pool_metrics(
+    engine: AsyncEngine, interval_seconds: float = POOL_METRICS_REPORT_INTERVAL_SECONDS
+):
+    """Log an engine's pool metrics every interval, until cancelled."""
+    previous = PoolMetrics()
+    while True:
+        await anyio.sleep(interval_seconds)
+        m = get_pool_metrics(engine)
+        if m is None:
+            return
+
+        checkouts = m.checkouts - previous.checkouts
+        wait = m.total_checkout_wait_s - previous.total_checkout_wait_s
+        logger.info(
+            f"DB pool ({get_process_role()}): {m.checked_out} checked out, {m.idle} idle, "
+            f"{m.overflow} overflow; {checkouts} checkouts, "
+            f"mean wait {wait / checkouts if checkouts else 0.0:.4f}s, "
+            f"{m.slow_checkouts - previous.slow_checkouts} slow, "
+            f"{m.checkout_timeouts - previous.checkout_timeouts} timed out; "
+            f"{m.connections_opened - previous.connections_opened} connections opened, "
+            f"{m.connections_closed - previous.connections_closed} closed, "
+            f"{m.connections_invalidated - previous.connections_invalidated} invalidated"
+        )
+        previous = m
@@ -9,10 +9,13 @@ from sentry_sdk.integrations.asgi import SentryAsgiMiddleware  # type: ignore
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from docent._log_util import get_logger
+from docent_core._db_service.db import DocentDB
+from docent_core._db_service.pool import report_pool_metrics
 from docent_core._env_util import ENV, get_deployment_id, init_sentry_or_raise
 from docent_core._server._analytics.posthog import AnalyticsClient
 from docent_core._server._auth.session_middleware import SessionAuthMiddleware
 from docent_core._server._rest._all_routers import REST_ROUTERS
+from docent_core.docent.services.auth_cache import run_auth_cache_listener
 from docent_core.docent.services.chat import ChatService
 from docent_core.docent.services.rubric import RubricService
 
@@ -148,10 +151,23 @@ async def periodic_cleanup_task():
             await anyio.sleep(3600)
 
 
+async def pool_metrics_task():
+    """Background task that periodically logs database connection pool metrics."""
+    try:
+        db = await DocentDB.init()
+    except Exception as e:
+        logger.error(f"Not reporting connection pool metrics: {e}")
+        return
+    await report_pool_metrics(db.engine)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     async with anyio.create_task_group() as tg:
         tg.start_soon(periodic_cleanup_task)
+        # Caches sessions, permissions and default views while it's subscribed
+        tg.start_soon(run_auth_cache_listener)
+        tg.start_soon(pool_metrics_task)
 
         yield
 
@@ -1,8 +1,10 @@
 import json
+import zlib
 from typing import Any, AsyncIterator, Awaitable, Callable
 
 import anyio
 from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from fastapi import HTTPException, Request
 from pydantic_core import to_jsonable_python
 
 
@@ -45,3 +47,67 @@ def sse_stream(
 
     generator = callback_streams_to_generator(execute, send_stream, recv_stream)
     return generator_to_sse_stream(generator)
+
+
+# Largest request body accepted after decompression. Compressed bodies are small enough to
+# pass any proxy limit, so this is what bounds the memory a single upload can take.
+MAX_DECOMPRESSED_BODY_BYTES = 256 * 1024 * 1024
+
+_DECOMPRESS_WBITS = {
+    "gzip": 16 + zlib.MAX_WBITS,
+    "deflate": zlib.MAX_WBITS,
+}
+
+
+def _decompress_capped(body: bytes, encoding: str, max_bytes: int) -> bytes:
+    """Decompress a gzip or deflate body, refusing to produce more than `max_bytes`.
+
+    gzip bodies may consist of several concatenated members, like `gzip.decompress` accepts.
+    """
+    chunks: list[bytes] = []
+    size = 0
+    remaining = body
+    while True:
+        decompressor = zlib.decompressobj(_DECOMPRESS_WBITS[encoding])
+        # Asking for one byte more than is allowed tells a body at the limit from one over it
+        chunk = decompressor.decompress(remaining, max_bytes - size + 1)
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Decompressed request body exceeds {max_bytes} bytes",
+            )
+        chunks.append(chunk)
+        if not decompressor.eof:
+            raise HTTPException(
+                status_code=400, detail=f"Invalid {encoding} request body: truncated"
+            )
+        remaining = decompressor.unused_data
+        if encoding != "gzip" or not remaining:
+            break
+    return b"".join(chunks)
+
+
+async def read_request_body(
+    request: Request, max_decompressed_bytes: int = MAX_DECOMPRESSED_BODY_BYTES
+) -> bytes:
+    """Read the raw request body, undoing any gzip or deflate Content-Encoding.
+
+    Decompression runs in a worker thread so large uploads don't block the event loop, and
+    stops with a 413 once the output passes `max_decompressed_bytes`.
+    """
+
+    body = await request.body()
+    encoding = request.headers.get("content-encoding", "identity").strip().lower()
+
+    if encoding in _DECOMPRESS_WBITS:
+        try:
+            return await anyio.to_thread.run_sync(
+                _decompress_capped, body, encoding, max_decompressed_bytes
+            )
+        except zlib.error as e:
+            raise HTTPException(status_code=400, detail=f"Invalid {encoding} request body: {e}")
+
+    if encoding != "identity":
+        raise HTTPException(status_code=415, detail=f"Unsupported content encoding: {encoding}")
+    return body
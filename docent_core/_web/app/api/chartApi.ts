@@ -3,6 +3,15 @@ import { BASE_URL } from '@/app/constants';
 import { ChartDimension, ChartSpec, ChartType } from '../types/collectionTypes';
 import { TaskStats } from '../types/experimentViewerTypes';
 
+// A chart whose data couldn't be computed has an error instead of a result
+interface ChartDataResponse {
+  request_type?: string;
+  result?: {
+    binStats: Record<string, TaskStats>;
+  };
+  error?: string;
+}
+
 export const chartApi = createApi({
   reducerPath: 'chartApi',
   baseQuery: fetchBaseQuery({
@@ -68,21 +77,22 @@ export const chartApi = createApi({
       }),
       providesTags: ['Charts'],
     }),
-    getChartData: build.query<
-      {
-        request_type: string;
-        result: {
-          binStats: Record<string, TaskStats>;
-        };
-      },
-      { collectionId: string; chartId: string }
+    // Data for several charts in one request, keyed by chart ID; all charts by default
+    getChartsData: build.query<
+      Record<string, ChartDataResponse>,
+      { collectionId: string; chartIds?: string[] }
     >({
-      query: ({ collectionId, chartId }) => ({
-        url: `/${collectionId}/${chartId}/data`,
-        method: 'GET',
+      query: ({ collectionId, chartIds }) => ({
+        url: `/${collectionId}/data`,
+        method: 'POST',
+        body: { chart_ids: chartIds },
       }),
-      providesTags: (result, error, { chartId }) => [
-        { type: 'ChartData', id: chartId },
+      providesTags: (result) => [
+        'ChartData',
+        ...Object.keys(result ?? {}).map((id) => ({
+          type: 'ChartData' as const,
+          id,
+        })),
       ],
     }),
     getChartMetadata: build.query<
@@ -107,5 +117,5 @@ export const {
   useDeleteChartMutation,
   useGetChartMetadataQuery,
   useGetChartsQuery,
-  useGetChartDataQuery,
+  useGetChartsDataQuery,
 } = chartApi;
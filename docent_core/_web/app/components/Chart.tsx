@@ -8,7 +8,7 @@ import ChartContainer from './ChartContainer';
 import { ChartSpec } from '../types/collectionTypes';
 import { useAppSelector } from '../store/hooks';
 import { ChartData, getScoreAt, parseChartData } from '../utils/chartDataUtils';
-import { useGetChartDataQuery } from '../api/chartApi';
+import { useGetChartsDataQuery } from '../api/chartApi';
 import { useChartFilters } from '../../hooks/use-chart-filters';
 import { CustomBarTooltip, CustomLineTooltip } from './CustomTooltips';
 import { Loader2 } from 'lucide-react';
@@ -23,17 +23,22 @@ export default function Chart({ chart }: { chart: ChartSpec }) {
   const collectionId = useAppSelector((state) => state.collection.collectionId);
   const { handleCellClick } = useChartFilters(collectionId);
 
+  // Every chart's data comes from one batched request, shared by all charts
   const {
     data: chartDataResponse,
     isLoading,
     error,
-  } = useGetChartDataQuery(
+  } = useGetChartsDataQuery(
     {
       collectionId: collectionId!,
-      chartId: chart.id,
     },
     {
       skip: !collectionId,
+      selectFromResult: ({ data, isLoading, error }) => ({
+        data: data?.[chart.id],
+        isLoading,
+        error,
+      }),
     }
   );
 
@@ -72,6 +77,15 @@ export default function Chart({ chart }: { chart: ChartSpec }) {
     );
   }
 
+  // Only this chart failed; the batched request still returned the others
+  if (chartDataResponse?.error) {
+    return (
+      <div className="flex items-center justify-center p-4 text-sm">
+        Error loading chart: {chartDataResponse.error}
+      </div>
+    );
+  }
+
   if (chart.chart_type === 'bar') {
     return <BarChart chartData={chartData} handleCellClick={handleCellClick} />;
   } else if (chart.chart_type === 'line') {
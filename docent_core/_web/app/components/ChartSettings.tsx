@@ -25,7 +25,7 @@ import {
 } from '../types/collectionTypes';
 import {
   useGetChartMetadataQuery,
-  useGetChartDataQuery,
+  useGetChartsDataQuery,
 } from '../api/chartApi';
 import { FilterControls, toggleFilterDisabledState } from './FilterControls';
 import { FilterChips } from './FilterChips';
@@ -178,9 +178,15 @@ export default function ChartSettings({ chart, onChange }: ChartSettingsProps) {
 
   // Reuse chart data cache for export without extra requests
   const { data: chartDataResponse, isFetching: isFetchingChartData } =
-    useGetChartDataQuery(
-      { collectionId: collectionId!, chartId: chart.id },
-      { skip: !collectionId }
+    useGetChartsDataQuery(
+      { collectionId: collectionId! },
+      {
+        skip: !collectionId,
+        selectFromResult: ({ data, isFetching }) => ({
+          data: data?.[chart.id],
+          isFetching,
+        }),
+      }
     );
 
   // In the new system, innerBinKey and outerBinKey are metadata keys directly
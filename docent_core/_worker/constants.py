@@ -2,6 +2,8 @@ from enum import Enum
 
 WORKER_QUEUE_NAME = "docent_worker_queue"
 JOB_TIMEOUT_SECONDS = 10 * 60  # 10 minutes
+# Index builds scan all agent runs, which can take longer than a job
+METADATA_INDEX_MAINTENANCE_TIMEOUT_SECONDS = 60 * 60  # 1 hour
 
 
 class WorkerFunction(str, Enum):
@@ -12,3 +14,5 @@ class WorkerFunction(str, Enum):
     CLUSTERING_JOB = "clustering_job"
     CHAT_JOB = "chat_job"
     TELEMETRY_PROCESSING_JOB = "telemetry_processing_job"
+    DELETE_COLLECTION_JOB = "delete_collection_job"
+    DELETE_AGENT_RUNS_JOB = "delete_agent_runs_job"
@@ -8,6 +8,10 @@ from docent_core.docent.workers.centroid_assignment_worker import (
     clustering_job,
 )
 from docent_core.docent.workers.chat_worker import chat_job
+from docent_core.docent.workers.deletion_worker import (
+    delete_agent_runs_job,
+    delete_collection_job,
+)
 from docent_core.docent.workers.embedding_worker import compute_embeddings
 from docent_core.docent.workers.refinement_worker import refinement_agent_job
 from docent_core.docent.workers.rubric_job_worker import rubric_job
@@ -21,4 +25,6 @@ JOB_DISPATCHER_MAP: dict[str, Callable[[ViewContext, SQLAJob], Coroutine[Any, An
     WorkerFunction.CHAT_JOB.value: chat_job,
     WorkerFunction.CLUSTERING_JOB.value: clustering_job,
     WorkerFunction.TELEMETRY_PROCESSING_JOB.value: telemetry_processing_job,
+    WorkerFunction.DELETE_COLLECTION_JOB.value: delete_collection_job,
+    WorkerFunction.DELETE_AGENT_RUNS_JOB.value: delete_agent_runs_job,
 }
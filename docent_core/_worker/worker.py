@@ -2,21 +2,29 @@
 Make sure to clean up any Redis streams and state keys after the job is finished!
 """
 
+import asyncio
 import traceback
 from typing import Any
 
 import anyio
 from anyio.abc import TaskGroup
+from arq import cron
 from arq.connections import RedisSettings
 from arq.worker import run_worker
 
 from docent._log_util import get_logger
+from docent_core._db_service.pool import report_pool_metrics, set_process_role
 from docent_core._env_util import ENV, get_deployment_id, init_sentry_or_raise
 from docent_core._server._broker.redis_client import get_redis_client
-from docent_core._worker.constants import JOB_TIMEOUT_SECONDS, WORKER_QUEUE_NAME
+from docent_core._worker.constants import (
+    JOB_TIMEOUT_SECONDS,
+    METADATA_INDEX_MAINTENANCE_TIMEOUT_SECONDS,
+    WORKER_QUEUE_NAME,
+)
 from docent_core._worker.job_worker_map import JOB_DISPATCHER_MAP
 from docent_core.docent.db.contexts import ViewContext
 from docent_core.docent.db.schemas.tables import JobStatus
+from docent_core.docent.services.metadata_indexes import MetadataIndexService
 from docent_core.docent.services.monoservice import MonoService
 
 logger = get_logger(__name__)
@@ -114,7 +122,37 @@ async def run_job(_: Any, ctx: ViewContext, job_id: str):
         tg.start_soon(await_commands, tg)
 
 
+async def resume_deletion_jobs(_: Any):
+    """Resume deletions whose worker died in the middle of them."""
+    mono_svc = await MonoService.init()
+    resumed = await mono_svc.resume_deletion_jobs()
+    if resumed:
+        logger.info(f"Resumed {len(resumed)} interrupted deletion jobs")
+
+
+async def on_startup(ctx: dict[str, Any]):
+    await resume_deletion_jobs(ctx)
+
+    mono_svc = await MonoService.init()
+    ctx["pool_metrics_task"] = asyncio.create_task(report_pool_metrics(mono_svc.db.engine))
+
+
+async def on_shutdown(ctx: dict[str, Any]):
+    if (task := ctx.get("pool_metrics_task")) is not None:
+        task.cancel()
+
+
+async def maintain_metadata_indexes(_: Any):
+    """Build indexes for hot metadata paths and drop cold ones, one pass at a time."""
+    mono_svc = await MonoService.init()
+    async with mono_svc.advisory_lock("metadata_indexes", action_id="maintain"):
+        await MetadataIndexService(mono_svc.db).maintain()
+
+
 def run():
+    # Size the database connection pool for a worker, before anything connects
+    set_process_role("worker")
+
     # Initialize Sentry for production/staging environments
     deployment_id = get_deployment_id()
     if deployment_id:
@@ -150,6 +188,17 @@ def run():
     run_worker(
         {
             "functions": [run_job],
+            "cron_jobs": [
+                cron(
+                    maintain_metadata_indexes,  # type: ignore
+                    minute={0, 15, 30, 45},
+                    timeout=METADATA_INDEX_MAINTENANCE_TIMEOUT_SECONDS,
+                ),
+                # Heartbeats only go stale a while after a worker dies, so check regularly
+                cron(resume_deletion_jobs, minute=set(range(0, 60, 5))),  # type: ignore
+            ],
+            "on_startup": on_startup,
+            "on_shutdown": on_shutdown,
             "redis_settings": redis_settings,
             "queue_name": WORKER_QUEUE_NAME,
             "max_jobs": 1,  # per worker
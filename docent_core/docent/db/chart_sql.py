@@ -1,7 +1,8 @@
 import logging
 from typing import TYPE_CHECKING, Any, Optional
 
-from sqlalchemy import Numeric, and_, case, cast, func, select
+from sqlalchemy import Numeric, and_, case, cast, func, literal, select, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, array
 from sqlalchemy.sql import Select
 from sqlalchemy.sql.sqltypes import Text
 
@@ -53,31 +54,25 @@ def _convert_to_numeric(raw: Any) -> Any:
     )
 
 
-def generate_chart_query(
+def _build_chart_source(
     dimensions: list["ChartDimension"],
-    measure: "ChartDimension",
     runs_filter: Optional[ComplexFilter],
     collection_id: str,
-) -> Select[Any]:
-    """Generate SQL query for chart data using ChartDimension objects.
-
-    Builds a single-level SELECT with proper joins, filters, and aggregation.
+    agent_run_ids: Optional[list[str]] = None,
+    judge_result_ids: Optional[list[str]] = None,
+) -> tuple[Any, dict[str, Any], Any]:
+    """Build the FROM clause, column map and WHERE clause shared by chart queries.
 
     Args:
-        dimensions: List of ChartDimension objects for grouping
-        measure: ChartDimension object for the measure
-        runs_filter: Optional filter for agent runs
-        collection_id: Collection to query
+        dimensions: Every dimension and measure the query reads
+        agent_run_ids: Optionally restrict the query to these agent runs
+        judge_result_ids: Optionally restrict judge subqueries to these judge results
 
     Returns:
-        Complete SQL query for chart data
-
-    Raises:
-        ChartSQLValidationError: If any parameters fail validation
+        (from_clause, column_map, where_clause), where column_map maps dimension keys and
+        "id" to the columns to select
     """
-
-    all_dimensions = dimensions + [measure]
-    unique_dimensions = list({dim.key: dim for dim in all_dimensions}.values())
+    unique_dimensions = list({dim.key: dim for dim in dimensions}.values())
 
     # Only get runs that are in the collection and match the filter
     where_clause = SQLAAgentRun.collection_id == collection_id
@@ -85,6 +80,8 @@ def generate_chart_query(
         runs_filter_clause = runs_filter.to_sqla_where_clause(SQLAAgentRun)
         if runs_filter_clause is not None:
             where_clause = and_(where_clause, runs_filter_clause)
+    if agent_run_ids is not None:
+        where_clause = and_(where_clause, SQLAAgentRun.id.in_(agent_run_ids))
 
     from_clause: Any = SQLAAgentRun.__table__
 
@@ -104,15 +101,16 @@ def generate_chart_query(
     # Join one judge subquery per judge dimension
     judge_dims = [d for d in unique_dimensions if isinstance(d, JudgeOutputDimension)]
     for idx, dim in enumerate(judge_dims):
+        judge_where_clause = and_(
+            SQLAJudgeResult.rubric_id == dim.judge_id,
+            SQLAJudgeResult.rubric_version == dim.judge_version,
+        )
+        if judge_result_ids is not None:
+            judge_where_clause = and_(judge_where_clause, SQLAJudgeResult.id.in_(judge_result_ids))
         judge_subquery = (
             select(SQLAJudgeResult.agent_run_id, dim.expression.label(dim.key))
             .select_from(judge_results_table)
-            .where(
-                and_(
-                    SQLAJudgeResult.rubric_id == dim.judge_id,
-                    SQLAJudgeResult.rubric_version == dim.judge_version,
-                )
-            )
+            .where(judge_where_clause)
             .subquery(name=f"judge_subquery_{idx}")
         )
 
@@ -121,38 +119,81 @@ def generate_chart_query(
         )
         column_map[dim.key] = judge_subquery.c[dim.key]
 
-    # Build SELECT and GROUP BY clauses for aggregation
-    outer_select: list[Any] = []
-    outer_group_by: list[Any] = []
+    return from_clause, column_map, where_clause
+
 
+def _dimension_columns(dimensions: list["ChartDimension"], column_map: dict[str, Any]) -> list[Any]:
+    dim_exprs: list[Any] = []
     for dim in dimensions:
         if isinstance(dim, (RunMetadataDimension, JudgeOutputDimension)):
-            dim_expr = column_map[dim.key]
-            outer_select.append(dim_expr.label(dim.key))
-            outer_group_by.append(dim_expr)
+            dim_exprs.append(column_map[dim.key])
         else:
             raise TypeError(f"Unsupported dimension type: {type(dim)}")
+    return dim_exprs
 
+
+def _measure_columns(
+    measure: "ChartDimension", column_map: dict[str, Any], label_suffix: str = ""
+) -> list[Any]:
+    """Aggregate a measure: `measure_value`, plus `measure_count` and `measure_ci` unless
+    the measure counts runs. Labels get `label_suffix` appended."""
     if isinstance(measure, CountRunDimension):
-        outer_select.append(func.count(column_map["id"]).label("measure_value"))
-    else:
-        numeric_value = _convert_to_numeric(column_map[measure.key])
+        return [func.count(column_map["id"]).label(f"measure_value{label_suffix}")]
 
-        avg_measure = func.avg(numeric_value)
-        count_measure = func.count(numeric_value)
-        stddev_measure = func.stddev(numeric_value)
+    numeric_value = _convert_to_numeric(column_map[measure.key])
 
-        ci_measure = case(
-            (
-                func.coalesce(count_measure, 0) > 1,
-                1.96 * func.coalesce(stddev_measure, 0) / func.sqrt(count_measure),
-            ),
-            else_=0,
-        )
+    avg_measure = func.avg(numeric_value)
+    count_measure = func.count(numeric_value)
+    stddev_measure = func.stddev(numeric_value)
+
+    ci_measure = case(
+        (
+            func.coalesce(count_measure, 0) > 1,
+            1.96 * func.coalesce(stddev_measure, 0) / func.sqrt(count_measure),
+        ),
+        else_=0,
+    )
+
+    return [
+        avg_measure.label(f"measure_value{label_suffix}"),
+        count_measure.label(f"measure_count{label_suffix}"),
+        ci_measure.label(f"measure_ci{label_suffix}"),
+    ]
 
-        outer_select.append(avg_measure.label("measure_value"))
-        outer_select.append(count_measure.label("measure_count"))
-        outer_select.append(ci_measure.label("measure_ci"))
+
+def generate_chart_query(
+    dimensions: list["ChartDimension"],
+    measure: "ChartDimension",
+    runs_filter: Optional[ComplexFilter],
+    collection_id: str,
+) -> Select[Any]:
+    """Generate SQL query for chart data using ChartDimension objects.
+
+    Builds a single-level SELECT with proper joins, filters, and aggregation.
+
+    Args:
+        dimensions: List of ChartDimension objects for grouping
+        measure: ChartDimension object for the measure
+        runs_filter: Optional filter for agent runs
+        collection_id: Collection to query
+
+    Returns:
+        Complete SQL query for chart data
+
+    Raises:
+        ChartSQLValidationError: If any parameters fail validation
+    """
+    from_clause, column_map, where_clause = _build_chart_source(
+        dimensions + [measure], runs_filter, collection_id
+    )
+
+    # Build SELECT and GROUP BY clauses for aggregation
+    dim_exprs = _dimension_columns(dimensions, column_map)
+    outer_select: list[Any] = [
+        dim_expr.label(dim.key) for dim, dim_expr in zip(dimensions, dim_exprs)
+    ]
+    outer_group_by: list[Any] = list(dim_exprs)
+    outer_select.extend(_measure_columns(measure, column_map))
 
     return (
         select(*outer_select)
@@ -161,3 +202,130 @@ def generate_chart_query(
         .group_by(*outer_group_by)
         .order_by(*outer_group_by)
     )
+
+
+def generate_rollup_query(
+    dimensions: list["ChartDimension"],
+    measure: "ChartDimension",
+    runs_filter: Optional[ComplexFilter],
+    collection_id: str,
+    agent_run_ids: Optional[list[str]] = None,
+    judge_result_ids: Optional[list[str]] = None,
+) -> Select[Any]:
+    """Generate a query for the additive statistics behind a chart, per bin.
+
+    Instead of means and confidence intervals, each bin gets its row count and the count,
+    sum and sum of squares of the measure. These can be added up across subsets of runs,
+    which is what lets chart rollups be maintained incrementally.
+
+    Bin values are returned as a text array (`bin_values`), in the order of `dimensions`.
+
+    Args:
+        dimensions: List of ChartDimension objects for grouping
+        measure: ChartDimension object for the measure
+        runs_filter: Optional filter for agent runs
+        collection_id: Collection to query
+        agent_run_ids: Optionally only aggregate these agent runs
+        judge_result_ids: Optionally only aggregate these judge results
+    """
+    from_clause, column_map, where_clause = _build_chart_source(
+        dimensions + [measure], runs_filter, collection_id, agent_run_ids, judge_result_ids
+    )
+    dim_exprs = _dimension_columns(dimensions, column_map)
+
+    bin_values = cast(array([cast(dim_expr, Text) for dim_expr in dim_exprs]), ARRAY(Text))
+    if isinstance(measure, CountRunDimension):
+        measure_columns: list[Any] = [literal(0), literal(0), literal(0)]
+    else:
+        numeric_value = _convert_to_numeric(column_map[measure.key])
+        measure_columns = [
+            func.count(numeric_value),
+            func.coalesce(func.sum(numeric_value), 0),
+            func.coalesce(func.sum(numeric_value * numeric_value), 0),
+        ]
+
+    return (
+        select(
+            bin_values.label("bin_values"),
+            func.count().label("row_count"),
+            measure_columns[0].label("measure_count"),
+            measure_columns[1].label("measure_sum"),
+            measure_columns[2].label("measure_sum_sq"),
+        )
+        .select_from(from_clause)
+        .where(where_clause)
+        .group_by(*dim_exprs)
+    )
+
+
+def generate_shared_chart_query(
+    charts: list[tuple[list["ChartDimension"], "ChartDimension"]],
+    runs_filter: Optional[ComplexFilter],
+    collection_id: str,
+) -> Select[Any]:
+    """Generate one query that computes the data of several charts in a single scan.
+
+    The charts must share a runs filter and read the same judge outputs, so that they
+    aggregate the same joined rows; each chart's bins are then one of the query's grouping
+    sets. Rows carry every chart's dimension columns (labeled by key, NULL when not grouped),
+    a `grouping_id` bitmask telling which grouping set they belong to (see
+    `shared_chart_grouping_id`), and the measure columns of `generate_chart_query` suffixed
+    with `_{i}` for the i-th chart.
+
+    Args:
+        charts: (dimensions, measure) of each chart
+        runs_filter: Optional filter for agent runs
+        collection_id: Collection to query
+    """
+    all_dimensions = [dim for dimensions, measure in charts for dim in dimensions + [measure]]
+    from_clause, column_map, where_clause = _build_chart_source(
+        all_dimensions, runs_filter, collection_id
+    )
+
+    grouping_dims = shared_chart_grouping_dimensions(charts)
+    grouping_exprs = _dimension_columns(grouping_dims, column_map)
+    expr_by_key = {dim.key: expr for dim, expr in zip(grouping_dims, grouping_exprs)}
+
+    outer_select: list[Any] = [
+        expr.label(dim.key) for dim, expr in zip(grouping_dims, grouping_exprs)
+    ]
+    outer_select.append(
+        (func.grouping(*grouping_exprs) if grouping_exprs else literal(0)).label("grouping_id")
+    )
+    for i, (_, measure) in enumerate(charts):
+        outer_select.extend(_measure_columns(measure, column_map, label_suffix=f"_{i}"))
+
+    # One grouping set per distinct set of chart dimensions
+    grouping_sets: dict[frozenset[str], Any] = {}
+    for dimensions, _ in charts:
+        dim_keys = frozenset(dim.key for dim in dimensions)
+        grouping_sets.setdefault(dim_keys, tuple_(*[expr_by_key[key] for key in dim_keys]))
+
+    return (
+        select(*outer_select)
+        .select_from(from_clause)
+        .where(where_clause)
+        .group_by(func.grouping_sets(*grouping_sets.values()))
+    )
+
+
+def shared_chart_grouping_dimensions(
+    charts: list[tuple[list["ChartDimension"], "ChartDimension"]],
+) -> list["ChartDimension"]:
+    """The distinct dimensions a shared chart query groups by, in `grouping_id` bit order."""
+    return list({dim.key: dim for dimensions, _ in charts for dim in dimensions}.values())
+
+
+def shared_chart_grouping_id(
+    grouping_dims: list["ChartDimension"], dimensions: list["ChartDimension"]
+) -> int:
+    """The `grouping_id` of the rows holding the bins of a chart with these dimensions.
+
+    Like Postgres' GROUPING(), each bit is set when the corresponding grouping dimension
+    is not part of the row's grouping set, with the first dimension as the highest bit.
+    """
+    dim_keys = {dim.key for dim in dimensions}
+    grouping_id = 0
+    for dim in grouping_dims:
+        grouping_id = (grouping_id << 1) | (dim.key not in dim_keys)
+    return grouping_id
@@ -1,11 +1,12 @@
 from typing import TYPE_CHECKING, Type
 
-from pydantic import BaseModel
-from sqlalchemy import ColumnElement, and_
+from pydantic import BaseModel, Field
+from sqlalchemy import ColumnElement, String, and_, literal, select
 
 from docent._log_util import get_logger
 from docent_core.docent.db.filters import ComplexFilter
 from docent_core.docent.db.schemas.auth_models import User
+from docent_core.docent.db.schemas.tables import SQLAFilterResultSetRun
 
 if TYPE_CHECKING:
     from docent_core.docent.db.schemas.tables import SQLAAgentRun
@@ -18,14 +19,31 @@ class ViewContext(BaseModel):
     view_id: str
     user: User | None
     base_filter: ComplexFilter | None
+    # The materialized result of `base_filter`, if resolved (see `FilterResultSetService`).
+    # Only valid briefly, so it isn't serialized into jobs.
+    base_filter_result_set_id: str | None = Field(default=None, exclude=True)
 
     def get_base_where_clause(self, SQLAAgentRun: Type["SQLAAgentRun"]) -> ColumnElement[bool]:
-        # Make sure we're filtering by the correct collection_id
-        base_clause = SQLAAgentRun.collection_id == self.collection_id
+        # Make sure we're filtering by the correct collection_id. It's rendered into the
+        # statement, since the metadata indexes are partial on it and the planner can't match
+        # them to a parameter in the generic plans of prepared statements.
+        base_clause = SQLAAgentRun.collection_id == literal(
+            self.collection_id, String, literal_execute=True
+        )
 
         if self.base_filter is None:
             return base_clause
 
+        if self.base_filter_result_set_id is not None:
+            return and_(
+                base_clause,
+                SQLAAgentRun.id.in_(
+                    select(SQLAFilterResultSetRun.agent_run_id).where(
+                        SQLAFilterResultSetRun.result_set_id == self.base_filter_result_set_id
+                    )
+                ),
+            )
+
         base_filter_clause = self.base_filter.to_sqla_where_clause(SQLAAgentRun)
         if base_filter_clause is None:
             return base_clause
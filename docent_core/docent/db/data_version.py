@@ -0,0 +1,96 @@
+"""
+Per-collection data versions.
+
+A collection's `data_version` is bumped in the same transaction as any write to its agent
+runs or judge results. Caches of derived data (e.g. chart results) include the version in
+their keys, so a write makes every cached entry for the collection unreachable without
+tracking which entries it affects.
+"""
+
+from datetime import UTC, datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from docent_core.docent.db.schemas.tables import SQLACollection
+
+
+class CollectionDeletedError(Exception):
+    """Raised when writing to a collection that has been marked for deletion."""
+
+    def __init__(self, collection_id: str):
+        super().__init__(f"Collection {collection_id} has been deleted")
+        self.collection_id = collection_id
+
+
+async def lock_collection_for_write(session: AsyncSession, collection_id: str) -> None:
+    """
+    Check that a collection isn't marked for deletion, and keep its row from being deleted
+    until the transaction ends. Call before writing rows that reference the collection.
+
+    This doesn't keep the collection from being marked for deletion in the meantime, so
+    writes must still end with `bump_data_version`, which checks again.
+
+    Raises:
+        CollectionDeletedError: If the collection is marked for deletion or doesn't exist.
+    """
+    collection_id_found = await session.scalar(
+        select(SQLACollection.id)
+        .where(SQLACollection.id == collection_id, SQLACollection.deleted_at.is_(None))
+        .with_for_update(key_share=True)
+    )
+    if collection_id_found is None:
+        raise CollectionDeletedError(collection_id)
+
+
+async def bump_data_version(
+    session: AsyncSession, collection_id: str, allow_deleted: bool = False
+) -> None:
+    """
+    Bump a collection's data version.
+
+    This locks the collection row until the transaction commits, so call it as late in the
+    transaction as possible. Marking a collection for deletion takes the same lock, so a
+    write either commits before the deletion starts (and is deleted with the rest), or
+    sees the collection deleted here and must roll back.
+
+    Args:
+        allow_deleted: Whether the collection may be marked for deletion, e.g. for writes
+            that themselves delete data.
+
+    Raises:
+        CollectionDeletedError: If the collection is marked for deletion and not
+            `allow_deleted`.
+    """
+    query = update(SQLACollection).where(SQLACollection.id == collection_id)
+    if not allow_deleted:
+        query = query.where(SQLACollection.deleted_at.is_(None))
+    result = await session.execute(
+        query.values(
+            data_version=SQLACollection.data_version + 1,
+            data_version_updated_at=datetime.now(UTC).replace(tzinfo=None),
+        ).returning(SQLACollection.id)
+    )
+    if result.first() is None and not allow_deleted:
+        raise CollectionDeletedError(collection_id)
+
+
+async def get_data_version(session: AsyncSession, collection_id: str) -> int:
+    """Get a collection's current data version. Read it before reading the data it covers."""
+    data_version = await session.scalar(
+        select(SQLACollection.data_version).where(SQLACollection.id == collection_id)
+    )
+    return data_version or 0
+
+
+async def get_data_version_and_updated_at(
+    session: AsyncSession, collection_id: str
+) -> tuple[int, datetime | None]:
+    """Get a collection's current data version and when it was bumped, if ever."""
+    result = await session.execute(
+        select(SQLACollection.data_version, SQLACollection.data_version_updated_at).where(
+            SQLACollection.id == collection_id
+        )
+    )
+    row = result.one_or_none()
+    return (row[0], row[1]) if row is not None else (0, None)
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Annotated, Any, Literal, Type, Union
+from typing import TYPE_CHECKING, Annotated, Any, Literal, Sequence, Type, Union
 from uuid import uuid4
 
 from pydantic import BaseModel, Discriminator, Field, field_validator
-from sqlalchemy import Boolean, ColumnElement, Float, String, and_, case, cast, or_
+from sqlalchemy import Boolean, ColumnElement, Float, String, and_, case, cast, literal, or_
 
 from docent._log_util import get_logger
 
@@ -14,10 +14,22 @@ if TYPE_CHECKING:
 logger = get_logger(__name__)
 
 
+def _inline(value: str) -> Any:
+    """Render a constant into the statement rather than binding it as a parameter.
+
+    The planner can only match an expression index if the query's expression has the same
+    constants, which parameters don't have in the generic plans of prepared statements.
+    """
+    return literal(value, String, literal_execute=True)
+
+
 def safe_bool(col: Any) -> Any:
     """Safely cast a column to boolean using regex validation."""
     return case(
-        (cast(col, String).op("~*")("^(true|false|t|f|1|0|yes|no|on|off)$"), cast(col, Boolean)),
+        (
+            cast(col, String).op("~*")(_inline("^(true|false|t|f|1|0|yes|no|on|off)$")),
+            cast(col, Boolean),
+        ),
         else_=None,
     )
 
@@ -25,10 +37,38 @@ def safe_bool(col: Any) -> Any:
 def safe_float(col: Any) -> Any:
     """Safely cast a column to float using regex validation."""
     return case(
-        (cast(col, String).op("~")("^[+-]?(\\d+\\.?\\d*|\\.\\d+)([eE][+-]?\\d+)?$"), cast(col, Float)), else_=None  # type: ignore
+        (cast(col, String).op("~")(_inline("^[+-]?(\\d+\\.?\\d*|\\.\\d+)([eE][+-]?\\d+)?$")), cast(col, Float)), else_=None  # type: ignore
     )
 
 
+# How a metadata value is read: as text, as a number, as a boolean, or as raw JSONB (for sorting)
+MetadataValueType = Literal["string", "float", "bool", "json"]
+
+
+def metadata_value_expression(
+    metadata_json: Any, key_path: Sequence[str], value_type: MetadataValueType
+) -> Any:
+    """Extract a typed value at `key_path` from a JSONB metadata column.
+
+    Filters, sorts and the automatic metadata indexes all build their expressions here,
+    since Postgres only uses an expression index for queries with the identical expression.
+    """
+    sqla_value = metadata_json
+    for key in key_path:
+        sqla_value = sqla_value[_inline(key)]
+
+    if value_type == "string":
+        return sqla_value.as_string()
+    elif value_type == "bool":
+        return safe_bool(sqla_value)
+    elif value_type == "float":
+        return safe_float(sqla_value)
+    elif value_type == "json":
+        return sqla_value
+    else:
+        raise ValueError(f"Unsupported metadata value type: {value_type}")
+
+
 class BaseCollectionFilter(BaseModel):
     """Base class for all collection filters."""
 
@@ -55,6 +95,19 @@ class PrimitiveFilter(BaseCollectionFilter):
     value: Any
     op: Literal[">", ">=", "<", "<=", "==", "!=", "~*", "!~*"]
 
+    @property
+    def metadata_value_type(self) -> MetadataValueType:
+        """How the metadata value is cast to compare against `value`."""
+        if isinstance(self.value, str):
+            return "string"
+        elif isinstance(self.value, bool):
+            return "bool"
+        elif isinstance(self.value, float) or isinstance(self.value, int):  # type: ignore warning about unnecessary comparison
+            # if self.value is an int, we may still need to do sql comparisons with floats
+            return "float"
+        else:
+            raise ValueError(f"Unsupported value type: {type(self.value)}")
+
     def to_sqla_where_clause(self, table: Type["SQLAAgentRun"]) -> ColumnElement[bool] | None:
         """Convert this filter to a SQLAlchemy WHERE clause."""
 
@@ -66,27 +119,16 @@ class PrimitiveFilter(BaseCollectionFilter):
         # Extract value from JSONB using the table parameter
         if mode == "text":
             sqla_value = table.text_for_search  # type: ignore
+            for key in self.key_path[1:]:
+                sqla_value = sqla_value[key]
         elif mode == "metadata":
-            sqla_value = table.metadata_json  # type: ignore
+            # Cast the extracted value to the correct type, since metadata is JSONB
+            sqla_value = metadata_value_expression(
+                table.metadata_json, self.key_path[1:], self.metadata_value_type
+            )
         else:
             raise ValueError(f"Unsupported mode: {mode}")
 
-        for key in self.key_path[1:]:
-            sqla_value = sqla_value[key]
-
-        # Cast the extracted value to the correct type
-        # This is only necessary for metadata which is JSONB
-        if mode == "metadata":
-            if isinstance(self.value, str):
-                sqla_value = sqla_value.as_string()
-            elif isinstance(self.value, bool):
-                sqla_value = safe_bool(sqla_value)
-            elif isinstance(self.value, float) or isinstance(self.value, int):  # type: ignore warning about unnecessary comparison
-                # if self.value is an int, we may still need to do sql comparisons with floats
-                sqla_value = safe_float(sqla_value)
-            else:
-                raise ValueError(f"Unsupported value type: {type(self.value)}")
-
         # Handle different operations using SQLAlchemy expressions
         if self.op == "==":
             return sqla_value == self.value
@@ -231,3 +273,24 @@ def parse_filter_dict(filter_dict: dict[str, Any]) -> CollectionFilter:
         return SearchResultExistsFilter(**filter_dict)
     else:
         raise ValueError(f"Unknown filter type: {filter_type}")
+
+
+def indexable_metadata_paths(
+    collection_filter: CollectionFilter,
+) -> list[tuple[list[str], MetadataValueType]]:
+    """Metadata key paths and value types that a filter compares with a B-tree operator.
+
+    Regex matches can't use a B-tree index, so they're left out.
+    """
+    if collection_filter.disabled:
+        return []
+    if isinstance(collection_filter, ComplexFilter):
+        return [path for f in collection_filter.filters for path in indexable_metadata_paths(f)]
+    if (
+        isinstance(collection_filter, PrimitiveFilter)
+        and collection_filter.key_path[0] == "metadata"
+        and len(collection_filter.key_path) > 1
+        and collection_filter.op in ("==", ">", ">=", "<", "<=")
+    ):
+        return [(collection_filter.key_path[1:], collection_filter.metadata_value_type)]
+    return []
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import Any, Literal
+
+from pydantic import BaseModel, Field, field_validator
+
+AgentRunField = Literal["name", "description", "created_at", "metadata"]
+
+
+class TranscriptProjection(BaseModel):
+    """Which parts of an agent run's transcripts to fetch."""
+
+    # Only fetch transcripts with one of these names; None fetches all of them
+    names: list[str] | None = None
+    messages: bool = False
+    message_count: bool = False
+    metadata: bool = False
+
+
+class AgentRunProjection(BaseModel):
+    """Which parts of an agent run to fetch.
+
+    The projection is pushed down into SQL, so columns, metadata paths and transcript
+    blobs that aren't requested are never read from the database.
+    """
+
+    fields: set[AgentRunField] = Field(default_factory=lambda: {"metadata"})
+    # Dotted paths within the metadata to fetch, e.g. "scores.correct"; None fetches it all
+    metadata_paths: list[str] | None = None
+    transcripts: TranscriptProjection | None = None
+
+    @field_validator("metadata_paths")
+    @classmethod
+    def _validate_metadata_paths(cls, paths: list[str] | None) -> list[str] | None:
+        if paths is not None:
+            for path in paths:
+                if not path or any(not part for part in path.split(".")):
+                    raise ValueError(f"Invalid metadata path: {path!r}")
+        return paths
+
+    def metadata_key_paths(self) -> list[list[str]]:
+        """Return the requested metadata paths as lists of keys."""
+        return [path.split(".") for path in self.metadata_paths or []]
+
+
+def set_key_path(target: dict[str, Any], key_path: list[str], value: Any) -> None:
+    """Set a value in a nested dict, creating intermediate dicts as needed."""
+    for key in key_path[:-1]:
+        child = target.get(key)
+        if not isinstance(child, dict):
+            child = target[key] = {}
+        target = child  # type: ignore[assignment]
+    target[key_path[-1]] = value
@@ -1,8 +1,8 @@
 from copy import deepcopy
 from datetime import UTC, datetime
 
-from sqlalchemy import DateTime, ForeignKey, String, Text
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Numeric, String, Text, UniqueConstraint
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from docent_core._db_service.schemas.base import SQLABase
@@ -15,6 +15,8 @@ from docent_core.docent.db.schemas.tables import (
 )
 
 TABLE_CHART = "charts"
+TABLE_CHART_ROLLUP = "chart_rollups"
+TABLE_CHART_ROLLUP_BIN = "chart_rollup_bins"
 
 
 class SQLAChart(SQLABase):
@@ -63,3 +65,48 @@ class SQLAChart(SQLABase):
         result = parse_filter_dict(deepcopy(self.runs_filter_dict))
         assert isinstance(result, ComplexFilter)
         return result
+
+
+class SQLAChartRollup(SQLABase):
+    """
+    A pre-aggregated chart: additive statistics per bin for one combination of dimensions,
+    measure and runs filter. Bins are kept up to date as agent runs and judge results are
+    written (see `ChartRollupService`).
+    """
+
+    __tablename__ = TABLE_CHART_ROLLUP
+
+    id = mapped_column(String(36), primary_key=True)
+    collection_id = mapped_column(
+        String(36), ForeignKey(f"{TABLE_COLLECTION}.id"), nullable=False, index=True
+    )
+
+    # Hash of `spec`, used to look rollups up
+    spec_hash = mapped_column(String(64), nullable=False)
+    # The dimensions, measure and runs filter the rollup aggregates
+    spec = mapped_column(JSONB, nullable=False)
+
+    created_at = mapped_column(
+        DateTime, default=lambda: datetime.now(UTC).replace(tzinfo=None), nullable=False
+    )
+    # Approximate; used to evict rollups that no chart reads anymore
+    last_used_at = mapped_column(
+        DateTime, default=lambda: datetime.now(UTC).replace(tzinfo=None), nullable=False
+    )
+
+    __table_args__ = (UniqueConstraint("collection_id", "spec_hash", name="uq_chart_rollups_spec"),)
+
+
+class SQLAChartRollupBin(SQLABase):
+    __tablename__ = TABLE_CHART_ROLLUP_BIN
+
+    rollup_id = mapped_column(
+        String(36), ForeignKey(f"{TABLE_CHART_ROLLUP}.id", ondelete="CASCADE"), primary_key=True
+    )
+    # Dimension values of the bin as text, in the order of the rollup's dimensions
+    bin_values = mapped_column(ARRAY(Text), primary_key=True)
+
+    row_count = mapped_column(BigInteger, nullable=False)
+    measure_count = mapped_column(BigInteger, nullable=False)
+    measure_sum = mapped_column(Numeric, nullable=False)
+    measure_sum_sq = mapped_column(Numeric, nullable=False)
@@ -8,18 +8,21 @@ from uuid import uuid4
 from pgvector.sqlalchemy import Vector
 from pydantic_core import to_jsonable_python
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     CheckConstraint,
     DateTime,
     Enum,
+    Float,
     ForeignKey,
     Index,
     Integer,
     LargeBinary,
     String,
     Text,
+    text,
 )
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.schema import UniqueConstraint
 
@@ -61,6 +64,11 @@ TABLE_USER_PROFILE = "user_profiles"
 TABLE_MODEL_API_KEYS = "model_api_keys"
 TABLE_TELEMETRY_ACCUMULATION = "telemetry_accumulation"
 TABLE_TELEMETRY_AGENT_RUN_STATUS = "telemetry_agent_run_status"
+TABLE_METADATA_KEY_STATS = "metadata_key_stats"
+TABLE_METADATA_FACET_VALUE = "metadata_facet_values"
+TABLE_METADATA_PATH_INDEX = "metadata_path_indexes"
+TABLE_FILTER_RESULT_SET = "filter_result_sets"
+TABLE_FILTER_RESULT_SET_RUN = "filter_result_set_runs"
 
 
 def sanitize_pg_text(text: str) -> str:
@@ -140,6 +148,166 @@ class SQLAAgentRun(SQLABase):
         )
 
 
+class SQLAMetadataKeyStats(SQLABase):
+    """
+    Catalog of the metadata key paths used by the agent runs of a collection.
+
+    Counts are maintained incrementally as agent runs are added, updated and deleted
+    (see `MetadataCatalogService`), so listing keys doesn't require scanning every run.
+    The row with the empty path is the metadata object itself; its `run_count` is the
+    number of agent runs in the collection.
+    """
+
+    __tablename__ = TABLE_METADATA_KEY_STATS
+
+    collection_id = mapped_column(
+        String(36), ForeignKey(f"{TABLE_COLLECTION}.id"), primary_key=True
+    )
+    # Dot-separated path below `metadata`, e.g. "scores.correct"
+    path = mapped_column(Text, primary_key=True)
+    depth = mapped_column(Integer, nullable=False)
+
+    # Number of runs in which the path occurs, and how many of those have each JSON type
+    run_count = mapped_column(BigInteger, nullable=False, default=0)
+    null_count = mapped_column(BigInteger, nullable=False, default=0)
+    string_count = mapped_column(BigInteger, nullable=False, default=0)
+    number_count = mapped_column(BigInteger, nullable=False, default=0)
+    integer_count = mapped_column(BigInteger, nullable=False, default=0)
+    boolean_count = mapped_column(BigInteger, nullable=False, default=0)
+    object_count = mapped_column(BigInteger, nullable=False, default=0)
+    array_count = mapped_column(BigInteger, nullable=False, default=0)
+
+    # K-minimum-values sketch of the scalar values seen, for estimating cardinality
+    value_hashes = mapped_column(ARRAY(BigInteger), nullable=False, default=list)
+
+
+def _pg_trgm_installed(ddl: Any, target: Any, bind: Any, **kwargs: Any) -> bool:
+    """Whether the pg_trgm extension is available, for indexes that need it.
+
+    Migrations install the extension; databases set up from the models without it still
+    work, just without trigram indexes.
+    """
+    if bind is None:
+        return True
+    installed = bind.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+    return installed.scalar() is not None
+
+
+class SQLAMetadataFacetValue(SQLABase):
+    """
+    Distinct scalar values of each metadata key path in a collection, with the number of
+    runs that have them. Maintained alongside the metadata key catalog (see
+    `MetadataCatalogService`) to serve filter autocomplete without scanning runs.
+    """
+
+    __tablename__ = TABLE_METADATA_FACET_VALUE
+
+    collection_id = mapped_column(
+        String(36), ForeignKey(f"{TABLE_COLLECTION}.id"), primary_key=True
+    )
+    # Dot-separated path below `metadata`, as in `SQLAMetadataKeyStats`
+    path = mapped_column(Text, primary_key=True)
+    # The value as text, like `->>` returns it
+    value = mapped_column(Text, primary_key=True)
+    run_count = mapped_column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        # Case-insensitive prefix lookups, as a range scan in byte order
+        Index(
+            "idx_metadata_facet_values_prefix",
+            "collection_id",
+            "path",
+            text('lower(value) COLLATE "C"'),
+        ),
+        # Substring lookups
+        Index(
+            "idx_metadata_facet_values_trgm",
+            "value",
+            postgresql_using="gin",
+            postgresql_ops={"value": "gin_trgm_ops"},
+        ).ddl_if(callable_=_pg_trgm_installed),
+    )
+
+
+class SQLAMetadataPathIndex(SQLABase):
+    """
+    How often each metadata key path of a collection is filtered or sorted on, and the
+    expression index built for it once it's used often enough. Managed by
+    `MetadataIndexService`, which builds and drops the indexes concurrently.
+    """
+
+    __tablename__ = TABLE_METADATA_PATH_INDEX
+
+    collection_id = mapped_column(
+        String(36), ForeignKey(f"{TABLE_COLLECTION}.id"), primary_key=True
+    )
+    # Dot-separated path below `metadata`, as in `SQLAMetadataKeyStats`
+    path = mapped_column(Text, primary_key=True)
+    # How queries read the value; see `MetadataValueType`
+    value_type = mapped_column(String(16), primary_key=True)
+
+    # Number of uses, decaying exponentially with age
+    usage_score = mapped_column(Float, nullable=False, default=0.0)
+    usage_updated_at = mapped_column(
+        DateTime, default=lambda: datetime.now(UTC).replace(tzinfo=None), nullable=False
+    )
+    last_used_at = mapped_column(
+        DateTime, default=lambda: datetime.now(UTC).replace(tzinfo=None), nullable=False
+    )
+
+    # Set before an index build starts; `index_built_at` is only set once it has finished,
+    # so a name without it is a build that failed or was interrupted
+    index_name = mapped_column(String(63), nullable=True)
+    index_built_at = mapped_column(DateTime, nullable=True)
+
+    # Consecutive failed builds, and when the last one was found; retries back off
+    build_failures = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    build_failed_at = mapped_column(DateTime, nullable=True)
+
+
+class SQLAFilterResultSet(SQLABase):
+    """
+    The agent runs of a collection that matched a filter at one data version, so queries
+    can join against them instead of evaluating the filter again (see
+    `FilterResultSetService`).
+    """
+
+    __tablename__ = TABLE_FILTER_RESULT_SET
+
+    id = mapped_column(String(36), primary_key=True, default=lambda: str(uuid4()))
+    collection_id = mapped_column(
+        String(36), ForeignKey(f"{TABLE_COLLECTION}.id"), nullable=False, index=True
+    )
+    filter_hash = mapped_column(String(64), nullable=False)
+    data_version = mapped_column(BigInteger, nullable=False)
+
+    created_at = mapped_column(
+        DateTime, default=lambda: datetime.now(UTC).replace(tzinfo=None), nullable=False
+    )
+    # Approximate; used to evict result sets that no query reads anymore
+    last_used_at = mapped_column(
+        DateTime, default=lambda: datetime.now(UTC).replace(tzinfo=None), nullable=False
+    )
+
+    __table_args__ = (
+        UniqueConstraint(
+            "collection_id", "filter_hash", "data_version", name="uq_filter_result_sets_key"
+        ),
+    )
+
+
+class SQLAFilterResultSetRun(SQLABase):
+    __tablename__ = TABLE_FILTER_RESULT_SET_RUN
+
+    result_set_id = mapped_column(
+        String(36),
+        ForeignKey(f"{TABLE_FILTER_RESULT_SET}.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    # Not a foreign key: deleting runs bumps the data version, so older sets just go stale
+    agent_run_id = mapped_column(String(36), primary_key=True)
+
+
 class TelemetryAgentRunStatus(enum.Enum):
     """Enumeration of telemetry agent run processing statuses."""
 
@@ -362,6 +530,13 @@ class SQLACollection(SQLABase):
         DateTime, default=lambda: datetime.now(UTC).replace(tzinfo=None), nullable=False
     )
 
+    # Set when deletion starts; the collection is hidden while a job deletes its data
+    deleted_at = mapped_column(DateTime, nullable=True)
+
+    # Bumped whenever agent runs or judge results change; keys caches of derived data
+    data_version = mapped_column(BigInteger, nullable=False, default=0, server_default="0")
+    data_version_updated_at = mapped_column(DateTime, nullable=True)
+
     views: Mapped[list["SQLAView"]] = relationship(
         "SQLAView",
         back_populates="collection",
@@ -173,6 +173,41 @@ async def get_chart_data(
         raise HTTPException(status_code=500, detail=f"Failed to get chart data: {str(e)}")
 
 
+class GetChartsDataRequest(BaseModel):
+    # Defaults to every chart in the collection
+    chart_ids: list[str] | None = None
+
+
+@chart_router.post("/{collection_id}/data")
+async def get_charts_data(
+    collection_id: str,
+    request: GetChartsDataRequest,
+    chart_service: ChartsService = Depends(get_chart_service),
+    ctx: ViewContext = Depends(get_default_view_ctx),
+    _: None = Depends(require_collection_permission(Permission.READ)),
+) -> dict[str, dict[str, Any]]:
+    """Get chart data (binStats) for several charts at once, keyed by chart ID.
+
+    Charts over the same runs are computed in a single scan, so this is cheaper than
+    fetching each chart's data separately.
+    """
+    try:
+        charts = await chart_service.get_charts(ctx)
+        if request.chart_ids is not None:
+            charts_by_id = {chart.id: chart for chart in charts}
+            missing_ids = [id for id in request.chart_ids if id not in charts_by_id]
+            if missing_ids:
+                raise HTTPException(status_code=404, detail=f"Charts not found: {missing_ids}")
+            charts = [charts_by_id[id] for id in request.chart_ids]
+
+        return await chart_service.get_charts_data(ctx, charts)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get chart data: {str(e)}")
+
+
 @chart_router.get("/{collection_id}/metadata")
 async def get_chart_metadata(
     collection_id: str,
@@ -5,6 +5,7 @@ import os
 import tempfile
 import time
 import zipfile
+import zlib
 from datetime import datetime
 from functools import partial
 from pathlib import Path
@@ -20,8 +21,9 @@ from fastapi import (
     Response,
     UploadFile,
 )
+from fastapi.exceptions import RequestValidationError
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, model_validator
+from pydantic import BaseModel, ValidationError, model_validator
 from pydantic_core import to_jsonable_python
 from sqlalchemy import or_, select
 from sqlalchemy.inspection import inspect as sqla_inspect
@@ -35,7 +37,7 @@ from docent_core._server._auth.session import (
     create_user_session,
     invalidate_user_session,
 )
-from docent_core._server.util import sse_stream
+from docent_core._server.util import read_request_body, sse_stream
 from docent_core.docent.ai_tools.assistant.summarizer import (
     HighLevelAction,
     LowLevelAction,
@@ -45,6 +47,7 @@ from docent_core.docent.ai_tools.assistant.summarizer import (
     summarize_agent_actions,
 )
 from docent_core.docent.db.contexts import ViewContext
+from docent_core.docent.db.data_version import CollectionDeletedError
 from docent_core.docent.db.filters import (
     ComplexFilter,
 )
@@ -78,6 +81,10 @@ from docent_core.docent.services.monoservice import MonoService
 
 logger = get_logger(__name__)
 
+MAX_EXPORT_PAGE_SIZE = 5_000
+# Runs per COPY transaction when importing a log file
+IMPORT_BATCH_SIZE = 500
+
 public_router = APIRouter()
 # FIXME(mengk): we should move all API endpoints to another router that explicitly requires API key auth
 #   This router creates an anonymous user for each session, which is an anti-pattern for API endpoints.
@@ -358,7 +365,17 @@ async def delete_collection(
     mono_svc: MonoService = Depends(get_mono_svc),
     _: None = Depends(require_collection_permission(Permission.ADMIN)),
 ):
-    await mono_svc.delete_collection(collection_id)
+    """
+    Delete a collection. It is hidden right away and its data is deleted by a background job.
+
+    Returns:
+        The ID of the deletion job.
+    """
+    try:
+        job_id = await mono_svc.start_collection_deletion(collection_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"job_id": job_id}
 
 
 ##############
@@ -483,8 +500,11 @@ async def import_runs_from_file(
                 break
             _tmp.write(chunk)
 
-    # Compute counts using the staged file (request body may be closed after return)
-    count_new_runs = load_inspect.get_total_samples(Path(temp_path), format)
+    # Compute counts using the staged file (request body may be closed after return).
+    # Counting scans the whole file, so keep it off the event loop.
+    count_new_runs = await anyio.to_thread.run_sync(
+        load_inspect.get_total_samples, Path(temp_path), format
+    )
     await mono_svc.check_space_for_runs(ctx, count_new_runs)
 
     # Create an in-memory stream for SSE
@@ -496,6 +516,7 @@ async def import_runs_from_file(
         t_start = time.perf_counter()
 
         runs_added = 0
+        rows_added = 0
 
         try:
             # Send initial event so clients can render 0 progress
@@ -511,10 +532,10 @@ async def import_runs_from_file(
             with open(temp_path, "rb") as _fh_ingest:
                 file_info, runs_generator = load_inspect.runs_from_file(_fh_ingest, format)
 
-                batches = itertools.batched(runs_generator, 100)
+                batches = itertools.batched(runs_generator, IMPORT_BATCH_SIZE)
                 async with mono_svc.advisory_lock(collection_id, action_id="mutation"):
                     for batch in batches:
-                        await mono_svc.add_agent_runs(ctx, batch)
+                        rows_added += await mono_svc.add_agent_runs(ctx, batch)
                         runs_added += len(batch)
 
                         # Stream progress update
@@ -527,6 +548,11 @@ async def import_runs_from_file(
                         )
 
             t_end = time.perf_counter()
+            rows_per_second = rows_added / max(t_end - t_start, 1e-9)
+            logger.info(
+                f"Imported {runs_added} agent runs ({rows_added} rows) in {t_end - t_start:.2f}s "
+                f"({rows_per_second:.0f} rows/s)"
+            )
 
             # Track with PostHog
             analytics.track_event(
@@ -539,6 +565,7 @@ async def import_runs_from_file(
                     "task": file_info.get("task"),
                     "model": file_info.get("model"),
                     "time_taken_seconds": t_end - t_start,
+                    "rows_per_second": rows_per_second,
                 },
             )
 
@@ -549,6 +576,7 @@ async def import_runs_from_file(
                     "message": f"Successfully imported {runs_added} agent runs from {file_info.get('filename')}",
                     "uploaded": runs_added,
                     "total": count_new_runs,
+                    "rows_per_second": rows_per_second,
                 }
             )
         finally:
@@ -658,8 +686,72 @@ async def get_agent_run_ids(
     )
 
 
+@user_router.get("/{collection_id}/agent_runs/export")
+async def export_agent_runs(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = 1_000,
+    fields: str | None = None,
+    mono_svc: MonoService = Depends(get_mono_svc),
+    ctx: ViewContext = Depends(get_default_view_ctx),
+    _: None = Depends(require_view_permission(Permission.READ)),
+):
+    """
+    Export one page of agent runs as newline-delimited JSON.
+
+    Args:
+        cursor: The `X-Next-Cursor` header from the previous page; omit for the first page.
+        limit: Maximum number of runs in this page (at most 5,000).
+        fields: Comma-separated top-level AgentRun fields to include; `id` is always included.
+
+    Returns:
+        An `application/x-ndjson` body with one agent run per line. `X-Next-Cursor` is set
+        when more runs may follow. The body is gzip-compressed if the client accepts it.
+    """
+
+    if not 1 <= limit <= MAX_EXPORT_PAGE_SIZE:
+        raise HTTPException(
+            status_code=400, detail=f"limit must be between 1 and {MAX_EXPORT_PAGE_SIZE}"
+        )
+
+    field_set = {f.strip() for f in fields.split(",") if f.strip()} if fields else None
+    try:
+        page = await mono_svc.get_agent_run_export_page(
+            ctx, after_id=cursor, limit=limit, fields=field_set
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    headers: dict[str, str] = {}
+    if len(page) == limit:
+        headers["X-Next-Cursor"] = page[-1]["id"]
+
+    def _lines():
+        for row in page:
+            yield json.dumps(row).encode("utf-8") + b"\n"
+
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+
+        def _gzipped_lines():
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+            for line in _lines():
+                chunk = compressor.compress(line)
+                if chunk:
+                    yield chunk
+            yield compressor.flush()
+
+        content = _gzipped_lines()
+    else:
+        content = _lines()
+
+    return StreamingResponse(content, media_type="application/x-ndjson", headers=headers)
+
+
 class AgentRunMetadataRequest(BaseModel):
     agent_run_ids: list[str]
+    # Dotted metadata paths to return instead of all metadata, e.g. the visible columns
+    metadata_paths: list[str] | None = None
 
 
 @user_router.post("/{collection_id}/agent_run_metadata")
@@ -670,7 +762,9 @@ async def get_agent_run_metadata(
     _: None = Depends(require_view_permission(Permission.READ)),
 ):
     # Query metadata directly without loading full agent runs
-    data = await mono_svc.get_metadata_for_agent_runs(ctx, request.agent_run_ids)
+    data = await mono_svc.get_metadata_for_agent_runs(
+        ctx, request.agent_run_ids, metadata_paths=request.metadata_paths
+    )
     return {k: to_jsonable_python(v) for k, v in data.items()}
 
 
@@ -678,14 +772,32 @@ class PostAgentRunsRequest(BaseModel):
     agent_runs: list[AgentRun]
 
 
+async def parse_post_agent_runs_request(request: Request) -> PostAgentRunsRequest:
+    """Parse the agent runs payload, accepting gzip- or deflate-compressed bodies."""
+    body = await read_request_body(request)
+    try:
+        return PostAgentRunsRequest.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+
+
 class DeleteAgentRunsRequest(BaseModel):
     agent_run_ids: list[str]
 
 
-@user_router.post("/{collection_id}/agent_runs")
+@user_router.post(
+    "/{collection_id}/agent_runs",
+    # The body is parsed by hand to accept compressed uploads, so FastAPI can't infer its schema
+    openapi_extra={
+        "requestBody": {
+            "content": {"application/json": {"schema": PostAgentRunsRequest.model_json_schema()}},
+            "required": True,
+        }
+    },
+)
 async def post_agent_runs(
     collection_id: str,
-    request: PostAgentRunsRequest,
+    request: PostAgentRunsRequest = Depends(parse_post_agent_runs_request),
     mono_svc: MonoService = Depends(get_mono_svc),
     ctx: ViewContext = Depends(get_default_view_ctx),
     analytics: AnalyticsClient = Depends(use_posthog_user_context),
@@ -693,7 +805,10 @@ async def post_agent_runs(
 ):
     async with mono_svc.advisory_lock(collection_id, action_id="mutation"):
         await mono_svc.check_space_for_runs(ctx, len(request.agent_runs))
-        await mono_svc.add_agent_runs(ctx, request.agent_runs)
+        try:
+            await mono_svc.add_agent_runs(ctx, request.agent_runs)
+        except CollectionDeletedError as e:
+            raise HTTPException(status_code=410, detail=str(e))
 
     # Track with PostHog
     analytics.track_event(
@@ -710,12 +825,17 @@ async def delete_agent_runs(
     collection_id: str,
     request: DeleteAgentRunsRequest,
     mono_svc: MonoService = Depends(get_mono_svc),
+    ctx: ViewContext = Depends(get_default_view_ctx),
     analytics: AnalyticsClient = Depends(use_posthog_user_context),
     _: None = Depends(require_collection_permission(Permission.WRITE)),
 ):
-    """Delete specific agent runs from a collection."""
-    async with mono_svc.advisory_lock(collection_id, action_id="mutation"):
-        deleted_count = await mono_svc.delete_agent_runs(collection_id, request.agent_run_ids)
+    """
+    Delete specific agent runs from a collection in a background job.
+
+    Returns:
+        The ID of the deletion job (None if no IDs were given) and the number of runs requested.
+    """
+    job_id = await mono_svc.start_agent_runs_deletion(ctx, request.agent_run_ids)
 
     # Track with PostHog
     analytics.track_event(
@@ -723,11 +843,10 @@ async def delete_agent_runs(
         properties={
             "collection_id": collection_id,
             "requested_runs": len(request.agent_run_ids),
-            "num_runs_deleted": deleted_count,
         },
     )
 
-    return {"deleted_count": deleted_count, "requested_count": len(request.agent_run_ids)}
+    return {"job_id": job_id, "requested_count": len(request.agent_run_ids)}
 
 
 ########
@@ -1,9 +1,13 @@
+import json
 import time
+from collections import defaultdict
+from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import JSONResponse
 
 from docent._log_util import get_logger
+from docent_core._server.util import read_request_body
 from docent_core.docent.db.schemas.auth_models import Permission, User
 from docent_core.docent.server.dependencies.database import require_collection_exists
 from docent_core.docent.server.dependencies.permissions import require_collection_permission
@@ -25,6 +29,21 @@ logger = get_logger(__name__)
 
 telemetry_router = APIRouter()
 
+# Required fields of each item type accepted by /v1/batch, matching the single-item endpoints
+BATCH_ITEM_REQUIRED_FIELDS: dict[str, tuple[str, ...]] = {
+    "scores": ("collection_id", "agent_run_id", "score_name", "score_value", "timestamp"),
+    "agent-run-metadata": ("collection_id", "agent_run_id", "metadata", "timestamp"),
+    "transcript-metadata": ("collection_id", "transcript_id", "timestamp"),
+    "transcript-group-metadata": (
+        "collection_id",
+        "transcript_group_id",
+        "agent_run_id",
+        "timestamp",
+    ),
+    "trace-done": ("collection_id",),
+}
+MAX_BATCH_ITEMS = 10_000
+
 
 @telemetry_router.post("/v1/traces")
 async def trace_endpoint(
@@ -468,6 +487,119 @@ async def add_transcript_group_metadata_endpoint(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _validate_batch_item(item: Any) -> tuple[str, dict[str, Any]] | str:
+    """Return a batch item's type and data, or a description of why it is invalid."""
+    item_type = item.get("type") if isinstance(item, dict) else None
+    data = item.get("data") if isinstance(item, dict) else None
+    required = BATCH_ITEM_REQUIRED_FIELDS.get(item_type) if isinstance(item_type, str) else None
+    if required is None or not isinstance(data, dict):
+        return "Item must have a known type and a data object"
+    missing_fields = [
+        field
+        for field in required
+        if (data.get(field) is None if field == "score_value" else not data.get(field))
+    ]
+    if missing_fields:
+        return f"Item ({item_type}) is missing required fields: {', '.join(missing_fields)}"
+    return item_type, data
+
+
+@telemetry_router.post("/v1/batch")
+async def batch_endpoint(
+    request: Request,
+    user: User = Depends(get_authenticated_user),
+    accumulation_service: TelemetryAccumulationService = Depends(
+        get_telemetry_accumulation_service
+    ),
+    telemetry_svc: TelemetryService = Depends(get_telemetry_service),
+):
+    """
+    Bulk endpoint for scores, metadata and trace-done signals.
+
+    The body is `{"items": [{"type": ..., "data": ...}, ...]}`, where each type names one of
+    the single-item endpoints (e.g. "scores" for /v1/scores) and the data is that endpoint's
+    request body. Valid items are stored with one transaction and one processing job per
+    collection.
+
+    Items are accepted or rejected individually: the response lists an error with the
+    index of each item that was invalid or whose collection could not be written to,
+    and `status` is "partial" if there were any.
+    """
+    try:
+        try:
+            body = json.loads(await read_request_body(request))
+            raw_items = body["items"]
+            if not isinstance(raw_items, list):
+                raise TypeError("items must be a list")
+        except (ValueError, KeyError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid batch body: {e}")
+        if len(raw_items) > MAX_BATCH_ITEMS:
+            raise HTTPException(
+                status_code=413, detail=f"At most {MAX_BATCH_ITEMS} items are allowed per batch"
+            )
+
+        errors: list[dict[str, Any]] = []
+        items_by_collection: dict[str, list[tuple[int, str, dict[str, Any]]]] = defaultdict(list)
+        for i, item in enumerate(raw_items):
+            validated = _validate_batch_item(item)
+            if isinstance(validated, str):
+                errors.append({"index": i, "detail": validated})
+                continue
+            item_type, data = validated
+            items_by_collection[data["collection_id"]].append((i, item_type, data))
+
+        for collection_id, items in items_by_collection.items():
+            try:
+                # Create collection with default name if it doesn't exist
+                await telemetry_svc.ensure_collection_exists(collection_id, user)
+
+                # Check if collection exists and user has permissions
+                await telemetry_svc.ensure_write_permission_for_collection(collection_id, user)
+            except HTTPException as e:
+                errors.extend({"index": i, "detail": e.detail} for i, _, _ in items)
+                continue
+
+            # Store telemetry log for this request
+            await telemetry_svc.store_telemetry_log(
+                user.id,
+                type="batch",
+                version="v1",
+                json_data={"items": [{"type": t, "data": d} for _, t, d in items]},
+                collection_id=collection_id,
+            )
+
+            # Store scores and metadata in database; trace-done items only trigger processing
+            await accumulation_service.add_batch(
+                collection_id, [(t, d) for _, t, d in items if t != "trace-done"], user.id
+            )
+
+            # Trigger background processing job
+            try:
+                await telemetry_svc.mono_svc.add_and_enqueue_telemetry_processing_job(
+                    collection_id, user
+                )
+            except Exception as e:
+                logger.error(
+                    f"Failed to trigger telemetry processing job for collection {collection_id}: {str(e)}"
+                )
+
+        errors.sort(key=lambda error: error["index"])
+        return JSONResponse(
+            status_code=200,
+            content={
+                "status": "partial" if errors else "success",
+                "items_accepted": len(raw_items) - len(errors),
+                "errors": errors,
+            },
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing telemetry batch: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @telemetry_router.post("/{collection_id}/ensure-telemetry-processing")
 async def ensure_telemetry_processing(
     collection_id: str = Depends(require_collection_exists),
@@ -0,0 +1,102 @@
+"""
+Redis cache of verified API keys.
+
+Verifying a key against its Argon2 hash takes tens of milliseconds of CPU, so once a key is
+verified, the user it belongs to is cached under the key's fingerprint for a short TTL.
+Revoking a key deletes its entry and leaves a tombstone for as long as an entry could live,
+so a verification that raced with the revocation can't cache the key again.
+
+Like the chart data cache, this is an optimization: if Redis is unavailable, every request
+verifies its key against the database.
+"""
+
+import json
+from typing import Any
+
+from redis.exceptions import WatchError
+
+from docent._log_util import get_logger
+from docent_core._server._broker.redis_client import get_redis_client
+from docent_core.docent.db.schemas.auth_models import User
+
+logger = get_logger(__name__)
+
+API_KEY_AUTH_CACHE_KEY_FORMAT = "api_key_auth:{fingerprint}"
+API_KEY_REVOKED_KEY_FORMAT = "api_key_revoked:{api_key_id}"
+API_KEY_LAST_USED_KEY_FORMAT = "api_key_last_used:{api_key_id}"
+
+# Bounds how long changes to a user's organizations take to apply to their API keys
+API_KEY_AUTH_CACHE_TTL_SECONDS = 5 * 60
+# At most one last_used_at write per key in this interval, across all processes
+API_KEY_LAST_USED_RESOLUTION_SECONDS = 60
+
+
+async def get_cached_api_key_auth(fingerprint: str) -> tuple[str, User] | None:
+    """Get the ID and user of a verified API key, if cached."""
+    try:
+        redis_client = await get_redis_client()
+        raw = await redis_client.get(  # type: ignore
+            API_KEY_AUTH_CACHE_KEY_FORMAT.format(fingerprint=fingerprint)
+        )
+    except Exception as e:
+        logger.warning(f"Failed to read API key cache: {e}")
+        return None
+    if raw is None:
+        return None
+    entry: dict[str, Any] = json.loads(raw)
+    return entry["api_key_id"], User.model_validate(entry["user"])
+
+
+async def set_cached_api_key_auth(fingerprint: str, api_key_id: str, user: User) -> None:
+    """Cache a key that was just verified, unless it has been revoked since."""
+    cache_key = API_KEY_AUTH_CACHE_KEY_FORMAT.format(fingerprint=fingerprint)
+    revoked_key = API_KEY_REVOKED_KEY_FORMAT.format(api_key_id=api_key_id)
+    entry = json.dumps({"api_key_id": api_key_id, "user": user.model_dump(mode="json")})
+    try:
+        redis_client = await get_redis_client()
+        async with redis_client.pipeline(transaction=True) as pipe:  # type: ignore
+            # The write is dropped if a revocation sets the tombstone after this check
+            await pipe.watch(revoked_key)  # type: ignore
+            if await pipe.exists(revoked_key):  # type: ignore
+                return
+            pipe.multi()  # type: ignore
+            pipe.set(cache_key, entry, ex=API_KEY_AUTH_CACHE_TTL_SECONDS)  # type: ignore
+            await pipe.execute()  # type: ignore
+    except WatchError:
+        pass
+    except Exception as e:
+        logger.warning(f"Failed to write API key cache: {e}")
+
+
+async def invalidate_cached_api_key_auth(api_key_id: str, fingerprint: str | None) -> None:
+    """Stop accepting a revoked key from the cache."""
+    try:
+        redis_client = await get_redis_client()
+        async with redis_client.pipeline(transaction=True) as pipe:  # type: ignore
+            pipe.set(  # type: ignore
+                API_KEY_REVOKED_KEY_FORMAT.format(api_key_id=api_key_id),
+                1,
+                ex=API_KEY_AUTH_CACHE_TTL_SECONDS,
+            )
+            if fingerprint is not None:
+                pipe.delete(API_KEY_AUTH_CACHE_KEY_FORMAT.format(fingerprint=fingerprint))  # type: ignore
+            await pipe.execute()  # type: ignore
+    except Exception as e:
+        # Cached entries expire on their own, so the revocation applies within the TTL
+        logger.error(f"Failed to invalidate cached API key {api_key_id}: {e}")
+
+
+async def claim_api_key_last_used_write(api_key_id: str) -> bool:
+    """Whether this request should write the key's last_used_at, which is throttled."""
+    try:
+        redis_client = await get_redis_client()
+        claimed = await redis_client.set(  # type: ignore
+            API_KEY_LAST_USED_KEY_FORMAT.format(api_key_id=api_key_id),
+            1,
+            ex=API_KEY_LAST_USED_RESOLUTION_SECONDS,
+            nx=True,
+        )
+    except Exception as e:
+        logger.warning(f"Failed to throttle API key last_used_at: {e}")
+        return True
+    return bool(claimed)
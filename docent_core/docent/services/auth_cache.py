@@ -0,0 +1,233 @@
+"""
+Process-local cache of session users, permission levels, and default view contexts.
+
+Most requests resolve all three before doing any work, so caching them removes several
+queries from every request. Writes that change them publish an invalidation on Redis;
+every process that caches subscribes with `run_auth_cache_listener` and drops the
+affected entries. Caching is only enabled while a process is subscribed, since it would
+otherwise miss invalidations. Entries also expire after a short TTL, which bounds how long
+changes made outside this module (e.g. to organization membership) take to apply.
+"""
+
+import json
+import time
+from typing import Any, Hashable, Literal
+from uuid import uuid4
+
+import anyio
+
+from docent._log_util import get_logger
+from docent_core._server._broker.redis_client import get_redis_client
+from docent_core.docent.db.filters import ComplexFilter
+from docent_core.docent.db.schemas.auth_models import Permission, ResourceType, User
+
+logger = get_logger(__name__)
+
+AUTH_CACHE_INVALIDATION_CHANNEL = "auth_cache:invalidate"
+
+AUTH_CACHE_TTL_SECONDS = 60
+# Entries per cache, beyond which the oldest are evicted
+AUTH_CACHE_MAX_ENTRIES = 10_000
+AUTH_CACHE_RECONNECT_DELAY_SECONDS = 5
+# Identifies this process's invalidations, which it has already applied when it receives them
+_SENDER_ID = str(uuid4())
+
+InvalidationKind = Literal["session", "resource", "collection_views"]
+
+
+class _TTLCache:
+    """Dict of entries that expire, grouped so a whole group can be invalidated at once."""
+
+    def __init__(self):
+        self._groups: dict[Hashable, dict[Hashable, tuple[float, Any]]] = {}
+        self._size = 0
+
+    def get(self, group: Hashable, key: Hashable) -> tuple[bool, Any]:
+        entry = self._groups.get(group, {}).get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return False, None
+        return True, entry[1]
+
+    def set(self, group: Hashable, key: Hashable, value: Any, ttl: float):
+        if self._size >= AUTH_CACHE_MAX_ENTRIES:
+            # Groups are in insertion order, so this evicts the oldest
+            self._size -= len(self._groups.pop(next(iter(self._groups))))
+        entries = self._groups.setdefault(group, {})
+        self._size += key not in entries
+        entries[key] = (time.monotonic() + ttl, value)
+
+    def invalidate(self, group: Hashable):
+        self._size -= len(self._groups.pop(group, {}))
+
+    def clear(self):
+        self._groups.clear()
+        self._size = 0
+
+
+_sessions = _TTLCache()
+_permissions = _TTLCache()
+_default_views = _TTLCache()
+
+_enabled = False
+# Incremented by every invalidation. A value read from the database is only cached if no
+# invalidation happened since the read started, since it may predate the change.
+_generation = 0
+
+
+def get_auth_cache_generation() -> int:
+    """Get a token to pass to the `set_cached_*` functions, taken before reading a value."""
+    return _generation
+
+
+def _can_cache(generation: int) -> bool:
+    return _enabled and generation == _generation
+
+
+def get_cached_session_user(session_id: str) -> User | None:
+    found, user = _sessions.get(session_id, session_id)
+    return user if found else None
+
+
+def set_cached_session_user(
+    generation: int, session_id: str, user: User, expires_in_seconds: float
+):
+    if _can_cache(generation):
+        ttl = min(AUTH_CACHE_TTL_SECONDS, expires_in_seconds)
+        _sessions.set(session_id, session_id, user, ttl)
+
+
+def _permission_key(user: User) -> Hashable:
+    # The level depends on organization memberships too, which can differ between the
+    # session and API keys of one user while their caches catch up
+    return user.id, frozenset(user.organization_ids)
+
+
+def get_cached_permission_level(
+    user: User, resource_type: ResourceType, resource_id: str
+) -> tuple[bool, Permission | None]:
+    """Get a user's cached permission level for a resource, and whether it was cached."""
+    return _permissions.get((resource_type.value, resource_id), _permission_key(user))
+
+
+def set_cached_permission_level(
+    generation: int,
+    user: User,
+    resource_type: ResourceType,
+    resource_id: str,
+    permission: Permission | None,
+):
+    if _can_cache(generation):
+        _permissions.set(
+            (resource_type.value, resource_id),
+            _permission_key(user),
+            permission,
+            AUTH_CACHE_TTL_SECONDS,
+        )
+
+
+def get_cached_default_view(
+    collection_id: str, user_id: str
+) -> tuple[str, ComplexFilter | None] | None:
+    """Get the ID and base filter of a user's default view of a collection, if cached."""
+    found, view = _default_views.get(collection_id, user_id)
+    if not found:
+        return None
+    view_id, base_filter = view
+    # Callers may modify the filter
+    return view_id, base_filter.model_copy(deep=True) if base_filter is not None else None
+
+
+def set_cached_default_view(
+    generation: int,
+    collection_id: str,
+    user_id: str,
+    view_id: str,
+    base_filter: ComplexFilter | None,
+):
+    if _can_cache(generation):
+        if base_filter is not None:
+            base_filter = base_filter.model_copy(deep=True)
+        _default_views.set(collection_id, user_id, (view_id, base_filter), AUTH_CACHE_TTL_SECONDS)
+
+
+def _apply_invalidation(message: dict[str, Any]):
+    global _generation
+    _generation += 1
+
+    kind: InvalidationKind = message["kind"]
+    if kind == "session":
+        _sessions.invalidate(message["session_id"])
+    elif kind == "resource":
+        _permissions.invalidate((message["resource_type"], message["resource_id"]))
+    elif kind == "collection_views":
+        _default_views.invalidate(message["collection_id"])
+
+
+async def _publish_invalidation(message: dict[str, Any]):
+    # Applied locally right away, rather than when this process receives its own message
+    _apply_invalidation(message)
+    try:
+        redis_client = await get_redis_client()
+        await redis_client.publish(  # type: ignore
+            AUTH_CACHE_INVALIDATION_CHANNEL, json.dumps({**message, "sender": _SENDER_ID})
+        )
+    except Exception as e:
+        # Other processes still drop the entries when they expire
+        logger.error(f"Failed to publish auth cache invalidation {message}: {e}")
+
+
+async def invalidate_cached_session(session_id: str):
+    """Call after a session is invalidated."""
+    await _publish_invalidation({"kind": "session", "session_id": session_id})
+
+
+async def invalidate_cached_permissions(resource_type: ResourceType, resource_id: str):
+    """Call after the ACL entries of a resource change."""
+    await _publish_invalidation(
+        {"kind": "resource", "resource_type": resource_type.value, "resource_id": resource_id}
+    )
+
+
+async def invalidate_cached_default_views(collection_id: str):
+    """Call after the views of a collection change."""
+    await _publish_invalidation({"kind": "collection_views", "collection_id": collection_id})
+
+
+def _set_enabled(enabled: bool):
+    global _enabled, _generation
+    _enabled = enabled
+    _generation += 1
+    _sessions.clear()
+    _permissions.clear()
+    _default_views.clear()
+
+
+async def run_auth_cache_listener():
+    """Enable the cache in this process, applying invalidations published by other processes.
+
+    Runs until cancelled, resubscribing if the connection to Redis is lost.
+    """
+    while True:
+        try:
+            redis_client = await get_redis_client()
+            pubsub = redis_client.pubsub()  # type: ignore
+            try:
+                await pubsub.subscribe(AUTH_CACHE_INVALIDATION_CHANNEL)  # type: ignore
+                async for message in pubsub.listen():  # type: ignore
+                    if message["type"] == "subscribe":
+                        _set_enabled(True)
+                        logger.info("Subscribed to auth cache invalidations")
+                    elif message["type"] == "message":
+                        invalidation = json.loads(message["data"])
+                        # Applying its own invalidations again would only keep fresh reads
+                        # from being cached
+                        if invalidation.get("sender") != _SENDER_ID:
+                            _apply_invalidation(invalidation)
+            finally:
+                # Invalidations published while unsubscribed would be missed
+                _set_enabled(False)
+                with anyio.CancelScope(shield=True):
+                    await pubsub.aclose()  # type: ignore
+        except Exception as e:
+            logger.warning(f"Auth cache listener disconnected: {e}")
+        await anyio.sleep(AUTH_CACHE_RECONNECT_DELAY_SECONDS)
@@ -0,0 +1,371 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any, Sequence
+from uuid import uuid4
+
+from sqlalchemy import Row, delete, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from docent._log_util import get_logger
+from docent_core.docent.db.chart_sql import generate_rollup_query
+from docent_core.docent.db.filters import (
+    AgentRunIdFilter,
+    CollectionFilter,
+    ComplexFilter,
+    PrimitiveFilter,
+)
+from docent_core.docent.db.schemas.chart import SQLAChartRollup, SQLAChartRollupBin
+from docent_core.docent.db.schemas.tables import SQLACollection
+from docent_core.docent.services.charts import (
+    ChartDimension,
+    ChartDimensionDataType,
+    CountRunDimension,
+    JudgeOutputDimension,
+    RunMetadataDimension,
+    static_measures,
+)
+
+logger = get_logger(__name__)
+
+# Each rollup costs an aggregation over the affected rows on every write, so only the
+# most recently used ones are kept
+MAX_CHART_ROLLUPS_PER_COLLECTION = 20
+# How stale a rollup's last_used_at may get before a read refreshes it
+ROLLUP_LAST_USED_RESOLUTION = timedelta(hours=1)
+
+
+def _describe_dimension(dim: ChartDimension) -> dict[str, Any]:
+    if isinstance(dim, RunMetadataDimension):
+        return {
+            "kind": dim.kind.value,
+            "json_path": dim.json_path,
+            "data_type": dim.data_type.value,
+        }
+    if isinstance(dim, JudgeOutputDimension):
+        return {
+            "kind": dim.kind.value,
+            "judge_id": dim.judge_id,
+            "judge_version": dim.judge_version,
+            "json_path": dim.json_path,
+            "data_type": dim.data_type.value,
+        }
+    if isinstance(dim, CountRunDimension):
+        return {"kind": dim.kind.value, "key": dim.key}
+    raise TypeError(f"Unsupported dimension type: {type(dim)}")
+
+
+def _dimension_from_description(description: dict[str, Any]) -> ChartDimension:
+    kind = description["kind"]
+    if kind == "run_metadata":
+        return RunMetadataDimension(
+            json_path=description["json_path"],
+            name=description["json_path"],
+            data_type=ChartDimensionDataType(description["data_type"]),
+        )
+    if kind == "judge_output":
+        return JudgeOutputDimension(
+            judge_id=description["judge_id"],
+            # The name only labels the chart; rollups don't depend on it
+            judge_name="",
+            judge_version=description["judge_version"],
+            name=description["json_path"],
+            json_path=description["json_path"],
+            data_type=ChartDimensionDataType(description["data_type"]),
+        )
+    for measure in static_measures:
+        if measure.key == description["key"]:
+            return measure
+    raise ValueError(f"Unknown chart dimension: {description}")
+
+
+def _filter_supports_rollups(runs_filter: CollectionFilter) -> bool:
+    """Whether a filter only looks at agent run rows, so its result for a run is fixed."""
+    if isinstance(runs_filter, ComplexFilter):
+        return all(_filter_supports_rollups(f) for f in runs_filter.filters)
+    return isinstance(runs_filter, (PrimitiveFilter, AgentRunIdFilter))
+
+
+@dataclass
+class _RollupSpec:
+    """The dimensions, measure and runs filter a rollup aggregates."""
+
+    dimensions: list[ChartDimension]
+    measure: ChartDimension
+    runs_filter: ComplexFilter | None
+
+    @classmethod
+    def from_json(cls, spec: dict[str, Any]) -> "_RollupSpec":
+        runs_filter = (
+            ComplexFilter.model_validate(spec["runs_filter"]) if spec["runs_filter"] else None
+        )
+        return cls(
+            [_dimension_from_description(d) for d in spec["dimensions"]],
+            _dimension_from_description(spec["measure"]),
+            runs_filter,
+        )
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "dimensions": [_describe_dimension(d) for d in self.dimensions],
+            "measure": _describe_dimension(self.measure),
+            "runs_filter": self.runs_filter.model_dump(mode="json") if self.runs_filter else None,
+        }
+
+    def hash(self) -> str:
+        return hashlib.sha256(json.dumps(self.to_json(), sort_keys=True).encode()).hexdigest()
+
+    @property
+    def judge_ids(self) -> set[str]:
+        return {
+            d.judge_id
+            for d in self.dimensions + [self.measure]
+            if isinstance(d, JudgeOutputDimension)
+        }
+
+
+class ChartRollupService:
+    """
+    Maintains pre-aggregated chart rollups.
+
+    A rollup holds the row count and the count, sum and sum of squares of the measure for
+    each bin of a chart, so means and confidence intervals can be computed without scanning
+    runs. These statistics are additive per agent run (or per judge result, for charts over
+    one judge output), so writers keep rollups current by aggregating only the rows they
+    touch: `add_agent_runs` after inserting or updating runs, `remove_agent_runs` before
+    deleting or updating them, and `add_judge_results` after inserting judge results, all in
+    the writer's transaction.
+
+    Writers take a KEY SHARE lock on the collection row before reading the rollup list, and
+    a new rollup is backfilled under an UPDATE lock on the same row, so every write is
+    either included in the backfill or applied to the new rollup.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @staticmethod
+    def supports(
+        dimensions: list[ChartDimension],
+        measure: ChartDimension,
+        runs_filter: ComplexFilter | None,
+    ) -> bool:
+        """Whether a chart can be served from a rollup.
+
+        Joining two judge outputs multiplies their results per run, which is not additive,
+        and search-based filters depend on data that rollups don't track.
+        """
+        unique_dimensions = {dim.key: dim for dim in dimensions + [measure]}.values()
+        num_judge_sources = sum(isinstance(d, JudgeOutputDimension) for d in unique_dimensions)
+        if num_judge_sources > 1:
+            return False
+        return runs_filter is None or _filter_supports_rollups(runs_filter)
+
+    async def get_rollup_bins(
+        self,
+        collection_id: str,
+        dimensions: list[ChartDimension],
+        measure: ChartDimension,
+        runs_filter: ComplexFilter | None,
+    ) -> Sequence[Row[Any]]:
+        """Get the bins of a chart's rollup, creating and backfilling the rollup if needed.
+
+        Creating a rollup commits the session, to release the lock it takes on the collection.
+        """
+        spec = _RollupSpec(dimensions, measure, runs_filter)
+        spec_hash = spec.hash()
+
+        rollup = await self._get_rollup(collection_id, spec_hash)
+        if rollup is None:
+            rollup_id = await self._create_rollup(collection_id, spec, spec_hash)
+        else:
+            rollup_id = rollup.id
+            if rollup.last_used_at < _now() - ROLLUP_LAST_USED_RESOLUTION:
+                await self.session.execute(
+                    update(SQLAChartRollup)
+                    .where(SQLAChartRollup.id == rollup_id)
+                    .values(last_used_at=_now())
+                )
+
+        # Select columns rather than entities: the ORM can't key its identity map on arrays
+        result = await self.session.execute(
+            select(
+                SQLAChartRollupBin.bin_values,
+                SQLAChartRollupBin.row_count,
+                SQLAChartRollupBin.measure_count,
+                SQLAChartRollupBin.measure_sum,
+                SQLAChartRollupBin.measure_sum_sq,
+            )
+            .where(SQLAChartRollupBin.rollup_id == rollup_id)
+            .order_by(SQLAChartRollupBin.bin_values)
+        )
+        return result.all()
+
+    async def _get_rollup(self, collection_id: str, spec_hash: str) -> SQLAChartRollup | None:
+        result = await self.session.execute(
+            select(SQLAChartRollup).where(
+                SQLAChartRollup.collection_id == collection_id,
+                SQLAChartRollup.spec_hash == spec_hash,
+            )
+        )
+        return result.scalar_one_or_none()
+
+    async def _create_rollup(self, collection_id: str, spec: _RollupSpec, spec_hash: str) -> str:
+        # Wait for in-flight writers and keep new ones out until the backfill commits
+        await self.session.execute(
+            select(SQLACollection.id).where(SQLACollection.id == collection_id).with_for_update()
+        )
+        rollup = await self._get_rollup(collection_id, spec_hash)
+        if rollup is not None:
+            # Created by a concurrent request while we waited for the lock
+            rollup_id = rollup.id
+        else:
+            rollup_id = str(uuid4())
+            self.session.add(
+                SQLAChartRollup(
+                    id=rollup_id,
+                    collection_id=collection_id,
+                    spec_hash=spec_hash,
+                    spec=spec.to_json(),
+                    last_used_at=_now(),
+                )
+            )
+            await self.session.flush()
+            await self._aggregate_into(rollup_id, collection_id, spec, sign=1)
+            await self._evict_rollups(collection_id)
+            logger.info(f"Created chart rollup {rollup_id} for collection {collection_id}")
+
+        # Exception to rule of not committing inside the service: release the collection lock
+        await self.session.commit()
+        return rollup_id
+
+    async def _evict_rollups(self, collection_id: str):
+        """Delete the least recently used rollups beyond the per-collection limit."""
+        stale_ids = (
+            select(SQLAChartRollup.id)
+            .where(SQLAChartRollup.collection_id == collection_id)
+            .order_by(SQLAChartRollup.last_used_at.desc())
+            .offset(MAX_CHART_ROLLUPS_PER_COLLECTION)
+        )
+        await self.session.execute(delete(SQLAChartRollup).where(SQLAChartRollup.id.in_(stale_ids)))
+
+    async def _aggregate_into(
+        self,
+        rollup_id: str,
+        collection_id: str,
+        spec: _RollupSpec,
+        sign: int,
+        agent_run_ids: list[str] | None = None,
+        judge_result_ids: list[str] | None = None,
+    ):
+        """Add (or with sign=-1, subtract) the statistics of the selected rows to a rollup."""
+        rollup_query = generate_rollup_query(
+            spec.dimensions,
+            spec.measure,
+            spec.runs_filter,
+            collection_id,
+            agent_run_ids=agent_run_ids,
+            judge_result_ids=judge_result_ids,
+        ).subquery()
+
+        # Upsert in bin order so concurrent writers lock bins in the same order
+        stmt = insert(SQLAChartRollupBin).from_select(
+            [
+                "rollup_id",
+                "bin_values",
+                "row_count",
+                "measure_count",
+                "measure_sum",
+                "measure_sum_sq",
+            ],
+            select(
+                literal(rollup_id),
+                rollup_query.c.bin_values,
+                rollup_query.c.row_count * sign,
+                rollup_query.c.measure_count * sign,
+                rollup_query.c.measure_sum * sign,
+                rollup_query.c.measure_sum_sq * sign,
+            ).order_by(rollup_query.c.bin_values),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SQLAChartRollupBin.rollup_id, SQLAChartRollupBin.bin_values],
+            set_={
+                column: getattr(SQLAChartRollupBin, column) + getattr(stmt.excluded, column)
+                for column in ("row_count", "measure_count", "measure_sum", "measure_sum_sq")
+            },
+        )
+        await self.session.execute(stmt)
+
+        if sign < 0:
+            await self.session.execute(
+                delete(SQLAChartRollupBin).where(
+                    SQLAChartRollupBin.rollup_id == rollup_id, SQLAChartRollupBin.row_count <= 0
+                )
+            )
+
+    async def _apply_to_rollups(
+        self,
+        collection_id: str,
+        sign: int,
+        agent_run_ids: list[str] | None = None,
+        judge_result_ids: list[str] | None = None,
+    ):
+        await self.session.execute(
+            select(SQLACollection.id)
+            .where(SQLACollection.id == collection_id)
+            .with_for_update(key_share=True)
+        )
+        result = await self.session.execute(
+            select(SQLAChartRollup.id, SQLAChartRollup.spec).where(
+                SQLAChartRollup.collection_id == collection_id
+            )
+        )
+        for rollup_id, spec_json in result.all():
+            spec = _RollupSpec.from_json(spec_json)
+            # New judge results only affect rollups over judge outputs
+            if judge_result_ids is not None and not spec.judge_ids:
+                continue
+            await self._aggregate_into(
+                rollup_id, collection_id, spec, sign, agent_run_ids, judge_result_ids
+            )
+
+    async def add_agent_runs(self, collection_id: str, agent_run_ids: list[str]):
+        """Add agent runs that were just inserted or updated to the collection's rollups."""
+        if agent_run_ids:
+            await self._apply_to_rollups(collection_id, 1, agent_run_ids=agent_run_ids)
+
+    async def remove_agent_runs(self, collection_id: str, agent_run_ids: list[str]):
+        """Remove agent runs that are about to be deleted or updated from the rollups."""
+        if agent_run_ids:
+            await self._apply_to_rollups(collection_id, -1, agent_run_ids=agent_run_ids)
+
+    async def add_judge_results(self, collection_id: str, judge_result_ids: list[str]):
+        """Add judge results that were just inserted to the collection's rollups."""
+        if judge_result_ids:
+            await self._apply_to_rollups(collection_id, 1, judge_result_ids=judge_result_ids)
+
+    async def drop_judge_rollups(self, collection_id: str, judge_id: str):
+        """Delete the rollups over a judge whose results are being deleted.
+
+        They are rebuilt from the remaining results the next time their chart is read.
+        """
+        result = await self.session.execute(
+            select(SQLAChartRollup.id, SQLAChartRollup.spec).where(
+                SQLAChartRollup.collection_id == collection_id
+            )
+        )
+        rollup_ids = [
+            rollup_id
+            for rollup_id, spec_json in result.all()
+            if judge_id in _RollupSpec.from_json(spec_json).judge_ids
+        ]
+        if rollup_ids:
+            await self.session.execute(
+                delete(SQLAChartRollup).where(SQLAChartRollup.id.in_(rollup_ids))
+            )
+
+
+def _now() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
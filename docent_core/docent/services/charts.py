@@ -1,15 +1,21 @@
+import hashlib
+import json
+import math
 from dataclasses import dataclass
+from decimal import Decimal
 from enum import Enum
-from typing import Any, cast
+from typing import Any, Sequence, cast
 from uuid import uuid4
 
 from pydantic import BaseModel, ConfigDict, Field
-from sqlalchemy import ColumnElement, delete, func, select, text, update
+from sqlalchemy import ColumnElement, delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.types import Numeric
 
 from docent._log_util import get_logger
+from docent_core._server._broker.redis_client import get_redis_client
 from docent_core.docent.db.contexts import ViewContext
+from docent_core.docent.db.data_version import get_data_version
 from docent_core.docent.db.filters import ComplexFilter
 from docent_core.docent.db.schemas.chart import SQLAChart
 from docent_core.docent.db.schemas.rubric import (
@@ -19,9 +25,24 @@ from docent_core.docent.db.schemas.rubric import (
 from docent_core.docent.db.schemas.tables import (
     SQLAAgentRun,
 )
+from docent_core.docent.services.metadata_catalog import MetadataCatalogService
 
 logger = get_logger(__name__)
 
+# Chart data is cached per collection data version; entries for old versions just expire
+CHART_DATA_CACHE_KEY_FORMAT = "chart_data:{collection_id}:{data_version}:{spec_hash}"
+CHART_DATA_CACHE_TTL_SECONDS = 60 * 60
+
+# Collections with at least this many runs serve charts from rollups where possible
+CHART_ROLLUP_MIN_RUNS = 10_000
+# Postgres' GROUPING() takes at most 31 arguments, one per dimension of a shared query
+MAX_SHARED_CHART_QUERY_DIMENSIONS = 31
+
+# Metadata keys that describe the other keys rather than the run
+METADATA_KEYS_EXCLUDED_FROM_CHARTS = ("_field_descriptions", "allow_fields_without_descriptions")
+# Metadata keys set on fewer runs than this are not offered as chart keys
+MIN_METADATA_KEY_PRESENCE_RATIO = 0.5
+
 
 class ChartSpec(BaseModel):
     """Response model for chart data, matching TypeScript ChartSpec interface."""
@@ -184,6 +205,7 @@ class JudgeOutputDimension(ChartDimension):
     judge_id: str
     judge_name: str
     judge_version: int
+    json_path: str
 
     def __init__(
         self,
@@ -217,6 +239,7 @@ class JudgeOutputDimension(ChartDimension):
             judge_id=judge_id,
             judge_name=judge_name,
             judge_version=judge_version,
+            json_path=json_path,
             **kwargs,
         )
 
@@ -256,6 +279,99 @@ class AvailableKeysCache:
     measures: list[ChartDimension]
 
 
+def _chart_data_cache_key(
+    collection_id: str,
+    data_version: int,
+    dimensions: list[ChartDimension],
+    measure: ChartDimension,
+    runs_filter: ComplexFilter | None,
+) -> str:
+    """Build the cache key for chart data from everything that goes into the chart query."""
+
+    def _describe(dim: ChartDimension) -> list[Any]:
+        return [dim.key, dim.data_type.value, getattr(dim, "judge_version", None)]
+
+    spec = {
+        "dimensions": [_describe(dim) for dim in dimensions],
+        "measure": _describe(measure),
+        "runs_filter": runs_filter.model_dump(mode="json") if runs_filter else None,
+    }
+    spec_hash = hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+    return CHART_DATA_CACHE_KEY_FORMAT.format(
+        collection_id=collection_id, data_version=data_version, spec_hash=spec_hash
+    )
+
+
+async def _get_cached_chart_data(cache_key: str) -> dict[str, Any] | None:
+    # The cache is an optimization; if Redis is unavailable, charts are computed directly
+    try:
+        redis_client = await get_redis_client()
+        raw = await redis_client.get(cache_key)  # type: ignore
+    except Exception as e:
+        logger.warning(f"Failed to read chart data cache: {e}")
+        return None
+    return json.loads(raw) if raw is not None else None
+
+
+async def _set_cached_chart_data(cache_key: str, chart_data: dict[str, Any]) -> None:
+    try:
+        redis_client = await get_redis_client()
+        await redis_client.set(  # type: ignore
+            cache_key, json.dumps(chart_data), ex=CHART_DATA_CACHE_TTL_SECONDS
+        )
+    except Exception as e:
+        logger.warning(f"Failed to write chart data cache: {e}")
+
+
+def _join_bin_key_parts(bin_key_parts: list[str]) -> str:
+    return (
+        "|".join(bin_key_parts)
+        if len(bin_key_parts) > 1
+        else bin_key_parts[0] if bin_key_parts else "default"
+    )
+
+
+def _bin_sort_key(
+    dimensions: list[ChartDimension], values: Sequence[Any]
+) -> list[tuple[bool, Any]]:
+    """Order bins like the chart query does: numeric dimensions by value, nulls last."""
+    return [
+        (
+            value is None,
+            (
+                Decimal(value)
+                if value is not None and dim.data_type == ChartDimensionDataType.NUMERIC
+                else value or ""
+            ),
+        )
+        for dim, value in zip(dimensions, values)
+    ]
+
+
+def _bin_stats_entry(measure_value: Any, measure_ci: Any, measure_count: Any) -> dict[str, Any]:
+    return {
+        "mean": float(measure_value) if measure_value is not None else None,
+        "ci": float(measure_ci) if measure_ci is not None else None,
+        "n": int(measure_count) if measure_count is not None else None,
+    }
+
+
+def _shared_query_batches(
+    charts: list[tuple[ChartSpec, list[ChartDimension], ChartDimension]],
+) -> list[list[tuple[ChartSpec, list[ChartDimension], ChartDimension]]]:
+    """Split charts that can share a scan into batches Postgres' GROUPING() can handle."""
+    batches: list[list[tuple[ChartSpec, list[ChartDimension], ChartDimension]]] = []
+    batch_dim_keys: set[str] = set()
+    for chart, chart_dimensions, measure_dimension in charts:
+        dim_keys = {dim.key for dim in chart_dimensions}
+        if not batches or len(batch_dim_keys | dim_keys) > MAX_SHARED_CHART_QUERY_DIMENSIONS:
+            batches.append([])
+            batch_dim_keys = set()
+        batches[-1].append((chart, chart_dimensions, measure_dimension))
+        batch_dim_keys |= dim_keys
+    return batches
+
+
 class ChartsService:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -422,96 +538,38 @@ class ChartsService:
     async def _fetch_run_metadata_chart_keys_from_db(
         self, collection_id: str
     ) -> list[ChartDimension]:
-        """Fetch metadata keys (including nested) and measure-eligible numeric keys in one query.
+        """Fetch metadata keys (including nested) from the collection's metadata catalog.
 
+        Keys present (non-null) in fewer than half of the runs are left out.
         Dimension data types allow nulls when determining numeric/boolean types.
         Measure eligibility is true if all occurrences are number/boolean/null.
         """
-        query = text(
-            """
-            WITH RECURSIVE json_paths AS (
-                -- Base case: top-level keys
-                SELECT
-                    key AS path,
-                    value,
-                    id AS agent_run_id
-                FROM agent_runs
-                CROSS JOIN LATERAL jsonb_each(metadata_json) AS t(key, value)
-                WHERE metadata_json IS NOT NULL
-                AND metadata_json != 'null'::jsonb
-                AND metadata_json != '{}'::jsonb
-                AND collection_id = :collection_id
-
-                UNION ALL
-
-                -- Recursive case: nested keys
-                SELECT
-                    jp.path || '.' || nested.key AS path,
-                    nested.value,
-                    jp.agent_run_id
-                FROM json_paths jp
-                CROSS JOIN LATERAL jsonb_each(jp.value) AS nested(key, value)
-                WHERE jsonb_typeof(jp.value) = 'object'
-            ),
-            total_runs AS (
-                SELECT COUNT(id)::int AS total_runs
-                FROM agent_runs
-                WHERE collection_id = :collection_id
-            ),
-            agg AS (
-                SELECT
-                    path,
-                    COUNT(DISTINCT agent_run_id) FILTER (WHERE jsonb_typeof(value) <> 'null') AS present_count,
-                    CASE
-                        WHEN bool_and(jsonb_typeof(value) = 'null') THEN 'null'
-                        WHEN bool_and(jsonb_typeof(value) IN ('number','null')) THEN 'numeric'
-                        WHEN bool_and(jsonb_typeof(value) IN ('number','boolean','null')) THEN 'numeric_or_boolean'
-                        WHEN bool_and(jsonb_typeof(value) IN ('number','boolean','string','null')) THEN 'text'
-                        ELSE 'unknown'
-                    END AS data_type
-                FROM json_paths
-                WHERE NOT (
-                    path IN ('_field_descriptions', 'allow_fields_without_descriptions')
-                    OR path LIKE '_field_descriptions.%'
-                    OR path LIKE 'allow_fields_without_descriptions.%'
-                )
-                GROUP BY path
-            )
-            SELECT
-                agg.path AS path,
-                agg.data_type AS data_type
-            FROM agg, total_runs
-            WHERE (agg.present_count::numeric / NULLIF(total_runs.total_runs::numeric, 0)) >= :min_presence_ratio
-            ORDER BY agg.path
-            """
-        )
-
         try:
-            result = await self.session.execute(
-                query,
-                {
-                    "collection_id": collection_id,
-                    "min_presence_ratio": 0.5,
-                },
-            )
-
-            rows = list(result)
+            catalog = MetadataCatalogService(self.session)
+            total_runs = await catalog.count_agent_runs(collection_id)
+            key_stats = await catalog.get_key_stats(collection_id)
 
             dimensions: list[ChartDimension] = []
-            for row in rows:
-                if row.data_type == "numeric":
-                    dt = ChartDimensionDataType.NUMERIC
-                elif row.data_type == "numeric_or_boolean":
-                    dt = ChartDimensionDataType.NUMERIC_OR_BOOLEAN
-                elif row.data_type == "text":
+            for stats in key_stats:
+                root_key = stats.path.split(".", 1)[0]
+                if root_key in METADATA_KEYS_EXCLUDED_FROM_CHARTS:
+                    continue
+                if stats.present_count < MIN_METADATA_KEY_PRESENCE_RATIO * total_runs:
+                    continue
+
+                if stats.present_count == 0 or stats.object_count or stats.array_count:
+                    continue
+                elif stats.string_count:
                     dt = ChartDimensionDataType.TEXT
+                elif stats.boolean_count:
+                    dt = ChartDimensionDataType.NUMERIC_OR_BOOLEAN
                 else:
-                    continue
+                    dt = ChartDimensionDataType.NUMERIC
 
                 dimensions.append(
                     RunMetadataDimension(
-                        json_path=row.path,
-                        name=row.path,
+                        json_path=stats.path,
+                        name=stats.path,
                         data_type=dt,
                     )
                 )
@@ -679,34 +737,22 @@ class ChartsService:
                 return measure
         return None
 
-    async def get_chart_data(self, ctx: ViewContext, chart: ChartSpec) -> dict[str, Any]:
-        """Get chart data (binStats) for a specific chart."""
+    async def _get_bin_stats_from_query(
+        self,
+        ctx: ViewContext,
+        chart_dimensions: list[ChartDimension],
+        measure_dimension: ChartDimension,
+        runs_filter: ComplexFilter | None,
+    ) -> dict[str, Any]:
+        """Aggregate chart data over the matching runs."""
         # Import here to avoid circular imports
         from docent_core.docent.db.chart_sql import generate_chart_query
 
-        # Extract dimensions and measures from chart specification
-        chart_dimensions: list[ChartDimension] = []
-        if chart.x_key:
-            x_dimension = await self._get_dimension_by_key(ctx, chart.x_key)
-            if x_dimension:
-                chart_dimensions.append(x_dimension)
-        if chart.series_key:
-            series_dimension = await self._get_dimension_by_key(ctx, chart.series_key)
-            if series_dimension:
-                chart_dimensions.append(series_dimension)
-
-        # Get measure dimension
-        if not chart.y_key:
-            raise ValueError("No y dimension specified for chart")
-        measure_dimension = await self._get_measure_by_key(ctx, chart.y_key)
-        if not measure_dimension:
-            raise ValueError(f"No measure dimension found for key: {chart.y_key}")
-
         # Generate SQL query for chart data
         query = generate_chart_query(
             dimensions=chart_dimensions,
             measure=measure_dimension,
-            runs_filter=chart.runs_filter,
+            runs_filter=runs_filter,
             collection_id=ctx.collection_id,
         )
 
@@ -727,11 +773,7 @@ class ChartsService:
                     # Fallback: use the index
                     bin_key_parts.append(f"{dim.key},{row[i]}")
 
-            bin_key = (
-                "|".join(bin_key_parts)
-                if len(bin_key_parts) > 1
-                else bin_key_parts[0] if bin_key_parts else "default"
-            )
+            bin_key = _join_bin_key_parts(bin_key_parts)
 
             # Get the measure value
             measure_value = (
@@ -747,15 +789,260 @@ class ChartsService:
             measure_ci = getattr(row, "measure_ci", None) if hasattr(row, "measure_ci") else None
 
             # Create TaskStats-like structure
-            bin_stats[bin_key] = {
-                "mean": float(measure_value) if measure_value is not None else None,
-                "ci": float(measure_ci) if measure_ci is not None else None,
-                "n": int(measure_count) if measure_count is not None else None,
+            bin_stats[bin_key] = _bin_stats_entry(measure_value, measure_ci, measure_count)
+
+        return bin_stats
+
+    async def _get_bin_stats_from_rollup(
+        self,
+        ctx: ViewContext,
+        chart_dimensions: list[ChartDimension],
+        measure_dimension: ChartDimension,
+        runs_filter: ComplexFilter | None,
+    ) -> dict[str, Any]:
+        """Compute chart data from the chart's rollup, matching `_get_bin_stats_from_query`."""
+        from docent_core.docent.services.chart_rollups import ChartRollupService
+
+        bins = await ChartRollupService(self.session).get_rollup_bins(
+            ctx.collection_id, chart_dimensions, measure_dimension, runs_filter
+        )
+
+        bin_stats: dict[str, Any] = {}
+        sorted_bins = sorted(bins, key=lambda b: _bin_sort_key(chart_dimensions, b.bin_values))
+        for rollup_bin in sorted_bins:
+            bin_key = _join_bin_key_parts(
+                [
+                    f"{dim.key},{value}"
+                    for dim, value in zip(chart_dimensions, rollup_bin.bin_values)
+                ]
+            )
+
+            if isinstance(measure_dimension, CountRunDimension):
+                bin_stats[bin_key] = {"mean": float(rollup_bin.row_count), "ci": None, "n": None}
+                continue
+
+            n = rollup_bin.measure_count
+            mean, ci = None, 0.0
+            if n > 0:
+                mean = float(rollup_bin.measure_sum / n)
+            if n > 1:
+                # Sample standard deviation, like Postgres' stddev
+                variance = (rollup_bin.measure_sum_sq - rollup_bin.measure_sum**2 / n) / (n - 1)
+                ci = 1.96 * math.sqrt(max(float(variance), 0.0)) / math.sqrt(n)
+            bin_stats[bin_key] = {"mean": mean, "ci": ci, "n": n}
+
+        return bin_stats
+
+    async def _get_bin_stats_from_shared_query(
+        self,
+        ctx: ViewContext,
+        charts: list[tuple[list[ChartDimension], ChartDimension]],
+        runs_filter: ComplexFilter | None,
+    ) -> list[dict[str, Any]]:
+        """Aggregate the data of several charts over the matching runs in one scan.
+
+        The charts must share `runs_filter` and read the same judge outputs; see
+        `generate_shared_chart_query`. Returns the bin stats of each chart, in order.
+        """
+        # Import here to avoid circular imports
+        from docent_core.docent.db.chart_sql import (
+            generate_shared_chart_query,
+            shared_chart_grouping_dimensions,
+            shared_chart_grouping_id,
+        )
+
+        query = generate_shared_chart_query(charts, runs_filter, ctx.collection_id)
+        rows = (await self.session.execute(query)).mappings().all()
+
+        grouping_dims = shared_chart_grouping_dimensions(charts)
+        all_bin_stats: list[dict[str, Any]] = []
+        for i, (chart_dimensions, _) in enumerate(charts):
+            grouping_id = shared_chart_grouping_id(grouping_dims, chart_dimensions)
+            chart_rows = [row for row in rows if row["grouping_id"] == grouping_id]
+            chart_rows.sort(
+                key=lambda row: _bin_sort_key(
+                    chart_dimensions, [row[dim.key] for dim in chart_dimensions]
+                )
+            )
+
+            bin_stats: dict[str, Any] = {}
+            for row in chart_rows:
+                bin_key = _join_bin_key_parts(
+                    [f"{dim.key},{row[dim.key]}" for dim in chart_dimensions]
+                )
+                bin_stats[bin_key] = _bin_stats_entry(
+                    row[f"measure_value_{i}"],
+                    row.get(f"measure_ci_{i}"),
+                    row.get(f"measure_count_{i}"),
+                )
+            all_bin_stats.append(bin_stats)
+
+        return all_bin_stats
+
+    async def _resolve_chart(
+        self, ctx: ViewContext, chart: ChartSpec
+    ) -> tuple[list[ChartDimension], ChartDimension]:
+        """Get the dimensions and measure of a chart specification."""
+        chart_dimensions: list[ChartDimension] = []
+        if chart.x_key:
+            x_dimension = await self._get_dimension_by_key(ctx, chart.x_key)
+            if x_dimension:
+                chart_dimensions.append(x_dimension)
+        if chart.series_key:
+            series_dimension = await self._get_dimension_by_key(ctx, chart.series_key)
+            if series_dimension:
+                chart_dimensions.append(series_dimension)
+
+        # Get measure dimension
+        if not chart.y_key:
+            raise ValueError("No y dimension specified for chart")
+        measure_dimension = await self._get_measure_by_key(ctx, chart.y_key)
+        if not measure_dimension:
+            raise ValueError(f"No measure dimension found for key: {chart.y_key}")
+
+        return chart_dimensions, measure_dimension
+
+    async def get_chart_data(self, ctx: ViewContext, chart: ChartSpec) -> dict[str, Any]:
+        """Get chart data (binStats) for a specific chart."""
+        chart_data = (await self.get_charts_data(ctx, [chart]))[chart.id]
+        if "error" in chart_data:
+            raise ValueError(chart_data["error"])
+        return chart_data
+
+    async def get_charts_data(
+        self, ctx: ViewContext, charts: list[ChartSpec]
+    ) -> dict[str, dict[str, Any]]:
+        """Get chart data (binStats) for several charts, keyed by chart ID.
+
+        Results are cached across requests, keyed by the resolved chart spec and the
+        collection's data version, so repeated loads of an unchanged collection don't
+        rerun the aggregation query. Charts that aggregate the same rows (same runs filter
+        and judge outputs) are computed together in a single scan.
+
+        A chart whose data can't be computed, e.g. one over a deleted judge, gets an entry
+        `{"error": <message>}` instead, so it doesn't fail the other charts.
+        """
+        # Import here to avoid circular imports
+        from docent_core.docent.services.chart_rollups import ChartRollupService
+
+        # Read the version before the data, so a concurrent write can't leave stale data
+        # cached under the new version
+        data_version = await get_data_version(self.session, ctx.collection_id)
+
+        bin_stats_by_chart: dict[str, dict[str, Any]] = {}
+        cache_keys: dict[str, str] = {}
+        chart_data_by_id: dict[str, dict[str, Any]] = {}
+        errors_by_chart: dict[str, str] = {}
+        # Charts to compute from queries, grouped by the rows they aggregate
+        query_groups: dict[
+            tuple[str, frozenset[str]],
+            list[tuple[ChartSpec, list[ChartDimension], ChartDimension]],
+        ] = {}
+        total_runs: int | None = None
+
+        for chart in charts:
+            if (
+                chart.id in chart_data_by_id
+                or chart.id in cache_keys
+                or chart.id in errors_by_chart
+            ):
+                continue
+            try:
+                chart_dimensions, measure_dimension = await self._resolve_chart(ctx, chart)
+            except ValueError as e:
+                logger.warning(f"Failed to resolve chart {chart.id}: {e}")
+                errors_by_chart[chart.id] = str(e)
+                continue
+
+            cache_key = _chart_data_cache_key(
+                ctx.collection_id,
+                data_version,
+                chart_dimensions,
+                measure_dimension,
+                chart.runs_filter,
+            )
+            cached = await _get_cached_chart_data(cache_key)
+            if cached is not None:
+                chart_data_by_id[chart.id] = cached
+                continue
+            cache_keys[chart.id] = cache_key
+
+            # Large collections are served from pre-aggregated rollups where the chart allows it
+            if total_runs is None:
+                total_runs = await MetadataCatalogService(self.session).count_agent_runs(
+                    ctx.collection_id
+                )
+            if total_runs >= CHART_ROLLUP_MIN_RUNS and ChartRollupService.supports(
+                chart_dimensions, measure_dimension, chart.runs_filter
+            ):
+                # Creating a rollup commits, so this can't run in a savepoint; the rest of
+                # the request only reads, so a failure just rolls the session back
+                try:
+                    bin_stats_by_chart[chart.id] = await self._get_bin_stats_from_rollup(
+                        ctx, chart_dimensions, measure_dimension, chart.runs_filter
+                    )
+                except Exception as e:
+                    logger.warning(f"Failed to get data for chart {chart.id}: {e}")
+                    await self.session.rollback()
+                    errors_by_chart[chart.id] = str(e)
+                continue
+
+            runs_filter_key = (
+                json.dumps(chart.runs_filter.model_dump(mode="json"), sort_keys=True)
+                if chart.runs_filter
+                else ""
+            )
+            judge_keys = frozenset(
+                dim.key
+                for dim in chart_dimensions + [measure_dimension]
+                if isinstance(dim, JudgeOutputDimension)
+            )
+            query_groups.setdefault((runs_filter_key, judge_keys), []).append(
+                (chart, chart_dimensions, measure_dimension)
+            )
+
+        for group in query_groups.values():
+            for batch in _shared_query_batches(group):
+                runs_filter = batch[0][0].runs_filter
+                # A savepoint keeps a failed query from aborting the others' transaction
+                try:
+                    async with self.session.begin_nested():
+                        if len(batch) == 1:
+                            _, chart_dimensions, measure_dimension = batch[0]
+                            all_bin_stats = [
+                                await self._get_bin_stats_from_query(
+                                    ctx, chart_dimensions, measure_dimension, runs_filter
+                                )
+                            ]
+                        else:
+                            all_bin_stats = await self._get_bin_stats_from_shared_query(
+                                ctx, [(dims, measure) for _, dims, measure in batch], runs_filter
+                            )
+                except Exception as e:
+                    logger.warning(
+                        f"Failed to get data for charts {[chart.id for chart, _, _ in batch]}: {e}"
+                    )
+                    for chart, _, _ in batch:
+                        errors_by_chart[chart.id] = str(e)
+                    continue
+                for (chart, _, _), bin_stats in zip(batch, all_bin_stats):
+                    bin_stats_by_chart[chart.id] = bin_stats
+
+        for chart_id, bin_stats in bin_stats_by_chart.items():
+            chart_data = {
+                "request_type": "comb_stats",
+                "result": {
+                    "binStats": bin_stats,
+                },
             }
+            await _set_cached_chart_data(cache_keys[chart_id], chart_data)
+            chart_data_by_id[chart_id] = chart_data
 
         return {
-            "request_type": "comb_stats",
-            "result": {
-                "binStats": bin_stats,
-            },
+            chart.id: (
+                chart_data_by_id[chart.id]
+                if chart.id in chart_data_by_id
+                else {"error": errors_by_chart[chart.id]}
+            )
+            for chart in charts
         }
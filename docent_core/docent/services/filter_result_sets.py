@@ -0,0 +1,146 @@
+import hashlib
+import json
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import delete, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from docent._log_util import get_logger
+from docent_core.docent.db.data_version import get_data_version_and_updated_at
+from docent_core.docent.db.filters import ComplexFilter
+from docent_core.docent.db.schemas.tables import (
+    SQLAAgentRun,
+    SQLAFilterResultSet,
+    SQLAFilterResultSetRun,
+)
+
+logger = get_logger(__name__)
+
+# How stale a result set's last_used_at may get before a read refreshes it
+RESULT_SET_LAST_USED_RESOLUTION = timedelta(minutes=1)
+# Queries may still read a result set for a while after resolving it, so even result sets
+# for old data versions are kept until they've been unused for this long
+RESULT_SET_GRACE_PERIOD = timedelta(minutes=10)
+# Result sets for the current data version are kept until they've been unused for this long
+RESULT_SET_TTL = timedelta(hours=1)
+# Filters are only materialized once the data version has been stable for this long. While
+# a collection is being written to, a set would be replaced before it's read much.
+RESULT_SET_MIN_VERSION_AGE = timedelta(seconds=30)
+
+
+def _now() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _filter_hash(base_filter: ComplexFilter) -> str:
+    return hashlib.sha256(
+        json.dumps(base_filter.model_dump(mode="json"), sort_keys=True).encode()
+    ).hexdigest()
+
+
+class FilterResultSetService:
+    """
+    Materializes the agent runs that match a view's base filter, so the queries of a
+    request can join against the result instead of each evaluating the filter again.
+
+    A result set covers one data version of its collection and is never updated: any write
+    bumps the version, and the next lookup once the version has settled materializes a new
+    set. Sets are only deleted after a grace period, since queries that resolved one may not
+    have read it yet.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_result_set_id(self, collection_id: str, base_filter: ComplexFilter) -> str | None:
+        """Get the ID of the result set for a filter, materializing it if needed.
+
+        The set only becomes visible to other sessions once this session commits, so call
+        this in a short transaction of its own.
+
+        Returns:
+            The result set's ID, or None if the collection's data changed too recently to
+            materialize the filter; evaluate it directly instead.
+        """
+        # Read the version before the runs, so the set is at least as new as its version
+        data_version, data_version_updated_at = await get_data_version_and_updated_at(
+            self.session, collection_id
+        )
+        filter_hash = _filter_hash(base_filter)
+        key_clause = (
+            (SQLAFilterResultSet.collection_id == collection_id)
+            & (SQLAFilterResultSet.filter_hash == filter_hash)
+            & (SQLAFilterResultSet.data_version == data_version)
+        )
+
+        result = await self.session.execute(
+            select(SQLAFilterResultSet.id, SQLAFilterResultSet.last_used_at).where(key_clause)
+        )
+        existing = result.one_or_none()
+        if existing is not None:
+            result_set_id, last_used_at = existing
+            if last_used_at < _now() - RESULT_SET_LAST_USED_RESOLUTION:
+                await self.session.execute(
+                    update(SQLAFilterResultSet)
+                    .where(SQLAFilterResultSet.id == result_set_id)
+                    .values(last_used_at=_now())
+                )
+            return result_set_id
+
+        if (
+            data_version_updated_at is not None
+            and data_version_updated_at > _now() - RESULT_SET_MIN_VERSION_AGE
+        ):
+            return None
+
+        # If another session is materializing the same set, this waits for it to commit
+        result_set_id = await self.session.scalar(
+            insert(SQLAFilterResultSet)
+            .values(
+                id=str(uuid4()),
+                collection_id=collection_id,
+                filter_hash=filter_hash,
+                data_version=data_version,
+                created_at=_now(),
+                last_used_at=_now(),
+            )
+            .on_conflict_do_nothing(constraint="uq_filter_result_sets_key")
+            .returning(SQLAFilterResultSet.id)
+        )
+        if result_set_id is None:
+            result_set_id = await self.session.scalar(
+                select(SQLAFilterResultSet.id).where(key_clause)
+            )
+            assert result_set_id is not None
+            return result_set_id
+
+        matching_runs = select(literal(result_set_id), SQLAAgentRun.id).where(
+            SQLAAgentRun.collection_id == collection_id
+        )
+        filter_clause = base_filter.to_sqla_where_clause(SQLAAgentRun)
+        if filter_clause is not None:
+            matching_runs = matching_runs.where(filter_clause)
+        await self.session.execute(
+            insert(SQLAFilterResultSetRun).from_select(
+                ["result_set_id", "agent_run_id"], matching_runs
+            )
+        )
+        logger.info(f"Materialized filter result set {result_set_id} for {collection_id}")
+
+        await self._evict(collection_id, data_version)
+        return result_set_id
+
+    async def _evict(self, collection_id: str, data_version: int):
+        # Their runs are deleted by the foreign key's ON DELETE CASCADE
+        await self.session.execute(
+            delete(SQLAFilterResultSet).where(
+                SQLAFilterResultSet.collection_id == collection_id,
+                SQLAFilterResultSet.last_used_at < _now() - RESULT_SET_GRACE_PERIOD,
+                or_(
+                    SQLAFilterResultSet.data_version < data_version,
+                    SQLAFilterResultSet.last_used_at < _now() - RESULT_SET_TTL,
+                ),
+            )
+        )
@@ -0,0 +1,449 @@
+import json
+from dataclasses import dataclass, field
+from typing import Literal
+
+from sqlalchemy import delete, func, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from docent_core.docent.db.schemas.tables import SQLAMetadataFacetValue, SQLAMetadataKeyStats
+
+# Number of smallest value hashes kept per key path for cardinality estimates
+SKETCH_SIZE = 256
+# Longer values are left out of the facet index; they make poor autocomplete suggestions
+# and would bloat its indexes
+MAX_FACET_VALUE_LENGTH = 256
+
+_HASH_RANGE = 2**64
+
+# Walks the metadata of the given runs and computes their key statistics per path
+_KEY_STATS_DELTA_QUERY = text(
+    """
+    WITH RECURSIVE json_paths AS (
+        SELECT ''::text AS path, 0 AS depth, metadata_json AS value
+        FROM agent_runs
+        WHERE collection_id = :collection_id
+        AND id = ANY(CAST(:agent_run_ids AS text[]))
+
+        UNION ALL
+
+        SELECT
+            CASE WHEN jp.depth = 0 THEN nested.key ELSE jp.path || '.' || nested.key END,
+            jp.depth + 1,
+            nested.value
+        FROM json_paths jp
+        CROSS JOIN LATERAL jsonb_each(jp.value) AS nested(key, value)
+        WHERE jsonb_typeof(jp.value) = 'object'
+    ),
+    typed_paths AS (
+        SELECT
+            path,
+            depth,
+            jsonb_typeof(value) AS value_type,
+            CASE WHEN jsonb_typeof(value) = 'number' THEN value::numeric % 1 = 0 END AS is_integer,
+            CASE
+                WHEN jsonb_typeof(value) IN ('string', 'number', 'boolean')
+                THEN ('x' || substr(md5(value::text), 1, 16))::bit(64)::bigint
+            END AS value_hash
+        FROM json_paths
+    )
+    SELECT
+        path,
+        min(depth) AS depth,
+        count(*) AS run_count,
+        count(*) FILTER (WHERE value_type = 'null') AS null_count,
+        count(*) FILTER (WHERE value_type = 'string') AS string_count,
+        count(*) FILTER (WHERE value_type = 'number') AS number_count,
+        count(*) FILTER (WHERE is_integer) AS integer_count,
+        count(*) FILTER (WHERE value_type = 'boolean') AS boolean_count,
+        count(*) FILTER (WHERE value_type = 'object') AS object_count,
+        count(*) FILTER (WHERE value_type = 'array') AS array_count,
+        coalesce(
+            (array_agg(DISTINCT value_hash ORDER BY value_hash)
+                FILTER (WHERE value_hash IS NOT NULL))[1:CAST(:sketch_size AS int)],
+            '{}'
+        ) AS value_hashes
+    FROM typed_paths
+    GROUP BY path
+    """
+)
+
+# Adds key statistics deltas to the catalog. Rows are upserted in path order so concurrent
+# writers lock them in the same order.
+_APPLY_KEY_STATS_DELTA_QUERY = text(
+    """
+    INSERT INTO metadata_key_stats (
+        collection_id, path, depth, run_count, null_count, string_count, number_count,
+        integer_count, boolean_count, object_count, array_count, value_hashes
+    )
+    SELECT
+        CAST(:collection_id AS text),
+        path,
+        depth,
+        run_count,
+        null_count,
+        string_count,
+        number_count,
+        integer_count,
+        boolean_count,
+        object_count,
+        array_count,
+        value_hashes
+    FROM jsonb_to_recordset(CAST(:deltas AS jsonb)) AS deltas(
+        path text, depth int, run_count bigint, null_count bigint, string_count bigint,
+        number_count bigint, integer_count bigint, boolean_count bigint, object_count bigint,
+        array_count bigint, value_hashes bigint[]
+    )
+    ORDER BY path
+    ON CONFLICT (collection_id, path) DO UPDATE SET
+        run_count = metadata_key_stats.run_count + EXCLUDED.run_count,
+        null_count = metadata_key_stats.null_count + EXCLUDED.null_count,
+        string_count = metadata_key_stats.string_count + EXCLUDED.string_count,
+        number_count = metadata_key_stats.number_count + EXCLUDED.number_count,
+        integer_count = metadata_key_stats.integer_count + EXCLUDED.integer_count,
+        boolean_count = metadata_key_stats.boolean_count + EXCLUDED.boolean_count,
+        object_count = metadata_key_stats.object_count + EXCLUDED.object_count,
+        array_count = metadata_key_stats.array_count + EXCLUDED.array_count,
+        value_hashes = ARRAY(
+            SELECT DISTINCT h
+            FROM unnest(metadata_key_stats.value_hashes || EXCLUDED.value_hashes) AS h
+            ORDER BY h
+            LIMIT CAST(:sketch_size AS int)
+        )
+    """
+)
+
+
+# Counts the given runs having each scalar value at each path
+_FACET_DELTA_QUERY = text(
+    """
+    WITH RECURSIVE json_paths AS (
+        SELECT ''::text AS path, 0 AS depth, metadata_json AS json_value
+        FROM agent_runs
+        WHERE collection_id = :collection_id
+        AND id = ANY(CAST(:agent_run_ids AS text[]))
+
+        UNION ALL
+
+        SELECT
+            CASE WHEN jp.depth = 0 THEN nested.key ELSE jp.path || '.' || nested.key END,
+            jp.depth + 1,
+            nested.value
+        FROM json_paths jp
+        CROSS JOIN LATERAL jsonb_each(jp.json_value) AS nested(key, value)
+        WHERE jsonb_typeof(jp.json_value) = 'object'
+    )
+    SELECT path, json_value #>> '{}' AS value, count(*) AS run_count
+    FROM json_paths
+    WHERE jsonb_typeof(json_value) IN ('string', 'number', 'boolean')
+    AND length(json_value #>> '{}') <= CAST(:max_value_length AS int)
+    GROUP BY path, json_value #>> '{}'
+    """
+)
+
+# Adds facet count deltas to the facet index, returning the updated rows so emptied ones
+# can be deleted
+_APPLY_FACET_DELTA_QUERY = text(
+    """
+    INSERT INTO metadata_facet_values (collection_id, path, value, run_count)
+    SELECT CAST(:collection_id AS text), path, value, run_count
+    FROM jsonb_to_recordset(CAST(:deltas AS jsonb)) AS deltas(
+        path text, value text, run_count bigint
+    )
+    ORDER BY path, value
+    ON CONFLICT (collection_id, path, value) DO UPDATE SET
+        run_count = metadata_facet_values.run_count + EXCLUDED.run_count
+    RETURNING path, value, run_count
+    """
+)
+
+_COUNT_COLUMNS = (
+    "run_count",
+    "null_count",
+    "string_count",
+    "number_count",
+    "integer_count",
+    "boolean_count",
+    "object_count",
+    "array_count",
+)
+
+
+@dataclass
+class _PathDelta:
+    depth: int
+    counts: dict[str, int]
+    # Value hashes of added runs, which go into the sketch
+    added_hashes: set[int] = field(default_factory=set)
+    # Value hashes of removed runs, which only tell unchanged paths apart
+    removed_hashes: set[int] = field(default_factory=set)
+
+    def is_noop(self) -> bool:
+        # Hashes that removed runs had are already in the sketch, if they belong there
+        return not any(self.counts.values()) and self.added_hashes <= self.removed_hashes
+
+
+@dataclass
+class _CatalogDelta:
+    """Changes to a collection's catalog and facet index that haven't been applied yet."""
+
+    paths: dict[str, _PathDelta] = field(default_factory=dict)
+    facets: dict[tuple[str, str], int] = field(default_factory=dict)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+@dataclass
+class MetadataKeyStats:
+    """Statistics about one metadata key path across the agent runs of a collection."""
+
+    path: str
+    depth: int
+    run_count: int
+    null_count: int
+    string_count: int
+    number_count: int
+    integer_count: int
+    boolean_count: int
+    object_count: int
+    array_count: int
+    value_hashes: list[int]
+
+    @classmethod
+    def from_sqla(cls, row: SQLAMetadataKeyStats) -> "MetadataKeyStats":
+        return cls(
+            path=row.path,
+            depth=row.depth,
+            run_count=row.run_count,
+            null_count=row.null_count,
+            string_count=row.string_count,
+            number_count=row.number_count,
+            integer_count=row.integer_count,
+            boolean_count=row.boolean_count,
+            object_count=row.object_count,
+            array_count=row.array_count,
+            value_hashes=list(row.value_hashes),
+        )
+
+    @property
+    def present_count(self) -> int:
+        """Number of runs in which the path has a non-null value."""
+        return self.run_count - self.null_count
+
+    @property
+    def cardinality_estimate(self) -> int:
+        """
+        Estimated number of distinct scalar values, from a k-minimum-values sketch.
+
+        The estimate is exact below `SKETCH_SIZE` distinct values. It never decreases when
+        runs are deleted, since values can't be removed from the sketch.
+        """
+        if len(self.value_hashes) < SKETCH_SIZE:
+            return len(self.value_hashes)
+        # Hashes are signed 64-bit integers; map the k-th smallest onto (0, 1]
+        kth_smallest = (max(self.value_hashes) + _HASH_RANGE // 2 + 1) / _HASH_RANGE
+        return round((SKETCH_SIZE - 1) / kth_smallest)
+
+    @property
+    def scalar_type(self) -> Literal["str", "bool", "int", "float"] | None:
+        """The most common scalar type of the path's values, if it has any scalar values."""
+        counts = {"str": self.string_count, "bool": self.boolean_count, "num": self.number_count}
+        most_common = max(counts, key=lambda t: counts[t])
+        if counts[most_common] <= 0:
+            return None
+        if most_common == "num":
+            return "int" if self.integer_count == self.number_count else "float"
+        return most_common  # type: ignore[return-value]
+
+
+class MetadataCatalogService:
+    """
+    Maintains the per-collection catalog of agent run metadata keys and the facet index of
+    their values.
+
+    Writers call `add_agent_runs` after inserting runs and `remove_agent_runs` before
+    deleting them, in the same transaction; an update is a removal followed by an addition,
+    best with a deferred removal. Each call only reads the metadata of the runs it is given.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        # Removals deferred until the next `add_agent_runs`, by collection ID
+        self._deferred: dict[str, _CatalogDelta] = {}
+
+    async def _compute_delta(
+        self, delta: _CatalogDelta, collection_id: str, agent_run_ids: list[str], sign: int
+    ):
+        """Add `sign` times the key statistics and facet counts of some runs to `delta`."""
+        if not agent_run_ids:
+            return
+        params = {"collection_id": collection_id, "agent_run_ids": agent_run_ids}
+
+        result = await self.session.execute(
+            _KEY_STATS_DELTA_QUERY, {**params, "sketch_size": SKETCH_SIZE}
+        )
+        for row in result.mappings():
+            path_delta = delta.paths.setdefault(
+                row["path"], _PathDelta(depth=row["depth"], counts=dict.fromkeys(_COUNT_COLUMNS, 0))
+            )
+            for column in _COUNT_COLUMNS:
+                path_delta.counts[column] += sign * row[column]
+            hashes = path_delta.added_hashes if sign > 0 else path_delta.removed_hashes
+            hashes.update(row["value_hashes"])
+
+        result = await self.session.execute(
+            _FACET_DELTA_QUERY, {**params, "max_value_length": MAX_FACET_VALUE_LENGTH}
+        )
+        for path, value, run_count in result:
+            delta.facets[(path, value)] = delta.facets.get((path, value), 0) + sign * run_count
+
+    async def _apply_delta(self, collection_id: str, delta: _CatalogDelta):
+        """
+        Apply a delta, skipping rows it doesn't change.
+
+        An update that leaves most of the metadata as it was then doesn't touch most rows,
+        including the collection's root row, which every other write to the collection
+        also locks.
+        """
+        key_stats = [
+            {
+                "path": path,
+                "depth": path_delta.depth,
+                **path_delta.counts,
+                # Sketches only grow: values can't be taken back out of them
+                "value_hashes": sorted(path_delta.added_hashes)[:SKETCH_SIZE],
+            }
+            for path, path_delta in delta.paths.items()
+            if not path_delta.is_noop()
+        ]
+        if key_stats:
+            await self.session.execute(
+                _APPLY_KEY_STATS_DELTA_QUERY,
+                {
+                    "collection_id": collection_id,
+                    "deltas": json.dumps(key_stats),
+                    "sketch_size": SKETCH_SIZE,
+                },
+            )
+            if any(row["run_count"] < 0 for row in key_stats):
+                await self.session.execute(
+                    delete(SQLAMetadataKeyStats).where(
+                        SQLAMetadataKeyStats.collection_id == collection_id,
+                        SQLAMetadataKeyStats.run_count <= 0,
+                    )
+                )
+
+        facets = [
+            {"path": path, "value": value, "run_count": run_count}
+            for (path, value), run_count in delta.facets.items()
+            if run_count != 0
+        ]
+        if not facets:
+            return
+        result = await self.session.execute(
+            _APPLY_FACET_DELTA_QUERY,
+            {"collection_id": collection_id, "deltas": json.dumps(facets)},
+        )
+        emptied = [(path, value) for path, value, run_count in result if run_count <= 0]
+        if emptied:
+            await self.session.execute(
+                delete(SQLAMetadataFacetValue).where(
+                    SQLAMetadataFacetValue.collection_id == collection_id,
+                    tuple_(SQLAMetadataFacetValue.path, SQLAMetadataFacetValue.value).in_(emptied),
+                )
+            )
+
+    async def add_agent_runs(self, collection_id: str, agent_run_ids: list[str]):
+        """Record the metadata of agent runs that were just inserted or updated."""
+        delta = self._deferred.pop(collection_id, None) or _CatalogDelta()
+        await self._compute_delta(delta, collection_id, agent_run_ids, 1)
+        await self._apply_delta(collection_id, delta)
+
+    async def remove_agent_runs(
+        self, collection_id: str, agent_run_ids: list[str], defer: bool = False
+    ):
+        """
+        Forget the metadata of agent runs that are about to be deleted or updated.
+
+        Args:
+            defer: Apply the removal together with the next `add_agent_runs` call on this
+                service, for updates. Only what the update changes is then written.
+        """
+        delta = self._deferred.pop(collection_id, None) or _CatalogDelta()
+        await self._compute_delta(delta, collection_id, agent_run_ids, -1)
+        if defer:
+            self._deferred[collection_id] = delta
+        else:
+            await self._apply_delta(collection_id, delta)
+
+    async def get_key_stats(self, collection_id: str) -> list[MetadataKeyStats]:
+        """Get statistics for every metadata key path in a collection, ordered by path."""
+        result = await self.session.execute(
+            select(SQLAMetadataKeyStats)
+            .where(SQLAMetadataKeyStats.collection_id == collection_id)
+            .where(SQLAMetadataKeyStats.depth > 0)
+            .order_by(SQLAMetadataKeyStats.path)
+        )
+        return [MetadataKeyStats.from_sqla(row) for row in result.scalars()]
+
+    async def count_agent_runs(self, collection_id: str) -> int:
+        """Count the agent runs in a collection, as recorded by the catalog."""
+        run_count = await self.session.scalar(
+            select(SQLAMetadataKeyStats.run_count).where(
+                SQLAMetadataKeyStats.collection_id == collection_id,
+                SQLAMetadataKeyStats.path == "",
+            )
+        )
+        return run_count or 0
+
+    async def get_facet_values(
+        self, collection_id: str, path: str, search: str | None = None, limit: int = 100
+    ) -> list[str]:
+        """
+        Get values of a metadata key path from the facet index.
+
+        Without `search`, returns the first `limit` values in order. With it, values that
+        start with `search` (case-insensitively) come first, followed by the most common
+        values that contain it.
+        """
+        path_filter = (
+            SQLAMetadataFacetValue.collection_id == collection_id,
+            SQLAMetadataFacetValue.path == path,
+        )
+        if not search:
+            result = await self.session.execute(
+                select(SQLAMetadataFacetValue.value)
+                .where(*path_filter)
+                .order_by(SQLAMetadataFacetValue.value)
+                .limit(limit)
+            )
+            return list(result.scalars())
+
+        # Prefix matches are a range over the lowercased values in byte order
+        prefix = search.lower()
+        lower_value = func.lower(SQLAMetadataFacetValue.value).collate("C")
+        prefix_query = (
+            select(SQLAMetadataFacetValue.value)
+            .where(*path_filter, lower_value >= prefix)
+            .order_by(lower_value)
+            .limit(limit)
+        )
+        if prefix[-1] != chr(0x10FFFF):
+            prefix_query = prefix_query.where(lower_value < prefix[:-1] + chr(ord(prefix[-1]) + 1))
+        values = list((await self.session.execute(prefix_query)).scalars())
+        if len(values) >= limit:
+            return values
+
+        substring_query = (
+            select(SQLAMetadataFacetValue.value)
+            .where(
+                *path_filter,
+                SQLAMetadataFacetValue.value.ilike(f"%{_escape_like(search)}%", escape="\\"),
+                SQLAMetadataFacetValue.value.notin_(values),
+            )
+            .order_by(SQLAMetadataFacetValue.run_count.desc(), SQLAMetadataFacetValue.value)
+            .limit(limit - len(values))
+        )
+        values.extend((await self.session.execute(substring_query)).scalars())
+        return values
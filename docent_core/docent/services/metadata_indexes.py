@@ -0,0 +1,362 @@
+import hashlib
+import json
+from datetime import UTC, datetime, timedelta
+from typing import Any, Sequence
+
+from sqlalchemy import String, column, delete, func, select, update
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlalchemy.engine import Dialect
+
+from docent._log_util import get_logger
+from docent_core._db_service.db import DocentDB
+from docent_core._server._broker.redis_client import get_redis_client
+from docent_core.docent.db.filters import MetadataValueType, metadata_value_expression
+from docent_core.docent.db.schemas.tables import (
+    TABLE_AGENT_RUN,
+    SQLACollection,
+    SQLAMetadataKeyStats,
+    SQLAMetadataPathIndex,
+)
+
+logger = get_logger(__name__)
+
+# Redis hash of use counts per metadata path, folded into `SQLAMetadataPathIndex` by
+# each maintenance pass
+METADATA_PATH_USAGE_KEY_FORMAT = "metadata_path_usage:{collection_id}"
+
+# Uses count half as much after this long
+USAGE_HALF_LIFE = timedelta(days=1)
+# Decayed number of uses after which a path gets an index
+MIN_USAGE_SCORE_FOR_INDEX = 20.0
+# Below this many runs with the path, scanning the collection's rows is cheap enough
+MIN_RUNS_FOR_INDEX = 10_000
+# Every index slows down writes to agent runs in the collection
+MAX_INDEXES_PER_COLLECTION = 8
+# Each build scans all of agent_runs, so a pass only starts a few
+MAX_INDEX_BUILDS_PER_PASS = 2
+# Indexes on paths that haven't been used for this long are dropped
+INDEX_COLD_AFTER = timedelta(days=7)
+# Paths without an index are forgotten once their score decays below this
+MIN_USAGE_SCORE_TO_KEEP = 0.01
+# A path whose index build failed is retried after this long, doubling with each further
+# consecutive failure up to the maximum
+INDEX_BUILD_RETRY_DELAY = timedelta(hours=1)
+MAX_INDEX_BUILD_RETRY_DELAY = timedelta(days=7)
+
+
+def _now() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _build_retry_delay(build_failures: int) -> timedelta:
+    # The exponent is capped well past the maximum, to keep the timedelta in range
+    delay = INDEX_BUILD_RETRY_DELAY * 2 ** min(max(build_failures - 1, 0), 16)
+    return min(delay, MAX_INDEX_BUILD_RETRY_DELAY)
+
+
+def _index_name(collection_id: str, path: str, value_type: str) -> str:
+    digest = hashlib.sha256(json.dumps([collection_id, path, value_type]).encode()).hexdigest()
+    return f"ix_{TABLE_AGENT_RUN}_metadata_{digest[:24]}"
+
+
+def _create_index_ddl(
+    dialect: Dialect, index_name: str, collection_id: str, path: str, value_type: str
+) -> str:
+    # Render literals with the connection's dialect, which knows how the server escapes them
+    compile_kwargs = {"literal_binds": True}
+    expression = metadata_value_expression(
+        column("metadata_json", JSONB), path.split("."), value_type  # type: ignore
+    ).compile(dialect=dialect, compile_kwargs=compile_kwargs)
+    predicate = (column("collection_id", String) == collection_id).compile(
+        dialect=dialect, compile_kwargs=compile_kwargs
+    )
+    return (
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} "
+        f"ON {TABLE_AGENT_RUN} (({expression})) WHERE {predicate}"
+    )
+
+
+async def record_metadata_path_usage(
+    collection_id: str, uses: Sequence[tuple[list[str], MetadataValueType]]
+) -> None:
+    """Count a query's filters and sorts on metadata paths, for `MetadataIndexService`.
+
+    Counting is best-effort: if Redis is unavailable, the uses are dropped.
+    """
+    # Keys containing dots can't be told apart in dot-separated paths, so they aren't indexed
+    fields = {
+        json.dumps([".".join(key_path), value_type])
+        for key_path, value_type in uses
+        if not any("." in key for key in key_path)
+    }
+    if not fields:
+        return
+
+    try:
+        redis_client = await get_redis_client()
+        key = METADATA_PATH_USAGE_KEY_FORMAT.format(collection_id=collection_id)
+        async with redis_client.pipeline(transaction=False) as pipe:  # type: ignore
+            for field in fields:
+                pipe.hincrby(key, field, 1)  # type: ignore
+            await pipe.execute()  # type: ignore
+    except Exception as e:
+        logger.warning(f"Failed to record metadata path usage: {e}")
+
+
+class MetadataIndexService:
+    """
+    Builds expression indexes on agent runs for the metadata paths that a collection's
+    queries filter and sort on most, and drops them once they go cold.
+
+    Each index is partial on one collection and indexes the same expression that filters
+    and sorts use (see `metadata_value_expression`), so the planner can match it. Indexes
+    are built and dropped CONCURRENTLY to avoid blocking writes, which can't happen inside
+    a transaction, so `maintain` runs them on autocommit connections and should run in the
+    background, one pass at a time.
+    """
+
+    def __init__(self, db: DocentDB):
+        self.db = db
+
+    async def maintain(self) -> None:
+        """Fold recorded usage into the registry, then drop cold indexes and build hot ones."""
+        await self._fold_usage()
+        await self._drop_cold_indexes()
+        await self._build_hot_indexes()
+
+    async def drop_collection_indexes(self, collection_id: str) -> None:
+        """Drop every index built for a collection and forget its usage."""
+        async with self.db.session() as session:
+            result = await session.execute(
+                select(SQLAMetadataPathIndex.index_name).where(
+                    SQLAMetadataPathIndex.collection_id == collection_id,
+                    SQLAMetadataPathIndex.index_name.is_not(None),
+                )
+            )
+            index_names = list(result.scalars().all())
+
+        for index_name in index_names:
+            await self._drop_index(index_name)
+
+        async with self.db.session() as session:
+            await session.execute(
+                delete(SQLAMetadataPathIndex).where(
+                    SQLAMetadataPathIndex.collection_id == collection_id
+                )
+            )
+
+    # CONCURRENTLY waits for every open transaction, so no session may be open during these.
+    # The DDL runs as is: paths may contain characters that `text` would take as parameters.
+
+    async def _build_index(
+        self, index_name: str, collection_id: str, path: str, value_type: str
+    ) -> None:
+        async with self.db.engine.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.exec_driver_sql(
+                _create_index_ddl(conn.dialect, index_name, collection_id, path, value_type)
+            )
+
+    async def _drop_index(self, index_name: str) -> None:
+        async with self.db.engine.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
+
+    async def _fold_usage(self) -> None:
+        redis_client = await get_redis_client()
+        usage_keys = [
+            key
+            async for key in redis_client.scan_iter(  # type: ignore
+                match=METADATA_PATH_USAGE_KEY_FORMAT.format(collection_id="*")
+            )
+        ]
+
+        now = _now()
+        async with self.db.session() as session:
+            # Decay every score to now before adding the new uses
+            await session.execute(
+                update(SQLAMetadataPathIndex).values(
+                    usage_score=SQLAMetadataPathIndex.usage_score
+                    * func.power(
+                        0.5,
+                        func.extract("epoch", now - SQLAMetadataPathIndex.usage_updated_at)
+                        / USAGE_HALF_LIFE.total_seconds(),
+                    ),
+                    usage_updated_at=now,
+                )
+            )
+
+            for key in usage_keys:
+                # Take the counts and reset them atomically, so no concurrent use is lost
+                async with redis_client.pipeline(transaction=True) as pipe:  # type: ignore
+                    pipe.hgetall(key)  # type: ignore
+                    pipe.delete(key)  # type: ignore
+                    counts, _ = await pipe.execute()  # type: ignore
+                if not counts:
+                    continue
+
+                # Skip collections that are deleted or being deleted, whose indexes are dropped
+                collection_id = key.split(":", 1)[1]
+                collection_exists = await session.scalar(
+                    select(SQLACollection.id).where(
+                        SQLACollection.id == collection_id, SQLACollection.deleted_at.is_(None)
+                    )
+                )
+                if collection_exists is None:
+                    continue
+
+                rows: list[dict[str, Any]] = []
+                for field, count in counts.items():
+                    path, value_type = json.loads(field)
+                    rows.append(
+                        {
+                            "collection_id": collection_id,
+                            "path": path,
+                            "value_type": value_type,
+                            "usage_score": float(count),
+                            "usage_updated_at": now,
+                            "last_used_at": now,
+                        }
+                    )
+                stmt = insert(SQLAMetadataPathIndex).values(rows)
+                await session.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=[
+                            SQLAMetadataPathIndex.collection_id,
+                            SQLAMetadataPathIndex.path,
+                            SQLAMetadataPathIndex.value_type,
+                        ],
+                        set_={
+                            "usage_score": SQLAMetadataPathIndex.usage_score
+                            + stmt.excluded.usage_score,
+                            "last_used_at": stmt.excluded.last_used_at,
+                        },
+                    )
+                )
+
+            await session.execute(
+                delete(SQLAMetadataPathIndex).where(
+                    SQLAMetadataPathIndex.index_name.is_(None),
+                    SQLAMetadataPathIndex.usage_score < MIN_USAGE_SCORE_TO_KEEP,
+                )
+            )
+
+    async def _drop_cold_indexes(self) -> None:
+        # Also clean up builds that failed or were interrupted, which leave invalid indexes
+        async with self.db.session() as session:
+            result = await session.execute(
+                select(
+                    SQLAMetadataPathIndex.collection_id,
+                    SQLAMetadataPathIndex.path,
+                    SQLAMetadataPathIndex.value_type,
+                    SQLAMetadataPathIndex.index_name,
+                    SQLAMetadataPathIndex.index_built_at,
+                ).where(
+                    SQLAMetadataPathIndex.index_name.is_not(None),
+                    (SQLAMetadataPathIndex.last_used_at < _now() - INDEX_COLD_AFTER)
+                    | SQLAMetadataPathIndex.index_built_at.is_(None),
+                )
+            )
+            cold = result.all()
+
+        for collection_id, path, value_type, index_name, index_built_at in cold:
+            # An index that was never finished belongs to a build that was interrupted
+            build_failed = index_built_at is None
+            logger.info(f"Dropping metadata index {index_name} on {collection_id}/{path}")
+            await self._drop_index(index_name)
+            await self._set_index(
+                collection_id, path, value_type, None, None, build_failed=build_failed
+            )
+
+    async def _build_hot_indexes(self) -> None:
+        async with self.db.session() as session:
+            result = await session.execute(
+                select(
+                    SQLAMetadataPathIndex.collection_id,
+                    SQLAMetadataPathIndex.path,
+                    SQLAMetadataPathIndex.value_type,
+                    SQLAMetadataPathIndex.build_failures,
+                    SQLAMetadataPathIndex.build_failed_at,
+                )
+                .join(
+                    SQLAMetadataKeyStats,
+                    (SQLAMetadataKeyStats.collection_id == SQLAMetadataPathIndex.collection_id)
+                    & (SQLAMetadataKeyStats.path == SQLAMetadataPathIndex.path),
+                )
+                .where(
+                    SQLAMetadataPathIndex.index_name.is_(None),
+                    SQLAMetadataPathIndex.usage_score >= MIN_USAGE_SCORE_FOR_INDEX,
+                    # Don't rebuild an index that was just dropped as cold
+                    SQLAMetadataPathIndex.last_used_at >= _now() - INDEX_COLD_AFTER,
+                    SQLAMetadataKeyStats.run_count >= MIN_RUNS_FOR_INDEX,
+                )
+                .order_by(SQLAMetadataPathIndex.usage_score.desc())
+            )
+            candidates = result.all()
+
+            result = await session.execute(
+                select(SQLAMetadataPathIndex.collection_id, func.count())
+                .where(SQLAMetadataPathIndex.index_name.is_not(None))
+                .group_by(SQLAMetadataPathIndex.collection_id)
+            )
+            num_indexes: dict[str, int] = {
+                collection_id: count for collection_id, count in result.all()
+            }
+
+        num_builds = 0
+        for collection_id, path, value_type, build_failures, build_failed_at in candidates:
+            if num_builds >= MAX_INDEX_BUILDS_PER_PASS:
+                break
+            if num_indexes.get(collection_id, 0) >= MAX_INDEXES_PER_COLLECTION:
+                continue
+            # Builds that keep failing, e.g. on values the expression can't cast, back off
+            if build_failed_at is not None:
+                if _now() < build_failed_at + _build_retry_delay(build_failures):
+                    continue
+
+            # Record the index before building it, so a failed build is found and dropped
+            index_name = _index_name(collection_id, path, value_type)
+            await self._set_index(collection_id, path, value_type, index_name, None)
+            logger.info(f"Building metadata index {index_name} on {collection_id}/{path}")
+            num_builds += 1
+            try:
+                await self._build_index(index_name, collection_id, path, value_type)
+            except Exception as e:
+                logger.error(f"Failed to build metadata index {index_name}: {e}")
+                # A failed concurrent build leaves an invalid index behind
+                await self._drop_index(index_name)
+                await self._set_index(
+                    collection_id, path, value_type, None, None, build_failed=True
+                )
+                continue
+
+            await self._set_index(collection_id, path, value_type, index_name, _now())
+            num_indexes[collection_id] = num_indexes.get(collection_id, 0) + 1
+
+    async def _set_index(
+        self,
+        collection_id: str,
+        path: str,
+        value_type: str,
+        index_name: str | None,
+        index_built_at: datetime | None,
+        build_failed: bool = False,
+    ) -> None:
+        values: dict[str, Any] = {"index_name": index_name, "index_built_at": index_built_at}
+        if build_failed:
+            values["build_failures"] = SQLAMetadataPathIndex.build_failures + 1
+            values["build_failed_at"] = _now()
+        elif index_built_at is not None:
+            values["build_failures"] = 0
+            values["build_failed_at"] = None
+
+        async with self.db.session() as session:
+            await session.execute(
+                update(SQLAMetadataPathIndex)
+                .where(
+                    SQLAMetadataPathIndex.collection_id == collection_id,
+                    SQLAMetadataPathIndex.path == path,
+                    SQLAMetadataPathIndex.value_type == value_type,
+                )
+                .values(**values)
+            )
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 import hashlib
-from contextlib import asynccontextmanager
+import json
+import re
+import time
+from contextlib import aclosing, asynccontextmanager
 from datetime import UTC, datetime, timedelta
-from decimal import Decimal
 from typing import (
     Any,
     AsyncIterator,
+    Awaitable,
+    Callable,
     Literal,
     ParamSpec,
     Sequence,
@@ -14,31 +18,49 @@ from typing import (
 )
 from uuid import uuid4
 
+import anyio
 from passlib.context import CryptContext
 from sqlalchemy import (
+    ARRAY,
+    JSON,
     ColumnElement,
+    Text,
+    any_,
     bindparam,
     delete,
     exists,
     func,
-    literal,
     select,
-    true,
+    tuple_,
     update,
 )
 from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-from sqlalchemy.sql import lateral, text
+from sqlalchemy.sql import text
 
 from docent._log_util import get_logger
 from docent.data_models.agent_run import AgentRun, FilterableField
 from docent.data_models.transcript import Transcript, TranscriptGroup
+from docent_core._db_service.bulk_insert import copy_rows, orm_row
 from docent_core._db_service.db import DocentDB
+from docent_core._db_service.schemas.base import SQLABase
 from docent_core._llm_util.data_models.llm_output import AsyncEmbeddingStreamingCallback
 from docent_core._llm_util.providers.openai import get_chunked_openai_embeddings_async
 from docent_core._server._broker.redis_client import enqueue_job
+from docent_core._worker.constants import JOB_TIMEOUT_SECONDS, WorkerFunction
 from docent_core.docent.db.contexts import ViewContext
-from docent_core.docent.db.filters import ComplexFilter
+from docent_core.docent.db.data_version import bump_data_version, lock_collection_for_write
+from docent_core.docent.db.filters import (
+    ComplexFilter,
+    indexable_metadata_paths,
+    metadata_value_expression,
+)
+from docent_core.docent.db.projections import (
+    AgentRunProjection,
+    TranscriptProjection,
+    set_key_path,
+)
 from docent_core.docent.db.schemas.auth_models import (
     PERMISSION_LEVELS,
     Permission,
@@ -46,7 +68,7 @@ from docent_core.docent.db.schemas.auth_models import (
     SubjectType,
     User,
 )
-from docent_core.docent.db.schemas.chart import SQLAChart
+from docent_core.docent.db.schemas.chart import SQLAChart, SQLAChartRollup, SQLAChartRollupBin
 from docent_core.docent.db.schemas.chat import SQLAChatSession
 from docent_core.docent.db.schemas.refinement import SQLARefinementAgentSession
 from docent_core.docent.db.schemas.rubric import SQLAJudgeResult, SQLARubric
@@ -59,13 +81,18 @@ from docent_core.docent.db.schemas.tables import (
     SQLAAnalyticsEvent,
     SQLAApiKey,
     SQLACollection,
+    SQLAFilterResultSet,
+    SQLAFilterResultSetRun,
     SQLAJob,
+    SQLAMetadataFacetValue,
+    SQLAMetadataKeyStats,
     SQLAModelApiKey,
     SQLASearchCluster,
     SQLASearchQuery,
     SQLASearchResult,
     SQLASearchResultCluster,
     SQLASession,
+    SQLATelemetryAccumulation,
     SQLATelemetryAgentRunStatus,
     SQLATelemetryLog,
     SQLATranscript,
@@ -74,12 +101,69 @@ from docent_core.docent.db.schemas.tables import (
     SQLAUser,
     SQLAView,
 )
+from docent_core.docent.services.api_key_cache import (
+    claim_api_key_last_used_write,
+    get_cached_api_key_auth,
+    invalidate_cached_api_key_auth,
+    set_cached_api_key_auth,
+)
+from docent_core.docent.services.auth_cache import (
+    get_auth_cache_generation,
+    get_cached_default_view,
+    get_cached_permission_level,
+    get_cached_session_user,
+    invalidate_cached_default_views,
+    invalidate_cached_permissions,
+    invalidate_cached_session,
+    set_cached_default_view,
+    set_cached_permission_level,
+    set_cached_session_user,
+)
+from docent_core.docent.services.chart_rollups import ChartRollupService
+from docent_core.docent.services.filter_result_sets import FilterResultSetService
+from docent_core.docent.services.metadata_catalog import MetadataCatalogService
+from docent_core.docent.services.metadata_indexes import (
+    MetadataIndexService,
+    record_metadata_path_usage,
+)
 
 logger = get_logger(__name__)
 
+# Top-level AgentRun fields that can be selected when exporting runs
+EXPORTABLE_AGENT_RUN_FIELDS = (
+    "id",
+    "name",
+    "description",
+    "metadata",
+    "transcripts",
+    "transcript_groups",
+)
+
+# Agent runs loaded and embedded at a time by compute_embeddings
+EMBEDDING_PAGE_SIZE = 1_000
+
+# Rows deleted per transaction by deletion jobs
+DELETION_BATCH_SIZE = 5_000
+# Agent runs deleted per transaction; each also cascades to its transcripts and results
+AGENT_RUN_DELETION_BATCH_SIZE = 500
+DELETION_JOB_TYPES = (
+    WorkerFunction.DELETE_COLLECTION_JOB.value,
+    WorkerFunction.DELETE_AGENT_RUNS_JOB.value,
+)
+# Deletion jobs record a heartbeat in their job_json; a running job whose heartbeat is older
+# than the job timeout belongs to a worker that died without marking it
+DELETION_JOB_STALE_SECONDS = JOB_TIMEOUT_SECONDS
+# Times a stale deletion job is resumed before it is given up on
+MAX_DELETION_JOB_ATTEMPTS = 3
+
+# Called with a table name and the number of rows deleted from it so far
+DeletionProgressCallback = Callable[[str, int], Awaitable[None]]
+
 P = ParamSpec("P")
 T = TypeVar("T")
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# API keys created by `create_api_key`: dk_{key_id}_{secret}
+API_KEY_FORMAT = re.compile(r"dk_([A-Za-z0-9]{16})_[A-Za-z0-9]{46}")
 
 
 class _NotGiven:
@@ -162,178 +246,239 @@ class MonoService:
             )
         logger.info(f"Updated Collection {collection_id} with values: {values_to_update}")
 
-    async def collection_exists(self, collection_id: str) -> bool:
+    async def collection_is_deleted(self, collection_id: str) -> bool:
+        """Whether a collection is marked for deletion, and so accepts no more writes."""
         async with self.db.session() as session:
             result = await session.execute(
-                select(exists().where(SQLACollection.id == collection_id))
+                select(
+                    exists().where(
+                        SQLACollection.id == collection_id, SQLACollection.deleted_at.is_not(None)
+                    )
+                )
             )
             return result.scalar_one()
 
-    async def delete_collection(self, collection_id: str) -> None:
-        # Remove all references from views to other dimensions and filters
-        async with self.db.session() as session:
-            await session.execute(
-                update(SQLAView)
-                .where(SQLAView.collection_id == collection_id)
-                .values(outer_bin_key=None, inner_bin_key=None, base_filter_dict=None)
-            )
-
-        # Delete telemetry logs
-        async with self.db.session() as session:
-            await session.execute(
-                delete(SQLATelemetryLog).where(SQLATelemetryLog.collection_id == collection_id)
-            )
-
-        # Delete telemetry accumulation data for the collection
-        async with self.db.session() as session:
-            from docent_core.docent.services.telemetry_accumulation import (
-                TelemetryAccumulationService,
-            )
-
-            accumulation_service = TelemetryAccumulationService(session)
-            await accumulation_service.delete_accumulation_data(collection_id)
-
-        # delete all search result clusters joining on search result id to get collection_id
+    async def collection_exists(self, collection_id: str) -> bool:
         async with self.db.session() as session:
-            await session.execute(
-                delete(SQLASearchResultCluster).where(
-                    SQLASearchResultCluster.cluster_id.in_(
-                        select(SQLASearchCluster.id).where(
-                            SQLASearchCluster.collection_id == collection_id
-                        )
+            result = await session.execute(
+                select(
+                    exists().where(
+                        SQLACollection.id == collection_id, SQLACollection.deleted_at.is_(None)
                     )
                 )
             )
+            return result.scalar_one()
 
-        # delete all search results
-        async with self.db.session() as session:
-            await session.execute(
-                delete(SQLASearchResult).where(SQLASearchResult.collection_id == collection_id)
-            )
-
-        # delete all search clusters
-        async with self.db.session() as session:
-            await session.execute(
-                delete(SQLASearchCluster).where(SQLASearchCluster.collection_id == collection_id)
-            )
+    async def start_collection_deletion(self, collection_id: str) -> str:
+        """
+        Hide a collection immediately and enqueue a job that deletes its data in batches.
 
-        # delete all search queries
-        async with self.db.session() as session:
-            await session.execute(
-                delete(SQLASearchQuery).where(SQLASearchQuery.collection_id == collection_id)
-            )
+        Returns:
+            The ID of the deletion job. If the collection's deletion already started, this is
+            the job started then.
 
-        # Delete all attributes
+        Raises:
+            ValueError: If the collection doesn't exist.
+        """
         async with self.db.session() as session:
-            await session.execute(
-                delete(SQLASearchResult).where(SQLASearchResult.collection_id == collection_id)
+            result = await session.execute(
+                update(SQLACollection)
+                .where(SQLACollection.id == collection_id, SQLACollection.deleted_at.is_(None))
+                .values(deleted_at=datetime.now(UTC).replace(tzinfo=None))
+                .returning(SQLACollection.id)
             )
+            if result.first() is None:
+                existing_job_id = await session.scalar(
+                    select(SQLAJob.id)
+                    .where(
+                        SQLAJob.type == WorkerFunction.DELETE_COLLECTION_JOB.value,
+                        SQLAJob.job_json["collection_id"].astext == collection_id,
+                    )
+                    .order_by(SQLAJob.created_at.desc())
+                    .limit(1)
+                )
+                if existing_job_id is None:
+                    raise ValueError(f"Collection {collection_id} not found")
+                return existing_job_id
 
-        # Delete all embeddings
-        async with self.db.session() as session:
-            await session.execute(
-                delete(SQLATranscriptEmbedding).where(
-                    SQLATranscriptEmbedding.collection_id == collection_id
+            job_id = str(uuid4())
+            session.add(
+                SQLAJob(
+                    id=job_id,
+                    type=WorkerFunction.DELETE_COLLECTION_JOB.value,
+                    job_json={"collection_id": collection_id},
                 )
             )
 
-        # Delete all analytics events
-        async with self.db.session() as session:
-            await session.execute(
-                delete(SQLAAnalyticsEvent).where(SQLAAnalyticsEvent.collection_id == collection_id)
-            )
+        await self._enqueue_deletion_job(collection_id, job_id)
+        logger.info(f"Enqueued deletion job {job_id} for collection {collection_id}")
+        return job_id
 
-        # Delete all transcripts
-        async with self.db.session() as session:
-            await session.execute(
-                delete(SQLATranscript).where(SQLATranscript.collection_id == collection_id)
-            )
+    async def _delete_in_batches(
+        self,
+        model: type[SQLABase],
+        where_clause: ColumnElement[bool],
+        batch_size: int = DELETION_BATCH_SIZE,
+        progress_callback: DeletionProgressCallback | None = None,
+        deadline: float | None = None,
+    ) -> int:
+        """
+        Delete matching rows a batch at a time, committing after each batch.
 
-        # Delete all transcript groups
-        async with self.db.session() as session:
-            await session.execute(
-                delete(SQLATranscriptGroup).where(
-                    SQLATranscriptGroup.collection_id == collection_id
-                )
-            )
+        Short transactions keep locks and WAL bursts bounded, and a deletion that is
+        interrupted only loses its current batch.
 
-        # delete all chat_sessions for agent runs in this collection
-        async with self.db.session() as session:
-            await session.execute(
-                delete(SQLAChatSession).where(
-                    SQLAChatSession.agent_run_id.in_(
-                        select(SQLAAgentRun.id).where(SQLAAgentRun.collection_id == collection_id)
-                    )
-                )
-            )
+        Args:
+            deadline: Optional `time.monotonic()` value after which to stop early.
 
-        # delete judge_results for agent runs in this collection
-        async with self.db.session() as session:
-            await session.execute(
-                delete(SQLAJudgeResult).where(
-                    SQLAJudgeResult.agent_run_id.in_(
-                        select(SQLAAgentRun.id).where(SQLAAgentRun.collection_id == collection_id)
-                    )
-                )
-            )
+        Returns:
+            The number of rows deleted.
+        """
+        table = model.__table__
+        primary_key = list(table.primary_key.columns)  # type: ignore[attr-defined]
+        pk_expr = primary_key[0] if len(primary_key) == 1 else tuple_(*primary_key)
+        batch_query = select(*primary_key).where(where_clause).limit(batch_size)
 
-        # Delete all agent runs
-        async with self.db.session() as session:
-            await session.execute(
-                delete(SQLAAgentRun).where(SQLAAgentRun.collection_id == collection_id)
-            )
+        total = 0
+        while True:
+            async with self.db.session() as session:
+                result = await session.execute(delete(table).where(pk_expr.in_(batch_query)))
+                num_deleted = result.rowcount or 0
+            total += num_deleted
+            if num_deleted and progress_callback is not None:
+                await progress_callback(table.name, total)  # type: ignore[attr-defined]
+            if num_deleted < batch_size:
+                return total
+            if deadline is not None and time.monotonic() >= deadline:
+                return total
+
+    async def delete_collection(
+        self,
+        collection_id: str,
+        progress_callback: DeletionProgressCallback | None = None,
+        batch_size: int = DELETION_BATCH_SIZE,
+        deadline: float | None = None,
+    ) -> bool:
+        """
+        Delete a collection and everything in it, in bounded batches.
 
-        # Delete all telemetry agent run status records
-        async with self.db.session() as session:
-            await session.execute(
-                delete(SQLATelemetryAgentRunStatus).where(
-                    SQLATelemetryAgentRunStatus.collection_id == collection_id
-                )
-            )
+        This can take a long time on large collections, so it should run in a deletion job
+        (see `start_collection_deletion`). It is safe to rerun after an interruption: each
+        step only deletes what is left.
 
-        # Delete all Access Control Entries
+        Args:
+            collection_id: The collection to delete.
+            progress_callback: Called with a table name and the rows deleted from it so far.
+            batch_size: Number of rows to delete per transaction.
+            deadline: Optional `time.monotonic()` value after which to stop between batches.
+
+        Returns:
+            True if the collection was deleted, False if the deadline passed first.
+        """
+        # Remove all references from views to other dimensions and filters
         async with self.db.session() as session:
-            view_ids = await session.execute(
-                select(SQLAView.id).where(SQLAView.collection_id == collection_id)
-            )
-            view_ids = view_ids.scalars().all()
-            await session.execute(
-                delete(SQLAAccessControlEntry).where(SQLAAccessControlEntry.view_id.in_(view_ids))
-            )
             await session.execute(
-                delete(SQLAAccessControlEntry).where(
-                    SQLAAccessControlEntry.collection_id == collection_id
-                )
+                update(SQLAView)
+                .where(SQLAView.collection_id == collection_id)
+                .values(outer_bin_key=None, inner_bin_key=None, base_filter_dict=None)
             )
+        await invalidate_cached_default_views(collection_id)
 
-        # Delete views
-        async with self.db.session() as session:
-            await session.execute(delete(SQLAView).where(SQLAView.collection_id == collection_id))
-
-        # Delete charts
-        async with self.db.session() as session:
-            await session.execute(delete(SQLAChart).where(SQLAChart.collection_id == collection_id))
+        # Drop the collection's metadata indexes, which would otherwise outlive it
+        await MetadataIndexService(self.db).drop_collection_indexes(collection_id)
 
-        # Delete all refinement agent sessions for rubrics in this collection
-        async with self.db.session() as session:
-            await session.execute(
-                delete(SQLARefinementAgentSession).where(
-                    SQLARefinementAgentSession.rubric_id.in_(
-                        select(SQLARubric.id).where(SQLARubric.collection_id == collection_id)
+        collection_run_ids = select(SQLAAgentRun.id).where(
+            SQLAAgentRun.collection_id == collection_id
+        )
+        # Tables to empty, in an order that respects foreign keys
+        steps: list[tuple[type[SQLABase], ColumnElement[bool]]] = [
+            # Telemetry logs and accumulation data
+            (SQLATelemetryLog, SQLATelemetryLog.collection_id == collection_id),
+            (
+                SQLATelemetryAccumulation,
+                SQLATelemetryAccumulation.key.like(f"collection_id={collection_id}%"),
+            ),
+            # Search result clusters, joining on search cluster id to get collection_id
+            (
+                SQLASearchResultCluster,
+                SQLASearchResultCluster.cluster_id.in_(
+                    select(SQLASearchCluster.id).where(
+                        SQLASearchCluster.collection_id == collection_id
                     )
-                )
-            )
-
-        # Delete all rubrics for this collection
-        async with self.db.session() as session:
-            await session.execute(
-                delete(SQLARubric).where(SQLARubric.collection_id == collection_id)
+                ),
+            ),
+            # Search results (including attributes), clusters and queries
+            (SQLASearchResult, SQLASearchResult.collection_id == collection_id),
+            (SQLASearchCluster, SQLASearchCluster.collection_id == collection_id),
+            (SQLASearchQuery, SQLASearchQuery.collection_id == collection_id),
+            # Embeddings and analytics events
+            (SQLATranscriptEmbedding, SQLATranscriptEmbedding.collection_id == collection_id),
+            (SQLAAnalyticsEvent, SQLAAnalyticsEvent.collection_id == collection_id),
+            # Transcripts and transcript groups
+            (SQLATranscript, SQLATranscript.collection_id == collection_id),
+            (SQLATranscriptGroup, SQLATranscriptGroup.collection_id == collection_id),
+            # Chat sessions and judge results for agent runs in this collection
+            (SQLAChatSession, SQLAChatSession.agent_run_id.in_(collection_run_ids)),
+            (SQLAJudgeResult, SQLAJudgeResult.agent_run_id.in_(collection_run_ids)),
+            # Agent runs, their metadata catalog and facets, and their telemetry status records
+            (SQLAAgentRun, SQLAAgentRun.collection_id == collection_id),
+            (SQLAMetadataKeyStats, SQLAMetadataKeyStats.collection_id == collection_id),
+            (SQLAMetadataFacetValue, SQLAMetadataFacetValue.collection_id == collection_id),
+            # Materialized filter results
+            (
+                SQLAFilterResultSetRun,
+                SQLAFilterResultSetRun.result_set_id.in_(
+                    select(SQLAFilterResultSet.id).where(
+                        SQLAFilterResultSet.collection_id == collection_id
+                    )
+                ),
+            ),
+            (SQLAFilterResultSet, SQLAFilterResultSet.collection_id == collection_id),
+            (
+                SQLATelemetryAgentRunStatus,
+                SQLATelemetryAgentRunStatus.collection_id == collection_id,
+            ),
+            # Access Control Entries on views and on the collection itself
+            (
+                SQLAAccessControlEntry,
+                SQLAAccessControlEntry.view_id.in_(
+                    select(SQLAView.id).where(SQLAView.collection_id == collection_id)
+                ),
+            ),
+            (SQLAAccessControlEntry, SQLAAccessControlEntry.collection_id == collection_id),
+            # Views, chart rollups and charts
+            (SQLAView, SQLAView.collection_id == collection_id),
+            (
+                SQLAChartRollupBin,
+                SQLAChartRollupBin.rollup_id.in_(
+                    select(SQLAChartRollup.id).where(SQLAChartRollup.collection_id == collection_id)
+                ),
+            ),
+            (SQLAChartRollup, SQLAChartRollup.collection_id == collection_id),
+            (SQLAChart, SQLAChart.collection_id == collection_id),
+            # Refinement agent sessions for rubrics in this collection, then the rubrics
+            (
+                SQLARefinementAgentSession,
+                SQLARefinementAgentSession.rubric_id.in_(
+                    select(SQLARubric.id).where(SQLARubric.collection_id == collection_id)
+                ),
+            ),
+            (SQLARubric, SQLARubric.collection_id == collection_id),
+        ]
+        for model, where_clause in steps:
+            await self._delete_in_batches(
+                model, where_clause, batch_size, progress_callback, deadline
             )
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
 
         # Finally delete the collection
         async with self.db.session() as session:
             await session.execute(delete(SQLACollection).where(SQLACollection.id == collection_id))
             logger.info(f"Deleted collection {collection_id}")
+        await invalidate_cached_permissions(ResourceType.COLLECTION, collection_id)
+        await invalidate_cached_default_views(collection_id)
+        return True
 
     async def get_collections(self, user: User | None = None) -> Sequence[SQLACollection]:
         """
@@ -341,7 +486,11 @@ class MonoService:
         If no user provided, returns all collections (for backward compatibility).
         """
         async with self.db.session() as session:
-            query = select(SQLACollection).order_by(SQLACollection.created_at.desc())
+            query = (
+                select(SQLACollection)
+                .where(SQLACollection.deleted_at.is_(None))
+                .order_by(SQLACollection.created_at.desc())
+            )
 
             if user is not None:
                 query = (
@@ -378,7 +527,9 @@ class MonoService:
             The collection if found, None otherwise
         """
         async with self.db.session() as session:
-            query = select(SQLACollection).where(SQLACollection.id == collection_id)
+            query = select(SQLACollection).where(
+                SQLACollection.id == collection_id, SQLACollection.deleted_at.is_(None)
+            )
             result = await session.execute(query)
             return result.scalar_one_or_none()
 
@@ -402,95 +553,135 @@ class MonoService:
         self,
         ctx: ViewContext,
         agent_runs: Sequence[AgentRun],
-    ):
-        # Convert AgentRun objects to SQLAlchemy objects using existing conversion functions
-        agent_run_data: list[SQLAAgentRun] = []
-        transcript_data: list[SQLATranscript] = []
-        transcript_group_data: list[SQLATranscriptGroup] = []
-
-        # Process all agent runs, transcripts, and transcript groups first
-        for ar in agent_runs:
-            sqla_agent_run = SQLAAgentRun.from_agent_run(ar, ctx.collection_id)
-            agent_run_data.append(sqla_agent_run)
-
-            # Process transcripts for this agent run
-            for t in ar.transcripts:
-                sqla_transcript = SQLATranscript.from_transcript(t, t.id, ctx.collection_id, ar.id)
-                transcript_data.append(sqla_transcript)
-
-            # Process transcript groups for this agent run
-            if hasattr(ar, "transcript_groups") and ar.transcript_groups:
-                for tg in ar.transcript_groups:
-                    # Use the existing from_transcript_group method to get all fields properly
-                    sqla_transcript_group = SQLATranscriptGroup.from_transcript_group(
-                        tg, ctx.collection_id
-                    )
-                    transcript_group_data.append(sqla_transcript_group)
+    ) -> int:
+        """
+        Insert agent runs along with their transcripts and transcript groups.
+
+        Rows are built in a worker thread and streamed into Postgres with COPY, bypassing
+        the ORM unit of work, which otherwise dominates the cost of large imports.
+
+        Returns:
+            The total number of rows inserted (agent runs, transcript groups and transcripts).
+
+        Raises:
+            CollectionDeletedError: If the collection is marked for deletion.
+        """
+        t_start = time.perf_counter()
+        agent_run_rows, transcript_group_rows, transcript_rows = await anyio.to_thread.run_sync(
+            _agent_run_insert_rows, agent_runs, ctx.collection_id
+        )
+
+        # Insert all rows in a single transaction; parents go first to satisfy foreign keys
+        async with self.db.session() as session:
+            await lock_collection_for_write(session, ctx.collection_id)
+            num_rows = await copy_rows(session, SQLAAgentRun, agent_run_rows)
+            num_rows += await copy_rows(session, SQLATranscriptGroup, transcript_group_rows)
+            num_rows += await copy_rows(session, SQLATranscript, transcript_rows)
+            agent_run_ids = [ar.id for ar in agent_runs]
+            await MetadataCatalogService(session).add_agent_runs(ctx.collection_id, agent_run_ids)
+            await ChartRollupService(session).add_agent_runs(ctx.collection_id, agent_run_ids)
+            await bump_data_version(session, ctx.collection_id)
+
+        elapsed = time.perf_counter() - t_start
+        logger.info(
+            f"Added {len(agent_runs)} agent runs, {len(transcript_rows)} transcripts, and {len(transcript_group_rows)} transcript groups "
+            f"in {elapsed:.2f}s ({num_rows / max(elapsed, 1e-9):.0f} rows/s)"
+        )
+        return num_rows
+
+    async def start_agent_runs_deletion(
+        self, ctx: ViewContext, agent_run_ids: list[str]
+    ) -> str | None:
+        """
+        Enqueue a job that deletes specific agent runs from a collection in batches.
 
-        # Sort transcript groups so they don't violate foreign key constraints when inserted at once
-        transcript_group_data = sort_transcript_groups_by_parent_order(transcript_group_data)
+        Returns:
+            The ID of the deletion job, or None if there was nothing to delete.
+        """
+        if not agent_run_ids:
+            return None
 
-        # Insert all rows in a single transaction using add_all
         async with self.db.session() as session:
-            session.add_all(agent_run_data)
-            session.add_all(transcript_group_data)
-            await session.flush()  # (mengk) seems necessary to avoid FK violations, for some strange reason
-            session.add_all(transcript_data)
+            job_id = str(uuid4())
+            session.add(
+                SQLAJob(
+                    id=job_id,
+                    type=WorkerFunction.DELETE_AGENT_RUNS_JOB.value,
+                    job_json={
+                        "collection_id": ctx.collection_id,
+                        "agent_run_ids": agent_run_ids,
+                        "num_processed": 0,
+                        "num_deleted": 0,
+                    },
+                )
+            )
 
+        await enqueue_job(ctx, job_id)  # type: ignore
         logger.info(
-            f"Added {len(agent_runs)} agent runs, {len(transcript_data)} transcripts, and {len(transcript_group_data)} transcript groups"
+            f"Enqueued deletion job {job_id} for {len(agent_run_ids)} agent runs "
+            f"in collection {ctx.collection_id}"
         )
+        return job_id
 
-    async def delete_agent_runs(self, collection_id: str, agent_run_ids: list[str]) -> int:
+    async def delete_agent_runs(
+        self,
+        collection_id: str,
+        agent_run_ids: list[str],
+        batch_size: int = AGENT_RUN_DELETION_BATCH_SIZE,
+    ) -> int:
         """
         Delete specific agent runs from a collection.
 
-        This method deletes agent runs and their associated data.
+        This method deletes agent runs and their associated data, `batch_size` runs per
+        transaction. Transcripts and the other per-run rows are removed via CASCADE, so
+        batches are kept smaller than for plain row deletes.
 
         Args:
             collection_id: The collection ID
             agent_run_ids: List of agent run IDs to delete
+            batch_size: Number of agent runs to delete per transaction
 
         Returns:
             Number of agent runs deleted
         """
-        if not agent_run_ids:
-            return 0
+        deleted_count, telemetry_count, accumulation_count = 0, 0, 0
 
-        async with self.db.session() as session:
-            # Delete telemetry agent run status records first
-            # (These don't have CASCADE delete since they intentionally don't have FK constraint)
-            telemetry_result = await session.execute(
-                delete(SQLATelemetryAgentRunStatus).where(
-                    SQLATelemetryAgentRunStatus.agent_run_id.in_(agent_run_ids),
-                    SQLATelemetryAgentRunStatus.collection_id == collection_id,
-                )
-            )
-            telemetry_count = telemetry_result.rowcount or 0
+        for i in range(0, len(agent_run_ids), batch_size):
+            batch_ids = [run_id for run_id in agent_run_ids[i : i + batch_size] if run_id]
 
-            # Delete telemetry accumulation data for these agent runs
-            from docent_core.docent.services.telemetry_accumulation import (
-                TelemetryAccumulationService,
-            )
-
-            accumulation_service = TelemetryAccumulationService(session)
-            accumulation_count = 0
-            for agent_run_id in agent_run_ids:
-                count = 0
-                if agent_run_id:
-                    count = await accumulation_service.delete_accumulation_data(
-                        collection_id, agent_run_id=agent_run_id
+            async with self.db.session() as session:
+                # Delete telemetry agent run status records first
+                # (These don't have CASCADE delete since they intentionally don't have FK constraint)
+                telemetry_result = await session.execute(
+                    delete(SQLATelemetryAgentRunStatus).where(
+                        SQLATelemetryAgentRunStatus.agent_run_id.in_(batch_ids),
+                        SQLATelemetryAgentRunStatus.collection_id == collection_id,
                     )
-                accumulation_count += count
-
-            agent_run_result = await session.execute(
-                delete(SQLAAgentRun).where(
-                    SQLAAgentRun.id.in_(agent_run_ids), SQLAAgentRun.collection_id == collection_id
                 )
-            )
-            deleted_count = agent_run_result.rowcount or 0
+                telemetry_count += telemetry_result.rowcount or 0
+
+                # Delete telemetry accumulation data for these agent runs in one statement
+                if batch_ids:
+                    key_prefixes = [
+                        f"collection_id={collection_id}:agent_run_id={agent_run_id}%"
+                        for agent_run_id in batch_ids
+                    ]
+                    accumulation_result = await session.execute(
+                        delete(SQLATelemetryAccumulation).where(
+                            SQLATelemetryAccumulation.key.like(any_(array(key_prefixes)))
+                        )
+                    )
+                    accumulation_count += accumulation_result.rowcount or 0
 
-            await session.commit()
+                await MetadataCatalogService(session).remove_agent_runs(collection_id, batch_ids)
+                await ChartRollupService(session).remove_agent_runs(collection_id, batch_ids)
+                agent_run_result = await session.execute(
+                    delete(SQLAAgentRun).where(
+                        SQLAAgentRun.id.in_(batch_ids), SQLAAgentRun.collection_id == collection_id
+                    )
+                )
+                deleted_count += agent_run_result.rowcount or 0
+                await bump_data_version(session, collection_id, allow_deleted=True)
 
         logger.info(
             f"Deleted {deleted_count} agent runs, {telemetry_count} telemetry records, "
@@ -500,6 +691,70 @@ class MonoService:
 
         return deleted_count
 
+    async def add_and_enqueue_deletion_job(self, job_type: str, job_json: dict[str, Any]) -> str:
+        """Add a deletion job, e.g. to continue one that ran out of time, and enqueue it."""
+        # A continuation starts with no heartbeat and a fresh attempt count
+        job_json = {k: v for k, v in job_json.items() if k not in ("heartbeat_at", "attempts")}
+        async with self.db.session() as session:
+            job_id = str(uuid4())
+            session.add(SQLAJob(id=job_id, type=job_type, job_json=job_json))
+
+        await self._enqueue_deletion_job(job_json["collection_id"], job_id)
+        return job_id
+
+    async def _enqueue_deletion_job(self, collection_id: str, job_id: str) -> None:
+        # The collection's views may already be gone, so the job gets a bare context
+        ctx = ViewContext(collection_id=collection_id, view_id="", user=None, base_filter=None)
+        await enqueue_job(ctx, job_id)  # type: ignore
+
+    async def resume_deletion_jobs(self) -> list[str]:
+        """
+        Re-enqueue deletion jobs whose worker died while running them, e.g. when it was killed.
+
+        A running deletion job whose heartbeat (see `DELETION_JOB_STALE_SECONDS`) has gone
+        stale is flipped back to pending and enqueued again. Deletion jobs commit batch by
+        batch, so a rerun picks up where the last one stopped. Jobs that were canceled, or
+        failed, are left alone, and a job is given up on after `MAX_DELETION_JOB_ATTEMPTS`
+        resumes. Rows are locked while being claimed, so concurrently running workers don't
+        resume the same job twice.
+
+        Returns:
+            The IDs of the resumed jobs.
+        """
+        now = datetime.now(UTC)
+        stale_before = now - timedelta(seconds=DELETION_JOB_STALE_SECONDS)
+        resumed: list[tuple[str, dict[str, Any]]] = []
+        async with self.db.session() as session:
+            result = await session.execute(
+                select(SQLAJob)
+                .where(SQLAJob.type.in_(DELETION_JOB_TYPES), SQLAJob.status == JobStatus.RUNNING)
+                .with_for_update(skip_locked=True)
+            )
+            for job in result.scalars():
+                heartbeat_at = job.job_json.get("heartbeat_at")
+                last_seen = (
+                    datetime.fromisoformat(heartbeat_at)
+                    if heartbeat_at is not None
+                    else job.created_at.replace(tzinfo=UTC)
+                )
+                if last_seen > stale_before:
+                    continue
+
+                attempts = job.job_json.get("attempts", 0) + 1
+                if attempts > MAX_DELETION_JOB_ATTEMPTS:
+                    logger.error(f"Giving up on deletion job {job.id} after {attempts - 1} resumes")
+                    job.status = JobStatus.CANCELED
+                    continue
+
+                job.job_json = {**job.job_json, "attempts": attempts, "heartbeat_at": None}
+                job.status = JobStatus.PENDING
+                resumed.append((job.id, job.job_json))
+
+        for job_id, job_json in resumed:
+            await self._enqueue_deletion_job(job_json["collection_id"], job_id)
+            logger.info(f"Resumed deletion job {job_id}")
+        return [job_id for job_id, _ in resumed]
+
     async def add_and_enqueue_embedding_job(self, ctx: ViewContext):
         collection_id = ctx.collection_id
         pending_count = await self.get_embedding_job_count(
@@ -536,6 +791,12 @@ class MonoService:
             sort_field: Field to sort by (e.g., "metadata.model", "metadata.score")
             sort_direction: Sort direction ("asc" or "desc")
         """
+        # Count the metadata paths this query filters and sorts on, for automatic indexes
+        metadata_path_uses = (
+            indexable_metadata_paths(ctx.base_filter) if ctx.base_filter is not None else []
+        )
+        ctx = await self.resolve_base_filter(ctx)
+
         async with self.db.session() as session:
             query = select(SQLAAgentRun.id).where(ctx.get_base_where_clause(SQLAAgentRun))
 
@@ -548,9 +809,10 @@ class MonoService:
 
                     # Build the JSON path expression for PostgreSQL
                     # Convert "field.subfield" to ->'field'->'subfield'
-                    sort_expr = SQLAAgentRun.metadata_json
-                    for part in path_parts:
-                        sort_expr = sort_expr[part]
+                    sort_expr = metadata_value_expression(
+                        SQLAAgentRun.metadata_json, path_parts, "json"
+                    )
+                    metadata_path_uses.append((path_parts, "json"))
                 else:
                     if sort_field == "agent_run_id":
                         sort_expr = SQLAAgentRun.id
@@ -568,7 +830,9 @@ class MonoService:
             result = await session.execute(query)
             agent_run_ids = result.scalars().all()
             logger.info(f"get_agent_run_ids: Found {len(agent_run_ids)} agent run IDs")
-            return list(agent_run_ids)
+
+        await record_metadata_path_usage(ctx.collection_id, metadata_path_uses)
+        return list(agent_run_ids)
 
     async def get_agent_runs(
         self,
@@ -581,7 +845,13 @@ class MonoService:
     ) -> list[AgentRun]:
         """
         Get all agent runs for a given Collection ID.
+
+        This materializes every matching run at once; use `iter_agent_runs` to process
+        large collections in bounded memory.
         """
+        if agent_run_ids is None and apply_base_where_clause:
+            ctx = await self.resolve_base_filter(ctx)
+
         async with self.db.session() as session:
             if agent_run_ids is not None and len(agent_run_ids) > 10_000:
                 agent_runs_raw: list[SQLAAgentRun] = []
@@ -619,38 +889,174 @@ class MonoService:
                 result = await session.execute(query)
                 agent_runs_raw = list(result.scalars().all())
 
-            # Get transcripts for those runs
-            agent_run_ids = [ar.id for ar in agent_runs_raw]
-            if agent_run_ids:
-                # Use batch processing to avoid PostgreSQL parameter limits
-                transcripts_raw: list[SQLATranscript] = []
-                batch_size = 10_000
+            return await self._assemble_agent_runs(session, agent_runs_raw)
 
-                for i in range(0, len(agent_run_ids), batch_size):
-                    batch_ids = agent_run_ids[i : i + batch_size]
-                    result = await session.execute(
-                        select(SQLATranscript).where(SQLATranscript.agent_run_id.in_(batch_ids))
-                    )
-                    batch_transcripts = result.scalars().all()
-                    transcripts_raw.extend(batch_transcripts)
+    async def iter_agent_runs(
+        self,
+        ctx: ViewContext,
+        agent_run_ids: list[str] | None = None,
+        _where_clause: ColumnElement[bool] | None = None,
+        apply_base_where_clause: bool = True,
+        page_size: int = 200,
+    ) -> AsyncIterator[list[AgentRun]]:
+        """
+        Stream agent runs in pages of at most `page_size` fully assembled runs.
+
+        Unlike `get_agent_runs`, only one page of runs, transcripts and transcript groups
+        is held in memory at a time, and each page is read in its own short session.
+        Without `agent_run_ids`, pages are keyset-paginated on the primary key, so every
+        page costs the same to fetch. With `agent_run_ids`, runs are yielded in that order,
+        with IDs that don't match the filters left out.
+
+        Args:
+            ctx: View context used to apply base filters and permissions.
+            agent_run_ids: Optional IDs to restrict to, in the order to yield them.
+            _where_clause: Optional extra filter on SQLAAgentRun.
+            apply_base_where_clause: Whether to apply the base where clause.
+            page_size: Maximum number of runs per yielded page.
+
+        Yields:
+            Non-empty lists of agent runs.
+        """
+        if page_size <= 0:
+            raise ValueError(f"page_size must be positive, got {page_size}")
+        # A stream can outlive the base filter's result set, which is only kept for a while
+        # after it's resolved, so every page evaluates the filter itself
+        ctx = ctx.model_copy(update={"base_filter_result_set_id": None})
+
+        after_id: str | None = None
+        offset = 0
+        while True:
+            query = select(SQLAAgentRun)
+            if apply_base_where_clause:
+                query = query.where(ctx.get_base_where_clause(SQLAAgentRun))
+            if _where_clause is not None:
+                query = query.where(_where_clause)
+
+            page_ids: list[str] | None = None
+            if agent_run_ids is not None:
+                page_ids = agent_run_ids[offset : offset + page_size]
+                if not page_ids:
+                    return
+                offset += len(page_ids)
+                query = query.where(SQLAAgentRun.id.in_(page_ids))
             else:
-                transcripts_raw = []
+                query = query.order_by(SQLAAgentRun.id).limit(page_size)
+                if after_id is not None:
+                    query = query.where(SQLAAgentRun.id > after_id)
 
-            # Get transcript groups for the agent runs
-            transcript_groups_raw: list[SQLATranscriptGroup] = []
-            if agent_run_ids:
-                # Use batch processing to avoid PostgreSQL parameter limits
-                batch_size = 10_000
+            async with self.db.session() as session:
+                agent_runs_raw = list((await session.execute(query)).scalars().all())
+                if page_ids is not None:
+                    order_index = {rid: i for i, rid in enumerate(page_ids)}
+                    agent_runs_raw.sort(key=lambda ar: order_index[ar.id])
+                elif not agent_runs_raw:
+                    return
+                else:
+                    after_id = agent_runs_raw[-1].id
+                page = await self._assemble_agent_runs(session, agent_runs_raw)
 
-                for i in range(0, len(agent_run_ids), batch_size):
-                    batch_ids = agent_run_ids[i : i + batch_size]
-                    result = await session.execute(
-                        select(SQLATranscriptGroup).where(
-                            SQLATranscriptGroup.agent_run_id.in_(batch_ids)
-                        )
-                    )
-                    batch_transcript_groups = result.scalars().all()
-                    transcript_groups_raw.extend(batch_transcript_groups)
+            if page:
+                yield page
+            if page_ids is None and len(agent_runs_raw) < page_size:
+                return
+
+    async def sample_agent_runs(
+        self,
+        ctx: ViewContext,
+        n: int,
+        seed: str | int | None = None,
+        stratify_by: str | None = None,
+        apply_base_where_clause: bool = True,
+    ) -> list[AgentRun]:
+        """
+        Pick `n` random agent runs matching the view's filters, in Postgres.
+
+        Only run IDs are ranked in the database; transcripts are loaded for the sampled
+        runs alone, so the cost of loading them doesn't grow with the collection.
+
+        Args:
+            ctx: View context used to apply base filters and permissions.
+            n: Number of runs to return (fewer if the view has fewer runs).
+            seed: Makes the sample deterministic: the same seed and runs give the same sample.
+            stratify_by: Optional field such as "metadata.model" to sample evenly across,
+                taking one run from each value in turn.
+            apply_base_where_clause: Whether to apply the base where clause.
+
+        Returns:
+            The sampled agent runs, in sampling order.
+        """
+        if n <= 0:
+            return []
+        if apply_base_where_clause:
+            ctx = await self.resolve_base_filter(ctx)
+
+        if seed is None:
+            sort_key: ColumnElement[Any] = func.random()
+        else:
+            sort_key = func.md5(func.concat(str(seed), ":", SQLAAgentRun.id))
+
+        if stratify_by is None:
+            query = select(SQLAAgentRun.id).order_by(sort_key).limit(n)
+            if apply_base_where_clause:
+                query = query.where(ctx.get_base_where_clause(SQLAAgentRun))
+        else:
+            field_parts = stratify_by.split(".")
+            if field_parts[0] != "metadata" or len(field_parts) < 2 or not all(field_parts):
+                raise ValueError(f"Can only stratify by a metadata field, got {stratify_by!r}")
+            stratum = SQLAAgentRun.metadata_json[tuple(field_parts[1:])].astext
+
+            ranked = select(
+                SQLAAgentRun.id,
+                sort_key.label("sort_key"),
+                func.row_number().over(partition_by=stratum, order_by=sort_key).label("rank"),
+            )
+            if apply_base_where_clause:
+                ranked = ranked.where(ctx.get_base_where_clause(SQLAAgentRun))
+            ranked_subq = ranked.subquery()
+            # Round-robin over strata: every stratum's first pick, then every second pick, ...
+            query = (
+                select(ranked_subq.c.id)
+                .order_by(ranked_subq.c.rank, ranked_subq.c.sort_key)
+                .limit(n)
+            )
+
+        async with self.db.session() as session:
+            sampled_ids = list((await session.execute(query)).scalars().all())
+            result = await session.execute(
+                select(SQLAAgentRun).where(SQLAAgentRun.id.in_(sampled_ids))
+            )
+            agent_runs_raw = result.scalars().all()
+            agent_runs = await self._assemble_agent_runs(session, agent_runs_raw)
+
+        order_index = {rid: i for i, rid in enumerate(sampled_ids)}
+        agent_runs.sort(key=lambda ar: order_index[ar.id])
+        return agent_runs
+
+    @staticmethod
+    async def _assemble_agent_runs(
+        session: AsyncSession, agent_runs_raw: Sequence[SQLAAgentRun]
+    ) -> list[AgentRun]:
+        """Load the transcripts and transcript groups of some agent runs and build AgentRuns."""
+        # Get transcripts for those runs
+        agent_run_ids = [ar.id for ar in agent_runs_raw]
+        transcripts_raw: list[SQLATranscript] = []
+        transcript_groups_raw: list[SQLATranscriptGroup] = []
+
+        # Use batch processing to avoid PostgreSQL parameter limits
+        batch_size = 10_000
+        for i in range(0, len(agent_run_ids), batch_size):
+            batch_ids = agent_run_ids[i : i + batch_size]
+            result = await session.execute(
+                select(SQLATranscript).where(SQLATranscript.agent_run_id.in_(batch_ids))
+            )
+            transcripts_raw.extend(result.scalars().all())
+
+            # Get transcript groups for the agent runs
+            result = await session.execute(
+                select(SQLATranscriptGroup).where(SQLATranscriptGroup.agent_run_id.in_(batch_ids))
+            )
+            transcript_groups_raw.extend(result.scalars().all())
 
         # Collate run_id -> transcripts
         agent_run_transcripts: dict[str, list[Transcript]] = {}
@@ -664,7 +1070,7 @@ class MonoService:
                 tg_raw.to_transcript_group()
             )
 
-        final_result = [
+        return [
             ar_raw.to_agent_run(
                 transcripts=agent_run_transcripts.get(ar_raw.id, []),
                 transcript_groups=agent_run_transcript_groups.get(ar_raw.id, []),
@@ -672,13 +1078,12 @@ class MonoService:
             for ar_raw in agent_runs_raw
         ]
 
-        return final_result
-
     async def get_metadata_for_agent_runs(
         self,
         ctx: ViewContext,
         agent_run_ids: list[str],
         apply_base_where_clause: bool = True,
+        metadata_paths: list[str] | None = None,
     ) -> dict[str, dict[str, Any]]:
         """
         Efficiently fetch only metadata for the specified agent run IDs.
@@ -689,6 +1094,7 @@ class MonoService:
             ctx: View context used to apply base filters and permissions.
             agent_run_ids: List of agent run IDs to fetch metadata for.
             apply_base_where_clause: Whether to apply the base where clause.
+            metadata_paths: Optional dotted metadata paths to fetch instead of all metadata.
 
         Returns:
             Mapping of agent_run_id -> structured metadata dict with:
@@ -699,36 +1105,244 @@ class MonoService:
         if not agent_run_ids:
             return {}
 
+        rows = await self.get_agent_run_projections(
+            ctx,
+            AgentRunProjection(fields={"metadata", "created_at"}, metadata_paths=metadata_paths),
+            agent_run_ids=agent_run_ids,
+            apply_base_where_clause=apply_base_where_clause,
+        )
+
         metadata_map: dict[str, dict[str, Any]] = {}
+        for row in rows:
+            # Structure the response with metadata in a separate key
+            # and non-JSON fields as direct keys
+            structured_metadata: dict[str, Any] = {
+                "agent_run_id": row["id"],
+                "metadata": row["metadata"] or {},
+            }
 
-        async with self.db.session() as session:
-            # Use batching to avoid exceeding database parameter limits
-            batch_size = 10_000
-            for i in range(0, len(agent_run_ids), batch_size):
-                batch_ids = agent_run_ids[i : i + batch_size]
-
-                query = select(
-                    SQLAAgentRun.id, SQLAAgentRun.metadata_json, SQLAAgentRun.created_at
-                ).where(SQLAAgentRun.id.in_(batch_ids))
-                if apply_base_where_clause:
-                    query = query.where(ctx.get_base_where_clause(SQLAAgentRun))
+            # Add created_at as a direct key
+            if row["created_at"]:
+                structured_metadata["created_at"] = row["created_at"].isoformat()
 
-                result = await session.execute(query)
-                for run_id, metadata, created_at in result.all():
-                    # Structure the response with metadata in a separate key
-                    # and non-JSON fields as direct keys
-                    structured_metadata: dict[str, Any] = {
-                        "agent_run_id": run_id,
-                        "metadata": metadata or {},
-                    }
+            metadata_map[row["id"]] = structured_metadata
 
-                    # Add created_at as a direct key
-                    if created_at:
-                        structured_metadata["created_at"] = created_at.isoformat()
+        return metadata_map
 
-                    metadata_map[run_id] = structured_metadata
+    async def get_agent_run_projections(
+        self,
+        ctx: ViewContext,
+        projection: AgentRunProjection,
+        agent_run_ids: list[str] | None = None,
+        after_id: str | None = None,
+        limit: int | None = None,
+        apply_base_where_clause: bool = True,
+    ) -> list[dict[str, Any]]:
+        """
+        Fetch only the requested parts of agent runs, ordered by ID.
 
-        return metadata_map
+        Only the columns, metadata paths and transcript parts named by the projection are
+        selected, so e.g. listing metadata never reads transcript blobs, and transcript
+        message counts are computed in Postgres without sending the messages.
+
+        Args:
+            ctx: View context used to apply base filters and permissions.
+            projection: Which run fields, metadata paths and transcript parts to fetch.
+            agent_run_ids: Optional IDs to restrict to.
+            after_id: Return only runs whose ID sorts after this one, for keyset pagination.
+            limit: Maximum number of runs to return.
+            apply_base_where_clause: Whether to apply the base where clause.
+
+        Returns:
+            One dict per run with `id` and the projected keys. With `metadata_paths`,
+            `metadata` only holds those paths; missing or null paths are left out.
+            With a transcript projection, `transcripts` lists dicts with the transcript's
+            `id`, `name`, `description`, `transcript_group_id` and the requested parts.
+        """
+        if agent_run_ids is None and apply_base_where_clause:
+            ctx = await self.resolve_base_filter(ctx)
+
+        key_paths = projection.metadata_key_paths()
+        columns: list[Any] = [SQLAAgentRun.id]
+        for field in ("name", "description", "created_at"):
+            if field in projection.fields:
+                columns.append(getattr(SQLAAgentRun, field))
+        if "metadata" in projection.fields:
+            if projection.metadata_paths is None:
+                columns.append(SQLAAgentRun.metadata_json)
+            else:
+                columns.extend(SQLAAgentRun.metadata_json[tuple(kp)] for kp in key_paths)
+
+        query = select(*columns).order_by(SQLAAgentRun.id)
+        if apply_base_where_clause:
+            query = query.where(ctx.get_base_where_clause(SQLAAgentRun))
+        if agent_run_ids is not None:
+            # One array parameter rather than one per ID, so the ordering, cursor and limit
+            # apply across all of the IDs however many there are
+            query = query.where(
+                SQLAAgentRun.id == any_(bindparam("agent_run_ids", agent_run_ids, ARRAY(Text)))
+            )
+        if after_id is not None:
+            query = query.where(SQLAAgentRun.id > after_id)
+        if limit is not None:
+            query = query.limit(limit)
+
+        rows: list[dict[str, Any]] = []
+        async with self.db.session() as session:
+            for values in (await session.execute(query)).all():
+                row: dict[str, Any] = {"id": values[0]}
+                values = values[1:]
+                for field in ("name", "description", "created_at"):
+                    if field in projection.fields:
+                        row[field], values = values[0], values[1:]
+                if "metadata" in projection.fields:
+                    if projection.metadata_paths is None:
+                        row["metadata"] = values[0]
+                    else:
+                        metadata: dict[str, Any] = {}
+                        for key_path, value in zip(key_paths, values):
+                            if value is not None:
+                                set_key_path(metadata, key_path, value)
+                        row["metadata"] = metadata
+                rows.append(row)
+
+            if projection.transcripts is not None:
+                transcripts = await self._get_projected_transcripts(
+                    session, projection.transcripts, [row["id"] for row in rows]
+                )
+                for row in rows:
+                    row["transcripts"] = transcripts.get(row["id"], [])
+
+        return rows
+
+    @staticmethod
+    async def _get_projected_transcripts(
+        session: AsyncSession, projection: TranscriptProjection, agent_run_ids: list[str]
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Fetch the requested parts of the transcripts of some agent runs, keyed by run ID."""
+        columns: list[Any] = [
+            SQLATranscript.agent_run_id,
+            SQLATranscript.id,
+            SQLATranscript.name,
+            SQLATranscript.description,
+            SQLATranscript.transcript_group_id,
+        ]
+        if projection.messages:
+            columns.append(SQLATranscript.messages)
+        if projection.message_count:
+            # Messages are stored as ASCII JSON bytes, so this never has to leave Postgres
+            columns.append(
+                func.json_array_length(
+                    func.convert_from(SQLATranscript.messages, "UTF8").cast(JSON)
+                )
+            )
+        if projection.metadata:
+            columns.append(SQLATranscript.metadata_json)
+
+        transcripts: dict[str, list[dict[str, Any]]] = {}
+        batch_size = 10_000
+        for i in range(0, len(agent_run_ids), batch_size):
+            query = (
+                select(*columns)
+                .where(SQLATranscript.agent_run_id.in_(agent_run_ids[i : i + batch_size]))
+                .order_by(SQLATranscript.created_at, SQLATranscript.id)
+            )
+            if projection.names is not None:
+                query = query.where(SQLATranscript.name.in_(projection.names))
+
+            for values in (await session.execute(query)).all():
+                agent_run_id, transcript_id, name, description, group_id, *parts = values
+                transcript: dict[str, Any] = {
+                    "id": transcript_id,
+                    "name": name,
+                    "description": description,
+                    "transcript_group_id": group_id,
+                }
+                if projection.messages:
+                    transcript["messages"] = json.loads(parts.pop(0).decode("utf-8"))
+                if projection.message_count:
+                    transcript["message_count"] = parts.pop(0)
+                if projection.metadata:
+                    transcript["metadata"] = json.loads(parts.pop(0).decode("utf-8"))
+                transcripts.setdefault(agent_run_id, []).append(transcript)
+        return transcripts
+
+    async def get_agent_run_export_page(
+        self,
+        ctx: ViewContext,
+        after_id: str | None = None,
+        limit: int = 1_000,
+        fields: set[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Fetch one page of agent runs as JSON-ready dicts, ordered by ID.
+
+        Pages are keyset-paginated on the primary key, so fetching page N costs the same
+        as fetching page 1. Transcripts and transcript groups are only loaded when they
+        are part of the requested projection.
+
+        Args:
+            ctx: View context used to apply base filters and permissions.
+            after_id: Return only runs whose ID sorts after this one (the previous page's cursor).
+            limit: Maximum number of runs to return.
+            fields: Top-level AgentRun fields to include; `id` is always included.
+                Defaults to all of EXPORTABLE_AGENT_RUN_FIELDS.
+
+        Returns:
+            A list of agent run dicts, at most `limit` long.
+        """
+        fields = set(EXPORTABLE_AGENT_RUN_FIELDS) if fields is None else fields | {"id"}
+        unknown_fields = fields - set(EXPORTABLE_AGENT_RUN_FIELDS)
+        if unknown_fields:
+            raise ValueError(f"Unknown agent run fields: {sorted(unknown_fields)}")
+
+        ctx = await self.resolve_base_filter(ctx)
+        async with self.db.session() as session:
+            query = (
+                select(SQLAAgentRun)
+                .where(ctx.get_base_where_clause(SQLAAgentRun))
+                .order_by(SQLAAgentRun.id)
+                .limit(limit)
+            )
+            if after_id is not None:
+                query = query.where(SQLAAgentRun.id > after_id)
+            agent_runs_raw = (await session.execute(query)).scalars().all()
+            agent_run_ids = [ar.id for ar in agent_runs_raw]
+
+            transcripts: dict[str, list[dict[str, Any]]] = {}
+            if "transcripts" in fields and agent_run_ids:
+                result = await session.execute(
+                    select(SQLATranscript).where(SQLATranscript.agent_run_id.in_(agent_run_ids))
+                )
+                for t_raw in result.scalars():
+                    transcripts.setdefault(t_raw.agent_run_id, []).append(
+                        t_raw.to_transcript().model_dump(mode="json")
+                    )
+
+            transcript_groups: dict[str, list[dict[str, Any]]] = {}
+            if "transcript_groups" in fields and agent_run_ids:
+                result = await session.execute(
+                    select(SQLATranscriptGroup).where(
+                        SQLATranscriptGroup.agent_run_id.in_(agent_run_ids)
+                    )
+                )
+                for tg_raw in result.scalars():
+                    transcript_groups.setdefault(tg_raw.agent_run_id, []).append(
+                        tg_raw.to_transcript_group().model_dump(mode="json")
+                    )
+
+        page: list[dict[str, Any]] = []
+        for ar_raw in agent_runs_raw:
+            row: dict[str, Any] = {
+                "id": ar_raw.id,
+                "name": ar_raw.name,
+                "description": ar_raw.description,
+                "metadata": ar_raw.metadata_json,
+                "transcripts": transcripts.get(ar_raw.id, []),
+                "transcript_groups": transcript_groups.get(ar_raw.id, []),
+            }
+            page.append({k: v for k, v in row.items() if k in fields})
+        return page
 
     async def get_agent_run(
         self, ctx: ViewContext, agent_run_id: str, apply_base_where_clause: bool = True
@@ -758,6 +1372,10 @@ class MonoService:
         """
         Get unique values for a specific metadata field from agent runs in the collection.
 
+        Views without a base filter are served from the metadata facet index, which only
+        holds scalar values up to `MAX_FACET_VALUE_LENGTH` characters; values starting with
+        `search` are listed before other matches.
+
         Args:
             ctx: The ViewContext to use for the query.
             field_name: The field name (e.g., "metadata.task_id")
@@ -767,6 +1385,7 @@ class MonoService:
         Returns:
             List of unique string values for the field
         """
+        ctx = await self.resolve_base_filter(ctx)
         async with self.db.session() as session:
             field_parts = field_name.split(".")
 
@@ -776,6 +1395,13 @@ class MonoService:
                     if not part.replace("_", "").replace("-", "").isalnum():
                         return []
 
+                # The facet index covers the whole collection, so it can only serve views
+                # without a base filter
+                if ctx.base_filter is None:
+                    return await MetadataCatalogService(session).get_facet_values(
+                        ctx.collection_id, ".".join(json_path_parts), search, limit
+                    )
+
                 field_expr = SQLAAgentRun.metadata_json
                 for part in json_path_parts[:-1]:
                     field_expr = field_expr.op("->")(part)
@@ -798,8 +1424,31 @@ class MonoService:
             else:
                 return []
 
-    async def count_base_agent_runs(self, ctx: ViewContext) -> int:
+    async def resolve_base_filter(self, ctx: ViewContext) -> ViewContext:
+        """
+        Materialize the view's base filter (see `FilterResultSetService`) and return a
+        context whose `get_base_where_clause` joins against the result.
+
+        The result set is only kept for a while after it's last resolved, so use the
+        returned context for queries that run right away, not for long-running work. The
+        context is returned unchanged if the collection's data changed too recently.
+        """
+        if ctx.base_filter is None or ctx.base_filter_result_set_id is not None:
+            return ctx
+        # There's nothing to cache for a filter whose parts are all disabled
+        if ctx.base_filter.to_sqla_where_clause(SQLAAgentRun) is None:
+            return ctx
 
+        async with self.db.session() as session:
+            result_set_id = await FilterResultSetService(session).get_result_set_id(
+                ctx.collection_id, ctx.base_filter
+            )
+        if result_set_id is None:
+            return ctx
+        return ctx.model_copy(update={"base_filter_result_set_id": result_set_id})
+
+    async def count_base_agent_runs(self, ctx: ViewContext) -> int:
+        ctx = await self.resolve_base_filter(ctx)
         async with self.db.session() as session:
             query = (
                 select(func.count())
@@ -849,6 +1498,13 @@ class MonoService:
     async def get_default_view_ctx(self, collection_id: str, user: User) -> ViewContext:
         # TODO(mengk): assert that collection_id exists
 
+        if (cached := get_cached_default_view(collection_id, user.id)) is not None:
+            view_id, base_filter = cached
+            return ViewContext(
+                collection_id=collection_id, view_id=view_id, base_filter=base_filter, user=user
+            )
+        generation = get_auth_cache_generation()
+
         # Check if a default view exists for this fg
         async with self.db.session() as session:
             result = await session.execute(
@@ -913,6 +1569,7 @@ class MonoService:
                 view.base_filter, ComplexFilter
             ), f"Base filter must be a ComplexFilter, found {type(view.base_filter)}"
 
+        set_cached_default_view(generation, collection_id, user.id, view.id, view.base_filter)
         return ViewContext(
             collection_id=collection_id, view_id=view.id, base_filter=view.base_filter, user=user
         )
@@ -929,6 +1586,7 @@ class MonoService:
                     .where(SQLAView.id == ctx.view_id)
                     .values(base_filter_dict=filter.model_dump())
                 )
+            await invalidate_cached_default_views(ctx.collection_id)
 
         new_ctx = ViewContext(
             collection_id=ctx.collection_id, view_id=ctx.view_id, base_filter=filter, user=ctx.user
@@ -942,6 +1600,7 @@ class MonoService:
                 await session.execute(
                     update(SQLAView).where(SQLAView.id == ctx.view_id).values(base_filter_dict=None)
                 )
+            await invalidate_cached_default_views(ctx.collection_id)
 
         new_ctx = ViewContext(
             collection_id=ctx.collection_id, view_id=ctx.view_id, base_filter=None, user=ctx.user
@@ -1070,56 +1729,66 @@ class MonoService:
     async def compute_embeddings(
         self, ctx: ViewContext, progress_callback: AsyncEmbeddingStreamingCallback
     ):
+        # Agent runs that don't have embeddings in this collection
+        missing_embeddings = ~exists().where(
+            SQLATranscriptEmbedding.agent_run_id == SQLAAgentRun.id,
+            SQLATranscriptEmbedding.collection_id == ctx.collection_id,
+        )
         async with self.db.session() as session:
-            # Get all agent runs that don't have embeddings in this collection
-            query = (
-                select(SQLAAgentRun.id)
-                .outerjoin(
-                    SQLATranscriptEmbedding,
-                    (SQLAAgentRun.id == SQLATranscriptEmbedding.agent_run_id)
-                    & (SQLATranscriptEmbedding.collection_id == ctx.collection_id),
-                )
-                .where(SQLATranscriptEmbedding.agent_run_id.is_(None))
+            num_missing = await session.scalar(
+                select(func.count())
+                .select_from(SQLAAgentRun)
+                .where(ctx.get_base_where_clause(SQLAAgentRun), missing_embeddings)
             )
-            result = await session.execute(query)
-            agent_run_ids_without_embeddings = result.scalars().all()
 
-        if len(agent_run_ids_without_embeddings) == 0:
+        if not num_missing:
             logger.info("All agent runs already have embeddings")
             return False
 
-        # Use existing get_agent_runs method to fetch full AgentRun objects with transcripts
-        agent_runs = await self.get_agent_runs(
-            ctx, agent_run_ids=list(agent_run_ids_without_embeddings)
-        )
+        logger.info(f"Computing embeddings for {num_missing} agent runs")
 
-        logger.info(f"Computing embeddings for {len(agent_runs)} agent runs")
-
-        text = [run.text for run in agent_runs]
-        try:
-            embeddings, chunk_to_doc = await get_chunked_openai_embeddings_async(
-                text, dimensions=EMBEDDING_DIM, callback=progress_callback
+        # Embed page by page so memory stays bounded; a failed job resumes where it stopped
+        num_done, num_pushed = 0, 0
+        async with aclosing(
+            self.iter_agent_runs(
+                ctx,
+                _where_clause=missing_embeddings,
+                page_size=EMBEDDING_PAGE_SIZE,
             )
-        except Exception as e:
-            # Just skip
-            logger.warning(f"Failed to compute embeddings: {e}")
-            return False
-        embedding_ids = [agent_runs[doc_idx].id for doc_idx in chunk_to_doc]
+        ) as pages:
+            async for agent_runs in pages:
 
-        async with self.db.session() as session:
-            session.add_all(
-                [
-                    SQLATranscriptEmbedding(
-                        id=str(uuid4()),
-                        collection_id=ctx.collection_id,
-                        agent_run_id=id,
-                        embedding=embedding,
+                async def _page_progress(progress: int, num_done: int = num_done) -> None:
+                    done = num_done + len(agent_runs) * progress / 100
+                    await progress_callback(min(100, int(done / num_missing * 100)))
+
+                text = [run.text for run in agent_runs]
+                try:
+                    embeddings, chunk_to_doc = await get_chunked_openai_embeddings_async(
+                        text, dimensions=EMBEDDING_DIM, callback=_page_progress
                     )
-                    for id, embedding in zip(embedding_ids, embeddings)
-                ]
-            )
+                except Exception as e:
+                    # Just skip
+                    logger.warning(f"Failed to compute embeddings: {e}")
+                    return False
+                embedding_ids = [agent_runs[doc_idx].id for doc_idx in chunk_to_doc]
+
+                async with self.db.session() as session:
+                    session.add_all(
+                        [
+                            SQLATranscriptEmbedding(
+                                id=str(uuid4()),
+                                collection_id=ctx.collection_id,
+                                agent_run_id=id,
+                                embedding=embedding,
+                            )
+                            for id, embedding in zip(embedding_ids, embeddings)
+                        ]
+                    )
+                num_done += len(agent_runs)
+                num_pushed += len(embeddings)
 
-        logger.info(f"Pushed {len(embeddings)} embeddings")
+        logger.info(f"Pushed {num_pushed} embeddings")
 
         return True
 
@@ -1507,22 +2176,31 @@ class MonoService:
         Returns:
             The User object if the session is valid and active, None otherwise
         """
+        if (cached_user := get_cached_session_user(session_id)) is not None:
+            return cached_user
+        generation = get_auth_cache_generation()
+
+        now = datetime.now(UTC).replace(tzinfo=None)
         async with self.db.session() as session:
             # Join session and user tables, check if session is active and not expired
             result = await session.execute(
-                select(SQLAUser)
+                select(SQLAUser, SQLASession.expires_at)
                 .join(SQLASession, SQLAUser.id == SQLASession.user_id)
                 .where(
                     SQLASession.id == session_id,
                     SQLASession.is_active,
-                    SQLASession.expires_at > datetime.now(UTC).replace(tzinfo=None),
+                    SQLASession.expires_at > now,
                 )
             )
-            sqla_user = result.scalar_one_or_none()
-            if not sqla_user:
+            row = result.one_or_none()
+            if row is None:
                 return None
 
-            return sqla_user.to_user()
+            sqla_user, expires_at = row
+            user = sqla_user.to_user()
+
+        set_cached_session_user(generation, session_id, user, (expires_at - now).total_seconds())
+        return user
 
     async def invalidate_session(self, session_id: str) -> bool:
         """
@@ -1538,7 +2216,8 @@ class MonoService:
             result = await session.execute(
                 update(SQLASession).where(SQLASession.id == session_id).values(is_active=False)
             )
-            return result.rowcount > 0
+        await invalidate_cached_session(session_id)
+        return result.rowcount > 0
 
     ###############
     # Permissions #
@@ -1584,6 +2263,11 @@ class MonoService:
     ) -> Permission | None:
         """Get the highest permission level a user has for a resource."""
 
+        found, cached_permission = get_cached_permission_level(user, resource_type, resource_id)
+        if found:
+            return cached_permission
+        generation = get_auth_cache_generation()
+
         # Build the resource filter based on ResourceType
         if resource_type == ResourceType.COLLECTION:
             resource_filter = SQLAAccessControlEntry.collection_id == resource_id
@@ -1624,9 +2308,13 @@ class MonoService:
                 all_perm_strs.extend(org_permission_result.scalars().all())
 
         # Return the highest permission level
-        if not all_perm_strs:
-            return None
-        return Permission(max(all_perm_strs, key=lambda p: PERMISSION_LEVELS[p]))
+        permission = (
+            Permission(max(all_perm_strs, key=lambda p: PERMISSION_LEVELS[p]))
+            if all_perm_strs
+            else None
+        )
+        set_cached_permission_level(generation, user, resource_type, resource_id, permission)
+        return permission
 
     async def set_acl_permission(
         self,
@@ -1695,6 +2383,7 @@ class MonoService:
                 f"Granted {permission.value} permission on {resource_type.value}:{resource_id} "
                 f"for {subject_type.value}:{subject_id}"
             )
+        await invalidate_cached_permissions(resource_type, resource_id)
 
     async def clear_acl_permission(
         self,
@@ -1737,7 +2426,9 @@ class MonoService:
             else:
                 logger.info("No ACL permissions matched the provided filters")
 
-            return count
+        if count > 0:
+            await invalidate_cached_permissions(resource_type, resource_id)
+        return count
 
     ###########
     # Locking #
@@ -1822,6 +2513,8 @@ class MonoService:
                 name=name,
                 key_id=key_id,
                 key_hash=key_hash,
+                # Lets revocation find the key's entry in the auth cache
+                fingerprint=self._create_fingerprint(raw_api_key),
             )
             session.add(api_key)
             await session.commit()
@@ -1846,90 +2539,126 @@ class MonoService:
                 update(SQLAApiKey)
                 .where(SQLAApiKey.id == api_key_id, SQLAApiKey.user_id == user_id)
                 .values(disabled_at=datetime.now(UTC).replace(tzinfo=None))
+                .returning(SQLAApiKey.fingerprint)
+            )
+            disabled = result.all()
+
+        # Invalidate after committing, so a verification that misses the cache sees the revocation
+        if disabled:
+            await invalidate_cached_api_key_auth(api_key_id, disabled[0].fingerprint)
+        return len(disabled) > 0
+
+    async def _touch_api_key(self, api_key_id: str) -> None:
+        """Update a key's last_used_at, at most once per resolution interval."""
+        if not await claim_api_key_last_used_write(api_key_id):
+            return
+        async with self.db.session() as session:
+            await session.execute(
+                update(SQLAApiKey)
+                .where(SQLAApiKey.id == api_key_id)
+                .values(last_used_at=datetime.now(UTC).replace(tzinfo=None))
             )
-            return result.rowcount > 0
 
     async def get_user_by_api_key(self, raw_api_key: str) -> User | None:
         """
         Validate an API key and return the associated user.
-        Updates last_used_at timestamp if key is valid.
+        Updates last_used_at timestamp if key is valid, at most once a minute.
 
-        Supports both new key_id pattern and legacy Argon2 hashes for migration.
+        Verified keys are cached (see `api_key_cache`), so most requests skip the Argon2
+        verification. Supports both the new key_id pattern and legacy Argon2 hashes; legacy
+        keys get a fingerprint on first use, which moves them to the indexed lookup.
         """
         if not raw_api_key.startswith("dk_"):
             return None
 
+        fingerprint = self._create_fingerprint(raw_api_key)
+        cached = await get_cached_api_key_auth(fingerprint)
+        if cached is not None:
+            api_key_id, user = cached
+            await self._touch_api_key(api_key_id)
+            return user
+
         async with self.db.session() as session:
-            # Parse key_id from API key format: dk_{key_id}_{secret}
-            key_id = None
-            api_key_data = None
-            parts = raw_api_key.split("_", 2)
-            if len(parts) == 3:
-                key_id = parts[1]
-
-            if key_id:
-                # Try new key_id pattern first
-                result = await session.execute(
-                    select(SQLAApiKey)
-                    .options(selectinload(SQLAApiKey.user))
-                    .where(
-                        SQLAApiKey.key_id == key_id,
-                        SQLAApiKey.disabled_at.is_(None),  # type: ignore
-                    )
-                )
-                api_key_data = result.scalar_one_or_none()
+            verified = await self._verify_api_key(session, raw_api_key, fingerprint)
+        if verified is None:
+            return None
 
-            # If key_id lookup failed, try fingerprint lookup for legacy keys
-            if not api_key_data:
-                fingerprint = self._create_fingerprint(raw_api_key)
-                result = await session.execute(
-                    select(SQLAApiKey)
-                    .options(selectinload(SQLAApiKey.user))
-                    .where(
-                        SQLAApiKey.fingerprint == fingerprint,
-                        SQLAApiKey.disabled_at.is_(None),  # type: ignore
-                    )
-                )
-                api_key_data = result.scalar_one_or_none()
-
-            # if either key_id or fingerprint is found, we can verify the key
-            if api_key_data and api_key_data.key_hash:
-                # Verify the raw key against Argon2 hash
-                if pwd_context.verify(raw_api_key, api_key_data.key_hash):
-                    await session.execute(
-                        update(SQLAApiKey)
-                        .where(SQLAApiKey.id == api_key_data.id)
-                        .values(last_used_at=datetime.now(UTC).replace(tzinfo=None))
-                    )
-                    return api_key_data.user.to_user()
+        api_key_id, user = verified
+        await set_cached_api_key_auth(fingerprint, api_key_id, user)
+        await self._touch_api_key(api_key_id)
+        return user
 
-            # Final fallback: Argon2-only verification for keys without fingerprint (legacy keys)
+    async def _verify_api_key(
+        self, session: AsyncSession, raw_api_key: str, fingerprint: str
+    ) -> tuple[str, User] | None:
+        """Check an API key against the database, returning its ID and user if valid."""
+
+        async def _verify_hash(key_hash: str) -> bool:
+            # Argon2 is deliberately slow; keep it off the event loop
+            return await anyio.to_thread.run_sync(pwd_context.verify, raw_api_key, key_hash)
+
+        # Keys in the current format (dk_{key_id}_{secret}) are always found by key_id, so
+        # only keys in other formats can be legacy keys
+        match = API_KEY_FORMAT.fullmatch(raw_api_key)
+        if match is not None:
             result = await session.execute(
                 select(SQLAApiKey)
                 .options(selectinload(SQLAApiKey.user))
                 .where(
+                    SQLAApiKey.key_id == match.group(1),
                     SQLAApiKey.disabled_at.is_(None),  # type: ignore
-                    SQLAApiKey.key_id.is_(None),  # Only keys without key_id
-                    SQLAApiKey.fingerprint.is_(None),  # Only keys without fingerprint
                 )
             )
+            api_key_data = result.scalar_one_or_none()
+            if api_key_data is None or not await _verify_hash(api_key_data.key_hash):
+                return None
+            if api_key_data.fingerprint is None:
+                # Keys created before fingerprints were stored for all keys
+                await session.execute(
+                    update(SQLAApiKey)
+                    .where(SQLAApiKey.id == api_key_data.id)
+                    .values(fingerprint=fingerprint)
+                )
+            return api_key_data.id, api_key_data.user.to_user()
 
-            for api_key_data in result.scalars().all():
-                if api_key_data.key_hash and pwd_context.verify(raw_api_key, api_key_data.key_hash):
-                    # Backfill fingerprint for legacy key on first successful use
-                    fingerprint = self._create_fingerprint(raw_api_key)
-                    await session.execute(
-                        update(SQLAApiKey)
-                        .where(SQLAApiKey.id == api_key_data.id)
-                        .values(
-                            fingerprint=fingerprint,
-                            last_used_at=datetime.now(UTC).replace(tzinfo=None),
-                        )
-                    )
-                    logger.info(f"Backfilled fingerprint for legacy API key {api_key_data.id}")
-                    return api_key_data.user.to_user()
+        # Legacy keys that were used before have a fingerprint
+        result = await session.execute(
+            select(SQLAApiKey)
+            .options(selectinload(SQLAApiKey.user))
+            .where(
+                SQLAApiKey.fingerprint == fingerprint,
+                SQLAApiKey.disabled_at.is_(None),  # type: ignore
+            )
+        )
+        api_key_data = result.scalar_one_or_none()
+        if api_key_data is not None:
+            if not await _verify_hash(api_key_data.key_hash):
+                return None
+            return api_key_data.id, api_key_data.user.to_user()
 
-            return None
+        # Final fallback: Argon2-only verification for keys without fingerprint (legacy keys)
+        result = await session.execute(
+            select(SQLAApiKey)
+            .options(selectinload(SQLAApiKey.user))
+            .where(
+                SQLAApiKey.disabled_at.is_(None),  # type: ignore
+                SQLAApiKey.key_id.is_(None),  # Only keys without key_id
+                SQLAApiKey.fingerprint.is_(None),  # Only keys without fingerprint
+            )
+        )
+
+        for api_key_data in result.scalars().all():
+            if api_key_data.key_hash and await _verify_hash(api_key_data.key_hash):
+                # Backfill fingerprint for legacy key on first successful use
+                await session.execute(
+                    update(SQLAApiKey)
+                    .where(SQLAApiKey.id == api_key_data.id)
+                    .values(fingerprint=fingerprint)
+                )
+                logger.info(f"Backfilled fingerprint for legacy API key {api_key_data.id}")
+                return api_key_data.id, api_key_data.user.to_user()
+
+        return None
 
     async def get_api_key_overrides(self, user: User | None) -> dict[str, str]:
         """Return a dictionary of API key overrides for a user."""
@@ -1995,96 +2724,57 @@ class MonoService:
         """
         Get all metadata fields from agent runs that can be used for filtering.
 
+        Fields are read from the collection's metadata catalog rather than by scanning runs.
+        Paths up to two levels deep with scalar values are included; the type of a field
+        is the most common type among its values.
+
         Args:
             ctx: View context
 
         Returns:
             List of all filterable fields
         """
-        where_clause = ctx.get_base_where_clause(SQLAAgentRun)
-
-        metadata_prefix = array([literal("metadata")])
-
-        base_lateral = lateral(
-            func.jsonb_each(SQLAAgentRun.metadata_json).table_valued("key", "value")
-        ).alias("metadata_pairs")
-
-        json_paths = (
-            select(
-                func.array_append(metadata_prefix, base_lateral.c.key).label("path_arr"),
-                base_lateral.c.value.label("value"),
-                SQLAAgentRun.id.label("agent_run_id"),
-                literal(1).label("depth"),
-            )
-            .select_from(SQLAAgentRun)
-            .join(base_lateral, true())
-            .where(where_clause)
-            .where(func.jsonb_typeof(SQLAAgentRun.metadata_json) == "object")
-        ).cte("json_paths", recursive=True)
-
-        nested_lateral = lateral(
-            func.jsonb_each(json_paths.c.value).table_valued("key", "value")
-        ).alias("nested_pairs")
-
-        json_paths = json_paths.union_all(
-            select(
-                func.array_append(json_paths.c.path_arr, nested_lateral.c.key).label("path_arr"),
-                nested_lateral.c.value.label("value"),
-                json_paths.c.agent_run_id,
-                (json_paths.c.depth + 1).label("depth"),
-            )
-            .join(nested_lateral, true())
-            .where(func.jsonb_typeof(json_paths.c.value) == "object")
-            .where(json_paths.c.depth < bindparam("max_depth"))
-        )
+        async with self.db.session() as session:
+            key_stats = await MetadataCatalogService(session).get_key_stats(ctx.collection_id)
 
-        scalar_json_types = ("string", "number", "boolean")
+        all_fields: dict[str, FilterableField] = {}
+        for stats in key_stats:
+            field_type = stats.scalar_type
+            if stats.depth > 2 or field_type is None:
+                continue
+            name = f"metadata.{stats.path}"
+            all_fields[name] = {"name": name, "type": field_type}
 
-        scalar_leaves = (
-            select(
-                json_paths.c.path_arr.label("path_arr"),
-                json_paths.c.value.label("value"),
-                json_paths.c.agent_run_id.label("agent_run_id"),
-            ).where(func.jsonb_typeof(json_paths.c.value).in_(scalar_json_types))
-        ).subquery()
+        all_fields["text"] = {"name": "text", "type": "str"}
 
-        metadata_query = (
-            select(
-                func.array_to_string(scalar_leaves.c.path_arr, ".").label("path"),
-                scalar_leaves.c.value,
-            )
-            .distinct(scalar_leaves.c.path_arr)
-            .order_by(scalar_leaves.c.path_arr, scalar_leaves.c.agent_run_id)
-        )
+        return sorted(all_fields.values(), key=lambda f: f["name"])
 
-        def _infer_filter_type(value: Any) -> Literal["str", "bool", "int", "float"] | None:
-            if isinstance(value, bool):
-                return "bool"
-            if isinstance(value, int):
-                return "int"
-            if isinstance(value, float):
-                return "float"
-            if isinstance(value, Decimal):
-                if value == value.to_integral_value():
-                    return "int"
-                return "float"
-            if isinstance(value, str):
-                return "str"
-            return None
 
-        all_fields: dict[str, FilterableField] = {}
+def _agent_run_insert_rows(
+    agent_runs: Sequence[AgentRun], collection_id: str
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]], list[dict[str, Any]]]:
+    """Convert agent runs into agent run, transcript group and transcript rows for `copy_rows`."""
+    agent_run_data: list[SQLAAgentRun] = []
+    transcript_data: list[SQLATranscript] = []
+    transcript_group_data: list[SQLATranscriptGroup] = []
 
-        async with self.db.session() as session:
-            result = await session.execute(metadata_query, {"max_depth": 2})
-            for row in result:
-                field_type = _infer_filter_type(row.value)
-                if field_type is None:
-                    continue
-                all_fields[row.path] = {"name": row.path, "type": field_type}
+    for ar in agent_runs:
+        agent_run_data.append(SQLAAgentRun.from_agent_run(ar, collection_id))
+        for t in ar.transcripts:
+            transcript_data.append(SQLATranscript.from_transcript(t, t.id, collection_id, ar.id))
+        for tg in ar.transcript_groups:
+            transcript_group_data.append(
+                SQLATranscriptGroup.from_transcript_group(tg, collection_id)
+            )
 
-        all_fields["text"] = {"name": "text", "type": "str"}
+    # Sort transcript groups so parents are inserted before their children
+    transcript_group_data = sort_transcript_groups_by_parent_order(transcript_group_data)
 
-        return sorted(all_fields.values(), key=lambda f: f["name"])
+    return (
+        [orm_row(obj) for obj in agent_run_data],
+        [orm_row(obj) for obj in transcript_group_data],
+        [orm_row(obj) for obj in transcript_data],
+    )
 
 
 def sort_transcript_groups_by_parent_order(
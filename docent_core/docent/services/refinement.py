@@ -210,14 +210,8 @@ class RefinementService:
         """Summarize max 10 agent runs as initial context for the refinement agent."""
 
         # Get 10 random agent runs
-        agent_runs = await self.mono_svc.get_agent_runs(ctx)
-
         N_SAMPLE_AGENT_RUNS = 10
-        if len(agent_runs) > N_SAMPLE_AGENT_RUNS:
-            import random
-
-            random.seed(0)
-            agent_runs = random.sample(agent_runs, N_SAMPLE_AGENT_RUNS)
+        agent_runs = await self.mono_svc.sample_agent_runs(ctx, N_SAMPLE_AGENT_RUNS, seed=0)
 
         # Get summaries for max 10 agent runs
         outputs = await summarize_agent_runs(
@@ -1,5 +1,6 @@
 import asyncio
 import json
+from contextlib import aclosing
 from typing import Any, AsyncContextManager, Callable, Sequence, cast
 from uuid import uuid4
 
@@ -32,6 +33,7 @@ from docent_core.docent.ai_tools.rubric.rubric import (
     evaluate_rubric,
 )
 from docent_core.docent.db.contexts import ViewContext
+from docent_core.docent.db.data_version import bump_data_version
 from docent_core.docent.db.schemas.auth_models import User
 from docent_core.docent.db.schemas.rubric import (
     SQLAJudgeResult,
@@ -45,11 +47,15 @@ from docent_core.docent.db.schemas.tables import (
     SQLAAgentRun,
     SQLAJob,
 )
+from docent_core.docent.services.chart_rollups import ChartRollupService
 from docent_core.docent.services.job import JobService
 from docent_core.docent.services.monoservice import MonoService
 
 logger = get_logger(__name__)
 
+# Agent runs loaded and judged at a time by a rubric job
+RUBRIC_JOB_PAGE_SIZE = 500
+
 
 class RubricService:
     def __init__(
@@ -157,6 +163,8 @@ class RubricService:
         all_rubrics = await self.get_all_rubric_versions(rubric_id)
         for rubric in all_rubrics:
             await self.session.delete(rubric)
+        if all_rubrics:
+            await self._drop_judge_results_from_charts(all_rubrics[0].collection_id, rubric_id)
 
     async def delete_rubric_versions_after(self, rubric_id: str, after_version: int) -> int:
         """Delete all versions of a rubric after a specific version (non-inclusive).
@@ -174,9 +182,18 @@ class RubricService:
         count = len(rubrics_to_delete)
         for rubric in rubrics_to_delete:
             await self.session.delete(rubric)
+        if rubrics_to_delete:
+            await self._drop_judge_results_from_charts(
+                rubrics_to_delete[0].collection_id, rubric_id
+            )
 
         return count
 
+    async def _drop_judge_results_from_charts(self, collection_id: str, rubric_id: str):
+        """Invalidate chart data derived from judge results that are being deleted."""
+        await ChartRollupService(self.session).drop_judge_rollups(collection_id, rubric_id)
+        await bump_data_version(self.session, collection_id, allow_deleted=True)
+
     ###############
     # Rubric jobs #
     ###############
@@ -323,7 +340,10 @@ class RubricService:
             .order_by(func.count(SQLAJudgeRunLabel.id).desc())
         )
 
-        query = query.where(ctx.get_base_where_clause(SQLAAgentRun))
+        # Only this query reads the materialized base filter; the job may run for longer
+        # than the result set is kept
+        resolved_ctx = await self.service.resolve_base_filter(ctx)
+        query = query.where(resolved_ctx.get_base_where_clause(SQLAAgentRun))
 
         result = await self.session.execute(query)
         agent_run_ids = cast(list[str], result.scalars().all())
@@ -339,14 +359,16 @@ class RubricService:
             return
 
         logger.info(f"Evaluating rubrics for {len(agent_run_ids)} agent runs missing results")
-        agent_runs = await self.service.get_agent_runs(ctx, agent_run_ids=agent_run_ids)
-        # Preserve the label-first ordering from agent_run_ids
-        order_index = {rid: i for i, rid in enumerate(agent_run_ids)}
-        agent_runs.sort(key=lambda ar: order_index.get(ar.id, len(order_index)))
 
         num_results = 0
 
-        async with BatchedWriter(self.session_cm_factory) as writer:
+        async def _before_commit(session: AsyncSession, batch: list[Any]):
+            await ChartRollupService(session).add_judge_results(
+                ctx.collection_id, [obj.id for obj in batch if isinstance(obj, SQLAJudgeResult)]
+            )
+            await bump_data_version(session, ctx.collection_id)
+
+        async with BatchedWriter(self.session_cm_factory, before_commit=_before_commit) as writer:
             # Use taskgroup for cancellation instead of events
             async with anyio.create_task_group() as tg:
                 cancel_scope = tg.cancel_scope
@@ -372,14 +394,21 @@ class RubricService:
                     ):
                         cancel_scope.cancel()
 
-                # Run the search, saving data to the database as we go
+                # Run the search page by page, preserving the label-first ordering of
+                # agent_run_ids and saving data to the database as we go
                 try:
-                    await self.evaluate_rubric_for_user(
-                        agent_runs,
-                        rubric.to_pydantic(),
-                        user=ctx.user,
-                        callback=_callback,
-                    )
+                    async with aclosing(
+                        self.service.iter_agent_runs(
+                            ctx, agent_run_ids=agent_run_ids, page_size=RUBRIC_JOB_PAGE_SIZE
+                        )
+                    ) as pages:
+                        async for agent_runs in pages:
+                            await self.evaluate_rubric_for_user(
+                                agent_runs,
+                                rubric.to_pydantic(),
+                                user=ctx.user,
+                                callback=_callback,
+                            )
                 except anyio.get_cancelled_exc_class():
                     logger.info(f"Rubric evaluation cancelled after reaching {num_results} results")
 
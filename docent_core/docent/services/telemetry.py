@@ -28,6 +28,7 @@ from docent.data_models.chat import (
 from docent.data_models.chat.tool import ToolCall
 from docent_core._server._analytics.posthog import AnalyticsClient
 from docent_core.docent.db.contexts import ViewContext
+from docent_core.docent.db.data_version import bump_data_version
 from docent_core.docent.db.schemas.auth_models import User
 from docent_core.docent.db.schemas.tables import (
     SQLAAgentRun,
@@ -38,6 +39,8 @@ from docent_core.docent.db.schemas.tables import (
     TelemetryAgentRunStatus,
     sanitize_pg_text,
 )
+from docent_core.docent.services.chart_rollups import ChartRollupService
+from docent_core.docent.services.metadata_catalog import MetadataCatalogService
 from docent_core.docent.services.monoservice import (
     MonoService,
     sort_transcript_groups_by_parent_order,
@@ -404,7 +407,18 @@ class TelemetryService:
             collection_id: The collection ID to ensure exists
             collection_name: The name to use for the collection
             user: The user creating the collection
+
+        Raises:
+            HTTPException: If the collection has been deleted; its ID can't be reused while
+                its data is being removed.
         """
+        from fastapi import HTTPException
+
+        if await self.mono_svc.collection_is_deleted(collection_id):
+            raise HTTPException(
+                status_code=410, detail=f"Collection {collection_id} has been deleted"
+            )
+
         try:
             if not await self.mono_svc.collection_exists(collection_id):
                 try:
@@ -1013,9 +1027,21 @@ class TelemetryService:
                     transcript_group_data.append(sqla_transcript_group)
 
         # Handle agent runs - upsert (insert or update)
+        # The metadata catalog and chart rollups forget the old version of updated runs, then
+        # record the new one
+        metadata_catalog = MetadataCatalogService(self.session)
+        chart_rollups = ChartRollupService(self.session)
+        await metadata_catalog.remove_agent_runs(
+            ctx.collection_id, list(existing_agent_run_ids), defer=True
+        )
+        await chart_rollups.remove_agent_runs(ctx.collection_id, list(existing_agent_run_ids))
         for sqla_agent_run in agent_run_data:
             # Use merge to handle both insert and update
             await self.session.merge(sqla_agent_run)
+        await self.session.flush()
+        await metadata_catalog.add_agent_runs(ctx.collection_id, agent_run_ids)
+        await chart_rollups.add_agent_runs(ctx.collection_id, agent_run_ids)
+        await bump_data_version(self.session, ctx.collection_id)
 
         # Validate transcript group parent references before saving transcript groups
         if transcript_group_data:
@@ -174,6 +174,29 @@ class TelemetryAccumulationService:
         user_id: Optional[str] = None,
     ) -> None:
         """Add a score to accumulation for an agent run."""
+        self.session.add(
+            self._score_entry(
+                collection_id, agent_run_id, score_name, score_value, timestamp, user_id
+            )
+        )
+        await self.session.commit()
+
+        logger.info(
+            f"Added score {score_name}={score_value} for agent_run_id {agent_run_id} in collection {collection_id}"
+        )
+
+        # Mark agent run for processing
+        await self._mark_agent_runs_for_processing(collection_id, {agent_run_id})
+
+    def _score_entry(
+        self,
+        collection_id: str,
+        agent_run_id: str,
+        score_name: str,
+        score_value: Any,
+        timestamp: str,
+        user_id: Optional[str],
+    ) -> SQLATelemetryAccumulation:
         key = self._build_key(collection_id, agent_run_id=agent_run_id)
         score_data = {
             "collection_id": collection_id,
@@ -189,21 +212,12 @@ class TelemetryAccumulationService:
         sanitized_json_str = sanitize_pg_text(json_str)
         sanitized_score_data = json.loads(sanitized_json_str)
 
-        accumulation_entry = SQLATelemetryAccumulation(
+        return SQLATelemetryAccumulation(
             key=key,
             data_type="scores",
             data=sanitized_score_data,
             user_id=user_id,
         )
-        self.session.add(accumulation_entry)
-        await self.session.commit()
-
-        logger.info(
-            f"Added score {score_name}={score_value} for agent_run_id {agent_run_id} in collection {collection_id}"
-        )
-
-        # Mark agent run for processing
-        await self._mark_agent_runs_for_processing(collection_id, {agent_run_id})
 
     async def get_collection_scores(self, collection_id: str) -> Dict[str, List[Dict[str, Any]]]:
         """Get all scores for a collection, grouped by agent_run_id."""
@@ -277,6 +291,26 @@ class TelemetryAccumulationService:
         user_id: Optional[str] = None,
     ) -> None:
         """Add agent run metadata to accumulation."""
+        self.session.add(
+            self._agent_run_metadata_entry(collection_id, agent_run_id, metadata, timestamp, user_id)
+        )
+        await self.session.commit()
+
+        logger.info(
+            f"Added agent run metadata for agent_run_id {agent_run_id} in collection {collection_id}"
+        )
+
+        # Mark agent run for processing
+        await self._mark_agent_runs_for_processing(collection_id, {agent_run_id})
+
+    def _agent_run_metadata_entry(
+        self,
+        collection_id: str,
+        agent_run_id: str,
+        metadata: Dict[str, Any],
+        timestamp: str,
+        user_id: Optional[str],
+    ) -> SQLATelemetryAccumulation:
         key = self._build_key(collection_id, agent_run_id=agent_run_id)
         metadata_data = {
             "collection_id": collection_id,
@@ -291,21 +325,12 @@ class TelemetryAccumulationService:
         sanitized_json_str = sanitize_pg_text(json_str)
         sanitized_metadata_data = json.loads(sanitized_json_str)
 
-        accumulation_entry = SQLATelemetryAccumulation(
+        return SQLATelemetryAccumulation(
             key=key,
             data_type="metadata",
             data=sanitized_metadata_data,
             user_id=user_id,
         )
-        self.session.add(accumulation_entry)
-        await self.session.commit()
-
-        logger.info(
-            f"Added agent run metadata for agent_run_id {agent_run_id} in collection {collection_id}"
-        )
-
-        # Mark agent run for processing
-        await self._mark_agent_runs_for_processing(collection_id, {agent_run_id})
 
     async def get_collection_agent_run_metadata(
         self, collection_id: str
@@ -388,10 +413,39 @@ class TelemetryAccumulationService:
         user_id: Optional[str] = None,
     ) -> None:
         """Add transcript metadata to accumulation."""
+        self.session.add(
+            self._transcript_metadata_entry(
+                collection_id,
+                transcript_id,
+                name,
+                description,
+                transcript_group_id,
+                metadata,
+                timestamp,
+                user_id,
+            )
+        )
+        await self.session.commit()
+
+        logger.info(
+            f"Added transcript metadata for transcript_id {transcript_id} in collection {collection_id}"
+        )
+
+    def _transcript_metadata_entry(
+        self,
+        collection_id: str,
+        transcript_id: str,
+        name: Optional[str],
+        description: Optional[str],
+        transcript_group_id: Optional[str],
+        metadata: Optional[Dict[str, Any]],
+        timestamp: str,
+        user_id: Optional[str],
+    ) -> SQLATelemetryAccumulation:
         key = self._build_key(
             collection_id, transcript_group_id=transcript_group_id, transcript_id=transcript_id
         )
-        accumulation_entry = SQLATelemetryAccumulation(
+        return SQLATelemetryAccumulation(
             key=key,
             data_type="transcript_metadata",
             data={
@@ -405,12 +459,6 @@ class TelemetryAccumulationService:
             },
             user_id=user_id,
         )
-        self.session.add(accumulation_entry)
-        await self.session.commit()
-
-        logger.info(
-            f"Added transcript metadata for transcript_id {transcript_id} in collection {collection_id}"
-        )
 
     async def add_transcript_group_metadata(
         self,
@@ -425,10 +473,44 @@ class TelemetryAccumulationService:
         user_id: Optional[str] = None,
     ) -> None:
         """Add transcript group metadata to accumulation."""
+        self.session.add(
+            self._transcript_group_metadata_entry(
+                collection_id,
+                agent_run_id,
+                transcript_group_id,
+                name,
+                description,
+                parent_transcript_group_id,
+                metadata,
+                timestamp,
+                user_id,
+            )
+        )
+        await self.session.commit()
+
+        logger.info(
+            f"Added transcript group metadata for transcript_group_id {transcript_group_id} in collection {collection_id}"
+        )
+
+        # Mark agent run for processing
+        await self._mark_agent_runs_for_processing(collection_id, {agent_run_id})
+
+    def _transcript_group_metadata_entry(
+        self,
+        collection_id: str,
+        agent_run_id: str,
+        transcript_group_id: str,
+        name: Optional[str],
+        description: Optional[str],
+        parent_transcript_group_id: Optional[str],
+        metadata: Optional[Dict[str, Any]],
+        timestamp: str,
+        user_id: Optional[str],
+    ) -> SQLATelemetryAccumulation:
         key = self._build_key(
             collection_id, agent_run_id=agent_run_id, transcript_group_id=transcript_group_id
         )
-        accumulation_entry = SQLATelemetryAccumulation(
+        return SQLATelemetryAccumulation(
             key=key,
             data_type="transcript_group_metadata",
             data={
@@ -443,15 +525,74 @@ class TelemetryAccumulationService:
             },
             user_id=user_id,
         )
-        self.session.add(accumulation_entry)
+
+    async def add_batch(
+        self,
+        collection_id: str,
+        items: List[tuple[str, Dict[str, Any]]],
+        user_id: Optional[str] = None,
+    ) -> None:
+        """
+        Add many scores and metadata updates for one collection in a single transaction.
+
+        Args:
+            collection_id: The collection ID
+            items: (type, data) pairs. The type is "scores", "agent-run-metadata",
+                "transcript-metadata" or "transcript-group-metadata", and the data has the
+                same fields as the request body of the matching single-item endpoint.
+            user_id: Optional user ID
+        """
+        agent_run_ids: set[str] = set()
+        for item_type, data in items:
+            if item_type == "scores":
+                entry = self._score_entry(
+                    collection_id,
+                    data["agent_run_id"],
+                    data["score_name"],
+                    data["score_value"],
+                    data["timestamp"],
+                    user_id,
+                )
+                agent_run_ids.add(data["agent_run_id"])
+            elif item_type == "agent-run-metadata":
+                entry = self._agent_run_metadata_entry(
+                    collection_id, data["agent_run_id"], data["metadata"], data["timestamp"], user_id
+                )
+                agent_run_ids.add(data["agent_run_id"])
+            elif item_type == "transcript-metadata":
+                entry = self._transcript_metadata_entry(
+                    collection_id,
+                    data["transcript_id"],
+                    data.get("name"),
+                    data.get("description"),
+                    data.get("transcript_group_id"),
+                    data.get("metadata"),
+                    data["timestamp"],
+                    user_id,
+                )
+            elif item_type == "transcript-group-metadata":
+                entry = self._transcript_group_metadata_entry(
+                    collection_id,
+                    data["agent_run_id"],
+                    data["transcript_group_id"],
+                    data.get("name"),
+                    data.get("description"),
+                    data.get("parent_transcript_group_id"),
+                    data.get("metadata"),
+                    data["timestamp"],
+                    user_id,
+                )
+                agent_run_ids.add(data["agent_run_id"])
+            else:
+                raise ValueError(f"Unknown telemetry item type: {item_type}")
+            self.session.add(entry)
+
         await self.session.commit()
 
-        logger.info(
-            f"Added transcript group metadata for transcript_group_id {transcript_group_id} in collection {collection_id}"
-        )
+        logger.info(f"Added {len(items)} telemetry items in collection {collection_id}")
 
-        # Mark agent run for processing
-        await self._mark_agent_runs_for_processing(collection_id, {agent_run_id})
+        # Mark agent runs for processing
+        await self._mark_agent_runs_for_processing(collection_id, agent_run_ids)
 
     async def get_transcript_group_metadata(self, collection_id: str) -> Dict[str, Dict[str, Any]]:
         """Get all transcript group metadata for a collection, merging multiple calls with recent data taking precedence."""
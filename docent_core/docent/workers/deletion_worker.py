@@ -0,0 +1,94 @@
+"""
+Deletion workers.
+
+Collections and agent runs are deleted in bounded batches, each in its own transaction,
+so large deletions never hold long locks. Progress is recorded in the job's job_json,
+and since every batch is committed, a rerun after an interruption picks up where the
+previous run stopped. Work that doesn't fit in one job's time budget is handed over to
+a continuation job. Every progress update also refreshes a heartbeat, which is how
+`MonoService.resume_deletion_jobs` tells jobs of dead workers from running ones.
+"""
+
+import time
+from datetime import UTC, datetime
+from typing import Any
+
+from docent._log_util import get_logger
+from docent_core._worker.constants import JOB_TIMEOUT_SECONDS
+from docent_core.docent.db.contexts import ViewContext
+from docent_core.docent.db.schemas.tables import SQLAJob
+from docent_core.docent.services.monoservice import AGENT_RUN_DELETION_BATCH_SIZE, MonoService
+
+logger = get_logger(__name__)
+
+# Leave headroom before the worker's job timeout to hand over to a continuation job
+TIME_BUDGET_SECONDS = JOB_TIMEOUT_SECONDS - 60
+
+
+async def _save_progress(mono_svc: MonoService, job_id: str, job_json: dict[str, Any]) -> None:
+    job_json["heartbeat_at"] = datetime.now(UTC).isoformat()
+    await mono_svc.set_job_json(job_id, job_json)
+
+
+async def delete_collection_job(ctx: ViewContext, job: SQLAJob) -> None:
+    """Delete a collection that was marked for deletion, recording rows deleted per table."""
+    job_json: dict[str, Any] = dict(job.job_json)
+    collection_id = job_json["collection_id"]
+    mono_svc = await MonoService.init()
+
+    # Counts from interrupted earlier runs of this deletion carry over
+    previous_rows_deleted: dict[str, int] = dict(job_json.get("rows_deleted", {}))
+    rows_deleted = dict(previous_rows_deleted)
+
+    async def _progress(table_name: str, num_deleted: int) -> None:
+        rows_deleted[table_name] = previous_rows_deleted.get(table_name, 0) + num_deleted
+        job_json["rows_deleted"] = rows_deleted
+        await _save_progress(mono_svc, job.id, job_json)
+
+    await _save_progress(mono_svc, job.id, job_json)
+    logger.info(f"Starting deletion of collection {collection_id}")
+    finished = await mono_svc.delete_collection(
+        collection_id, _progress, deadline=time.monotonic() + TIME_BUDGET_SECONDS
+    )
+
+    if not finished:
+        new_job_id = await mono_svc.add_and_enqueue_deletion_job(job.type, job_json)
+        logger.info(
+            f"Deletion of collection {collection_id} continues in job {new_job_id}; "
+            f"rows deleted so far: {rows_deleted}"
+        )
+    else:
+        logger.info(f"Deleted collection {collection_id}; rows deleted: {rows_deleted}")
+
+
+async def delete_agent_runs_job(ctx: ViewContext, job: SQLAJob) -> None:
+    """Delete a list of agent runs batch by batch, recording how many IDs were processed."""
+    job_json: dict[str, Any] = dict(job.job_json)
+    collection_id = job_json["collection_id"]
+    agent_run_ids: list[str] = job_json["agent_run_ids"]
+    mono_svc = await MonoService.init()
+
+    await _save_progress(mono_svc, job.id, job_json)
+    deadline = time.monotonic() + TIME_BUDGET_SECONDS
+    while job_json["num_processed"] < len(agent_run_ids):
+        if time.monotonic() > deadline:
+            new_job_id = await mono_svc.add_and_enqueue_deletion_job(job.type, job_json)
+            logger.info(
+                f"Deletion of {len(agent_run_ids)} agent runs continues in job {new_job_id} "
+                f"after {job_json['num_processed']}"
+            )
+            return
+
+        start = job_json["num_processed"]
+        batch_ids = agent_run_ids[start : start + AGENT_RUN_DELETION_BATCH_SIZE]
+        async with mono_svc.advisory_lock(collection_id, action_id="mutation"):
+            num_deleted = await mono_svc.delete_agent_runs(collection_id, batch_ids)
+
+        job_json["num_processed"] = start + len(batch_ids)
+        job_json["num_deleted"] += num_deleted
+        await _save_progress(mono_svc, job.id, job_json)
+
+    logger.info(
+        f"Deleted {job_json['num_deleted']} of {len(agent_run_ids)} requested agent runs "
+        f"from collection {collection_id}"
+    )
@@ -0,0 +1,38 @@
+"""Agent runs for tests to upload, shared by the unit and integration tests."""
+
+from typing import Any
+
+from docent.data_models import AgentRun, Transcript
+from docent.data_models.chat import parse_chat_message
+
+transcript_raw = [
+    {"role": "user", "content": "What's the weather like in New York today?"},
+    {
+        "role": "assistant",
+        "content": "The weather in New York today is mostly sunny with a high of 75°F (24°C).",
+    },
+]
+
+
+def make_agent_runs(n: int) -> list[AgentRun]:
+    """Make `n` runs with a one-message transcript each, numbered by `metadata["i"]`."""
+    return [
+        AgentRun(
+            transcripts=[
+                Transcript(messages=[parse_chat_message({"role": "user", "content": f"run {i}"})])
+            ],
+            metadata={"i": i},
+        )
+        for i in range(n)
+    ]
+
+
+def runs_with_metadata(metadatas: list[dict[str, Any]]) -> list[AgentRun]:
+    """Make one run per metadata dict, each with the same short conversation."""
+    return [
+        AgentRun(
+            transcripts=[Transcript(messages=[parse_chat_message(msg) for msg in transcript_raw])],
+            metadata=metadata,
+        )
+        for metadata in metadatas
+    ]
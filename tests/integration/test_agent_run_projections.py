@@ -0,0 +1,80 @@
+import pytest
+
+from docent.data_models import AgentRun, Transcript
+from docent.data_models.chat import parse_chat_message
+from docent_core.docent.db.projections import AgentRunProjection, TranscriptProjection
+from docent_core.docent.db.schemas.auth_models import User
+from docent_core.docent.services.monoservice import MonoService
+
+
+def _transcript(name: str, num_messages: int) -> Transcript:
+    return Transcript(
+        name=name,
+        messages=[
+            parse_chat_message({"role": "user", "content": f"message {i}"})
+            for i in range(num_messages)
+        ],
+    )
+
+
+@pytest.mark.integration
+async def test_agent_run_projections(
+    mono_service: MonoService, test_collection_id: str, test_user: User
+):
+    ctx = await mono_service.get_default_view_ctx(test_collection_id, test_user)
+    agent_run = AgentRun(
+        name="run",
+        transcripts=[_transcript("main", 3), _transcript("judge", 1)],
+        metadata={"model": "gpt", "scores": {"correct": True, "reward": 0.5}},
+    )
+    await mono_service.add_agent_runs(ctx, [agent_run])
+
+    (row,) = await mono_service.get_agent_run_projections(
+        ctx,
+        AgentRunProjection(
+            fields={"name", "metadata"},
+            metadata_paths=["scores.correct", "missing.path"],
+            transcripts=TranscriptProjection(names=["main"], message_count=True),
+        ),
+    )
+    assert row["id"] == agent_run.id
+    assert row["name"] == "run"
+    assert row["metadata"] == {"scores": {"correct": True}}
+    (transcript,) = row["transcripts"]
+    assert transcript["name"] == "main"
+    assert transcript["message_count"] == 3
+    assert "messages" not in transcript
+
+    (row,) = await mono_service.get_agent_run_projections(
+        ctx, AgentRunProjection(fields=set(), transcripts=TranscriptProjection(messages=True))
+    )
+    assert set(row) == {"id", "transcripts"}
+    assert sorted(len(t["messages"]) for t in row["transcripts"]) == [1, 3]
+
+
+@pytest.mark.integration
+async def test_agent_run_projections_paginate_across_many_ids(
+    mono_service: MonoService, test_collection_id: str, test_user: User
+):
+    ctx = await mono_service.get_default_view_ctx(test_collection_id, test_user)
+    agent_runs = [AgentRun(transcripts=[_transcript("main", 1)], metadata={}) for _ in range(3)]
+    await mono_service.add_agent_runs(ctx, agent_runs)
+    run_ids = sorted(ar.id for ar in agent_runs)
+
+    # The largest ID comes before many unknown ones, and the smaller IDs after them
+    agent_run_ids = [run_ids[2], *(f"missing-{i}" for i in range(12_000)), *run_ids[:2]]
+    pages: list[list[str]] = []
+    cursor = None
+    while True:
+        rows = await mono_service.get_agent_run_projections(
+            ctx,
+            AgentRunProjection(fields=set()),
+            agent_run_ids=agent_run_ids,
+            after_id=cursor,
+            limit=2,
+        )
+        pages.append([row["id"] for row in rows])
+        if len(rows) < 2:
+            break
+        cursor = rows[-1]["id"]
+    assert pages == [run_ids[:2], run_ids[2:]]
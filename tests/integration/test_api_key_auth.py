@@ -0,0 +1,101 @@
+from uuid import uuid4
+
+import pytest
+from arq import ArqRedis
+from sqlalchemy import select
+
+from docent_core._db_service.db import DocentDB
+from docent_core.docent.db.schemas.auth_models import User
+from docent_core.docent.db.schemas.tables import SQLAApiKey
+from docent_core.docent.services import api_key_cache, monoservice
+from docent_core.docent.services.monoservice import MonoService
+
+
+async def _get_api_key(db_service: DocentDB, api_key_id: str) -> SQLAApiKey:
+    async with db_service.session() as session:
+        result = await session.execute(select(SQLAApiKey).where(SQLAApiKey.id == api_key_id))
+        return result.scalar_one()
+
+
+@pytest.mark.integration
+async def test_api_key_auth(
+    mono_service: MonoService,
+    db_service: DocentDB,
+    test_user: User,
+    redis_client: ArqRedis,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    async def get_redis_client() -> ArqRedis:
+        return redis_client
+
+    monkeypatch.setattr(api_key_cache, "get_redis_client", get_redis_client)
+
+    num_verifications = 0
+    verify = monoservice.pwd_context.verify
+
+    def counting_verify(secret: str, hash: str) -> bool:
+        nonlocal num_verifications
+        num_verifications += 1
+        return verify(secret, hash)
+
+    monkeypatch.setattr(monoservice.pwd_context, "verify", counting_verify)
+
+    api_key_id, raw_api_key = await mono_service.create_api_key(test_user.id, "test")
+    user = await mono_service.get_user_by_api_key(raw_api_key)
+    assert user is not None and user.id == test_user.id
+    assert num_verifications == 1
+    last_used_at = (await _get_api_key(db_service, api_key_id)).last_used_at
+    assert last_used_at is not None
+
+    # Later requests are served from the cache and don't rewrite last_used_at
+    user = await mono_service.get_user_by_api_key(raw_api_key)
+    assert user is not None and user.id == test_user.id
+    assert num_verifications == 1
+    assert (await _get_api_key(db_service, api_key_id)).last_used_at == last_used_at
+
+    # A wrong secret for an existing key_id is still rejected
+    assert await mono_service.get_user_by_api_key(raw_api_key[:-1] + "0") is None
+
+    # Revocation applies immediately, and the key isn't cached again
+    assert await mono_service.disable_api_key(api_key_id, test_user.id)
+    assert await mono_service.get_user_by_api_key(raw_api_key) is None
+    await api_key_cache.set_cached_api_key_auth(
+        mono_service._create_fingerprint(raw_api_key), api_key_id, test_user
+    )
+    assert await mono_service.get_user_by_api_key(raw_api_key) is None
+
+
+@pytest.mark.integration
+async def test_legacy_api_key_auth(
+    mono_service: MonoService,
+    db_service: DocentDB,
+    test_user: User,
+    redis_client: ArqRedis,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    async def get_redis_client() -> ArqRedis:
+        return redis_client
+
+    monkeypatch.setattr(api_key_cache, "get_redis_client", get_redis_client)
+
+    raw_api_key = f"dk_{uuid4().hex}"
+    api_key_id = str(uuid4())
+    async with db_service.session() as session:
+        session.add(
+            SQLAApiKey(
+                id=api_key_id,
+                user_id=test_user.id,
+                name="legacy",
+                key_hash=monoservice.pwd_context.hash(raw_api_key),
+            )
+        )
+
+    user = await mono_service.get_user_by_api_key(raw_api_key)
+    assert user is not None and user.id == test_user.id
+
+    # The first use moves the key to the fingerprint lookup
+    api_key = await _get_api_key(db_service, api_key_id)
+    assert api_key.fingerprint == mono_service._create_fingerprint(raw_api_key)
+
+    assert await mono_service.disable_api_key(api_key_id, test_user.id)
+    assert await mono_service.get_user_by_api_key(raw_api_key) is None
@@ -0,0 +1,102 @@
+import json
+from typing import Callable
+
+import anyio
+import pytest
+from arq import ArqRedis
+from sqlalchemy import delete, update
+
+from docent_core._db_service.db import DocentDB
+from docent_core.docent.db.filters import ComplexFilter, PrimitiveFilter
+from docent_core.docent.db.schemas.auth_models import (
+    Permission,
+    ResourceType,
+    SubjectType,
+    User,
+)
+from docent_core.docent.db.schemas.tables import SQLAAccessControlEntry, SQLASession
+from docent_core.docent.services import auth_cache
+from docent_core.docent.services.monoservice import MonoService
+
+
+async def _wait_until(condition: Callable[[], bool]):
+    with anyio.fail_after(5):
+        while not condition():
+            await anyio.sleep(0.01)
+
+
+@pytest.mark.integration
+async def test_auth_cache(
+    mono_service: MonoService,
+    db_service: DocentDB,
+    test_collection_id: str,
+    test_user: User,
+    redis_client: ArqRedis,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    async def get_redis_client() -> ArqRedis:
+        return redis_client
+
+    monkeypatch.setattr(auth_cache, "get_redis_client", get_redis_client)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(auth_cache.run_auth_cache_listener)
+        await _wait_until(lambda: auth_cache._enabled)
+
+        # Permission levels are cached until the resource's ACL changes
+        level = await mono_service.get_permission_level(
+            test_user, ResourceType.COLLECTION, test_collection_id
+        )
+        assert level == Permission.ADMIN
+        async with db_service.session() as session:
+            await session.execute(
+                delete(SQLAAccessControlEntry).where(
+                    SQLAAccessControlEntry.collection_id == test_collection_id
+                )
+            )
+        assert await mono_service.has_permission(
+            test_user, ResourceType.COLLECTION, test_collection_id, Permission.ADMIN
+        )
+        await mono_service.set_acl_permission(
+            SubjectType.USER,
+            test_user.id,
+            ResourceType.COLLECTION,
+            test_collection_id,
+            Permission.READ,
+        )
+        level = await mono_service.get_permission_level(
+            test_user, ResourceType.COLLECTION, test_collection_id
+        )
+        assert level == Permission.READ
+
+        # Default views are cached until the view changes
+        ctx = await mono_service.get_default_view_ctx(test_collection_id, test_user)
+        assert (await mono_service.get_default_view_ctx(test_collection_id, test_user)) == ctx
+        base_filter = ComplexFilter(
+            filters=[PrimitiveFilter(key_path=["metadata", "score"], op=">", value=1)]
+        )
+        await mono_service.set_view_base_filter(ctx, base_filter)
+        ctx = await mono_service.get_default_view_ctx(test_collection_id, test_user)
+        assert ctx.base_filter == base_filter
+
+        # Session users are cached, and invalidations from other processes apply too
+        session_id = await mono_service.create_session(test_user.id)
+        user = await mono_service.get_user_by_session_id(session_id)
+        assert user is not None and user.id == test_user.id
+        async with db_service.session() as session:
+            await session.execute(
+                update(SQLASession).where(SQLASession.id == session_id).values(is_active=False)
+            )
+        assert await mono_service.get_user_by_session_id(session_id) is not None
+        await redis_client.publish(  # type: ignore
+            auth_cache.AUTH_CACHE_INVALIDATION_CHANNEL,
+            json.dumps({"kind": "session", "session_id": session_id}),
+        )
+        await _wait_until(lambda: auth_cache.get_cached_session_user(session_id) is None)
+        assert await mono_service.get_user_by_session_id(session_id) is None
+
+        tg.cancel_scope.cancel()
+
+    # Nothing is cached without a subscription, since invalidations would be missed
+    assert not auth_cache._enabled
+    assert auth_cache.get_cached_default_view(test_collection_id, test_user.id) is None
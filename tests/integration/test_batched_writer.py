@@ -0,0 +1,62 @@
+from typing import Any
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from docent_core._db_service.batched_writer import BatchedWriter
+from docent_core._db_service.db import DocentDB
+from docent_core.docent.db.schemas.tables import SQLAAgentRun, SQLATranscriptGroup
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("bulk_insert", [True, False])
+async def test_batched_writer_writes_mixed_models(
+    db_service: DocentDB, test_collection_id: str, bulk_insert: bool
+):
+    num_before_commits = 0
+
+    async def before_commit(session: AsyncSession, batch: list[Any]):
+        # The first batch fails after its rows were written, and is retried
+        nonlocal num_before_commits
+        num_before_commits += 1
+        if num_before_commits == 1:
+            raise RuntimeError("before_commit failed")
+
+    async with BatchedWriter(
+        db_service.session, batch_size=7, bulk_insert=bulk_insert, before_commit=before_commit
+    ) as writer:
+        for i in range(20):
+            # Children are added before their parents, and batches must not split the pair
+            objects: list[Any] = [
+                SQLATranscriptGroup(
+                    id=f"group-{i}",
+                    collection_id=test_collection_id,
+                    agent_run_id=f"run-{i}",
+                    metadata_json={"i": i},
+                ),
+                SQLAAgentRun(
+                    id=f"run-{i}",
+                    collection_id=test_collection_id,
+                    metadata_json={"i": i},
+                    text_for_search="",
+                ),
+            ]
+            try:
+                await writer.add_all(objects)
+            except RuntimeError:
+                # The failed flush surfaces here, before these objects were queued
+                await writer.add_all(objects)
+
+    metrics = writer.metrics()
+    assert metrics.objects_written == 40
+    assert metrics.failed_flushes == 1
+    assert metrics.queue_depth == 0
+    assert metrics.flushes >= 40 // 7
+
+    async with db_service.session() as session:
+        num_groups = await session.scalar(select(func.count()).select_from(SQLATranscriptGroup))
+        num_runs = await session.scalar(select(func.count()).select_from(SQLAAgentRun))
+        created_at = await session.scalar(select(SQLAAgentRun.created_at).limit(1))
+    assert num_groups == 20 and num_runs == 20
+    assert created_at is not None
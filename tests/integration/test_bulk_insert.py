@@ -0,0 +1,90 @@
+import pytest
+from sqlalchemy import JSON, Integer, String, func, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+from docent.data_models import AgentRun, Transcript
+from docent.data_models.chat import parse_chat_message
+from docent_core._db_service.bulk_insert import copy_rows
+from docent_core._db_service.db import DocentDB
+from docent_core.docent.db.schemas.auth_models import User
+from docent_core.docent.db.schemas.tables import SQLAAgentRun, SQLATranscript
+from docent_core.docent.services import monoservice
+from docent_core.docent.services.monoservice import MonoService
+
+
+class _Base(DeclarativeBase):
+    pass
+
+
+class _Row(_Base):
+    __tablename__ = "test_bulk_insert_rows"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    payload = mapped_column(JSON, nullable=False)
+    count = mapped_column(Integer, nullable=False, default=3)
+    # Only Postgres knows this default, so it must not be sent as NULL
+    label = mapped_column(String, nullable=False, server_default="unlabeled")
+
+
+@pytest.mark.integration
+async def test_copy_rows_applies_defaults(db_engine: AsyncEngine):
+    async with db_engine.begin() as conn:
+        await conn.run_sync(_Base.metadata.create_all)
+    try:
+        async with AsyncSession(bind=db_engine) as session:
+            num_rows = await copy_rows(
+                session,
+                _Row,
+                [
+                    {"id": "a", "payload": {"x": 1}},
+                    {"id": "b", "payload": [1, 2], "count": 5},
+                    {"id": "c", "payload": {}, "label": "given"},
+                ],
+            )
+            await session.commit()
+            assert num_rows == 3
+            assert await copy_rows(session, _Row, []) == 0
+
+            result = await session.execute(
+                select(_Row.id, _Row.payload, _Row.count, _Row.label).order_by(_Row.id)
+            )
+            assert [tuple(r) for r in result] == [
+                ("a", {"x": 1}, 3, "unlabeled"),
+                ("b", [1, 2], 5, "unlabeled"),
+                ("c", {}, 3, "given"),
+            ]
+    finally:
+        async with db_engine.begin() as conn:
+            await conn.execute(text(f"DROP TABLE {_Row.__tablename__}"))
+
+
+@pytest.mark.integration
+async def test_add_agent_runs_rolls_back_copies(
+    mono_service: MonoService,
+    db_service: DocentDB,
+    test_collection_id: str,
+    test_user: User,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    async def _bump_data_version(*args: object, **kwargs: object) -> None:
+        raise RuntimeError("failed after the copies")
+
+    monkeypatch.setattr(monoservice, "bump_data_version", _bump_data_version)
+
+    ctx = await mono_service.get_default_view_ctx(test_collection_id, test_user)
+    agent_runs = [
+        AgentRun(
+            transcripts=[
+                Transcript(messages=[parse_chat_message({"role": "user", "content": "hi"})])
+            ]
+        )
+        for _ in range(3)
+    ]
+    with pytest.raises(RuntimeError, match="failed after the copies"):
+        await mono_service.add_agent_runs(ctx, agent_runs)
+
+    # The copies were part of the transaction that rolled back
+    async with db_service.session() as session:
+        for model in (SQLAAgentRun, SQLATranscript):
+            assert await session.scalar(select(func.count()).select_from(model)) == 0
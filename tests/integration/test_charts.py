@@ -2,27 +2,12 @@ from typing import Any
 
 import httpx
 import pytest
+from sqlalchemy import update
 
-from docent.data_models import AgentRun, Transcript
-from docent.data_models.chat import parse_chat_message
-
-transcript_raw = [
-    {"role": "user", "content": "What's the weather like in New York today?"},
-    {
-        "role": "assistant",
-        "content": "The weather in New York today is mostly sunny with a high of 75°F (24°C).",
-    },
-]
-
-
-def runs_with_metadata(metadatas: list[dict[str, Any]]) -> list[AgentRun]:
-    return [
-        AgentRun(
-            transcripts=[Transcript(messages=[parse_chat_message(msg) for msg in transcript_raw])],
-            metadata=metadata,
-        )
-        for metadata in metadatas
-    ]
+from docent_core._db_service.db import DocentDB
+from docent_core.docent.db.schemas.chart import SQLAChart
+from docent_core.docent.services.monoservice import MonoService
+from tests.fixtures.agent_runs import runs_with_metadata
 
 
 @pytest.mark.integration
@@ -212,3 +197,220 @@ async def test_chart_stats_simple(
     bin2 = stats["ar.metadata_json->>agent_scaffold,bar"]
     assert bin2["mean"] == 3.5
     assert bin2["n"] == 2
+
+
+@pytest.mark.integration
+async def test_chart_data_cache(
+    authed_client: httpx.AsyncClient,
+    test_collection_id: str,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    async def add_runs(metadatas: list[dict[str, Any]]):
+        agent_runs = runs_with_metadata(metadatas)
+        response = await authed_client.post(
+            f"/rest/{test_collection_id}/agent_runs",
+            json={"agent_runs": [ar.model_dump(mode="json") for ar in agent_runs]},
+        )
+        assert response.status_code == 200
+
+    async def get_stats() -> dict[str, Any]:
+        response = await authed_client.get(f"/rest/chart/{test_collection_id}/{chart_id}/data")
+        assert response.status_code == 200
+        return response.json()["result"]["binStats"]
+
+    await add_runs([{"agent_scaffold": "foo"}, {"agent_scaffold": "foo"}])
+    response = await authed_client.post(
+        f"/rest/chart/{test_collection_id}/create",
+        json={"x_key": "ar.metadata_json->>agent_scaffold", "y_key": "COUNT(ar.id)"},
+    )
+    assert response.status_code == 200
+    chart_id = response.json()["id"]
+
+    stats = await get_stats()
+    assert stats["ar.metadata_json->>agent_scaffold,foo"]["mean"] == 2
+
+    # Repeated loads are served from the cache without running the chart query
+    from docent_core.docent.db import chart_sql
+
+    def _fail(*args: Any, **kwargs: Any):
+        raise AssertionError("chart query should not run")
+
+    with monkeypatch.context() as m:
+        m.setattr(chart_sql, "generate_chart_query", _fail)
+        assert await get_stats() == stats
+
+    # Ingesting runs invalidates the cached data
+    await add_runs([{"agent_scaffold": "foo"}])
+    stats = await get_stats()
+    assert stats["ar.metadata_json->>agent_scaffold,foo"]["mean"] == 3
+
+
+@pytest.mark.integration
+async def test_chart_rollups(
+    authed_client: httpx.AsyncClient,
+    test_collection_id: str,
+    mono_service: MonoService,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    from docent_core.docent.db import chart_sql
+    from docent_core.docent.services import charts
+
+    async def add_runs(metadatas: list[dict[str, Any]]) -> list[str]:
+        agent_runs = runs_with_metadata(metadatas)
+        response = await authed_client.post(
+            f"/rest/{test_collection_id}/agent_runs",
+            json={"agent_runs": [ar.model_dump(mode="json") for ar in agent_runs]},
+        )
+        assert response.status_code == 200
+        return [ar.id for ar in agent_runs]
+
+    async def get_stats(use_rollup: bool) -> dict[str, Any]:
+        def _fail(*args: Any, **kwargs: Any):
+            raise AssertionError("chart query should not run")
+
+        async def _no_cache(cache_key: str) -> None:
+            return None
+
+        with monkeypatch.context() as m:
+            m.setattr(charts, "_get_cached_chart_data", _no_cache)
+            if use_rollup:
+                m.setattr(charts, "CHART_ROLLUP_MIN_RUNS", 0)
+                m.setattr(chart_sql, "generate_chart_query", _fail)
+            response = await authed_client.get(f"/rest/chart/{test_collection_id}/{chart_id}/data")
+        assert response.status_code == 200
+        return response.json()["result"]["binStats"]
+
+    async def assert_rollup_matches_query():
+        rollup_stats, query_stats = await get_stats(True), await get_stats(False)
+        assert list(rollup_stats) == list(query_stats)
+        for key, query_bin in query_stats.items():
+            # Rollups compute the confidence interval from sums, so it may differ in rounding
+            assert rollup_stats[key] == {**query_bin, "ci": pytest.approx(query_bin["ci"])}
+        return rollup_stats
+
+    run_ids = await add_runs(
+        [{"agent_scaffold": "foo", "scores": {"points": i}} for i in range(4)]
+        + [{"agent_scaffold": "bar", "scores": {"points": i * 1.5}} for i in range(3)]
+    )
+    response = await authed_client.post(
+        f"/rest/chart/{test_collection_id}/create",
+        json={
+            "x_key": "ar.metadata_json->>agent_scaffold",
+            "y_key": "ar.metadata_json->scores->>points",
+        },
+    )
+    assert response.status_code == 200
+    chart_id = response.json()["id"]
+
+    # The first rollup read backfills it from the existing runs
+    stats = await assert_rollup_matches_query()
+    assert stats["ar.metadata_json->>agent_scaffold,foo"]["mean"] == 1.5
+
+    # Writes keep the rollup up to date
+    await add_runs([{"agent_scaffold": "baz", "scores": {"points": 7}}, {"agent_scaffold": "foo"}])
+    await mono_service.delete_agent_runs(test_collection_id, run_ids[:2])
+    stats = await assert_rollup_matches_query()
+    assert stats["ar.metadata_json->>agent_scaffold,foo"]["n"] == 2
+    assert stats["ar.metadata_json->>agent_scaffold,baz"]["mean"] == 7
+
+
+@pytest.mark.integration
+async def test_charts_data_batch(
+    authed_client: httpx.AsyncClient,
+    db_service: DocentDB,
+    test_collection_id: str,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    from docent_core.docent.db import chart_sql
+    from docent_core.docent.services import charts
+
+    agent_runs = runs_with_metadata(
+        [
+            {"agent_scaffold": scaffold, "model": model, "scores": {"points": i}}
+            for i, (scaffold, model) in enumerate(
+                [("foo", "a"), ("foo", "b"), ("bar", "a"), ("bar", "a"), ("baz", "b")]
+            )
+        ]
+    )
+    response = await authed_client.post(
+        f"/rest/{test_collection_id}/agent_runs",
+        json={"agent_runs": [ar.model_dump(mode="json") for ar in agent_runs]},
+    )
+    assert response.status_code == 200
+
+    chart_ids: list[str] = []
+    for chart in [
+        {
+            "x_key": "ar.metadata_json->>agent_scaffold",
+            "y_key": "ar.metadata_json->scores->>points",
+        },
+        {
+            "x_key": "ar.metadata_json->>agent_scaffold",
+            "series_key": "ar.metadata_json->>model",
+            "y_key": "COUNT(ar.id)",
+        },
+        {"x_key": "ar.metadata_json->>model", "y_key": "ar.metadata_json->scores->>points"},
+    ]:
+        response = await authed_client.post(f"/rest/chart/{test_collection_id}/create", json=chart)
+        assert response.status_code == 200
+        chart_ids.append(response.json()["id"])
+
+    def _fail(*args: Any, **kwargs: Any):
+        raise AssertionError("charts should share one query")
+
+    # All three charts aggregate the same runs, so they are computed in one scan
+    with monkeypatch.context() as m:
+        m.setattr(chart_sql, "generate_chart_query", _fail)
+        response = await authed_client.post(
+            f"/rest/chart/{test_collection_id}/data", json={"chart_ids": chart_ids}
+        )
+    assert response.status_code == 200
+    batch_data = response.json()
+    assert list(batch_data) == chart_ids
+    assert (
+        batch_data[chart_ids[0]]["result"]["binStats"]["ar.metadata_json->>agent_scaffold,foo"][
+            "mean"
+        ]
+        == 0.5
+    )
+
+    # The data matches what each chart's own query returns
+    async def _no_cache(cache_key: str) -> None:
+        return None
+
+    monkeypatch.setattr(charts, "_get_cached_chart_data", _no_cache)
+    for chart_id in chart_ids:
+        response = await authed_client.get(f"/rest/chart/{test_collection_id}/{chart_id}/data")
+        assert response.status_code == 200
+        single_stats = response.json()["result"]["binStats"]
+        batch_stats = batch_data[chart_id]["result"]["binStats"]
+        assert list(batch_stats) == list(single_stats)
+        for key, single_bin in single_stats.items():
+            ci = single_bin["ci"]
+            assert batch_stats[key] == {**single_bin, "ci": ci if ci is None else pytest.approx(ci)}
+
+    # Omitting chart IDs returns every chart in the collection
+    response = await authed_client.post(f"/rest/chart/{test_collection_id}/data", json={})
+    assert response.status_code == 200
+    assert set(response.json()) == set(chart_ids)
+
+    # A chart that can't be resolved, e.g. over a judge that was deleted since, gets an
+    # error entry without failing the others
+    response = await authed_client.post(
+        f"/rest/chart/{test_collection_id}/create", json={"x_key": "ar.metadata_json->>model"}
+    )
+    assert response.status_code == 200
+    broken_chart_id = response.json()["id"]
+    async with db_service.session() as session:
+        await session.execute(
+            update(SQLAChart)
+            .where(SQLAChart.id == broken_chart_id)
+            .values(y_key="jr.missing-judge.output->>score")
+        )
+    response = await authed_client.post(
+        f"/rest/chart/{test_collection_id}/data", json={"chart_ids": [*chart_ids, broken_chart_id]}
+    )
+    assert response.status_code == 200
+    batch_data = response.json()
+    assert "error" in batch_data[broken_chart_id]
+    assert all("binStats" in batch_data[chart_id]["result"] for chart_id in chart_ids)
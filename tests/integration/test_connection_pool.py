@@ -0,0 +1,72 @@
+import anyio
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from docent_core._db_service import pool
+from docent_core._db_service.pool import (
+    PoolSettings,
+    create_pooled_engine,
+    get_pool_metrics,
+    get_pool_settings,
+)
+from tests.integration.fixtures.database import TEST_DATABASE_URL
+
+
+def test_pool_settings_overrides(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setitem(pool.ENV, "DOCENT_PG_POOL_SIZE", "7")
+    monkeypatch.setitem(pool.ENV, "DOCENT_WORKER_PG_POOL_SIZE", "3")
+    monkeypatch.setitem(pool.ENV, "DOCENT_WORKER_PG_POOL_TIMEOUT", "2.5")
+
+    assert get_pool_settings("server").pool_size == 7
+    worker_settings = get_pool_settings("worker")
+    assert worker_settings.pool_size == 3
+    assert worker_settings.pool_timeout == 2.5
+    assert worker_settings.max_overflow == pool.DEFAULT_POOL_SETTINGS["worker"].max_overflow
+
+    monkeypatch.setitem(pool.ENV, "DOCENT_SERVER_PG_MAX_OVERFLOW", "lots")
+    with pytest.raises(ValueError, match="DOCENT_SERVER_PG_MAX_OVERFLOW"):
+        get_pool_settings("server")
+
+
+@pytest.mark.integration
+async def test_pool_metrics(db_engine: AsyncEngine):
+    # The db_engine fixture sets up the test database; this test needs an engine of its own
+    engine = create_pooled_engine(
+        TEST_DATABASE_URL,
+        PoolSettings(
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=5,
+            statement_timeout_ms=1234,
+            prepared_statement_cache_size=0,
+        ),
+    )
+    try:
+
+        async def _query():
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT pg_sleep(0.1)"))
+
+        # Both queries share one connection, so one waits for the other
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(_query)
+            tg.start_soon(_query)
+
+        async with engine.connect() as conn:
+            assert (await conn.scalar(text("SHOW statement_timeout"))) == "1234ms"
+            metrics = get_pool_metrics(engine)
+            assert metrics is not None
+            assert metrics.checked_out == 1
+
+        metrics = get_pool_metrics(engine)
+        assert metrics is not None
+        assert metrics.checkouts == 3
+        assert metrics.max_checkout_wait_s >= 0.05
+        assert metrics.connections_opened == 1
+        assert metrics.checked_out == 0 and metrics.idle == 1
+    finally:
+        await engine.dispose()
+
+    metrics = get_pool_metrics(engine)
+    assert metrics is not None and metrics.connections_closed == 1
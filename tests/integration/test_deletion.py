@@ -0,0 +1,177 @@
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import httpx
+import pytest
+from sqlalchemy import func, select
+
+from docent_core._db_service.db import DocentDB
+from docent_core.docent.db.data_version import CollectionDeletedError
+from docent_core.docent.db.schemas.auth_models import User
+from docent_core.docent.db.schemas.tables import (
+    JobStatus,
+    SQLAAgentRun,
+    SQLACollection,
+    SQLATelemetryAccumulation,
+    SQLATranscript,
+)
+from docent_core.docent.services import monoservice
+from docent_core.docent.services.monoservice import MonoService
+from tests.fixtures.agent_runs import make_agent_runs
+
+
+def _ago(seconds: float) -> str:
+    return (datetime.now(UTC) - timedelta(seconds=seconds)).isoformat()
+
+
+@pytest.mark.integration
+async def test_delete_agent_runs_in_batches(
+    mono_service: MonoService, db_service: DocentDB, test_collection_id: str, test_user: User
+):
+    ctx = await mono_service.get_default_view_ctx(test_collection_id, test_user)
+    agent_runs = make_agent_runs(7)
+    await mono_service.add_agent_runs(ctx, agent_runs)
+
+    async with db_service.session() as session:
+        session.add_all(
+            SQLATelemetryAccumulation(
+                key=f"collection_id={test_collection_id}:agent_run_id={ar.id}",
+                data_type="scores",
+                data={},
+            )
+            for ar in agent_runs
+        )
+
+    ids = [ar.id for ar in agent_runs[:5]] + ["missing"]
+    assert await mono_service.delete_agent_runs(test_collection_id, ids, batch_size=2) == 5
+
+    async with db_service.session() as session:
+        assert await session.scalar(select(func.count()).select_from(SQLAAgentRun)) == 2
+        assert await session.scalar(select(func.count()).select_from(SQLATranscript)) == 2
+        remaining_keys = (await session.execute(select(SQLATelemetryAccumulation.key))).scalars()
+        assert sorted(key.rsplit("=", 1)[1] for key in remaining_keys) == sorted(
+            ar.id for ar in agent_runs[5:]
+        )
+
+
+@pytest.mark.integration
+async def test_collection_deletion(
+    mono_service: MonoService,
+    db_service: DocentDB,
+    test_collection_id: str,
+    test_user: User,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    ctx = await mono_service.get_default_view_ctx(test_collection_id, test_user)
+    await mono_service.add_agent_runs(ctx, make_agent_runs(12))
+
+    enqueued: list[str] = []
+
+    async def _enqueue_job(ctx: Any, job_id: str) -> None:
+        enqueued.append(job_id)
+
+    monkeypatch.setattr(monoservice, "enqueue_job", _enqueue_job)
+
+    # The collection disappears immediately, before its data is deleted
+    job_id = await mono_service.start_collection_deletion(test_collection_id)
+    assert enqueued == [job_id]
+    assert not await mono_service.collection_exists(test_collection_id)
+    assert await mono_service.get_collection(test_collection_id) is None
+    assert await mono_service.get_collections(test_user) == []
+
+    # A job whose worker died is picked up again once its heartbeat goes stale, and only once
+    job = await mono_service.get_job(job_id)
+    assert job is not None
+    await mono_service.set_job_status(job_id, JobStatus.RUNNING)
+    await mono_service.set_job_json(job_id, {**job.job_json, "heartbeat_at": _ago(60)})
+    assert await mono_service.resume_deletion_jobs() == []
+    await mono_service.set_job_json(job_id, {**job.job_json, "heartbeat_at": _ago(3600)})
+    assert await mono_service.resume_deletion_jobs() == [job_id]
+    assert await mono_service.resume_deletion_jobs() == []
+    assert enqueued == [job_id, job_id]
+
+    progress: dict[str, int] = {}
+
+    async def _progress(table_name: str, num_deleted: int) -> None:
+        progress[table_name] = num_deleted
+
+    await mono_service.delete_collection(test_collection_id, _progress, batch_size=5)
+
+    assert progress["transcripts"] == 12
+    assert progress["agent_runs"] == 12
+    async with db_service.session() as session:
+        assert await session.scalar(select(func.count()).select_from(SQLACollection)) == 0
+        assert await session.scalar(select(func.count()).select_from(SQLAAgentRun)) == 0
+
+
+@pytest.mark.integration
+async def test_resume_deletion_jobs_gives_up(
+    mono_service: MonoService, test_collection_id: str, monkeypatch: pytest.MonkeyPatch
+):
+    async def _enqueue_job(ctx: Any, job_id: str) -> None:
+        pass
+
+    monkeypatch.setattr(monoservice, "enqueue_job", _enqueue_job)
+
+    job_id = await mono_service.start_collection_deletion(test_collection_id)
+    job = await mono_service.get_job(job_id)
+    assert job is not None
+
+    # Jobs that were canceled, or failed, stay that way
+    await mono_service.set_job_status(job_id, JobStatus.CANCELED)
+    await mono_service.set_job_json(job_id, {**job.job_json, "heartbeat_at": _ago(3600)})
+    assert await mono_service.resume_deletion_jobs() == []
+
+    for attempt in range(monoservice.MAX_DELETION_JOB_ATTEMPTS + 1):
+        job = await mono_service.get_job(job_id)
+        assert job is not None
+        await mono_service.set_job_status(job_id, JobStatus.RUNNING)
+        await mono_service.set_job_json(job_id, {**job.job_json, "heartbeat_at": _ago(3600)})
+        resumed = await mono_service.resume_deletion_jobs()
+        assert resumed == ([job_id] if attempt < monoservice.MAX_DELETION_JOB_ATTEMPTS else [])
+
+    job = await mono_service.get_job(job_id)
+    assert job is not None and job.status == JobStatus.CANCELED
+
+
+@pytest.mark.integration
+async def test_deleted_collection_rejects_writes(
+    authed_client: httpx.AsyncClient,
+    mono_service: MonoService,
+    db_service: DocentDB,
+    test_collection_id: str,
+    test_user: User,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    async def _enqueue_job(ctx: Any, job_id: str) -> None:
+        pass
+
+    monkeypatch.setattr(monoservice, "enqueue_job", _enqueue_job)
+
+    ctx = await mono_service.get_default_view_ctx(test_collection_id, test_user)
+    job_id = await mono_service.start_collection_deletion(test_collection_id)
+
+    # Deleting again returns the job already started, rather than starting another
+    assert await mono_service.start_collection_deletion(test_collection_id) == job_id
+    with pytest.raises(ValueError, match="not found"):
+        await mono_service.start_collection_deletion("missing")
+
+    with pytest.raises(CollectionDeletedError):
+        await mono_service.add_agent_runs(ctx, make_agent_runs(1))
+    async with db_service.session() as session:
+        for model in (SQLAAgentRun, SQLATranscript):
+            assert await session.scalar(select(func.count()).select_from(model)) == 0
+
+    score = {
+        "collection_id": test_collection_id,
+        "agent_run_id": "run-1",
+        "score_name": "accuracy",
+        "score_value": 1.0,
+        "timestamp": "2025-01-01T00:00:00Z",
+    }
+    response = await authed_client.post(
+        "/rest/telemetry/v1/batch", json={"items": [{"type": "scores", "data": score}]}
+    )
+    assert response.status_code == 200
+    (error,) = response.json()["errors"]
+    assert "has been deleted" in error["detail"]
@@ -0,0 +1,84 @@
+import gzip
+import json
+from typing import Any
+
+import httpx
+import pytest
+
+from docent_core.docent.db.schemas.auth_models import User
+from docent_core.docent.server.rest.router import MAX_EXPORT_PAGE_SIZE
+from docent_core.docent.services.monoservice import MonoService
+from tests.fixtures.agent_runs import make_agent_runs
+
+
+@pytest.mark.integration
+async def test_get_agent_run_export_page(
+    mono_service: MonoService, test_collection_id: str, test_user: User
+):
+    ctx = await mono_service.get_default_view_ctx(test_collection_id, test_user)
+    agent_runs = make_agent_runs(5)
+    await mono_service.add_agent_runs(ctx, agent_runs)
+    expected_ids = sorted(ar.id for ar in agent_runs)
+
+    first = await mono_service.get_agent_run_export_page(ctx, limit=3)
+    rest = await mono_service.get_agent_run_export_page(ctx, after_id=first[-1]["id"], limit=3)
+    assert [row["id"] for row in first + rest] == expected_ids
+    assert all(len(row["transcripts"]) == 1 for row in first + rest)
+
+    # `id` is always included, and unrequested fields aren't loaded
+    projected = await mono_service.get_agent_run_export_page(ctx, fields={"metadata"})
+    assert projected[0].keys() == {"id", "metadata"}
+
+    with pytest.raises(ValueError, match="Unknown agent run fields"):
+        await mono_service.get_agent_run_export_page(ctx, fields={"nonexistent"})
+
+
+@pytest.mark.integration
+async def test_export_agent_runs_endpoint(
+    authed_client: httpx.AsyncClient,
+    mono_service: MonoService,
+    test_collection_id: str,
+    test_user: User,
+):
+    ctx = await mono_service.get_default_view_ctx(test_collection_id, test_user)
+    agent_runs = make_agent_runs(5)
+    await mono_service.add_agent_runs(ctx, agent_runs)
+    url = f"/rest/{test_collection_id}/agent_runs/export"
+
+    exported: list[dict[str, Any]] = []
+    cursors: list[str | None] = []
+    params: dict[str, Any] = {"limit": 2, "fields": "metadata"}
+    while True:
+        async with authed_client.stream(
+            "GET", url, params=params, headers={"Accept-Encoding": "gzip"}
+        ) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "application/x-ndjson"
+            assert response.headers["content-encoding"] == "gzip"
+            raw = b"".join([chunk async for chunk in response.aiter_raw()])
+        exported.extend(json.loads(line) for line in gzip.decompress(raw).splitlines())
+        cursor = response.headers.get("X-Next-Cursor")
+        cursors.append(cursor)
+        if cursor is None:
+            break
+        params["cursor"] = cursor
+
+    # 5 runs in pages of 2; the last, short page has no cursor
+    assert len(cursors) == 3 and cursors[-1] is None
+    assert [row["id"] for row in exported] == sorted(ar.id for ar in agent_runs)
+    assert all(row.keys() == {"id", "metadata"} for row in exported)
+    assert sorted(row["metadata"]["i"] for row in exported) == list(range(5))
+
+    # Without gzip the body is plain NDJSON
+    response = await authed_client.get(
+        url, params={"limit": 10}, headers={"Accept-Encoding": "identity"}
+    )
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert "X-Next-Cursor" not in response.headers
+    assert len(response.text.splitlines()) == 5
+
+    response = await authed_client.get(url, params={"limit": MAX_EXPORT_PAGE_SIZE + 1})
+    assert response.status_code == 400
+    response = await authed_client.get(url, params={"fields": "metadata,nonexistent"})
+    assert response.status_code == 400
@@ -0,0 +1,162 @@
+from datetime import timedelta
+from typing import Any
+
+import pytest
+from sqlalchemy import delete, func, select
+
+from docent.data_models import AgentRun, Transcript
+from docent.data_models.chat import parse_chat_message
+from docent_core._db_service.db import DocentDB
+from docent_core._worker.constants import WorkerFunction
+from docent_core.docent.ai_tools.rubric.rubric import JudgeResult, ResultType, Rubric
+from docent_core.docent.db.filters import ComplexFilter, PrimitiveFilter
+from docent_core.docent.db.schemas.auth_models import User
+from docent_core.docent.db.schemas.tables import (
+    SQLAFilterResultSet,
+    SQLAFilterResultSetRun,
+    SQLAJob,
+)
+from docent_core.docent.services import filter_result_sets, rubric
+from docent_core.docent.services.monoservice import MonoService
+from docent_core.docent.services.rubric import RubricService
+
+
+def _agent_run(metadata: dict[str, object]) -> AgentRun:
+    return AgentRun(
+        transcripts=[Transcript(messages=[parse_chat_message({"role": "user", "content": "hi"})])],
+        metadata=metadata,
+    )
+
+
+async def _count_result_sets(db_service: DocentDB) -> tuple[int, int]:
+    async with db_service.session() as session:
+        num_sets = await session.scalar(select(func.count()).select_from(SQLAFilterResultSet))
+        num_runs = await session.scalar(select(func.count()).select_from(SQLAFilterResultSetRun))
+    return num_sets or 0, num_runs or 0
+
+
+@pytest.mark.integration
+async def test_filter_result_sets(
+    mono_service: MonoService,
+    db_service: DocentDB,
+    test_collection_id: str,
+    test_user: User,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    ctx = await mono_service.get_default_view_ctx(test_collection_id, test_user)
+    agent_runs = [_agent_run({"score": i}) for i in range(10)]
+    await mono_service.add_agent_runs(ctx, agent_runs)
+
+    ctx = ctx.model_copy(
+        update={
+            "base_filter": ComplexFilter(
+                filters=[PrimitiveFilter(key_path=["metadata", "score"], op=">=", value=6)]
+            )
+        }
+    )
+    expected_ids = {run.id for run in agent_runs[6:]}
+
+    # Right after a write, the filter is evaluated directly
+    assert set(await mono_service.get_agent_run_ids(ctx)) == expected_ids
+    assert await _count_result_sets(db_service) == (0, 0)
+
+    # Once the data version has settled, it's materialized
+    monkeypatch.setattr(filter_result_sets, "RESULT_SET_MIN_VERSION_AGE", timedelta(0))
+    assert set(await mono_service.get_agent_run_ids(ctx)) == expected_ids
+    assert await _count_result_sets(db_service) == (1, 4)
+
+    # Other queries on the view reuse the result set
+    assert await mono_service.count_base_agent_runs(ctx) == 4
+    runs = await mono_service.get_agent_runs(ctx)
+    assert {run.id for run in runs} == expected_ids
+    assert await _count_result_sets(db_service) == (1, 4)
+
+    # The resolved ID stays out of serialized contexts, e.g. those sent to jobs
+    resolved_ctx = await mono_service.resolve_base_filter(ctx)
+    assert resolved_ctx.base_filter_result_set_id is not None
+    assert "base_filter_result_set_id" not in resolved_ctx.model_dump()
+
+    # A write bumps the data version, so the filter is evaluated again
+    new_run = _agent_run({"score": 8})
+    await mono_service.add_agent_runs(ctx, [new_run])
+    assert set(await mono_service.get_agent_run_ids(ctx)) == expected_ids | {new_run.id}
+    assert await _count_result_sets(db_service) == (2, 9)
+
+    # Disabled filters have nothing to cache
+    disabled_ctx = ctx.model_copy(
+        update={
+            "base_filter": ComplexFilter(
+                filters=[
+                    PrimitiveFilter(key_path=["metadata", "score"], op="<", value=3, disabled=True)
+                ]
+            )
+        }
+    )
+    assert len(await mono_service.get_agent_run_ids(disabled_ctx)) == 11
+    assert await _count_result_sets(db_service) == (2, 9)
+
+
+@pytest.mark.integration
+async def test_rubric_job_outlives_result_set(
+    mono_service: MonoService,
+    db_service: DocentDB,
+    test_collection_id: str,
+    test_user: User,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(filter_result_sets, "RESULT_SET_MIN_VERSION_AGE", timedelta(0))
+    monkeypatch.setattr(rubric, "RUBRIC_JOB_PAGE_SIZE", 2)
+
+    ctx = await mono_service.get_default_view_ctx(test_collection_id, test_user)
+    agent_runs = [_agent_run({"score": i}) for i in range(10)]
+    await mono_service.add_agent_runs(ctx, agent_runs)
+    ctx = ctx.model_copy(
+        update={
+            "base_filter": ComplexFilter(
+                filters=[PrimitiveFilter(key_path=["metadata", "score"], op=">=", value=3)]
+            )
+        }
+    )
+
+    evaluated_ids: list[str] = []
+
+    async def evaluate_rubric_for_user(
+        self: RubricService, agent_runs: list[AgentRun], judged_rubric: Rubric, **kwargs: Any
+    ) -> list[dict[str, Any] | None]:
+        evaluated_ids.extend(run.id for run in agent_runs)
+        # Writing results bumps the data version, so the job's result set is evicted once
+        # it's no longer used; here that happens after the first page
+        await kwargs["callback"](
+            0,
+            [
+                JudgeResult(
+                    agent_run_id=run.id,
+                    rubric_id=judged_rubric.id,
+                    rubric_version=judged_rubric.version,
+                    output={},
+                    result_type=ResultType.DIRECT_RESULT,
+                )
+                for run in agent_runs
+            ],
+        )
+        async with db_service.session() as session:
+            await session.execute(delete(SQLAFilterResultSet))
+        return []
+
+    monkeypatch.setattr(RubricService, "evaluate_rubric_for_user", evaluate_rubric_for_user)
+
+    async with db_service.session() as session:
+        rubric_svc = RubricService(session, db_service.session, mono_service)
+        rubric_id = await rubric_svc.create_rubric(
+            test_collection_id, Rubric(rubric_text="Did the agent finish?")
+        )
+    job_id = await mono_service.add_job(
+        WorkerFunction.RUBRIC_JOB.value, {"rubric_id": rubric_id, "max_results": None}
+    )
+
+    async with db_service.session() as session:
+        job = await session.get(SQLAJob, job_id)
+        assert job is not None
+        await RubricService(session, db_service.session, mono_service).run_rubric_job(ctx, job)
+
+    assert sorted(evaluated_ids) == sorted(run.id for run in agent_runs[3:])
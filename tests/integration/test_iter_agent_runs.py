@@ -0,0 +1,36 @@
+import pytest
+
+from docent.data_models import AgentRun, Transcript
+from docent.data_models.chat import parse_chat_message
+from docent_core.docent.db.schemas.auth_models import User
+from docent_core.docent.services.monoservice import MonoService
+
+
+@pytest.mark.integration
+async def test_iter_agent_runs_pages(
+    mono_service: MonoService, test_collection_id: str, test_user: User
+):
+    ctx = await mono_service.get_default_view_ctx(test_collection_id, test_user)
+    agent_runs = [
+        AgentRun(
+            transcripts=[
+                Transcript(messages=[parse_chat_message({"role": "user", "content": f"run {i}"})])
+            ],
+            metadata={"i": i},
+        )
+        for i in range(25)
+    ]
+    await mono_service.add_agent_runs(ctx, agent_runs)
+
+    pages = [page async for page in mono_service.iter_agent_runs(ctx, page_size=10)]
+    assert [len(page) for page in pages] == [10, 10, 5]
+    streamed = [ar for page in pages for ar in page]
+    assert [ar.id for ar in streamed] == sorted(ar.id for ar in agent_runs)
+    assert all(len(ar.transcripts) == 1 for ar in streamed)
+
+    # Explicit IDs are yielded in the order given, skipping unknown ones
+    wanted = [agent_runs[i].id for i in (7, 3, 20)] + ["missing"]
+    pages = [
+        page async for page in mono_service.iter_agent_runs(ctx, agent_run_ids=wanted, page_size=2)
+    ]
+    assert [ar.id for page in pages for ar in page] == wanted[:3]
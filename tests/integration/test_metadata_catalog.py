@@ -0,0 +1,150 @@
+import pytest
+from sqlalchemy import text, update
+
+from docent.data_models import AgentRun, Transcript
+from docent.data_models.chat import parse_chat_message
+from docent_core._db_service.db import DocentDB
+from docent_core.docent.db.schemas.auth_models import User
+from docent_core.docent.db.schemas.tables import SQLAAgentRun
+from docent_core.docent.services.charts import ChartsService
+from docent_core.docent.services.metadata_catalog import MetadataCatalogService
+from docent_core.docent.services.monoservice import MonoService
+
+
+def _agent_run(metadata: dict[str, object]) -> AgentRun:
+    return AgentRun(
+        transcripts=[Transcript(messages=[parse_chat_message({"role": "user", "content": "hi"})])],
+        metadata=metadata,
+    )
+
+
+@pytest.mark.integration
+async def test_metadata_catalog(
+    mono_service: MonoService, db_service: DocentDB, test_collection_id: str, test_user: User
+):
+    ctx = await mono_service.get_default_view_ctx(test_collection_id, test_user)
+    agent_runs = [
+        _agent_run({"model": f"m{i % 3}", "scores": {"reward": i / 2, "correct": i % 2 == 0}})
+        for i in range(10)
+    ] + [_agent_run({"model": None, "rare": "x"})]
+    await mono_service.add_agent_runs(ctx, agent_runs)
+
+    async with db_service.session() as session:
+        catalog = MetadataCatalogService(session)
+        assert await catalog.count_agent_runs(test_collection_id) == 11
+        stats = {s.path: s for s in await catalog.get_key_stats(test_collection_id)}
+    assert set(stats) == {"model", "rare", "scores", "scores.reward", "scores.correct"}
+    assert stats["model"].present_count == 10
+    assert stats["model"].cardinality_estimate == 3
+    assert stats["scores.reward"].integer_count == 5
+
+    fields = await mono_service.get_agent_run_metadata_fields(ctx)
+    assert {f["name"]: f["type"] for f in fields} == {
+        "metadata.model": "str",
+        "metadata.rare": "str",
+        "metadata.scores.reward": "float",
+        "metadata.scores.correct": "bool",
+        "text": "str",
+    }
+
+    async with db_service.session() as session:
+        chart_keys = await ChartsService(session)._fetch_run_metadata_chart_keys_from_db(
+            test_collection_id
+        )
+    # "rare" is set on too few runs to chart
+    assert {key.json_path: key.data_type.value for key in chart_keys} == {  # type: ignore[attr-defined]
+        "model": "text",
+        "scores.correct": "numeric_or_boolean",
+        "scores.reward": "numeric",
+    }
+
+    # Deleting runs takes their keys out of the catalog
+    await mono_service.delete_agent_runs(test_collection_id, [agent_runs[-1].id, agent_runs[0].id])
+    async with db_service.session() as session:
+        catalog = MetadataCatalogService(session)
+        assert await catalog.count_agent_runs(test_collection_id) == 9
+        stats = {s.path: s for s in await catalog.get_key_stats(test_collection_id)}
+    assert "rare" not in stats
+    assert stats["model"].run_count == 9
+    assert stats["scores.reward"].integer_count == 4
+
+
+@pytest.mark.integration
+async def test_metadata_facet_values(
+    mono_service: MonoService, test_collection_id: str, test_user: User
+):
+    ctx = await mono_service.get_default_view_ctx(test_collection_id, test_user)
+    agent_runs = [
+        _agent_run({"model": model, "info": {"task": f"task_{i}"}})
+        for i, model in enumerate(
+            ["gpt-4o", "gpt-4o", "gpt-4o-mini", "claude", "my-gpt", "50%_off", "x" * 300]
+        )
+    ]
+    await mono_service.add_agent_runs(ctx, agent_runs)
+
+    async def values(field_name: str, search: str | None = None, limit: int = 100):
+        return await mono_service.get_unique_field_values(ctx, field_name, search, limit)
+
+    # Values too long to suggest are left out
+    assert await values("metadata.model") == [
+        "50%_off",
+        "claude",
+        "gpt-4o",
+        "gpt-4o-mini",
+        "my-gpt",
+    ]
+    assert await values("metadata.info.task", limit=2) == ["task_0", "task_1"]
+
+    # Prefix matches come first, then other matches; LIKE wildcards match literally
+    assert await values("metadata.model", "GPT") == ["gpt-4o", "gpt-4o-mini", "my-gpt"]
+    assert await values("metadata.model", "4o-") == ["gpt-4o-mini"]
+    assert await values("metadata.model", "%_") == ["50%_off"]
+    assert await values("metadata.model", "nope") == []
+
+    # Values that no run has anymore are dropped
+    await mono_service.delete_agent_runs(test_collection_id, [agent_runs[2].id, agent_runs[0].id])
+    assert await values("metadata.model", "gpt") == ["gpt-4o", "my-gpt"]
+    await mono_service.delete_agent_runs(test_collection_id, [agent_runs[1].id])
+    assert await values("metadata.model", "gpt") == ["my-gpt"]
+
+
+@pytest.mark.integration
+async def test_metadata_catalog_update_skips_unchanged_rows(
+    mono_service: MonoService, db_service: DocentDB, test_collection_id: str, test_user: User
+):
+    ctx = await mono_service.get_default_view_ctx(test_collection_id, test_user)
+    agent_runs = [_agent_run({"model": "a", "step": i}) for i in range(3)]
+    await mono_service.add_agent_runs(ctx, agent_runs)
+
+    async def row_versions() -> dict[str, str]:
+        async with db_service.session() as session:
+            result = await session.execute(
+                text("SELECT path, xmin::text FROM metadata_key_stats WHERE collection_id = :id"),
+                {"id": ctx.collection_id},
+            )
+            return {path: xmin for path, xmin in result}
+
+    versions = await row_versions()
+
+    # Update one run the way telemetry does: a deferred removal, then an addition
+    async with db_service.session() as session:
+        catalog = MetadataCatalogService(session)
+        await catalog.remove_agent_runs(ctx.collection_id, [agent_runs[0].id], defer=True)
+        await session.execute(
+            update(SQLAAgentRun)
+            .where(SQLAAgentRun.id == agent_runs[0].id)
+            .values(metadata_json={"model": "b", "step": 0})
+        )
+        await catalog.add_agent_runs(ctx.collection_id, [agent_runs[0].id])
+
+    new_versions = await row_versions()
+    async with db_service.session() as session:
+        stats = {
+            s.path: s
+            for s in await MetadataCatalogService(session).get_key_stats(ctx.collection_id)
+        }
+    # Only the path whose value changed is written
+    assert {path for path in versions if new_versions[path] != versions[path]} == {"model"}
+    assert stats["model"].run_count == 3
+    assert stats["model"].cardinality_estimate == 2
+    assert await mono_service.get_unique_field_values(ctx, "metadata.model") == ["a", "b"]
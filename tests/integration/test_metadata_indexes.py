@@ -0,0 +1,186 @@
+from datetime import timedelta
+
+import pytest
+from arq import ArqRedis
+from sqlalchemy import select, text
+
+from docent.data_models import AgentRun, Transcript
+from docent.data_models.chat import parse_chat_message
+from docent_core._db_service.db import DocentDB
+from docent_core.docent.db.filters import ComplexFilter, PrimitiveFilter
+from docent_core.docent.db.schemas.auth_models import User
+from docent_core.docent.db.schemas.tables import SQLAAgentRun, SQLAMetadataPathIndex
+from docent_core.docent.services import metadata_indexes
+from docent_core.docent.services.metadata_indexes import MetadataIndexService
+from docent_core.docent.services.monoservice import MonoService
+
+
+def _agent_run(metadata: dict[str, object]) -> AgentRun:
+    return AgentRun(
+        transcripts=[Transcript(messages=[parse_chat_message({"role": "user", "content": "hi"})])],
+        metadata=metadata,
+    )
+
+
+async def _index_names(db_service: DocentDB) -> set[str]:
+    async with db_service.session() as session:
+        result = await session.execute(
+            text("SELECT indexname FROM pg_indexes WHERE tablename = 'agent_runs'")
+        )
+        return set(result.scalars().all())
+
+
+@pytest.mark.integration
+async def test_metadata_indexes(
+    mono_service: MonoService,
+    db_service: DocentDB,
+    test_collection_id: str,
+    test_user: User,
+    redis_client: ArqRedis,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    async def get_redis_client() -> ArqRedis:
+        return redis_client
+
+    monkeypatch.setattr(metadata_indexes, "get_redis_client", get_redis_client)
+    monkeypatch.setattr(metadata_indexes, "MIN_RUNS_FOR_INDEX", 0)
+    monkeypatch.setattr(metadata_indexes, "MIN_USAGE_SCORE_FOR_INDEX", 1.5)
+
+    ctx = await mono_service.get_default_view_ctx(test_collection_id, test_user)
+    await mono_service.add_agent_runs(
+        ctx,
+        [_agent_run({"model": f"m{i % 3}", "scores": {"reward": i / 2}}) for i in range(30)],
+    )
+    existing_indexes = await _index_names(db_service)
+
+    # A path used once isn't indexed yet
+    filtered_ctx = ctx.model_copy(
+        update={
+            "base_filter": ComplexFilter(
+                filters=[
+                    PrimitiveFilter(key_path=["metadata", "scores", "reward"], op=">=", value=7),
+                    PrimitiveFilter(key_path=["metadata", "model"], op="~*", value="m1"),
+                ]
+            )
+        }
+    )
+    await mono_service.get_agent_run_ids(filtered_ctx, sort_field="metadata.model")
+    service = MetadataIndexService(db_service)
+    await service.maintain()
+    assert await _index_names(db_service) == existing_indexes
+
+    # Once used often enough, the filtered and sorted paths get an index each; the regex
+    # match doesn't, since it can't use one
+    await mono_service.get_agent_run_ids(filtered_ctx, sort_field="metadata.model")
+    await service.maintain()
+    async with db_service.session() as session:
+        result = await session.execute(
+            select(
+                SQLAMetadataPathIndex.path,
+                SQLAMetadataPathIndex.value_type,
+                SQLAMetadataPathIndex.index_name,
+                SQLAMetadataPathIndex.index_built_at,
+            )
+        )
+        registry = {(path, value_type): (name, built) for path, value_type, name, built in result}
+    assert set(registry) == {("scores.reward", "float"), ("model", "json")}
+    assert all(name is not None and built is not None for name, built in registry.values())
+    index_names = {name for name, _ in registry.values()}
+    assert await _index_names(db_service) == existing_indexes | index_names
+
+    # The planner matches the indexes to the queries' expressions, also in the generic plans
+    # that prepared statements switch to, where the parameters aren't known
+    reward_filter = PrimitiveFilter(key_path=["metadata", "scores", "reward"], op=">=", value=7)
+    reward_ctx = ctx.model_copy(update={"base_filter": ComplexFilter(filters=[reward_filter])})
+    query = select(SQLAAgentRun.id).where(reward_ctx.get_base_where_clause(SQLAAgentRun))
+    async with db_service.engine.connect() as conn:
+        compiled = query.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+        params = [compiled.params[name] for name in compiled.positiontup or []]
+        driver_conn = (await conn.get_raw_connection()).driver_connection
+        async with driver_conn.transaction():
+            # Without statistics, the planner can't tell the indexes' costs apart
+            await driver_conn.execute("ANALYZE agent_runs")
+            await driver_conn.execute("SET LOCAL enable_seqscan = off")
+            await driver_conn.execute("SET LOCAL plan_cache_mode = force_generic_plan")
+            statement = await driver_conn.prepare(str(compiled), name="filtered_runs")
+            assert len(await statement.fetch(*params)) == 16
+            # A generic plan doesn't depend on the parameters' values
+            plan = await driver_conn.fetch(
+                f"EXPLAIN EXECUTE filtered_runs({', '.join(['NULL'] * len(params))})"
+            )
+            await driver_conn.execute("DEALLOCATE filtered_runs")
+    assert registry[("scores.reward", "float")][0] in "\n".join(row[0] for row in plan)
+
+    # Indexes on paths that went cold are dropped
+    monkeypatch.setattr(metadata_indexes, "INDEX_COLD_AFTER", timedelta(seconds=-1))
+    await service.maintain()
+    assert await _index_names(db_service) == existing_indexes
+    async with db_service.session() as session:
+        result = await session.execute(
+            select(SQLAMetadataPathIndex.index_name).where(
+                SQLAMetadataPathIndex.index_name.is_not(None)
+            )
+        )
+        assert result.scalars().all() == []
+
+
+@pytest.mark.integration
+async def test_failed_metadata_index_builds_back_off(
+    mono_service: MonoService,
+    db_service: DocentDB,
+    test_collection_id: str,
+    test_user: User,
+    redis_client: ArqRedis,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    async def get_redis_client() -> ArqRedis:
+        return redis_client
+
+    monkeypatch.setattr(metadata_indexes, "get_redis_client", get_redis_client)
+    monkeypatch.setattr(metadata_indexes, "MIN_RUNS_FOR_INDEX", 0)
+    monkeypatch.setattr(metadata_indexes, "MIN_USAGE_SCORE_FOR_INDEX", 0.5)
+
+    ctx = await mono_service.get_default_view_ctx(test_collection_id, test_user)
+    await mono_service.add_agent_runs(
+        ctx, [_agent_run({"scores": {"reward": i}}) for i in range(5)]
+    )
+    await mono_service.get_agent_run_ids(ctx, sort_field="metadata.scores.reward")
+
+    builds: list[str] = []
+    build_index = MetadataIndexService._build_index  # type: ignore[reportPrivateUsage]
+
+    async def failing_build_index(self: MetadataIndexService, index_name: str, *args: str):
+        builds.append(index_name)
+        raise RuntimeError("could not create index")
+
+    async def get_registry() -> tuple[str | None, int]:
+        async with db_service.session() as session:
+            result = await session.execute(
+                select(SQLAMetadataPathIndex.index_name, SQLAMetadataPathIndex.build_failures)
+            )
+            (index_name, build_failures), *_ = result.all()
+            return index_name, build_failures
+
+    monkeypatch.setattr(MetadataIndexService, "_build_index", failing_build_index)
+    service = MetadataIndexService(db_service)
+    existing_indexes = await _index_names(db_service)
+    await service.maintain()
+    assert len(builds) == 1
+    assert await get_registry() == (None, 1)
+
+    # The next pass doesn't retry the build yet
+    await service.maintain()
+    assert len(builds) == 1
+
+    # Once the delay has passed, it does
+    monkeypatch.setattr(metadata_indexes, "INDEX_BUILD_RETRY_DELAY", timedelta(0))
+    await service.maintain()
+    assert len(builds) == 2
+    assert await get_registry() == (None, 2)
+
+    # A successful build resets the failures
+    monkeypatch.setattr(MetadataIndexService, "_build_index", build_index)
+    await service.maintain()
+    index_name, build_failures = await get_registry()
+    assert index_name == builds[0] and build_failures == 0
+    assert await _index_names(db_service) == existing_indexes | {index_name}
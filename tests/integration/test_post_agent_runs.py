@@ -0,0 +1,45 @@
+import gzip
+
+import httpx
+import pytest
+
+from docent.sdk._uploads import encode_agent_run_batch
+from docent_core.docent.db.schemas.auth_models import User
+from docent_core.docent.services.monoservice import MonoService
+from tests.fixtures.agent_runs import runs_with_metadata
+
+
+@pytest.mark.integration
+async def test_post_compressed_agent_runs(
+    authed_client: httpx.AsyncClient,
+    mono_service: MonoService,
+    test_collection_id: str,
+    test_user: User,
+):
+    agent_runs = runs_with_metadata([{"i": i} for i in range(3)])
+    body, headers = encode_agent_run_batch(
+        [ar.model_dump_json().encode() for ar in agent_runs], compress=True
+    )
+
+    response = await authed_client.post(
+        f"/rest/{test_collection_id}/agent_runs", content=body, headers=headers
+    )
+    assert response.status_code == 200
+    ctx = await mono_service.get_default_view_ctx(test_collection_id, test_user)
+    assert sorted(await mono_service.get_agent_run_ids(ctx)) == sorted(ar.id for ar in agent_runs)
+
+    response = await authed_client.post(
+        f"/rest/{test_collection_id}/agent_runs",
+        content=gzip.compress(b'{"agent_runs": [{"id": 1}]}'),
+        headers=headers,
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.integration
+async def test_post_agent_runs_request_schema(authed_client: httpx.AsyncClient):
+    response = await authed_client.get("/openapi.json")
+    assert response.status_code == 200
+    operation = response.json()["paths"]["/rest/{collection_id}/agent_runs"]["post"]
+    schema = operation["requestBody"]["content"]["application/json"]["schema"]
+    assert "agent_runs" in schema["properties"]
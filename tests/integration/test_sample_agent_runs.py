@@ -0,0 +1,42 @@
+from collections import Counter
+
+import pytest
+
+from docent.data_models import AgentRun, Transcript
+from docent.data_models.chat import parse_chat_message
+from docent_core.docent.db.schemas.auth_models import User
+from docent_core.docent.services.monoservice import MonoService
+
+
+@pytest.mark.integration
+async def test_sample_agent_runs(
+    mono_service: MonoService, test_collection_id: str, test_user: User
+):
+    ctx = await mono_service.get_default_view_ctx(test_collection_id, test_user)
+    # 27 runs of one model and 3 of another
+    agent_runs = [
+        AgentRun(
+            transcripts=[
+                Transcript(messages=[parse_chat_message({"role": "user", "content": "hi"})])
+            ],
+            metadata={"model": "common" if i < 27 else "rare"},
+        )
+        for i in range(30)
+    ]
+    await mono_service.add_agent_runs(ctx, agent_runs)
+
+    sample = await mono_service.sample_agent_runs(ctx, 5, seed=0)
+    assert len(sample) == len({ar.id for ar in sample}) == 5
+    assert all(len(ar.transcripts) == 1 for ar in sample)
+    # Seeded samples are reproducible
+    assert [ar.id for ar in await mono_service.sample_agent_runs(ctx, 5, seed=0)] == [
+        ar.id for ar in sample
+    ]
+
+    stratified = await mono_service.sample_agent_runs(ctx, 6, seed=1, stratify_by="metadata.model")
+    assert Counter(ar.metadata["model"] for ar in stratified) == {"common": 3, "rare": 3}
+
+    assert len(await mono_service.sample_agent_runs(ctx, 100)) == 30
+
+    with pytest.raises(ValueError):
+        await mono_service.sample_agent_runs(ctx, 5, stratify_by="created_at")
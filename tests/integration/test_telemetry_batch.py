@@ -0,0 +1,47 @@
+import httpx
+import pytest
+
+from docent_core.docent.services.monoservice import MonoService
+
+
+@pytest.mark.integration
+async def test_batch_rejects_items_individually(
+    authed_client: httpx.AsyncClient, mono_service: MonoService, test_collection_id: str
+):
+    other_user = await mono_service.create_user(
+        email="pytest_other@example.com", password="test_password_123"
+    )
+    other_collection_id = await mono_service.create_collection(user=other_user)
+
+    def score(collection_id: str, value: float) -> dict[str, object]:
+        return {
+            "type": "scores",
+            "data": {
+                "collection_id": collection_id,
+                "agent_run_id": "run-1",
+                "score_name": "accuracy",
+                "score_value": value,
+                "timestamp": "2025-01-01T00:00:00Z",
+            },
+        }
+
+    items = [
+        score(test_collection_id, 1.0),
+        {"type": "scores", "data": {"collection_id": test_collection_id}},
+        {"type": "unknown", "data": {}},
+        # The user can't write to this collection
+        score(other_collection_id, 0.5),
+        score(test_collection_id, 0.0),
+    ]
+    response = await authed_client.post("/rest/telemetry/v1/batch", json={"items": items})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "partial"
+    assert body["items_accepted"] == 2
+    assert [error["index"] for error in body["errors"]] == [1, 2, 3]
+    assert "missing required fields" in body["errors"][0]["detail"]
+    assert "Write permission required" in body["errors"][2]["detail"]
+
+    response = await authed_client.post("/rest/telemetry/v1/batch", json={"items": items[:1]})
+    assert response.json() == {"status": "success", "items_accepted": 1, "errors": []}
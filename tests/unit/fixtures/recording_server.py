@@ -0,0 +1,140 @@
+"""Local HTTP server fixture that records the agent runs and telemetry uploaded to it."""
+
+import gzip
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Iterator
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+class RecordingServer(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _RecordingHandler)
+        self.lock = threading.Lock()
+        # Content-Encoding and agent runs of each upload, in the order they arrived
+        self.uploads: list[tuple[str | None, list[dict[str, Any]]]] = []
+        self.stored_runs: dict[str, dict[str, Any]] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        # Seconds each upload takes, so concurrent uploads overlap
+        self.upload_delay = 0.0
+        # Fail uploads that repeat a stored run, as the Docent server does
+        self.reject_duplicates = False
+        # Path and JSON body of every other POST, e.g. telemetry, in the order they arrived
+        self.requests: list[tuple[str, Any]] = []
+        # Whether telemetry can be sent in bulk; older servers don't have /v1/batch
+        self.bulk_supported = True
+        # Query parameters of each /agent_runs/export request, in the order they arrived
+        self.export_requests: list[dict[str, str]] = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+
+class _RecordingHandler(BaseHTTPRequestHandler):
+    server: RecordingServer
+
+    def _respond(self, body: Any) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path.endswith("/agent_run"):
+            agent_run_id = parse_qs(url.query)["agent_run_id"][0]
+            self._respond(self.server.stored_runs.get(agent_run_id))
+        elif url.path.endswith("/agent_runs/export"):
+            self._export_page({k: v[0] for k, v in parse_qs(url.query).items()})
+        else:
+            self._respond({})
+
+    def _export_page(self, params: dict[str, str]) -> None:
+        """Serve a page of stored runs the way the Docent server's export endpoint does."""
+        srv = self.server
+        limit = int(params["limit"])
+        fields = set(params["fields"].split(",")) | {"id"} if "fields" in params else None
+        with srv.lock:
+            srv.export_requests.append(params)
+            ids = sorted(i for i in srv.stored_runs if i > params.get("cursor", ""))[:limit]
+            page = [srv.stored_runs[i] for i in ids]
+        if fields is not None:
+            page = [{k: v for k, v in run.items() if k in fields} for run in page]
+
+        body = b"".join(json.dumps(run).encode() + b"\n" for run in page)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        if len(page) == limit:
+            self.send_header("X-Next-Cursor", page[-1]["id"])
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path.endswith("/agent_run_metadata"):
+            agent_run_ids = json.loads(body)["agent_run_ids"]
+            self._respond({i: {} for i in agent_run_ids if i in self.server.stored_runs})
+            return
+        if not self.path.endswith("/agent_runs"):
+            if self.path == "/v1/batch" and not self.server.bulk_supported:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            with self.server.lock:
+                self.server.requests.append((self.path, json.loads(body) if body else None))
+            self._respond({})
+            return
+
+        srv = self.server
+        with srv.lock:
+            srv.in_flight += 1
+            srv.max_in_flight = max(srv.max_in_flight, srv.in_flight)
+        time.sleep(srv.upload_delay)
+
+        encoding = self.headers.get("Content-Encoding")
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        agent_runs = json.loads(body)["agent_runs"]
+        with srv.lock:
+            srv.in_flight -= 1
+            if srv.reject_duplicates and any(run["id"] in srv.stored_runs for run in agent_runs):
+                self.send_response(500)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            srv.uploads.append((encoding, agent_runs))
+            srv.stored_runs.update((run["id"], run) for run in agent_runs)
+        self._respond({})
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@contextmanager
+def serve_in_background(srv: RecordingServer) -> Iterator[RecordingServer]:
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield srv
+    finally:
+        srv.shutdown()
+
+
+@pytest.fixture
+def server() -> Iterator[RecordingServer]:
+    with serve_in_background(RecordingServer()) as srv:
+        yield srv
@@ -0,0 +1,67 @@
+"""Unit tests for streaming Inspect .json logs."""
+
+import io
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from docent.loaders import load_inspect
+
+
+class _NonSeekableFile(io.RawIOBase):
+    """A binary stream that can only be read forward, like a socket or pipe."""
+
+    def __init__(self, data: bytes):
+        self._data = io.BytesIO(data)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        chunk = self._data.read(min(len(buffer), 7))
+        buffer[: len(chunk)] = chunk
+        return len(chunk)
+
+
+def _sample(sample_id: str) -> dict[str, Any]:
+    return {
+        "id": sample_id,
+        "epoch": 1,
+        "messages": [{"role": "user", "content": 'quote " unicode é 😀'}],
+        "scores": {"accuracy": {"value": 0.5}},
+    }
+
+
+class TestInspectJSONLog:
+    @pytest.mark.unit
+    @pytest.mark.parametrize("samples_first", [False, True])
+    def test_runs_from_non_seekable_file(self, samples_first: bool):
+        """Header fields are picked up whether they come before or after the samples."""
+        header = {"version": 2, "eval": {"task": "t", "model": "m", "nested": [1, None]}}
+        samples = {"samples": [_sample("a"), _sample("b"), _sample("c")]}
+        log = {**samples, **header} if samples_first else {**header, **samples}
+        file = _NonSeekableFile(json.dumps(log, ensure_ascii=False).encode())
+
+        header_metadata, runs = load_inspect.runs_from_file(file, format="json")  # type: ignore
+        runs = list(runs)
+
+        assert header_metadata == {"task": "t", "model": "m"}
+        assert [run.metadata["sample_id"] for run in runs] == ["a", "b", "c"]
+        assert runs[0].metadata["scores"] == {"accuracy": 0.5}
+        assert runs[0].transcripts[0].messages[0].content == 'quote " unicode é 😀'
+
+    @pytest.mark.unit
+    def test_missing_samples_raises(self):
+        with pytest.raises(ValueError, match="no samples"):
+            load_inspect.runs_from_file(io.BytesIO(b'{"eval": {"task": "t"}}'), format="json")
+
+    @pytest.mark.unit
+    def test_get_total_samples(self, tmp_path: Path):
+        # Array and scalar elements count too, and nested arrays don't
+        log = {"eval": {"samples": [1, 2]}, "samples": [_sample("a"), [], 3, None]}
+        path = tmp_path / "log.json"
+        path.write_text(json.dumps(log))
+
+        assert load_inspect.get_total_samples(path, format="json") == 4
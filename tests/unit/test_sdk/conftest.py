@@ -0,0 +1,3 @@
+from tests.unit.fixtures.recording_server import server
+
+__all__ = ["server"]
@@ -0,0 +1,120 @@
+"""Unit tests for batching and shutdown in the background agent run writer."""
+
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import pytest
+
+from docent.data_models import AgentRun
+from docent.sdk._disk_spool import DiskSpool
+from docent.sdk.agent_run_writer import AgentRunWriter
+from tests.fixtures.agent_runs import make_agent_runs
+from tests.unit.fixtures.recording_server import RecordingServer
+
+MakeWriter = Callable[..., AgentRunWriter]
+
+
+def _run_size(run: AgentRun) -> int:
+    return len(run.model_dump_json().encode("utf-8"))
+
+
+@pytest.fixture
+def make_writer(server: RecordingServer, monkeypatch: pytest.MonkeyPatch) -> Iterator[MakeWriter]:
+    # Writers are process-wide singletons that install signal handlers
+    monkeypatch.setattr(AgentRunWriter, "_instance", None)
+    monkeypatch.setattr(AgentRunWriter, "_register_shutdown_hooks", lambda self: None)  # type: ignore
+    writers: list[AgentRunWriter] = []
+
+    def _make(**kwargs: Any) -> AgentRunWriter:
+        writer = AgentRunWriter(
+            api_key="test-key", collection_id="collection", server_url=server.url, **kwargs
+        )
+        writers.append(writer)
+        return writer
+
+    yield _make
+    for writer in writers:
+        writer.finish(force=True)
+        writer._thread.join(timeout=10)  # type: ignore[reportPrivateUsage]
+
+
+def _wait_for(condition: Callable[[], bool], timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out waiting for condition"
+        time.sleep(0.01)
+
+
+@pytest.mark.unit
+def test_runs_are_batched_by_count_and_size(server: RecordingServer, make_writer: MakeWriter):
+    agent_runs = make_agent_runs(10)
+    run_size = max(_run_size(run) for run in agent_runs)
+    writer = make_writer(num_workers=1, batch_size=3, flush_interval=0.1)
+
+    writer.log_agent_runs(agent_runs[:6])
+    _wait_for(lambda: len(server.stored_runs) == 6)
+    assert [len(batch) for _, batch in server.uploads] == [3, 3]
+
+    # Runs that fit within the count limit are still split by size
+    writer._max_batch_bytes = 2 * run_size  # type: ignore[reportPrivateUsage]
+    writer.log_agent_runs(agent_runs[6:])
+    _wait_for(lambda: len(server.stored_runs) == 10)
+    assert [len(batch) for _, batch in server.uploads[2:]] == [2, 2]
+
+    assert all(encoding == "gzip" for encoding, _ in server.uploads)
+    metrics = writer.metrics()
+    assert metrics.runs_sent == 10 and metrics.batches_sent == 4
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("use_spool", [False, True])
+def test_run_held_over_from_last_batch_survives_shutdown(
+    server: RecordingServer, make_writer: MakeWriter, tmp_path: Path, use_spool: bool
+):
+    agent_runs = make_agent_runs(2)
+    server.upload_delay = 0.5
+    # The second run doesn't fit in the first batch, so the worker holds it for the next
+    writer = make_writer(
+        num_workers=1,
+        max_batch_bytes=_run_size(agent_runs[0]) + 1,
+        spool_dir=str(tmp_path) if use_spool else None,
+    )
+
+    writer.log_agent_runs(agent_runs)
+    # Shut down while the first batch is being posted
+    _wait_for(lambda: server.in_flight == 1)
+    writer.finish(force=True)
+    writer._thread.join(timeout=10)  # type: ignore[reportPrivateUsage]
+    assert not writer._thread.is_alive()  # type: ignore[reportPrivateUsage]
+
+    assert agent_runs[0].id in server.stored_runs
+    if use_spool:
+        spool = DiskSpool(tmp_path / "collection", max_bytes=1024**3)
+        spooled = [run for segment in spool.segments() for run in spool.read(segment)]
+        assert [AgentRun.model_validate_json(run).id for run in spooled] == [agent_runs[1].id]
+    else:
+        assert agent_runs[1].id in server.stored_runs
+
+
+@pytest.mark.unit
+def test_spooled_runs_are_replayed_without_duplicates(
+    server: RecordingServer, make_writer: MakeWriter, tmp_path: Path
+):
+    agent_runs = make_agent_runs(5)
+    # The first two runs were stored, but the response was lost so they were spooled too
+    server.reject_duplicates = True
+    server.stored_runs = {run.id: run.model_dump(mode="json") for run in agent_runs[:2]}
+    spool = DiskSpool(tmp_path / "collection", max_bytes=1024**3)
+    spool.write([run.model_dump_json().encode("utf-8") for run in agent_runs[:3]])
+    spool.write([run.model_dump_json().encode("utf-8") for run in agent_runs[3:]])
+
+    writer = make_writer(spool_dir=str(tmp_path), spool_replay_interval=0.1, max_retries=1)
+
+    _wait_for(lambda: writer.metrics().runs_replayed == 3)
+    assert len(server.stored_runs) == 5 and not spool.segments()
+    assert [[run["id"] for run in batch] for _, batch in server.uploads] == [
+        [agent_runs[2].id],
+        [agent_runs[3].id, agent_runs[4].id],
+    ]
+    assert not (tmp_path / "collection" / "rejected").exists()
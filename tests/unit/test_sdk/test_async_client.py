@@ -0,0 +1,39 @@
+"""Unit tests for the asynchronous client."""
+
+import pytest
+
+from docent import AsyncDocent
+from tests.fixtures.agent_runs import make_agent_runs
+from tests.unit.fixtures.recording_server import RecordingServer
+
+
+@pytest.mark.unit
+async def test_add_agent_runs_uploads_concurrently(server: RecordingServer):
+    server.upload_delay = 0.05
+    agent_runs = make_agent_runs(30)
+
+    async with AsyncDocent(server_url=server.url, api_key="test-key", max_concurrency=3) as client:
+        result = await client.add_agent_runs("collection", agent_runs, batch_size=4)
+
+    assert result["total_runs_added"] == 30
+    assert len(server.uploads) == 8
+    assert all(encoding == "gzip" and len(batch) <= 4 for encoding, batch in server.uploads)
+    assert sorted(server.stored_runs) == sorted(run.id for run in agent_runs)
+    # Uploads overlap, but never beyond the client's concurrency limit
+    assert 1 < server.max_in_flight <= 3
+
+
+@pytest.mark.unit
+async def test_get_agent_runs_keeps_order(server: RecordingServer):
+    agent_runs = make_agent_runs(5)
+    server.stored_runs = {run.id: run.model_dump(mode="json") for run in agent_runs}
+
+    async with AsyncDocent(server_url=server.url, api_key="test-key") as client:
+        wanted = [agent_runs[3].id, "missing", agent_runs[0].id]
+        fetched = await client.get_agent_runs("collection", wanted)
+
+    assert [run.id if run else None for run in fetched] == [
+        agent_runs[3].id,
+        None,
+        agent_runs[0].id,
+    ]
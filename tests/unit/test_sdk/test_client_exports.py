@@ -0,0 +1,50 @@
+"""Unit tests for paging through agent run exports."""
+
+import pytest
+
+from docent import AsyncDocent, Docent
+from docent.data_models import AgentRun
+from tests.fixtures.agent_runs import make_agent_runs
+from tests.unit.fixtures.recording_server import RecordingServer
+
+
+def _store_runs(server: RecordingServer, n: int) -> list[str]:
+    agent_runs = make_agent_runs(n)
+    server.stored_runs = {run.id: run.model_dump(mode="json") for run in agent_runs}
+    return sorted(server.stored_runs)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("page_size,num_requests", [(2, 3), (5, 2), (10, 1)])
+def test_export_agent_runs_follows_cursor(
+    server: RecordingServer, page_size: int, num_requests: int
+):
+    ids = _store_runs(server, 5)
+    client = Docent(server_url=server.url, api_key="test-key")
+
+    exported = list(client.export_agent_runs("collection", page_size=page_size))
+
+    assert [run["id"] for run in exported] == ids
+    assert AgentRun.model_validate(exported[0]).id == ids[0]
+    # A full page may be followed by an empty one, ending the export
+    assert len(server.export_requests) == num_requests
+    assert "cursor" not in server.export_requests[0]
+    assert [r["cursor"] for r in server.export_requests[1:]] == ids[page_size - 1 :: page_size]
+
+
+@pytest.mark.unit
+async def test_async_export_agent_runs_projects_fields(server: RecordingServer):
+    ids = _store_runs(server, 5)
+
+    async with AsyncDocent(server_url=server.url, api_key="test-key") as client:
+        exported = [
+            run
+            async for run in client.export_agent_runs(
+                "collection", fields=["metadata"], page_size=2
+            )
+        ]
+
+    assert [run["id"] for run in exported] == ids
+    assert all(run.keys() == {"id", "metadata"} for run in exported)
+    assert [r["limit"] for r in server.export_requests] == ["2", "2", "2"]
+    assert all(r["fields"] == "metadata" for r in server.export_requests)
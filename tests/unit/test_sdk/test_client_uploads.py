@@ -0,0 +1,37 @@
+"""Unit tests for batched, compressed agent run uploads."""
+
+import pytest
+
+from docent import Docent
+from docent.sdk._uploads import batch_encoded_runs
+from tests.fixtures.agent_runs import make_agent_runs
+from tests.unit.fixtures.recording_server import RecordingServer
+
+
+@pytest.mark.unit
+def test_batch_encoded_runs_respects_size_and_count():
+    runs = [b"a" * 10, b"b" * 10, b"c" * 30, b"d", b"e", b"f"]
+    assert list(batch_encoded_runs(runs, max_batch_bytes=25, max_batch_runs=2)) == [
+        [b"a" * 10, b"b" * 10],
+        # A run over the size limit goes in a batch of its own
+        [b"c" * 30],
+        [b"d", b"e"],
+        [b"f"],
+    ]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("compress", [True, False])
+def test_add_agent_runs_uploads_every_run_in_batches(server: RecordingServer, compress: bool):
+    client = Docent(server_url=server.url, api_key="test-key")
+    agent_runs = make_agent_runs(25)
+
+    result = client.add_agent_runs(
+        "collection", agent_runs, batch_size=4, max_concurrency=3, compress=compress
+    )
+
+    assert result["total_runs_added"] == 25
+    assert all(encoding == ("gzip" if compress else None) for encoding, _ in server.uploads)
+    assert all(len(batch) <= 4 for _, batch in server.uploads)
+    uploaded_ids = [run["id"] for _, batch in server.uploads for run in batch]
+    assert sorted(uploaded_ids) == sorted(run.id for run in agent_runs)
@@ -0,0 +1,57 @@
+"""Unit tests for ingesting directories of Inspect .eval logs."""
+
+from pathlib import Path
+
+import pytest
+from inspect_ai.log import read_eval_log, write_eval_log
+
+from docent import Docent
+from docent.sdk._uploads import plan_eval_parse_tasks
+from tests.unit.fixtures.recording_server import RecordingServer
+
+
+def _write_eval_logs(root: Path, sample_ids_per_file: list[list[int]]) -> list[Path]:
+    """Write .eval logs, some in subdirectories, each with samples of the given IDs."""
+    template = read_eval_log("tests/integration/data/ctf.json")
+    paths: list[Path] = []
+    for i, sample_ids in enumerate(sample_ids_per_file):
+        log = template.model_copy(deep=True)
+        assert log.samples
+        log.samples = [
+            log.samples[0].model_copy(update={"id": sample_id, "epoch": 1})
+            for sample_id in sample_ids
+        ]
+        path = root / f"dir_{i % 2}" / f"log_{i}.eval"
+        path.parent.mkdir(exist_ok=True)
+        write_eval_log(log, str(path))
+        paths.append(path)
+    return paths
+
+
+@pytest.mark.unit
+def test_plan_eval_parse_tasks_splits_files_into_chunks(tmp_path: Path):
+    paths = _write_eval_logs(tmp_path, [[1, 2, 3], [4], []])
+
+    tasks = plan_eval_parse_tasks(paths, samples_per_task=2)
+
+    assert [(path, len(names)) for path, names in tasks] == [
+        (paths[0], 2),
+        (paths[0], 1),
+        (paths[1], 1),
+    ]
+
+
+@pytest.mark.unit
+def test_recursively_ingest_inspect_logs(server: RecordingServer, tmp_path: Path):
+    _write_eval_logs(tmp_path, [[1, 2, 3], [4, 5], [6]])
+    (tmp_path / "dir_0" / "notes.json").write_text("{}")
+    client = Docent(server_url=server.url, api_key="test-key")
+
+    client.recursively_ingest_inspect_logs(
+        "collection", str(tmp_path), num_parse_workers=2, samples_per_task=2
+    )
+
+    runs = list(server.stored_runs.values())
+    assert sorted(run["metadata"]["sample_id"] for run in runs) == [1, 2, 3, 4, 5, 6]
+    assert all(run["metadata"]["task"] == "inspect_evals/luce_intercode_ctf" for run in runs)
+    assert all(encoding == "gzip" for encoding, _ in server.uploads)
@@ -0,0 +1,67 @@
+"""Unit tests for reading compressed request bodies."""
+
+import gzip
+import zlib
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from docent_core._server.util import read_request_body
+
+
+def _request(body: bytes, encoding: str | None) -> Request:
+    headers = [(b"content-encoding", encoding.encode())] if encoding else []
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return Request({"type": "http", "method": "POST", "headers": headers}, receive)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "encoding,encode",
+    [
+        (None, lambda b: b),
+        ("gzip", gzip.compress),
+        ("deflate", zlib.compress),
+        # Concatenated gzip members decode to the concatenation of their contents
+        ("gzip", lambda b: gzip.compress(b[:10]) + gzip.compress(b[10:])),
+    ],
+)
+async def test_read_request_body_decodes(encoding: str | None, encode: object):
+    body = b'{"agent_runs": []}' * 100
+    assert await read_request_body(_request(encode(body), encoding)) == body  # type: ignore
+
+
+@pytest.mark.unit
+async def test_read_request_body_caps_decompressed_size():
+    # 10 MB of zeros compresses to about 10 KB
+    bomb = gzip.compress(b"\0" * 10_000_000)
+    with pytest.raises(HTTPException) as e:
+        await read_request_body(_request(bomb, "gzip"), max_decompressed_bytes=1_000_000)
+    assert e.value.status_code == 413
+
+    body = await read_request_body(_request(bomb, "gzip"), max_decompressed_bytes=10_000_000)
+    assert len(body) == 10_000_000
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "body,encoding,status_code",
+    [
+        (gzip.compress(b"{}")[:-4], "gzip", 400),
+        (b"not compressed", "deflate", 400),
+        (b"{}", "br", 415),
+    ],
+)
+async def test_read_request_body_rejects_invalid(body: bytes, encoding: str, status_code: int):
+    with pytest.raises(HTTPException) as e:
+        await read_request_body(_request(body, encoding))
+    assert e.value.status_code == status_code
@@ -0,0 +1,49 @@
+"""Unit tests for the background exporter that batches scores and metadata."""
+
+from typing import Any, Iterator
+
+import pytest
+
+from docent.trace import TelemetryBatchExporter
+from tests.unit.fixtures.recording_server import RecordingServer, serve_in_background
+
+
+@pytest.fixture(params=[True, False], ids=["bulk", "legacy"])
+def server(request: pytest.FixtureRequest) -> Iterator[RecordingServer]:
+    srv = RecordingServer()
+    srv.bulk_supported = request.param
+    with serve_in_background(srv):
+        yield srv
+
+
+@pytest.mark.unit
+def test_payloads_are_delivered_in_order_on_shutdown(server: RecordingServer):
+    exporter = TelemetryBatchExporter(server.url, headers={}, max_batch_size=4)
+    for i in range(10):
+        exporter.enqueue("/v1/scores", {"agent_run_id": f"run-{i}", "score_value": i})
+    exporter.enqueue("/v1/trace-done", {"collection_id": "c"})
+    exporter.shutdown(timeout=10)
+
+    delivered: list[tuple[str, Any]] = []
+    for path, body in server.requests:
+        if path == "/v1/batch":
+            assert len(body["items"]) <= 4
+            delivered.extend((f"/v1/{item['type']}", item["data"]) for item in body["items"])
+        else:
+            delivered.append((path, body))
+
+    assert [data.get("score_value") for _, data in delivered] == [*range(10), None]
+    assert delivered[-1] == ("/v1/trace-done", {"collection_id": "c"})
+
+
+@pytest.mark.unit
+def test_enqueue_after_shutdown_is_dropped(server: RecordingServer):
+    exporter = TelemetryBatchExporter(server.url, headers={})
+    exporter.enqueue("/v1/scores", {"agent_run_id": "run-1", "score_value": 1})
+    exporter.shutdown(timeout=10)
+
+    exporter.enqueue("/v1/scores", {"agent_run_id": "run-2", "score_value": 2})
+
+    assert exporter._worker is None  # type: ignore[reportPrivateUsage]
+    assert exporter.flush(timeout=1)
+    assert len(server.requests) == 1
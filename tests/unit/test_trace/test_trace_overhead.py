@@ -0,0 +1,96 @@
+"""Unit tests and a per-span overhead microbenchmark for DocentTracer's low-overhead options."""
+
+import time
+import uuid
+from typing import Callable
+
+import pytest
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from docent.trace import DocentTracer, Instruments
+
+
+def _make_tracer(**kwargs: object) -> tuple[DocentTracer, InMemorySpanExporter]:
+    tracer = DocentTracer(
+        collection_id="test-collection",
+        enable_otlp_export=False,
+        block_instruments=set(Instruments),
+        **kwargs,  # type: ignore[arg-type]
+    )
+    tracer.initialize()
+    exporter = InMemorySpanExporter()
+    assert tracer._tracer_provider is not None
+    tracer._tracer_provider.add_span_processor(SimpleSpanProcessor(exporter))
+    return tracer, exporter
+
+
+class TestAgentRunSampling:
+    @pytest.mark.unit
+    def test_sampling_is_per_agent_run(self):
+        tracer, exporter = _make_tracer(sample_rate=0.5)
+        assert tracer._tracer is not None
+
+        run_ids = [str(uuid.uuid4()) for _ in range(200)]
+        for run_id in run_ids:
+            with tracer.agent_run_context(agent_run_id=run_id):
+                for _ in range(3):
+                    with tracer._tracer.start_as_current_span("step"):
+                        pass
+        tracer.close()
+
+        sampled = {run_id for run_id in run_ids if tracer.is_agent_run_sampled(run_id)}
+        assert 0 < len(sampled) < len(run_ids)
+
+        exported = [span.attributes["agent_run_id"] for span in exporter.get_finished_spans()]
+        # Every span of a sampled run is kept, and nothing else
+        assert sorted(exported) == sorted(run_id for run_id in sampled for _ in range(3))
+
+    @pytest.mark.unit
+    def test_invalid_sample_rate(self):
+        with pytest.raises(ValueError):
+            DocentTracer(sample_rate=1.5)
+
+    @pytest.mark.unit
+    def test_max_attribute_length(self):
+        tracer, exporter = _make_tracer(max_attribute_length=16)
+        assert tracer._tracer is not None
+
+        with tracer.agent_run_context(agent_run_id="run"):
+            with tracer._tracer.start_as_current_span("llm") as span:
+                span.set_attribute("gen_ai.prompt.0.content", "x" * 1000)
+        tracer.close()
+
+        (finished,) = exporter.get_finished_spans()
+        assert finished.attributes is not None
+        assert finished.attributes["gen_ai.prompt.0.content"] == "x" * 16
+        assert finished.attributes["agent_run_id"] == "run"
+
+
+@pytest.mark.slow
+def test_per_span_overhead_benchmark(record_property: Callable[[str, object], None]):
+    """Record the cost of one traced span at a few settings, e.g. in --junitxml output.
+
+    Timings depend on the machine, so only the exported spans are checked.
+    """
+    n_spans = 20_000
+
+    for label, kwargs in [
+        ("all_runs_sampled", {}),
+        ("10pct_of_runs_sampled", {"sample_rate": 0.1}),
+        ("no_runs_sampled", {"sample_rate": 0.0}),
+    ]:
+        tracer, exporter = _make_tracer(**kwargs)
+        assert tracer._tracer is not None
+
+        start = time.perf_counter()
+        for i in range(n_spans // 100):
+            with tracer.agent_run_context(agent_run_id=f"run-{i}", task="bench"):
+                for _ in range(100):
+                    with tracer._tracer.start_as_current_span("step") as span:
+                        span.set_attribute("gen_ai.prompt.0.content", "hello")
+        record_property(f"{label}_us_per_span", (time.perf_counter() - start) / n_spans * 1e6)
+        tracer.close()
+
+        n_sampled = sum(tracer.is_agent_run_sampled(f"run-{i}") for i in range(n_spans // 100))
+        assert len(exporter.get_finished_spans()) == n_sampled * 100